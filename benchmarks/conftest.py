@@ -0,0 +1,41 @@
+"""Fixtures for the benchmark suite.
+
+Run with::
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:20%
+
+Results are saved under ``.benchmarks/`` and compared against the previous
+run, so a slowdown between commits fails the comparison run.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from api_gui.clients.uspto_odp import USPTOODPClient
+
+from .stub_server import StubODP
+
+
+@pytest.fixture(scope="session")
+def stub() -> Iterator[StubODP]:
+    with StubODP() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub: StubODP) -> USPTOODPClient:
+    return USPTOODPClient(stub.base_url)
+
+
+def per_second(benchmark: Any, amount: float, key: str) -> None:
+    """Record ``amount / mean round time`` in the saved benchmark data."""
+
+    if benchmark.stats is None:  # --benchmark-disable
+        return
+    mean = benchmark.stats.stats.mean
+    benchmark.extra_info[key] = round(amount / mean, 1) if mean else None
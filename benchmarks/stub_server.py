@@ -0,0 +1,251 @@
+"""Local stand-in for the ODP endpoints the clients call.
+
+The server answers from deterministic synthetic data (see
+:mod:`api_gui.util.synthetic`), so benchmark runs are comparable between
+commits and never touch the network:
+
+* ``POST /api/v1/patent/applications/search`` -- paginated search over
+  ``records`` applications, honouring ``pagination.offset``/``limit``.
+* ``POST /api/v1/patent/applications/search/download`` -- the same
+  pages in one response, refused with 413 above ``download_cap`` bytes.
+* ``GET /api/v1/patent/applications/<app>`` -- single-record lookup.
+* ``GET /api/v1/patent/applications/<app>/documents`` -- ``documents``
+  entries per application.
+* ``GET /api/v1/download/applications/<app>/<doc>.<ext>`` -- a
+  ``document_bytes`` payload (``Range`` requests are honoured).
+* ``GET /api/v1/datasets/products/<product>`` and
+  ``GET /api/v1/datasets/products/files/<product>/<file>`` -- one bulk file
+  of ``bulk_bytes``, streamed in 1 MiB blocks.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from api_gui.util.synthetic import FIRST_APPLICATION, SyntheticGenerator
+
+__all__ = ["StubODP"]
+
+_BLOCK = bytes(range(256)) * 4096  # 1 MiB
+
+_CODES = ("CTNF", "CTFR", "NOA", "REM", "CLM", "SPEC", "IDS", "892")
+
+
+def _documents(app: str, count: int) -> dict[str, Any]:
+    return {
+        "count": count,
+        "documentBag": [
+            {
+                "applicationNumberText": app,
+                "officialDate": f"2020-{1 + n % 12:02d}-{1 + n % 28:02d}T00:00:00",
+                "documentIdentifier": f"DOC{n:05d}",
+                "documentCode": _CODES[n % len(_CODES)],
+                "documentCodeDescriptionText": "Synthetic document",
+                "downloadOptionBag": [
+                    {
+                        "mimeTypeIdentifier": "PDF",
+                        "downloadUrl": f"/api/v1/download/applications/{app}/DOC{n:05d}.pdf",
+                        "pageTotalQuantity": 1 + n % 30,
+                    }
+                ],
+            }
+            for n in range(count)
+        ],
+    }
+
+
+_SEARCH = re.compile(r"^/api/v1/patent/applications/search$")
+_SEARCH_DOWNLOAD = re.compile(r"^/api/v1/patent/applications/search/download$")
+_DOCS = re.compile(r"^/api/v1/patent/applications/([^/]+)/documents$")
+_LOOKUP = re.compile(r"^/api/v1/patent/applications/([^/?]+)$")
+_DOWNLOAD = re.compile(r"^/api/v1/download/applications/[^/]+/[^/]+$")
+_BULK_FILE = re.compile(r"^/api/v1/datasets/products/files/[^/]+/[^/]+$")
+_BULK_PRODUCT = re.compile(r"^/api/v1/datasets/products/([^/]+)$")
+_RANGE = re.compile(r"bytes=(\d+)-")
+
+
+class StubODP:
+    """Serve synthetic ODP responses on ``127.0.0.1`` from a thread.
+
+    Args:
+        records: Applications matched by every search.
+        documents: Documents listed per application.
+        document_bytes: Size of each document download.
+        bulk_bytes: Size of the single bulk product file.
+        seed: Seed of the synthetic dataset.
+        download_cap: Largest search/download response, in bytes.
+        latency: Seconds added before every response, to mimic a WAN
+            round trip.
+    """
+
+    def __init__(
+        self,
+        records: int = 2000,
+        documents: int = 20,
+        document_bytes: int = 256 * 1024,
+        bulk_bytes: int = 64 * 1024 * 1024,
+        seed: int = 0,
+        download_cap: int = 6_000_000,
+        latency: float = 0.0,
+    ) -> None:
+        self.generator = SyntheticGenerator(seed=seed, population=records)
+        self.records = records
+        self.documents = documents
+        self.document_bytes = document_bytes
+        self.bulk_bytes = bulk_bytes
+        self.download_cap = download_cap
+        self.latency = latency
+        # Encoded once so the server's own JSON work stays out of the timings.
+        self._encoded = [
+            json.dumps(rec).encode() for rec in self.generator.records(records)
+        ]
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        assert self._server is not None, "server not started"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> StubODP:
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    # -- responses --------------------------------------------------------
+    def search_page(self, offset: int, limit: int) -> bytes:
+        page = self._encoded[offset : offset + limit]
+        return (
+            b'{"count":%d,"patentFileWrapperDataBag":[' % self.records
+            + b",".join(page)
+            + b"]}"
+        )
+
+    def lookup(self, app: str) -> bytes | None:
+        i = int(app) - FIRST_APPLICATION if app.isdigit() else -1
+        if not 0 <= i < self.records:
+            return None
+        return b'{"count":1,"patentFileWrapperDataBag":[' + self._encoded[i] + b"]}"
+
+    def documents_listing(self, app: str) -> bytes:
+        return json.dumps(_documents(app, self.documents)).encode()
+
+    def bulk_product(self, product: str) -> bytes:
+        return json.dumps(
+            {
+                "count": 1,
+                "bulkDataProductBag": [
+                    {
+                        "productIdentifier": product,
+                        "productFileBag": {
+                            "count": 1,
+                            "fileDataBag": [
+                                {
+                                    "fileName": f"{product}.zip",
+                                    "fileSize": self.bulk_bytes,
+                                }
+                            ],
+                        },
+                    }
+                ],
+            }
+        ).encode()
+
+
+def _handler(stub: StubODP) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, Nagle's
+        # algorithm and delayed ACKs add ~40 ms to every keep-alive request.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _json(self, body: bytes | None) -> None:
+            if body is None:
+                return self._error(404, b'{"error":"Not Found"}')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, size: int) -> None:
+            match = _RANGE.match(self.headers.get("Range", ""))
+            start = int(match.group(1)) if match else 0
+            self.send_response(206 if start else 200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(max(0, size - start)))
+            self.end_headers()
+            remaining = size - start
+            while remaining > 0:
+                block = _BLOCK[: min(len(_BLOCK), remaining)]
+                self.wfile.write(block)
+                remaining -= len(block)
+
+        def do_POST(self) -> None:
+            if stub.latency:
+                time.sleep(stub.latency)
+            length = int(self.headers.get("Content-Length", "0"))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            download = bool(_SEARCH_DOWNLOAD.match(self.path))
+            if not (download or _SEARCH.match(self.path)):
+                return self._json(None)
+            page = body.get("pagination") or {}
+            offset = int(page.get("offset", 0))
+            limit = int(page.get("limit", 25))
+            result = stub.search_page(offset, limit)
+            if download and len(result) > stub.download_cap:
+                return self._error(413, b'{"error":"Result too large"}')
+            self._json(result)
+
+        def do_GET(self) -> None:
+            if stub.latency:
+                time.sleep(stub.latency)
+            path = self.path.split("?", 1)[0]
+            if m := _DOCS.match(path):
+                return self._json(stub.documents_listing(m.group(1)))
+            if _SEARCH.match(path):
+                return self._json(stub.search_page(0, 25))
+            if m := _LOOKUP.match(path):
+                return self._json(stub.lookup(m.group(1)))
+            if _DOWNLOAD.match(path):
+                return self._stream(stub.document_bytes)
+            if _BULK_FILE.match(path):
+                return self._stream(stub.bulk_bytes)
+            if m := _BULK_PRODUCT.match(path):
+                return self._json(stub.bulk_product(m.group(1)))
+            self._json(None)
+
+    return Handler
@@ -0,0 +1,34 @@
+"""Replay recorded ODP cassettes through the client.
+
+Skipped until cassettes are recorded with ``scripts/record_cassettes.py``.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from api_gui.clients.uspto_odp import USPTOODPClient
+from tests.conftest import CASSETTES, recorder
+
+pytest.importorskip("pytest_benchmark")
+
+
+def _client() -> USPTOODPClient:
+    return USPTOODPClient("https://api.uspto.gov", api_key_env="USPTO_ODP_API_KEY")
+
+
+def test_replay_simple_search(benchmark) -> None:
+    payload = {
+        "q": "applicationMetaData.applicationTypeLabelName:Utility",
+        "pagination": {"offset": 0, "limit": 1},
+    }
+
+    if not (CASSETTES / "pfw_simple_search.yaml").exists():
+        pytest.skip("cassette 'pfw_simple_search' not recorded")
+
+    @recorder("pfw_simple_search")
+    def replay() -> dict:
+        return _client().search_pfw(payload)
+
+    data = benchmark(replay)
+    assert "patentFileWrapperDataBag" in data
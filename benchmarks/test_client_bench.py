@@ -0,0 +1,100 @@
+"""Client throughput against the local stub server."""
+
+from __future__ import annotations
+
+import io
+import itertools
+from pathlib import Path
+
+import pytest
+
+from api_gui import cli
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util.batch_download import BatchDownloader, document_refs
+from api_gui.util.synthetic import FIRST_APPLICATION
+
+from .conftest import per_second
+from .stub_server import StubODP
+
+pytest.importorskip("pytest_benchmark")
+
+_rounds = itertools.count()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"stream": True}, {"transfer": "auto"}],
+    ids=["buffered", "streamed", "auto-download"],
+)
+def test_search_iteration(
+    benchmark, client: USPTOODPClient, stub: StubODP, options: dict
+) -> None:
+    def run() -> int:
+        records = client.iter_search_pfw({"q": "*"}, page_size=100, **options)
+        return sum(1 for _ in records)
+
+    assert benchmark(run) == stub.records
+    per_second(benchmark, stub.records, "records_per_s")
+
+
+@pytest.mark.parametrize("transfer", ["pages", "auto"])
+def test_search_transfer_with_latency(benchmark, transfer: str) -> None:
+    # 50 ms per round trip, roughly a client far from the API.
+    with StubODP(records=2000, latency=0.05) as slow:
+        client = USPTOODPClient(slow.base_url)
+
+        def run() -> int:
+            records = client.iter_search_pfw(
+                {"q": "*"}, page_size=100, transfer=transfer
+            )
+            return sum(1 for _ in records)
+
+        assert benchmark.pedantic(run, rounds=3) == slow.records
+    per_second(benchmark, slow.records, "records_per_s")
+
+
+def test_lookup_fan_out(benchmark, stub: StubODP) -> None:
+    apps = [str(FIRST_APPLICATION + i) for i in range(200)]
+
+    def run() -> int:
+        out = io.StringIO()
+        cli.main(
+            ["lookup", *apps, "--workers", "8", "--base-url", stub.base_url],
+            out=out,
+        )
+        return len(out.getvalue().splitlines())
+
+    assert benchmark(run) == len(apps)
+    per_second(benchmark, len(apps), "lookups_per_s")
+
+
+def test_document_download(
+    benchmark, client: USPTOODPClient, stub: StubODP, tmp_path: Path
+) -> None:
+    app = str(FIRST_APPLICATION)
+    refs = document_refs(client.pfw_documents(app), app)
+
+    def setup() -> tuple[tuple[BatchDownloader], dict[str, object]]:
+        dest = tmp_path / f"round{next(_rounds)}"
+        return (BatchDownloader(client, str(dest), workers=4),), {}
+
+    def run(downloader: BatchDownloader) -> int:
+        return len(downloader.download(refs).downloaded)
+
+    assert benchmark.pedantic(run, setup=setup, rounds=5) == stub.documents
+    per_second(
+        benchmark, stub.documents * stub.document_bytes / 1e6, "mb_per_s"
+    )
+
+
+def test_bulk_download(
+    benchmark, client: USPTOODPClient, stub: StubODP, tmp_path: Path
+) -> None:
+    dest = tmp_path / "bulk.zip"
+
+    def run() -> int:
+        client.bulk_download("PTFWPRD", "PTFWPRD.zip", str(dest))
+        return dest.stat().st_size
+
+    assert benchmark.pedantic(run, rounds=3) == stub.bulk_bytes
+    per_second(benchmark, stub.bulk_bytes / 1e6, "mb_per_s")
@@ -0,0 +1,39 @@
+"""Export throughput for EndNote XML and RIS."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from api_gui.export.endnote_export import export_endnote_xml, export_ris
+from api_gui.util.record_view import load_views
+from api_gui.util.synthetic import SyntheticGenerator
+
+from .conftest import per_second
+
+pytest.importorskip("pytest_benchmark")
+
+MAPPING = str(
+    Path(__file__).resolve().parents[1]
+    / "src/api_gui/export/endnote_field_map.uspto_pfw.json"
+)
+RECORDS = list(SyntheticGenerator(seed=0).records(5000))
+
+
+@pytest.mark.parametrize("fmt", ["endnote", "ris"])
+def test_export_records(benchmark, tmp_path: Path, fmt: str) -> None:
+    out = str(tmp_path / f"out.{fmt}")
+    if fmt == "endnote":
+        benchmark(export_endnote_xml, RECORDS, MAPPING, out_path=out)
+    else:
+        benchmark(export_ris, RECORDS, MAPPING, out_path=out)
+    per_second(benchmark, len(RECORDS), "records_per_s")
+
+
+def test_export_compact_views(benchmark, tmp_path: Path) -> None:
+    views = load_views(RECORDS)
+    out = str(tmp_path / "out.ris")
+
+    benchmark(export_ris, views, MAPPING, out_path=out)
+    per_second(benchmark, len(views), "records_per_s")
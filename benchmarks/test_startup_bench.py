@@ -0,0 +1,27 @@
+"""GUI module import time, measured in a fresh interpreter per round."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def test_gui_import(benchmark, tmp_path: Path) -> None:
+    env = {**os.environ, "PYTHONPATH": str(SRC), "HOME": str(tmp_path)}
+
+    def run() -> None:
+        subprocess.run(
+            [sys.executable, "-c", "import api_gui.gui.app"],
+            check=True,
+            env=env,
+        )
+
+    benchmark.pedantic(run, rounds=5, warmup_rounds=1)
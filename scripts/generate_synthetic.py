@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Write synthetic PFW, petition or bulk-product data for scale testing.
+
+Examples::
+
+    python scripts/generate_synthetic.py pfw --records 10000 --out pfw.json
+    python scripts/generate_synthetic.py pfw --size 2G --out bulk.zip --processes 8
+    python scripts/generate_synthetic.py petition --records 500 --out petitions.jsonl \\
+        --cardinality inventorBag=3 --seed 42
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from api_gui.util.synthetic import SyntheticGenerator, write_bulk_zip, write_json  # noqa: E402
+
+SCHEMAS = {
+    "pfw": "patent-data-schema.json",
+    "petition": "petition-decision-schema.json",
+    "bulk": "bulkdata-response-schema.json",
+}
+_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def _size(text: str) -> int:
+    unit = _UNITS.get(text[-1:].upper())
+    return int(float(text[:-1]) * unit) if unit else int(text)
+
+
+def _cardinality(text: str) -> tuple[str, int | tuple[int, int]]:
+    name, _, value = text.partition("=")
+    lo, _, hi = value.partition("-")
+    return name, (int(lo), int(hi)) if hi else int(lo)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=sorted(SCHEMAS))
+    parser.add_argument("--out", required=True, help=".json, .jsonl or .zip")
+    parser.add_argument("--records", type=int)
+    parser.add_argument("--size", type=_size, help="ZIP only: e.g. 500M, 2G")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--cardinality",
+        type=_cardinality,
+        action="append",
+        default=[],
+        metavar="BAG=N[-M]",
+        help="Items per array field, e.g. inventorBag=2-5",
+    )
+    parser.add_argument("--density", type=float, default=0.85)
+    parser.add_argument("--per-member", type=int, default=10_000)
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args(argv)
+    if args.records is None and (args.size is None or not args.out.endswith(".zip")):
+        parser.error("--records is required (or --size with a .zip output)")
+
+    generator = SyntheticGenerator(
+        SCHEMAS[args.kind],
+        seed=args.seed,
+        cardinalities=dict(args.cardinality),
+        density=args.density,
+        population=args.records,
+    )
+    if args.out.endswith(".zip"):
+        stats = write_bulk_zip(
+            args.out,
+            generator,
+            records=args.records,
+            target_bytes=args.size,
+            records_per_member=args.per_member,
+            processes=args.processes,
+        )
+    elif args.out.endswith(".jsonl"):
+        with open(args.out, "w", encoding="utf-8") as handle:
+            for record in generator.records(args.records):
+                handle.write(json.dumps(record) + "\n")
+        stats = {"records": args.records}
+    else:
+        write_json(args.out, generator, args.records)
+        stats = {"records": args.records}
+    print(json.dumps({"path": args.out, **stats}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
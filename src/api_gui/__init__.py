@@ -1 +1,6 @@
-from .gui.app import main
+def main():
+    # Imported lazily so headless entry points (``api_gui.cli``) never pull
+    # in tkinter/ttkbootstrap just by importing the package.
+    from .gui.app import main as _main
+
+    _main()
@@ -0,0 +1,1079 @@
+"""Headless command-line interface over :class:`USPTOODPClient`.
+
+Examples::
+
+    python -m api_gui.cli search --q "applicationMetaData.groupArtUnitNumber:2123" --max 500
+    python -m api_gui.cli lookup 14412875 16123123 --workers 4
+    python -m api_gui.cli docs 14412875 --codes CTNF --download out/
+    python -m api_gui.cli bulk PTFWPRD
+    python -m api_gui.cli petitions --q "decisionTypeCode:GRANTED" --enrich
+    python -m api_gui.cli family 14412875 --depth 3 --format dot
+    python -m api_gui.cli ingest corpus.sqlite hits.jsonl PTFWPRD.zip
+    python -m api_gui.cli analytics corpus.sqlite --report allowance --by examiner
+    python -m api_gui.cli events corpus.sqlite --code CTFR --since 30 --without RCEX
+    python -m api_gui.cli export records.jsonl --format ris --out refs.ris
+    python -m api_gui.cli call pfw.get_application applicationNumberText=14412875
+
+Each command also answers to the provider ``op_id`` it wraps (for example
+``pfw.search`` or ``pfw.get_application``), and results are streamed to
+stdout as JSON Lines. This module must stay free of tkinter/ttkbootstrap
+imports so it starts quickly on headless hosts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict
+from pathlib import Path
+from typing import IO, Any, TypeVar
+
+from .clients.base import ApiError
+from .clients.dispatch import bounded_map
+from .clients.uspto_odp import USPTOODPClient
+from .util import metrics
+from .util.analytics import GROUPS
+from .util.provider_loader import Provider, load_providers
+
+__all__ = ["main", "build_parser"]
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+PROVIDERS_DIR = PACKAGE_DIR / "providers"
+DEFAULT_MAPPING = PACKAGE_DIR / "export" / "endnote_field_map.uspto_pfw.json"
+
+# command -> provider op_id it wraps
+COMMAND_OPS = {
+    "search": "pfw.search",
+    "lookup": "pfw.get_application",
+    "docs": "pfw.list_documents",
+    "bulk": "pfw.bulk.products",
+    "petitions": "petition.search",
+}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _emit(obj: Any, out: IO[str]) -> None:
+    out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def _read_lines(values: list[str]) -> Iterator[str]:
+    """Yield positional values, reading stdin for a lone ``-``."""
+
+    for value in values:
+        if value == "-":
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        else:
+            yield value
+
+
+def _provider_for(
+    op_id: str | None, providers: dict[str, Provider]
+) -> Provider | None:
+    for provider in providers.values():
+        if provider.meta["operation"]["op_id"] == op_id:
+            return provider
+    return None
+
+
+def _client(args: argparse.Namespace) -> USPTOODPClient:
+    meta = args.provider.meta if args.provider else {}
+    auth = meta.get("auth", {})
+    env_var = auth.get("env_var", "USPTO_ODP_API_KEY")
+    if args.api_key:
+        os.environ[env_var] = args.api_key
+    return USPTOODPClient(
+        args.base_url or meta.get("base_url", "https://api.uspto.gov"),
+        api_key_env=env_var,
+        api_key_header=auth.get("name", "X-API-KEY"),
+        timeout=args.timeout,
+        rate_limit=args.rate_limit,
+    )
+
+
+def _checkpoint(args: argparse.Namespace, kind: str, params: dict[str, Any]) -> Any:
+    """Open the ``--checkpoint`` journal job for this command, if any."""
+
+    if not args.checkpoint:
+        return None
+    from .util.checkpoint import JobJournal
+
+    journal = JobJournal(args.checkpoint)
+    args.journal = journal
+    return journal.job(kind, params, job_id=args.job)
+
+
+# -- commands --------------------------------------------------------------
+def _search_payload(args: argparse.Namespace) -> dict[str, Any]:
+    payload: dict[str, Any] = {}
+    if args.payload:
+        if args.payload == "-":
+            payload = json.load(sys.stdin)
+        else:
+            with open(args.payload, "r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+    if args.q is not None:
+        payload["q"] = args.q
+    filters = list(payload.get("filters") or [])
+    for spec in args.filter or []:
+        name, _, value = spec.partition("=")
+        filters.append({"name": name, "value": value.split(",")})
+    if filters:
+        payload["filters"] = filters
+    return payload
+
+
+def cmd_search(args: argparse.Namespace, out: IO[str]) -> int:
+    client = _client(args)
+    payload = _search_payload(args)
+    validator = None
+    if args.validate is not None:
+        from .util.record_validation import StreamValidator
+
+        validator = StreamValidator(sample_rate=args.validate)
+    fields = args.fields.split(",") if args.fields else None
+    if args.fields_from_mapping:
+        from .export.endnote_export import fields_for_mapping_file
+
+        mapped = fields_for_mapping_file(args.fields_from_mapping)
+        fields = sorted(set(fields or []) | set(mapped))
+    if args.checkpoint:
+        if not args.out:
+            print("--checkpoint needs --out", file=sys.stderr)
+            return 2
+        from .util.harvest import checkpointed_search
+
+        target = os.path.abspath(args.out)
+        checkpoint = _checkpoint(
+            args, "search", {"payload": payload, "fields": fields, "out": target}
+        )
+        written = checkpointed_search(
+            client,
+            payload,
+            args.out,
+            checkpoint,
+            page_size=args.page_size,
+            max_records=args.max,
+            validator=validator,
+            fields=fields,
+            stream=args.stream,
+        )
+        print(f"{written} records written to {args.out}", file=sys.stderr)
+    elif args.shard_by:
+        from .util.query_shards import iter_sharded, plan_shards
+
+        plan = plan_shards(
+            client,
+            payload,
+            args.shard_by,
+            max_shard=args.shard_size,
+            workers=args.workers,
+        )
+        print(
+            f"{len(plan.shards)} shards cover {plan.covered} of {plan.total} hits",
+            file=sys.stderr,
+        )
+        for record in iter_sharded(
+            client,
+            payload,
+            plan=plan,
+            workers=args.workers,
+            page_size=args.page_size,
+            max_records=args.max,
+            validator=validator,
+            fields=fields,
+            stream=args.stream,
+        ):
+            _emit(record, out)
+    else:
+        for record in client.iter_search_pfw(
+            payload,
+            page_size=args.page_size,
+            max_records=args.max,
+            validator=validator,
+            fields=fields,
+            stream=args.stream,
+            transfer=args.transfer,
+        ):
+            _emit(record, out)
+    if validator is not None:
+        print(validator.report.summary(), file=sys.stderr)
+    return 0
+
+
+def cmd_petitions(args: argparse.Namespace, out: IO[str]) -> int:
+    client = _client(args)
+    validator = None
+    if args.validate is not None:
+        from .util.record_validation import StreamValidator
+
+        validator = StreamValidator(
+            "petition-decision-schema.json", sample_rate=args.validate
+        )
+    decisions = client.iter_search_petitions(
+        _search_payload(args),
+        page_size=args.page_size,
+        max_records=args.max,
+        validator=validator,
+        stream=args.stream,
+    )
+    if not args.enrich:
+        for decision in decisions:
+            _emit(decision, out)
+    else:
+        from .util.petition_join import enrich_petitions
+
+        for decision, record in enrich_petitions(
+            client, decisions, workers=args.workers
+        ):
+            _emit({**decision, "patentFileWrapper": record}, out)
+    if validator is not None:
+        print(validator.report.summary(), file=sys.stderr)
+    return 0
+
+
+def cmd_lookup(args: argparse.Namespace, out: IO[str]) -> int:
+    client = _client(args)
+    if args.checkpoint:
+        if not args.out:
+            print("--checkpoint needs --out", file=sys.stderr)
+            return 2
+        from .util.harvest import checkpointed_lookups
+
+        apps = list(_read_lines(args.applications))
+        target = os.path.abspath(args.out)
+        checkpoint = _checkpoint(args, "lookup", {"apps": apps, "out": target})
+        failures = checkpointed_lookups(
+            client, apps, args.out, checkpoint, workers=args.workers
+        )
+        for app, message in failures.items():
+            print(f"{app}: {message}", file=sys.stderr)
+        return 1 if failures else 0
+    status = 0
+    results = bounded_map(
+        client.pfw_lookup, _read_lines(args.applications), args.workers
+    )
+    for app, data, exc in results:
+        if exc is not None:
+            print(f"{app}: {exc}", file=sys.stderr)
+            status = 1
+            continue
+        assert data is not None
+        for record in data.get("patentFileWrapperDataBag") or [data]:
+            _emit(record, out)
+    return status
+
+
+def cmd_family(args: argparse.Namespace, out: IO[str]) -> int:
+    from .util.family_graph import FamilyGraphBuilder
+
+    builder = FamilyGraphBuilder(_client(args), workers=args.workers)
+    families = builder.expand_many(
+        _read_lines(args.applications),
+        max_depth=args.depth,
+        max_nodes=args.max_nodes,
+    )
+    graph, stats = builder.graph, builder.last
+    if args.format == "dot":
+        out.write(graph.to_dot(set().union(*families)))
+    else:
+        written: list[set[str]] = []
+        for seed, family in zip(stats.seeds, families):
+            if family in written:
+                continue
+            written.append(family)
+            _emit({"seed": seed, **graph.to_dict(family)}, out)
+    print(
+        f"{len(graph)} applications, {stats.fetched} fetched, "
+        f"{stats.failed} failed"
+        + (" (truncated by --max-nodes)" if stats.truncated else ""),
+        file=sys.stderr,
+    )
+    return 1 if stats.failed else 0
+
+
+def cmd_docs(args: argparse.Namespace, out: IO[str]) -> int:
+    from .util.batch_download import document_refs, filter_documents
+    from .util.harvest import Harvester
+
+    client = _client(args)
+    codes = args.codes.split(",") if args.codes else None
+    apps = _read_lines(args.applications)
+    if args.checkpoint and not args.download:
+        print("--checkpoint needs --download", file=sys.stderr)
+        return 2
+    if args.download:
+        store = None
+        if args.store:
+            from .util.document_store import DocumentStore
+
+            store = DocumentStore(args.store, link=args.link)
+        harvester = Harvester(
+            client,
+            args.download,
+            codes=codes,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            list_workers=args.workers,
+            download_workers=args.download_workers or args.workers,
+            progress=lambda row: _emit(asdict(row), out),
+            store=store,
+            checkpoint=_checkpoint(
+                args,
+                "harvest",
+                {
+                    "dest": os.path.abspath(args.download),
+                    "codes": codes,
+                    "from": args.date_from,
+                    "to": args.date_to,
+                },
+            ),
+        )
+        try:
+            summary = harvester.run(apps)
+        finally:
+            if store is not None:
+                store.close()
+        return 1 if summary.failed else 0
+
+    status = 0
+    for app, listing, exc in bounded_map(
+        client.pfw_documents, apps, args.workers
+    ):
+        if exc is not None:
+            print(f"{app}: {exc}", file=sys.stderr)
+            status = 1
+            continue
+        assert listing is not None
+        refs = filter_documents(
+            document_refs(listing, app),
+            codes=codes,
+            date_from=args.date_from,
+            date_to=args.date_to,
+        )
+        for ref in refs:
+            _emit(asdict(ref), out)
+    return status
+
+
+def cmd_bulk(args: argparse.Namespace, out: IO[str]) -> int:
+    client = _client(args)
+    data = client.bulk_products(args.product, latest=not args.all)
+    wanted = set(args.download or [])
+    for product in data.get("bulkDataProductBag", []):
+        files = (product.get("productFileBag") or {}).get("fileDataBag", [])
+        for entry in files:
+            name = entry.get("fileName")
+            if wanted and name not in wanted:
+                continue
+            if wanted:
+                os.makedirs(args.dest, exist_ok=True)
+                dest = os.path.join(args.dest, name)
+                path = client.bulk_download(args.product, name, dest)
+                entry = {**entry, "path": path}
+            _emit(entry, out)
+    return 0
+
+
+def _iter_records(path: str) -> Iterator[dict[str, Any]]:
+    handle = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in handle:
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            bag = obj.get("patentFileWrapperDataBag")
+            if isinstance(bag, list):
+                yield from bag
+            else:
+                yield obj
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _iter_inputs(paths: list[str]) -> Iterator[dict[str, Any]]:
+    """Yield records from JSONL files and bulk ZIP/JSON archives."""
+
+    import zipfile
+
+    from .util.bulk_reader import iter_bulk_records
+
+    for path in paths:
+        if path != "-" and (path.endswith(".json") or zipfile.is_zipfile(path)):
+            yield from iter_bulk_records(path)
+        else:
+            yield from _iter_records(path)
+
+
+def cmd_ingest(args: argparse.Namespace, out: IO[str]) -> int:
+    from .util.record_store import RecordStore
+
+    with RecordStore(args.store) as store:
+        stats = store.ingest(_iter_inputs(args.inputs))
+        _emit({**asdict(stats), "records": len(store)}, out)
+    return 0
+
+
+def cmd_analytics(args: argparse.Namespace, out: IO[str]) -> int:
+    from .util.analytics import load_portfolio
+    from .util.record_store import RecordStore
+
+    try:
+        with RecordStore(args.store) as store:
+            portfolio = load_portfolio(store)
+    except ImportError as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+    if args.report == "summary":
+        frame = portfolio.summary()
+    elif args.report == "pendency":
+        frame = portfolio.pendency(by=args.by, min_count=args.min_count)
+    elif args.report == "allowance":
+        frame = portfolio.allowance(
+            by=args.by or "art_unit", min_count=args.min_count
+        )
+    else:
+        frame = portfolio.cpc_distribution(
+            level=args.level, by=args.by, top=args.top
+        )
+    if args.report != "cpc" and args.top:
+        frame = frame.head(args.top)
+    frame = frame.reset_index(drop=args.report == "summary")
+    text = frame.to_json(orient="records", lines=True, force_ascii=False)
+    if text and not text.endswith("\n"):  # pandas < 1.5
+        text += "\n"
+    out.write(text)
+    return 0
+
+
+def _codes(values: list[str] | None) -> list[str]:
+    return [c.strip() for v in values or [] for c in v.split(",") if c.strip()]
+
+
+def _since(value: str | None) -> Any:
+    """``--since``/``--until`` take a date or a number of days ago."""
+
+    from .util.event_index import days_ago
+
+    if value is None or not value.isdigit():
+        return value
+    return days_ago(int(value))
+
+
+def cmd_events(args: argparse.Namespace, out: IO[str]) -> int:
+    from .util.event_index import EventIndex
+    from .util.record_store import RecordStore
+
+    codes = _codes(args.code)
+    with RecordStore(args.store) as store:
+        index = EventIndex(store)
+        since, until = _since(args.since), _since(args.until)
+        if args.timeline:
+            rows: list[Any] = index.timeline(args.timeline)
+        elif args.sequence:
+            rows = index.sequence(
+                _codes([args.sequence]), since, until, within_days=args.within
+            )
+        elif not codes:
+            for code, count in index.codes():
+                _emit({"code": code, "events": count}, out)
+            return 0
+        elif args.without:
+            rows = index.awaiting(
+                codes, _codes([args.without]), since, until, args.within
+            )
+        else:
+            rows = index.window(codes, since, until, limit=args.limit)
+    for row in rows[: args.limit] if args.limit else rows:
+        _emit(asdict(row), out)
+    return 0
+
+
+def cmd_watch(args: argparse.Namespace, out: IO[str]) -> int:
+    from .util.record_store import RecordStore
+    from .util.watchlist import Snapshot, Watchlist
+
+    apps = list(_read_lines(args.applications))
+    with Watchlist(args.watchlist) as watch:
+        if args.action == "add":
+            _emit({"added": watch.add(apps), "watched": len(watch)}, out)
+            return 0
+        if args.action == "remove":
+            _emit({"removed": watch.remove(apps), "watched": len(watch)}, out)
+            return 0
+        if args.action == "list":
+            for app, snapshot in watch.items():
+                _emit({"application": app, **asdict(snapshot or Snapshot())}, out)
+            return 0
+        store = RecordStore(args.store) if args.store else None
+        try:
+            changes = watch.poll(
+                _client(args),
+                workers=args.workers,
+                documents=not args.no_documents,
+                applications=apps or None,
+                store=store,
+            )
+            for change in changes:
+                _emit(change.to_dict(), out)
+        finally:
+            if store is not None:
+                store.close()
+        stats = watch.last
+    for app, message in stats.errors.items():
+        print(f"{app}: {message}", file=sys.stderr)
+    print(
+        f"{stats.checked} checked, {stats.not_modified} not modified, "
+        f"{stats.unchanged} unchanged, {stats.changed} changed, "
+        f"{stats.failed} failed",
+        file=sys.stderr,
+    )
+    return 1 if stats.failed else 0
+
+
+def cmd_fulltext(args: argparse.Namespace, out: IO[str]) -> int:
+    from .util.text_index import TextIndex, sources_from_manifest
+
+    with TextIndex(args.index) as index:
+        if args.action == "search":
+            hits = index.search(
+                " ".join(args.args),
+                codes=_codes([args.codes]) if args.codes else None,
+                limit=args.limit,
+            )
+            for hit in hits:
+                _emit(asdict(hit), out)
+            return 0
+        store = None
+        if args.store:
+            from .util.document_store import DocumentStore
+
+            store = DocumentStore(args.store)
+        sources = (s for path in args.args for s in sources_from_manifest(path))
+        try:
+            stats = index.add(
+                sources,
+                workers=args.workers,
+                store=store,
+                retry_failed=args.retry_failed,
+            )
+        except ImportError as exc:
+            print(str(exc), file=sys.stderr)
+            return 2
+        finally:
+            if store is not None:
+                store.close()
+        _emit({**asdict(stats), "indexed": len(index)}, out)
+    return 0
+
+
+def cmd_export(args: argparse.Namespace, out: IO[str]) -> int:
+    from .export.endnote_export import export_endnote_xml, export_ris
+
+    count = 0
+
+    def records() -> Iterator[dict[str, Any]]:
+        # Counted as they stream past; the input is never held in memory.
+        nonlocal count
+        for record in _iter_records(args.input):
+            count += 1
+            yield record
+
+    stream: Iterable[Any] = records()
+    resolver = store = None
+    if args.format == "endnote" and args.attach_policy == "file" and args.attach_dir:
+        from .export.attachments import AttachmentResolver
+
+        if args.store:
+            from .util.document_store import DocumentStore
+
+            store = DocumentStore(args.store, link=args.link)
+        resolver = AttachmentResolver(
+            _client(args),
+            args.attach_dir,
+            codes=_codes([args.attach_codes]) if args.attach_codes else None,
+            workers=args.workers,
+            download_workers=args.download_workers or args.workers,
+            store=store,
+        )
+        stream = resolver.stream(stream)
+    summary: dict[str, Any] = {}
+    try:
+        if args.incremental is not None or args.delta:
+            from .export.incremental import export_incremental
+
+            result = asdict(
+                export_incremental(
+                    stream,
+                    args.mapping,
+                    state_path=args.incremental or None,
+                    fmt=args.format,
+                    out_path=args.out,
+                    delta_path=args.delta,
+                    attach_policy=args.attach_policy,
+                    attachment_urls=resolver.paths if resolver else None,
+                )
+            )
+            path = result.pop("path")
+            del result["records"]
+            summary.update(result)
+        elif args.format == "ris":
+            path = export_ris(stream, args.mapping, out_path=args.out)
+        else:
+            path = export_endnote_xml(
+                stream,
+                args.mapping,
+                attach_policy=args.attach_policy,
+                attachment_urls=resolver.paths if resolver else None,
+                out_path=args.out,
+            )
+    finally:
+        if store is not None:
+            store.close()
+    status = 0
+    if resolver is not None:
+        stats = asdict(resolver.stats)
+        errors = stats.pop("errors")
+        for key, error in errors.items():
+            print(f"{key}: {error}", file=sys.stderr)
+        summary["attachments"] = stats
+        status = 1 if errors else 0
+    _emit({"path": path, "records": count, **summary}, out)
+    return status
+
+
+def cmd_call(args: argparse.Namespace, out: IO[str]) -> int:
+    args.provider = _provider_for(args.operation, args.providers)
+    client = _client(args)
+    if args.operation not in client.dispatcher:
+        print(f"unknown operation: {args.operation}", file=sys.stderr)
+        return 2
+    operation = client.dispatcher[args.operation]
+    params = dict(spec.partition("=")[::2] for spec in args.params)
+    body = None
+    if args.payload:
+        if args.payload == "-":
+            body = json.load(sys.stdin)
+        else:
+            with open(args.payload, "r", encoding="utf-8") as handle:
+                body = json.load(handle)
+    if args.download:
+        _emit({"path": operation.download(args.download, **params)}, out)
+    elif args.all:
+        for record in operation.pages(
+            body,
+            page_size=args.page_size,
+            max_records=args.max,
+            stream=args.stream,
+            **params,
+        ):
+            _emit(record, out)
+    else:
+        _emit(operation(body, **params), out)
+    return 0
+
+
+def cmd_ops(args: argparse.Namespace, out: IO[str]) -> int:
+    for key, provider in sorted(args.providers.items()):
+        op = provider.meta["operation"]
+        _emit(
+            {
+                "key": key,
+                "op_id": op["op_id"],
+                "method": op.get("method"),
+                "path": op.get("path"),
+            },
+            out,
+        )
+    return 0
+
+
+# -- parser ----------------------------------------------------------------
+def build_parser(providers: dict[str, Provider]) -> argparse.ArgumentParser:
+    """Build the argument parser, aliasing commands to provider op_ids."""
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--api-key", help="API key (defaults to the env var)")
+    common.add_argument("--base-url", help="Override the provider base URL")
+    common.add_argument("--timeout", type=float, default=30)
+    common.add_argument(
+        "--workers", type=int, default=4, help="Concurrent requests"
+    )
+    common.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        metavar="RPS",
+        help="Maximum requests per second across all workers",
+    )
+    common.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="Write request/stage metrics in Prometheus text format on exit",
+    )
+    common.add_argument(
+        "--trace", metavar="FILE", help="Append every request/stage event as JSONL"
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="python -m api_gui.cli",
+        description="Headless USPTO ODP search, lookup, documents and export.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    known_ops = {p.meta["operation"]["op_id"] for p in providers.values()}
+
+    def add(name: str, func: Any, help_text: str) -> argparse.ArgumentParser:
+        op_id = COMMAND_OPS.get(name)
+        aliases = [op_id] if op_id in known_ops else []
+        p = sub.add_parser(
+            name, aliases=aliases, parents=[common], help=help_text
+        )
+        p.set_defaults(func=func, op_id=op_id, checkpoint=None, job=None)
+        return p
+
+    def add_checkpoint(p: argparse.ArgumentParser) -> None:
+        p.add_argument(
+            "--checkpoint",
+            metavar="DB",
+            help="SQLite journal; rerunning the command resumes where it stopped",
+        )
+        p.add_argument("--job", help="Journal job id (defaults to one per input)")
+
+    p = add("search", cmd_search, "Stream search hits as JSONL")
+    p.add_argument("--q", help="Query string")
+    p.add_argument("--payload", help="JSON payload file, or - for stdin")
+    p.add_argument(
+        "--filter",
+        action="append",
+        metavar="NAME=V1,V2",
+        help="Add a filter (repeatable)",
+    )
+    p.add_argument("--page-size", type=int, default=100)
+    p.add_argument("--max", type=int, default=None, help="Stop after N hits")
+    p.add_argument("--fields", help="Comma-separated fields to return")
+    p.add_argument(
+        "--fields-from-mapping",
+        metavar="MAPPING",
+        help="Return only the fields an export mapping file needs",
+    )
+    p.add_argument(
+        "--validate",
+        type=float,
+        nargs="?",
+        const=1.0,
+        default=None,
+        metavar="RATE",
+        help="Validate a fraction of records against the response schema",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Decode each page record by record instead of all at once",
+    )
+    p.add_argument(
+        "--transfer",
+        choices=("pages", "auto"),
+        default="pages",
+        help="auto: fetch large chunks from search/download when that is faster",
+    )
+    p.add_argument(
+        "--shard-by",
+        nargs="?",
+        const="applicationMetaData.filingDate",
+        metavar="DATE_FIELD",
+        help="Split the search into parallel date-range shards",
+    )
+    p.add_argument(
+        "--shard-size",
+        type=int,
+        default=5000,
+        help="Most hits per shard (default 5000)",
+    )
+    p.add_argument("--out", help="Write hits to this JSONL file")
+    add_checkpoint(p)
+
+    p = add("petitions", cmd_petitions, "Stream petition decisions as JSONL")
+    p.add_argument("--q", help="Query string")
+    p.add_argument("--payload", help="JSON payload file, or - for stdin")
+    p.add_argument(
+        "--filter",
+        action="append",
+        metavar="NAME=V1,V2",
+        help="Add a filter (repeatable)",
+    )
+    p.add_argument("--page-size", type=int, default=100)
+    p.add_argument("--max", type=int, default=None, help="Stop after N hits")
+    p.add_argument(
+        "--validate",
+        type=float,
+        nargs="?",
+        const=1.0,
+        default=None,
+        metavar="RATE",
+        help="Validate a fraction of decisions against the response schema",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Decode each page record by record instead of all at once",
+    )
+    p.add_argument(
+        "--enrich",
+        action="store_true",
+        help="Attach each decision's file wrapper record (one lookup per app)",
+    )
+
+    p = add("lookup", cmd_lookup, "Look up applications by number")
+    p.add_argument("applications", nargs="+", help="Numbers, or - for stdin")
+    p.add_argument("--out", help="Write records to this JSONL file")
+    add_checkpoint(p)
+
+    p = add("family", cmd_family, "Build continuity family graphs")
+    p.add_argument("applications", nargs="+", help="Seeds, or - for stdin")
+    p.add_argument(
+        "--depth", type=int, default=None, help="Most continuity hops from a seed"
+    )
+    p.add_argument(
+        "--max-nodes", type=int, default=None, help="Stop after N lookups"
+    )
+    p.add_argument("--format", choices=("json", "dot"), default="json")
+
+    p = add("docs", cmd_docs, "List or download application documents")
+    p.add_argument("applications", nargs="+", help="Numbers, or - for stdin")
+    p.add_argument("--codes", help="Comma-separated documentCode filter")
+    p.add_argument("--from", dest="date_from", help="officialDate >= DATE")
+    p.add_argument("--to", dest="date_to", help="officialDate <= DATE")
+    p.add_argument("--download", metavar="DIR", help="Download into DIR")
+    p.add_argument(
+        "--download-workers",
+        type=int,
+        default=None,
+        help="Concurrent downloads (defaults to --workers)",
+    )
+    p.add_argument(
+        "--store",
+        metavar="DIR",
+        help="Deduplicating document store to link downloads from",
+    )
+    p.add_argument(
+        "--link",
+        choices=("auto", "hardlink", "reflink", "copy"),
+        default="auto",
+        help="How --store files are placed (auto tries hardlink, reflink, copy)",
+    )
+    add_checkpoint(p)
+
+    p = add("bulk", cmd_bulk, "List or download bulk dataset files")
+    p.add_argument("product", help="Product identifier, e.g. PTFWPRD")
+    p.add_argument("--all", action="store_true", help="Not only latest")
+    p.add_argument("--download", nargs="+", metavar="FILE")
+    p.add_argument("--dest", default=".", help="Download directory")
+
+    p = add("ingest", cmd_ingest, "Add records to a local record store")
+    p.add_argument("store", help="SQLite record store (created if missing)")
+    p.add_argument(
+        "inputs", nargs="+", help="JSONL or bulk ZIP/JSON files, or - for stdin"
+    )
+
+    p = add("analytics", cmd_analytics, "Portfolio reports over a record store")
+    p.add_argument("store", help="SQLite record store")
+    p.add_argument(
+        "--report",
+        choices=("summary", "pendency", "allowance", "cpc"),
+        default="summary",
+    )
+    p.add_argument("--by", choices=GROUPS, help="Group rows by this column")
+    p.add_argument(
+        "--level",
+        choices=("section", "class", "subclass", "group", "symbol"),
+        default="subclass",
+        help="CPC level for --report cpc",
+    )
+    p.add_argument("--top", type=int, default=None, help="Keep the first N rows")
+    p.add_argument(
+        "--min-count",
+        type=int,
+        default=1,
+        help="Drop groups with fewer applications than this",
+    )
+
+    p = add("events", cmd_events, "Query the event index of a record store")
+    p.add_argument("store", help="SQLite record store")
+    p.add_argument("--timeline", metavar="APP", help="One application's events")
+    p.add_argument(
+        "--code",
+        action="append",
+        metavar="CODES",
+        help="Event codes to match (comma-separated, repeatable); none lists codes",
+    )
+    p.add_argument("--since", help="YYYY-MM-DD, or N for N days ago")
+    p.add_argument("--until", help="YYYY-MM-DD, or N for N days ago")
+    p.add_argument(
+        "--without",
+        metavar="CODES",
+        help="Applications whose latest --code event has no later event in CODES",
+    )
+    p.add_argument(
+        "--sequence",
+        metavar="CODES",
+        help="Applications with these events in order, e.g. CTNF,CTFR,RCEX",
+    )
+    p.add_argument(
+        "--within",
+        type=int,
+        metavar="DAYS",
+        help="Limit for --without responses or the --sequence span",
+    )
+    p.add_argument("--limit", type=int, default=None)
+
+    p = add("watch", cmd_watch, "Watch applications and report what changed")
+    p.add_argument("watchlist", help="SQLite watchlist (created if missing)")
+    p.add_argument("action", choices=("add", "remove", "list", "poll"))
+    p.add_argument(
+        "applications",
+        nargs="*",
+        help="Numbers, or - for stdin (for poll: only these watched ones)",
+    )
+    p.add_argument("--store", help="Ingest changed records into this record store")
+    p.add_argument(
+        "--no-documents",
+        action="store_true",
+        help="Skip the document list (one request per application, not two)",
+    )
+
+    p = add("fulltext", cmd_fulltext, "Index and search downloaded document text")
+    p.add_argument("index", help="SQLite text index (created if missing)")
+    p.add_argument("action", choices=("add", "search"))
+    p.add_argument(
+        "args", nargs="+", help="add: harvest manifests; search: an FTS5 query"
+    )
+    p.add_argument("--codes", help="Comma-separated documentCode filter")
+    p.add_argument("--limit", type=int, default=50, help="Most search hits")
+    p.add_argument(
+        "--store", metavar="DIR", help="Document store to take content hashes from"
+    )
+    p.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Extract documents that failed before again",
+    )
+
+    p = add("export", cmd_export, "Export JSONL records to EndNote or RIS")
+    p.add_argument("input", help="JSONL records file, or - for stdin")
+    p.add_argument("--format", choices=("endnote", "ris"), default="endnote")
+    p.add_argument("--mapping", default=str(DEFAULT_MAPPING))
+    p.add_argument("--out", default=None, help="Output file path")
+    p.add_argument(
+        "--attach-policy", choices=("url", "file", "none"), default="url"
+    )
+    p.add_argument(
+        "--attach-dir",
+        metavar="DIR",
+        help="With --attach-policy file, download attachments into DIR",
+    )
+    p.add_argument(
+        "--attach-codes", help="Comma-separated documentCode filter for attachments"
+    )
+    p.add_argument(
+        "--download-workers",
+        type=int,
+        default=None,
+        help="Concurrent attachment downloads (defaults to --workers)",
+    )
+    p.add_argument(
+        "--store",
+        metavar="DIR",
+        help="Deduplicating document store to link attachments from",
+    )
+    p.add_argument(
+        "--link",
+        choices=("auto", "hardlink", "reflink", "copy"),
+        default="auto",
+        help="How --store files are placed (auto tries hardlink, reflink, copy)",
+    )
+    p.add_argument(
+        "--incremental",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="STATE",
+        help="Re-map only records whose source changed since the last export; "
+        "state defaults to OUT.state.sqlite",
+    )
+    p.add_argument(
+        "--delta",
+        metavar="FILE",
+        help="Also write only new and changed records to FILE (implies "
+        "--incremental; without --out only FILE is written)",
+    )
+
+    p = add("call", cmd_call, "Call any provider operation by op_id")
+    p.add_argument("operation", help="op_id, e.g. pfw.get_application")
+    p.add_argument(
+        "params",
+        nargs="*",
+        metavar="NAME=VALUE",
+        help="Path or query parameters",
+    )
+    p.add_argument("--payload", help="JSON body file, or - for stdin")
+    p.add_argument(
+        "--all", action="store_true", help="Follow the operation's pagination"
+    )
+    p.add_argument("--page-size", type=int, default=None)
+    p.add_argument("--max", type=int, default=None, help="Stop after N records")
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Decode each page record by record instead of all at once",
+    )
+    p.add_argument("--download", metavar="FILE", help="Save the response body")
+
+    add("ops", cmd_ops, "List provider operations")
+    return parser
+
+
+def main(argv: list[str] | None = None, out: IO[str] | None = None) -> int:
+    """Run the CLI and return its exit status."""
+
+    providers = load_providers(str(PROVIDERS_DIR))
+    args = build_parser(providers).parse_args(argv)
+    args.providers = providers
+    args.provider = _provider_for(args.op_id, providers)
+    hooks = []
+    registry = trace = None
+    if args.metrics:
+        registry = metrics.MetricsRegistry()
+        hooks.append(metrics.subscribe(registry))
+    if args.trace:
+        trace = metrics.JsonlTraceWriter(args.trace)
+        hooks.append(metrics.subscribe(trace))
+    try:
+        return int(args.func(args, out or sys.stdout))
+    except (ApiError, FileExistsError) as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+    except BrokenPipeError:  # e.g. piped into ``head``
+        return 0
+    finally:
+        for unsubscribe in hooks:
+            unsubscribe()
+        if registry is not None:
+            registry.write_prometheus(args.metrics)
+        if trace is not None:
+            trace.close()
+        journal = getattr(args, "journal", None)
+        if journal is not None:
+            journal.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
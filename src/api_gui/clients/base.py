@@ -1,13 +1,68 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Mapping
+import time
+from typing import Any, Iterator, Mapping
 
 import requests
 
+from ..util import metrics
+from ..util.rate_limit import RateLimiter
+from .decoding import Loads, get_decoder, iter_json_array
+
 
 class ApiError(Exception):
-    """Raised when a USPTO API request fails."""
+    """Raised when a USPTO API request fails.
+
+    ``status`` is the HTTP status code and ``retry_after`` the server's
+    ``Retry-After`` delay in seconds, when the response carried them.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status: int | None = None,
+        retry_after: float | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RequestValidationError(ApiError):
+    """Raised when a payload fails its operation's request schema.
+
+    The check runs locally, before any network round trip.
+    """
+
+    def __init__(self, op_id: str, errors: list[str]) -> None:
+        self.op_id = op_id
+        self.errors = errors
+        super().__init__(f"{op_id} payload is invalid: " + "; ".join(errors))
+
+
+def _error(method: str, url: str, response: requests.Response) -> ApiError:
+    retry_after = response.headers.get("Retry-After", "")
+    return ApiError(
+        f"{method} {url} failed: {response.status_code} {response.text[:200]}",
+        status=response.status_code,
+        retry_after=float(retry_after) if retry_after.isdigit() else None,
+    )
+
+
+# Response headers that identify a version of a resource, and the request
+# headers that ask the server to answer 304 while that version is current.
+_VALIDATORS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+
+
+def response_validators(response: requests.Response) -> dict[str, str]:
+    """Return the ``ETag``/``Last-Modified`` headers of ``response``."""
+
+    return {
+        name: response.headers[name]
+        for name in _VALIDATORS
+        if response.headers.get(name)
+    }
 
 
 class BaseClient:
@@ -19,10 +74,14 @@ class BaseClient:
         api_key_env: str | None = None,
         api_key_header: str = "X-API-KEY",
         timeout: float = 30,
+        rate_limit: float | None = None,
+        decoder: str | Loads = "auto",
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
         self.timeout = timeout
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.loads = get_decoder(decoder) if isinstance(decoder, str) else decoder
         self.api_key_env = api_key_env
         self.api_key_header = api_key_header
 
@@ -34,27 +93,129 @@ class BaseClient:
     def _url(self, path: str) -> str:
         return f"{self.base_url}{path}"
 
+    def _throttle(self) -> float:
+        if self.limiter is not None:
+            return self.limiter.acquire()
+        return 0.0
+
+    def decode(self, response: requests.Response) -> Any:
+        """Decode a JSON response body with the configured decoder."""
+
+        return self.loads(response.content)
+
+    def iter_bag(
+        self,
+        response: requests.Response,
+        bag: str,
+        chunk_size: int = 1 << 16,
+    ) -> Iterator[Any]:
+        """Yield the records of ``bag`` while a streamed response downloads.
+
+        ``response`` should come from ``get``/``post`` with ``stream=True``;
+        each record is decoded as soon as its bytes have arrived and the
+        body is never held in full. This trades some decode speed for
+        memory; ``decode`` is the faster path for bodies that fit.
+        """
+
+        try:
+            yield from iter_json_array(response.iter_content(chunk_size), bag)
+        finally:
+            response.close()
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        op: str | None,
+        stream: bool,
+        **kwargs: Any,
+    ) -> requests.Response:
+        url = self._url(path)
+        wait = self._throttle()
+        if not metrics.enabled():
+            return self.session.request(
+                method, url, timeout=self.timeout, stream=stream, **kwargs
+            )
+        attrs: dict[str, Any] = {"method": method, "path": path, "wait": wait}
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, url, timeout=self.timeout, stream=stream, **kwargs
+            )
+        except requests.RequestException as exc:
+            attrs.update(status=0, error=type(exc).__name__)
+            metrics.emit(
+                metrics.Event("request", op or path, time.perf_counter() - start, attrs)
+            )
+            raise
+        body = response.request.body
+        if stream:
+            # The body has not been read yet; trust the declared length.
+            length = response.headers.get("Content-Length")
+            bytes_in = int(length) if length else None
+        else:
+            bytes_in = len(response.content)
+        attrs.update(
+            status=response.status_code,
+            ttfb=response.elapsed.total_seconds(),
+            bytes_out=len(body) if body else 0,
+            bytes_in=bytes_in,
+        )
+        metrics.emit(
+            metrics.Event("request", op or path, time.perf_counter() - start, attrs)
+        )
+        return response
+
     def get(
         self,
         path: str,
         params: Mapping[str, Any] | None = None,
+        stream: bool = False,
+        op: str | None = None,
     ) -> requests.Response:
-        url = self._url(path)
-        response = self.session.get(url, params=params, timeout=self.timeout)
+        response = self._send("GET", path, op, stream, params=params)
+        if not response.ok:
+            raise _error("GET", self._url(path), response)
+        return response
+
+    def get_if_changed(
+        self,
+        path: str,
+        validators: Mapping[str, str] | None = None,
+        params: Mapping[str, Any] | None = None,
+        op: str | None = None,
+    ) -> requests.Response | None:
+        """GET ``path`` unless it is unchanged since ``validators``.
+
+        ``validators`` are the :func:`response_validators` of an earlier
+        response; they are sent as ``If-None-Match``/``If-Modified-Since``
+        and a ``304 Not Modified`` answer returns ``None``. Servers that
+        ignore them simply answer 200.
+        """
+
+        headers = {
+            _VALIDATORS[name]: value
+            for name, value in (validators or {}).items()
+            if name in _VALIDATORS
+        }
+        response = self._send(
+            "GET", path, op, False, params=params, headers=headers or None
+        )
+        if response.status_code == 304:
+            return None
         if not response.ok:
-            snippet = response.text[:200]
-            raise ApiError(f"GET {url} failed: {response.status_code} {snippet}")
+            raise _error("GET", self._url(path), response)
         return response
 
     def post(
         self,
         path: str,
         json_body: Mapping[str, Any] | None = None,
+        stream: bool = False,
+        op: str | None = None,
     ) -> requests.Response:
-        url = self._url(path)
         payload = dict(json_body) if json_body is not None else {}
-        response = self.session.post(url, json=payload, timeout=self.timeout)
+        response = self._send("POST", path, op, stream, json=payload)
         if not response.ok:
-            snippet = response.text[:200]
-            raise ApiError(f"POST {url} failed: {response.status_code} {snippet}")
+            raise _error("POST", self._url(path), response)
         return response
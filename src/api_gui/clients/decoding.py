@@ -0,0 +1,213 @@
+"""JSON decoding helpers for large API responses.
+
+:func:`get_decoder` picks the fastest available JSON library (``orjson``,
+then ``ujson``) and falls back to the standard library. :func:`iter_json_array`
+decodes the elements of one top-level array, such as
+``patentFileWrapperDataBag``, straight off a byte stream: only the element
+currently being read is buffered, never the whole body.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+__all__ = ["Loads", "get_decoder", "iter_json_array"]
+
+Loads = Callable[[bytes], Any]
+
+_SPECIAL = re.compile(rb'["{}\[\]]')
+_SEPARATORS = re.compile(r"[\s,]*")
+# Characters that may still extend a number decoded at a chunk edge.
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_WS = b" \t\r\n"
+_BACKSLASH = 0x5C
+_TRIM_AT = 1 << 16
+_raw_decode = json.JSONDecoder().raw_decode
+
+
+def _stdlib_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def get_decoder(name: str = "auto") -> Loads:
+    """Return a ``loads(bytes)`` function.
+
+    Args:
+        name: ``"auto"`` for the fastest installed library, or one of
+            ``"orjson"``, ``"ujson"`` and ``"json"``.
+
+    Returns:
+        A callable decoding UTF-8 JSON bytes.
+
+    Raises:
+        ImportError: If a specific library was requested but is missing.
+        ValueError: If ``name`` is not a known decoder.
+    """
+
+    if name not in ("auto", "orjson", "ujson", "json"):
+        raise ValueError(f"Unknown JSON decoder: {name}")
+    if name in ("auto", "orjson"):
+        try:
+            import orjson
+        except ImportError:
+            if name == "orjson":
+                raise
+        else:
+            return orjson.loads
+    if name in ("auto", "ujson"):
+        try:
+            import ujson
+        except ImportError:
+            if name == "ujson":
+                raise
+        else:
+            return ujson.loads
+    return _stdlib_loads
+
+
+def _string_end(buf: bytearray, i: int) -> int:
+    """Return the index after the string closing quote, or -1 if unseen.
+
+    ``i`` points just past the opening quote.
+    """
+
+    while True:
+        j = buf.find(b'"', i)
+        if j < 0:
+            return -1
+        k = j - 1
+        escapes = 0
+        while buf[k] == _BACKSLASH:
+            escapes += 1
+            k -= 1
+        if escapes % 2 == 0:
+            return j + 1
+        i = j + 1
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """Yield the elements of the top-level array ``key`` as they arrive.
+
+    Elements are framed and decoded by the standard library's C scanner:
+    a per-element byte scan in Python to hand slices to ``orjson`` would
+    cost several times more than the faster decode saves.
+
+    Args:
+        chunks: The JSON document as an iterable of byte chunks, for
+            example ``response.iter_content(65536)``.
+        key: Name of an array member of the top-level object.
+
+    Returns:
+        An iterator over the decoded elements. Nothing is yielded when the
+        key is absent.
+
+    Raises:
+        ValueError: If the stream ends inside the array or the array is
+            malformed.
+    """
+
+    it = iter(chunks)
+    buf = bytearray()
+
+    def fill() -> bool:
+        for chunk in it:
+            if chunk:
+                buf.extend(chunk)
+                return True
+        return False
+
+    # Phase 1: walk the document until ``key``'s array opens at depth 1.
+    pos = 0
+    depth = 0
+    last_key: Any = None
+    while True:
+        m = _SPECIAL.search(buf, pos)
+        if m is None:
+            del buf[:]
+            pos = 0
+            if not fill():
+                return
+            continue
+        i = m.start()
+        c = buf[i]
+        if c == 0x22:  # '"'
+            end = _string_end(buf, i + 1)
+            j = end
+            if depth == 1 and end >= 0:
+                while j < len(buf) and buf[j] in _WS:
+                    j += 1
+            if end < 0 or j >= len(buf):
+                # String (or what follows it) not complete yet.
+                del buf[:i]
+                pos = 0
+                if not fill():
+                    return
+                continue
+            if depth == 1 and buf[j] == 0x3A:  # ':'
+                last_key = json.loads(bytes(buf[i:end]))
+                pos = j + 1
+            else:
+                pos = end
+        elif c in b"{[":
+            pos = i + 1
+            if depth == 1 and c == 0x5B and last_key == key:
+                break
+            depth += 1
+        else:
+            depth -= 1
+            pos = i + 1
+            if depth == 0:
+                return
+
+    # Phase 2: decode elements with the C scanner behind ``raw_decode``,
+    # keeping only the not-yet-consumed tail of the stream as text.
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    text = utf8.decode(bytes(buf[pos:]))
+    del buf[:]
+    pos = 0
+    eof = False
+
+    def more() -> bool:
+        nonlocal text, pos, eof
+        if fill():
+            text = text[pos:] + utf8.decode(bytes(buf))
+            del buf[:]
+        else:
+            text = text[pos:] + utf8.decode(b"", final=True)
+            eof = True
+        pos = 0
+        return not eof
+
+    while True:
+        pos = _SEPARATORS.match(text, pos).end()
+        if pos >= len(text):
+            if not more():
+                raise ValueError(f"JSON stream ended inside '{key}'")
+            continue
+        if text[pos] == "]":
+            return
+        try:
+            value, end = _raw_decode(text, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more()
+            continue
+        if (
+            not eof
+            and isinstance(value, (int, float))
+            and _NUMBER_TAIL.fullmatch(text, end) is not None
+        ):
+            # A number reaching the buffer edge ("1" of "1e5", "2." of
+            # "2.5") may continue in the next chunk.
+            more()
+            continue
+        yield value
+        pos = end
+        if pos > _TRIM_AT:
+            text = text[pos:]
+            pos = 0
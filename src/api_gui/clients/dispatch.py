@@ -0,0 +1,626 @@
+"""Callable operations generated from ``provider.*.json`` metadata.
+
+Every provider file describes an operation's method, path template and
+request schema; an optional ``policy`` block declares how the operation
+should be driven at volume::
+
+    "policy": {
+      "pagination": {"style": "offset", "in": "body",
+                     "bag": "patentFileWrapperDataBag", "page_size": 100},
+      "cache": {"ttl": 3600, "maxsize": 4096},
+      "retry": {"attempts": 3, "backoff": 0.5, "max_backoff": 30,
+                "statuses": [429, 500, 502, 503, 504]},
+      "concurrency": {"workers": 8}
+    }
+
+:class:`Dispatcher` turns each operation (and each ``followup`` or
+``download_helper`` that has an ``op_id``) into an :class:`Operation`, so an
+endpoint added as a provider file is callable, paginated, cached, retried
+and fanned out without client code::
+
+    ops = client.dispatcher
+    ops["pfw.get_application"](applicationNumberText="14412875")
+    for record in ops["pfw.search"].pages({"q": "widget"}, max_records=500):
+        ...
+    for params, data, exc in ops["pfw.list_documents"].map(
+        {"applicationNumberText": app} for app in apps
+    ):
+        ...
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, TypeVar
+from urllib.parse import quote
+
+import requests
+
+from ..util import metrics
+from .base import ApiError, RequestValidationError
+
+if TYPE_CHECKING:
+    from ..util.provider_loader import Provider, ProviderRegistry
+    from ..util.record_validation import StreamValidator
+    from .base import BaseClient
+
+__all__ = [
+    "Dispatcher",
+    "Operation",
+    "OperationPolicy",
+    "PathTemplate",
+    "RetryPolicy",
+    "bounded_map",
+    "iter_pages",
+]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+JsonDict = dict[str, Any]
+
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+def bounded_map(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: int,
+    executor: Executor | None = None,
+) -> Iterator[tuple[T, R | None, BaseException | None]]:
+    """Map ``fn`` over ``items`` concurrently, yielding in input order.
+
+    At most ``2 * workers`` calls are in flight, so arbitrarily long inputs
+    (for example application numbers piped on stdin) are not buffered.
+    Calls run on a thread pool of ``workers`` threads unless an
+    ``executor`` (such as a process pool) is given; it is left running.
+    """
+
+    window: deque[tuple[T, Future[R]]] = deque()
+
+    def drain_one() -> tuple[T, R | None, BaseException | None]:
+        item, future = window.popleft()
+        exc = future.exception()
+        return item, None if exc else future.result(), exc
+
+    def run(pool: Executor) -> Iterator[tuple[T, R | None, BaseException | None]]:
+        for item in items:
+            window.append((item, pool.submit(fn, item)))
+            if len(window) >= 2 * max(1, workers):
+                yield drain_one()
+        while window:
+            yield drain_one()
+
+    if executor is not None:
+        yield from run(executor)
+        return
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        yield from run(pool)
+
+
+def iter_pages(
+    body: JsonDict,
+    search: Callable[[JsonDict], JsonDict],
+    stream_search: Callable[[JsonDict], Iterator[JsonDict]] | None,
+    bag: str,
+    page_size: int,
+    max_records: int | None = None,
+    validator: StreamValidator | None = None,
+    stream: bool = False,
+) -> Iterator[JsonDict]:
+    """Yield ``bag`` records from an offset/limit paginated search.
+
+    ``body["pagination"]`` is rewritten for every page, starting at its
+    current ``offset``. Paging stops when a page comes back short, the
+    response ``count`` is reached, or ``max_records`` records have been
+    yielded. With ``stream`` pages come from ``stream_search`` and
+    ``count`` is not read.
+    """
+
+    offset = int((body.get("pagination") or {}).get("offset", 0))
+    yielded = 0
+    while True:
+        limit = page_size
+        if max_records is not None:
+            limit = min(limit, max_records - yielded)
+            if limit <= 0:
+                return
+        body["pagination"] = {"offset": offset, "limit": limit}
+        if stream and stream_search is not None:
+            records: Any = stream_search(body)
+            total = None
+        else:
+            data = search(body)
+            records = data.get(bag) or []
+            total = data.get("count")
+        received = 0
+        for record in records:
+            received += 1
+            if validator is not None:
+                validator.validate(record)
+            yield record
+        yielded += received
+        offset += received
+        if received < limit or (total is not None and offset >= total):
+            return
+
+
+class PathTemplate:
+    """A provider path such as ``/applications/{applicationNumberText}``.
+
+    The template is split once into literal and parameter segments, so
+    rendering is a join over pre-sized parts. Values are percent-encoded.
+    """
+
+    __slots__ = ("template", "params", "_parts")
+
+    def __init__(self, template: str) -> None:
+        self.template = template
+        parts: list[tuple[bool, str]] = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(template):
+            if match.start() > pos:
+                parts.append((False, template[pos : match.start()]))
+            parts.append((True, match.group(1)))
+            pos = match.end()
+        if pos < len(template):
+            parts.append((False, template[pos:]))
+        self._parts = tuple(parts)
+        self.params = tuple(name for is_param, name in parts if is_param)
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        return "".join(
+            quote(str(values[text]), safe="") if is_param else text
+            for is_param, text in self._parts
+        )
+
+
+@dataclass(frozen=True)
+class Pagination:
+    bag: str
+    style: str = "offset"
+    location: str = "body"
+    page_size: int = 100
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float
+    maxsize: int | None = None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 1
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+    def delay(self, attempt: int, exc: BaseException) -> float:
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            return min(float(retry_after), self.max_backoff)
+        return min(self.backoff * 2**attempt, self.max_backoff)
+
+    def should_retry(self, exc: BaseException) -> bool:
+        if isinstance(exc, RequestValidationError):
+            return False
+        if isinstance(exc, ApiError):
+            return exc.status in self.statuses
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            return exc.response.status_code in self.statuses
+        return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+    def call(
+        self,
+        fn: Callable[[], R],
+        name: str,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> R:
+        """Return ``fn()``, retrying the failures this policy covers.
+
+        Each retry emits a ``retry`` metrics event named ``name``.
+        """
+
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as exc:
+                attempt += 1
+                if attempt >= self.attempts or not self.should_retry(exc):
+                    raise
+                delay = self.delay(attempt - 1, exc)
+                if metrics.enabled():
+                    status = getattr(exc, "status", None)
+                    response = getattr(exc, "response", None)
+                    if status is None and response is not None:
+                        status = response.status_code
+                    attrs = {
+                        "attempt": attempt,
+                        "status": status or 0,
+                        "error": type(exc).__name__,
+                    }
+                    metrics.emit(metrics.Event("retry", name, delay, attrs))
+                sleep(delay)
+
+
+@dataclass(frozen=True)
+class OperationPolicy:
+    """Pagination, caching, retry and concurrency declared for one operation."""
+
+    pagination: Pagination | None = None
+    cache: CachePolicy | None = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    workers: int = 4
+
+    @classmethod
+    def from_meta(cls, meta: Mapping[str, Any] | None) -> OperationPolicy:
+        meta = meta or {}
+        pagination = meta.get("pagination")
+        cache = meta.get("cache")
+        retry = dict(meta.get("retry") or {})
+        if "statuses" in retry:
+            retry["statuses"] = frozenset(retry["statuses"])
+        return cls(
+            pagination=(
+                Pagination(
+                    bag=pagination["bag"],
+                    style=pagination.get("style", "offset"),
+                    location=pagination.get("in", "body"),
+                    page_size=int(pagination.get("page_size", 100)),
+                )
+                if pagination
+                else None
+            ),
+            cache=(
+                CachePolicy(float(cache["ttl"]), cache.get("maxsize"))
+                if cache and cache.get("ttl")
+                else None
+            ),
+            retry=RetryPolicy(**retry),
+            workers=int((meta.get("concurrency") or {}).get("workers", 4)),
+        )
+
+
+class _ResponseCache:
+    """Thread-safe TTL cache with least-recently-used eviction.
+
+    Values are deep-copied in and out, so a caller that mutates a decoded
+    response does not change what later hits return.
+    """
+
+    def __init__(
+        self,
+        policy: CachePolicy,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.policy = policy
+        self.clock = clock
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            value = entry[1]
+        return True, copy.deepcopy(value)
+
+    def put(self, key: Any, value: Any) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (self.clock() + self.policy.ttl, value)
+            self._entries.move_to_end(key)
+            if self.policy.maxsize is not None:
+                while len(self._entries) > self.policy.maxsize:
+                    self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class Operation:
+    """One provider operation bound to a client.
+
+    Calling the operation sends one request. Keyword arguments named in the
+    path template fill it; any others become query parameters (after the
+    ``params.query`` defaults). ``body`` is the JSON body of a POST and is
+    checked against the request schema before it is sent.
+    """
+
+    def __init__(
+        self,
+        client: BaseClient,
+        op_id: str,
+        meta: Mapping[str, Any],
+        registry: ProviderRegistry | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        method = str(meta.get("method", "GET")).upper()
+        if method not in ("GET", "POST"):
+            raise ValueError(f"{op_id}: unsupported method {method}")
+        self.client = client
+        self.op_id = op_id
+        self.method = method
+        self.summary = meta.get("summary", "")
+        self.path = PathTemplate(meta["path"])
+        params = meta.get("params") or {}
+        self._path_specs: Mapping[str, Any] = params.get("path") or {}
+        self._query_defaults = {
+            name: spec["default"]
+            for name, spec in (params.get("query") or {}).items()
+            if "default" in spec
+        }
+        self.policy = OperationPolicy.from_meta(meta.get("policy"))
+        self.registry = registry
+        self.sleep = sleep
+        self.cache = _ResponseCache(self.policy.cache) if self.policy.cache else None
+
+    def __repr__(self) -> str:
+        return f"<Operation {self.op_id} {self.method} {self.path.template}>"
+
+    # -- request building --------------------------------------------------
+    def _split(self, params: Mapping[str, Any]) -> tuple[str, dict[str, Any]]:
+        errors = []
+        for name in self.path.params:
+            if params.get(name) in (None, ""):
+                errors.append(f"{name}: required path parameter")
+                continue
+            allowed = (self._path_specs.get(name) or {}).get("enum")
+            if allowed and params[name] not in allowed:
+                errors.append(f"{name}: {params[name]!r} is not one of {allowed}")
+        if errors:
+            raise RequestValidationError(self.op_id, errors)
+        query = dict(self._query_defaults)
+        query.update((k, v) for k, v in params.items() if k not in self.path.params)
+        for name, value in query.items():
+            if isinstance(value, bool):
+                query[name] = "true" if value else "false"
+        return self.path.render(params), query
+
+    def _with_retry(self, fn: Callable[[], R]) -> R:
+        return self.policy.retry.call(fn, self.op_id, self.sleep)
+
+    # -- calls -------------------------------------------------------------
+    def _payload(self, body: Mapping[str, Any] | None) -> dict[str, Any]:
+        if self.method != "POST":
+            if body is not None:
+                raise RequestValidationError(self.op_id, ["<root>: GET takes no body"])
+            return {}
+        payload = dict(body or {})
+        if self.registry is not None and self.op_id in self.registry:
+            self.registry.validate(self.op_id, payload)
+        return payload
+
+    def __call__(self, body: Mapping[str, Any] | None = None, **params: Any) -> Any:
+        path, query = self._split(params)
+        payload = self._payload(body)
+        key = None
+        if self.cache is not None:
+            key = (
+                path,
+                tuple(sorted((k, str(v)) for k, v in query.items())),
+                json.dumps(payload, sort_keys=True) if payload else None,
+            )
+            hit, value = self.cache.get(key)
+            if hit:
+                return value
+
+        def send() -> Any:
+            if self.method == "POST":
+                response = self.client.post(path, json_body=payload, op=self.op_id)
+            else:
+                response = self.client.get(path, params=query or None, op=self.op_id)
+            return self.client.decode(response)
+
+        value = self._with_retry(send)
+        if key is not None:
+            assert self.cache is not None
+            self.cache.put(key, value)
+        return value
+
+    def stream(
+        self, body: Mapping[str, Any] | None = None, **params: Any
+    ) -> Iterator[Any]:
+        """Yield the pagination bag's records of one response as they decode."""
+
+        if self.policy.pagination is None:
+            raise ValueError(f"{self.op_id} declares no pagination bag")
+        path, query = self._split(params)
+        payload = self._payload(body)
+
+        def send() -> requests.Response:
+            if self.method == "POST":
+                return self.client.post(
+                    path, json_body=payload, stream=True, op=self.op_id
+                )
+            return self.client.get(
+                path, params=query or None, stream=True, op=self.op_id
+            )
+
+        response = self._with_retry(send)
+        return self.client.iter_bag(response, self.policy.pagination.bag)
+
+    def pages(
+        self,
+        body: Mapping[str, Any] | None = None,
+        page_size: int | None = None,
+        max_records: int | None = None,
+        validator: StreamValidator | None = None,
+        stream: bool = False,
+        **params: Any,
+    ) -> Iterator[Any]:
+        """Yield records across pages, following the pagination policy.
+
+        With ``"in": "body"`` the ``pagination`` object of the JSON body is
+        advanced; with ``"in": "query"`` ``offset``/``limit`` query
+        parameters are.
+        """
+
+        pagination = self.policy.pagination
+        if pagination is None or pagination.style != "offset":
+            raise ValueError(f"{self.op_id} declares no offset pagination")
+        if pagination.location == "query":
+
+            def search(page: JsonDict) -> JsonDict:
+                return self(**params, **page["pagination"])
+
+            def stream_search(page: JsonDict) -> Iterator[Any]:
+                return self.stream(**params, **page["pagination"])
+
+            start: JsonDict = {"pagination": {"offset": params.pop("offset", 0)}}
+        else:
+
+            def search(page: JsonDict) -> JsonDict:
+                return self(page, **params)
+
+            def stream_search(page: JsonDict) -> Iterator[Any]:
+                return self.stream(page, **params)
+
+            start = dict(body or {})
+        return iter_pages(
+            start,
+            search,
+            stream_search,
+            pagination.bag,
+            page_size or pagination.page_size,
+            max_records,
+            validator,
+            stream,
+        )
+
+    def map(
+        self,
+        param_sets: Iterable[Mapping[str, Any]],
+        workers: int | None = None,
+    ) -> Iterator[tuple[Mapping[str, Any], Any, BaseException | None]]:
+        """Call the operation once per parameter set, concurrently.
+
+        Yields ``(params, result, error)`` in input order; ``workers``
+        defaults to the policy's ``concurrency.workers``.
+        """
+
+        return bounded_map(
+            lambda p: self(**p), param_sets, workers or self.policy.workers
+        )
+
+    def download(
+        self,
+        dest_path: str,
+        progress: Callable[[int, int | None], None] | None = None,
+        **params: Any,
+    ) -> str:
+        """Download the operation's response body to ``dest_path``.
+
+        Interrupted transfers resume from the partial file on retry.
+        """
+
+        from ..util.download_manager import DownloadManager
+
+        path, query = self._split(params)
+        url = self.client._url(path)
+        if query:
+            url += "?" + "&".join(
+                f"{quote(str(k), safe='')}={quote(str(v), safe='')}"
+                for k, v in query.items()
+            )
+        manager = DownloadManager(self.client.session)
+
+        def fetch() -> str:
+            self.client._throttle()
+            return manager.download(url, dest_path, progress=progress, op=self.op_id)
+
+        return self._with_retry(fetch)
+
+
+class Dispatcher:
+    """Operations for every provider in a registry, bound to ``client``.
+
+    Operations are built on first use and rebuilt when the registry
+    re-parses their provider file, so edits to the JSON take effect
+    without restarting.
+    """
+
+    def __init__(
+        self,
+        client: BaseClient,
+        registry: ProviderRegistry | None = None,
+        validate_requests: bool = True,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if registry is None:
+            from ..util.provider_loader import get_registry
+
+            registry = get_registry()
+        self.client = client
+        self.registry = registry
+        self.validate_requests = validate_requests
+        self.sleep = sleep
+        self._ops: dict[str, tuple[Mapping[str, Any], Operation]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _operations(provider: Provider) -> Iterator[tuple[str, Mapping[str, Any]]]:
+        operation = provider.meta["operation"]
+        yield operation["op_id"], operation
+        extras = list(operation.get("followup") or [])
+        if operation.get("download_helper"):
+            extras.append(operation["download_helper"])
+        for extra in extras:
+            if extra.get("op_id"):
+                yield extra["op_id"], extra
+
+    def _lookup(self, op_id: str) -> tuple[Provider, Mapping[str, Any]]:
+        for provider in self.registry.providers().values():
+            for candidate, meta in self._operations(provider):
+                if candidate == op_id or provider.key == op_id:
+                    return provider, meta
+        raise KeyError(op_id)
+
+    def ops(self) -> list[str]:
+        """Return every dispatchable ``op_id``."""
+
+        return sorted(
+            op_id
+            for provider in self.registry.providers().values()
+            for op_id, _ in self._operations(provider)
+        )
+
+    def __contains__(self, op_id: object) -> bool:
+        try:
+            self._lookup(str(op_id))
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, op_id: str) -> Operation:
+        provider, meta = self._lookup(op_id)
+        with self._lock:
+            cached = self._ops.get(op_id)
+            # The registry hands out a new dict whenever it re-parses a file.
+            if cached is not None and cached[0] is provider.meta:
+                return cached[1]
+            operation = Operation(
+                self.client,
+                meta["op_id"],
+                meta,
+                registry=self.registry if self.validate_requests else None,
+                sleep=self.sleep,
+            )
+            self._ops[op_id] = (provider.meta, operation)
+            return operation
@@ -0,0 +1,171 @@
+"""Choose between paged search and the search/download endpoint.
+
+``POST /api/v1/patent/applications/search/download`` returns a whole
+result chunk in one response of up to about 6 MB, where paged search
+needs one round trip per ``page_size`` records. :func:`iter_search_adaptive`
+starts with an ordinary page to learn the result ``count`` and the
+average record size, then lets a :class:`TransferPlanner` pick, chunk by
+chunk, whichever transfer its measurements say is faster:
+
+* a download chunk is sized to fit under the cap with headroom, and is
+  only used when it would replace at least two pages;
+* once both transfers have been timed, the per-record cost of each decides;
+* a download rejected as too large (413) halves the chunk, and after
+  repeated rejections the planner stays on pages; throttling (429) and
+  server errors are retried with backoff, honouring ``Retry-After``, and
+  never shrink the chunk.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING, Any
+
+from .base import ApiError
+from .dispatch import RetryPolicy
+
+if TYPE_CHECKING:
+    from ..util.record_validation import StreamValidator
+    from .uspto_odp import USPTOODPClient
+
+__all__ = ["DOWNLOAD_CAP", "TransferPlanner", "iter_search_adaptive"]
+
+# Documented response cap of the search/download endpoint, in bytes.
+DOWNLOAD_CAP = 6_000_000
+
+# Status of a download that exceeded the response cap.
+_TOO_LARGE = 413
+
+# Transient download failures; the search/download endpoint has no provider
+# file, so its retry policy lives here.
+_RETRY = RetryPolicy(attempts=4)
+
+
+class TransferPlanner:
+    """Running estimates of record size and per-transfer latency.
+
+    Args:
+        page_size: Records per paged search request.
+        cap: Download response cap in bytes.
+        headroom: Fraction of ``cap`` a planned download may fill, to
+            absorb variation in record size.
+        alpha: Weight of the newest sample in the moving averages.
+    """
+
+    def __init__(
+        self,
+        page_size: int,
+        cap: int = DOWNLOAD_CAP,
+        headroom: float = 0.7,
+        alpha: float = 0.3,
+    ) -> None:
+        self.page_size = page_size
+        self.cap = cap
+        self.headroom = headroom
+        self.alpha = alpha
+        self.record_bytes: float | None = None
+        self.page_seconds: float | None = None
+        self.download_seconds_per_record: float | None = None
+        self.max_download: int | None = None
+        self.downloads_enabled = True
+
+    def _avg(self, old: float | None, new: float) -> float:
+        return new if old is None else old + self.alpha * (new - old)
+
+    def observe_page(self, records: int, nbytes: int, seconds: float) -> None:
+        if records:
+            self.record_bytes = self._avg(self.record_bytes, nbytes / records)
+        self.page_seconds = self._avg(self.page_seconds, seconds)
+
+    def observe_download(self, records: int, nbytes: int, seconds: float) -> None:
+        if not records:
+            return
+        self.record_bytes = self._avg(self.record_bytes, nbytes / records)
+        self.download_seconds_per_record = self._avg(
+            self.download_seconds_per_record, seconds / records
+        )
+
+    def download_failed(self, records: int) -> None:
+        """Shrink future downloads after one of ``records`` was too large."""
+
+        self.max_download = records // 2
+        if self.max_download < 2 * self.page_size:
+            self.downloads_enabled = False
+
+    def plan(self, remaining: int) -> tuple[str, int]:
+        """Return ``("download" | "page", records)`` for the next chunk."""
+
+        page = ("page", min(self.page_size, remaining))
+        if not self.downloads_enabled or self.record_bytes is None:
+            return page
+        n = min(remaining, int(self.cap * self.headroom / self.record_bytes))
+        if self.max_download is not None:
+            n = min(n, self.max_download)
+        if n < 2 * self.page_size:
+            return page
+        if self.download_seconds_per_record is not None and self.page_seconds:
+            paged = math.ceil(n / self.page_size) * self.page_seconds
+            if self.download_seconds_per_record * n >= paged:
+                return page
+        return ("download", n)
+
+
+def iter_search_adaptive(
+    client: USPTOODPClient,
+    payload: Mapping[str, Any],
+    page_size: int = 100,
+    max_records: int | None = None,
+    validator: StreamValidator | None = None,
+    planner: TransferPlanner | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield search hits, mixing pages and download chunks.
+
+    Paging stops at ``count``, on a short chunk, or after ``max_records``
+    records, exactly as with ``iter_search_pfw``.
+    """
+
+    planner = planner or TransferPlanner(page_size)
+    body = dict(payload)
+    offset = int((body.get("pagination") or {}).get("offset", 0))
+    yielded = 0
+    total: int | None = None
+    while True:
+        remaining = page_size if total is None else total - offset
+        if max_records is not None:
+            remaining = min(remaining, max_records - yielded)
+        if remaining <= 0:
+            return
+        mode, limit = planner.plan(remaining)
+        body["pagination"] = {"offset": offset, "limit": limit}
+        start = time.perf_counter()
+        if mode == "download":
+            try:
+                data, nbytes = _RETRY.call(
+                    lambda: client._search_chunk(body, download=True),
+                    "pfw.search.download",
+                    client.dispatcher.sleep,
+                )
+            except ApiError as exc:
+                if exc.status != _TOO_LARGE:
+                    raise
+                planner.download_failed(limit)
+                continue
+        else:
+            data, nbytes = client._search_chunk(body)
+            total = data.get("count", total)
+        records = data.get("patentFileWrapperDataBag") or []
+        seconds = time.perf_counter() - start
+        if mode == "download":
+            planner.observe_download(len(records), nbytes, seconds)
+        else:
+            planner.observe_page(len(records), nbytes, seconds)
+        for record in records:
+            if validator is not None:
+                validator.validate(record)
+            yield record
+        yielded += len(records)
+        offset += len(records)
+        if len(records) < limit or (total is not None and offset >= total):
+            return
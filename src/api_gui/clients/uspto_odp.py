@@ -1,37 +1,282 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Mapping
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Mapping,
+    Sequence,
+    TypeVar,
+)
 
 from .base import BaseClient
+from .dispatch import Dispatcher, RetryPolicy, iter_pages
 from ..util.download_manager import DownloadManager
+from ..util.provider_loader import ProviderRegistry, get_registry
+
+if TYPE_CHECKING:
+    import requests
+
+    from ..util.record_validation import StreamValidator
 
 JsonDict = Dict[str, Any]
+R = TypeVar("R")
 
 
 class USPTOODPClient(BaseClient):
+    def __init__(
+        self,
+        *args: Any,
+        validate_requests: bool = True,
+        registry: ProviderRegistry | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if validate_requests and registry is None:
+            registry = get_registry()
+        self.registry = registry if validate_requests else None
+        self._dispatcher: Dispatcher | None = None
+
+    @property
+    def dispatcher(self) -> Dispatcher:
+        """Operations generated from the provider files (see ``dispatch``)."""
+        if self._dispatcher is None:
+            self._dispatcher = Dispatcher(
+                self,
+                self.registry or get_registry(),
+                validate_requests=self.registry is not None,
+            )
+        return self._dispatcher
+
+    def _validate(self, op_id: str, payload: Mapping[str, Any]) -> None:
+        if self.registry is not None and op_id in self.registry:
+            self.registry.validate(op_id, payload)
+
+    def _retrying(self, op_id: str, fn: Callable[[], R]) -> R:
+        """Call ``fn`` under the retry policy of the provider operation.
+
+        The hand-written methods below retry exactly like the generated
+        ``dispatcher[op_id]``; operations without a provider are not retried.
+        """
+        dispatcher = self.dispatcher
+        try:
+            policy = dispatcher[op_id].policy.retry
+        except KeyError:
+            policy = RetryPolicy()
+        return policy.call(fn, op_id, dispatcher.sleep)
+
     def search_pfw(self, payload: Mapping[str, Any]) -> JsonDict:
-        response = self.post(
-            "/api/v1/patent/applications/search",
-            json_body=payload,
+        self._validate("pfw.search", payload)
+        response = self._retrying(
+            "pfw.search",
+            lambda: self.post(
+                "/api/v1/patent/applications/search",
+                json_body=payload,
+                op="pfw.search",
+            ),
+        )
+        return self.decode(response)
+
+    def stream_search_pfw(self, payload: Mapping[str, Any]) -> Iterator[JsonDict]:
+        """Yield one search page's records, decoding them off the socket."""
+        self._validate("pfw.search", payload)
+        response = self._retrying(
+            "pfw.search",
+            lambda: self.post(
+                "/api/v1/patent/applications/search",
+                json_body=payload,
+                stream=True,
+                op="pfw.search",
+            ),
+        )
+        return self.iter_bag(response, "patentFileWrapperDataBag")
+
+    def iter_search_pfw(
+        self,
+        payload: Mapping[str, Any],
+        page_size: int = 100,
+        max_records: int | None = None,
+        validator: StreamValidator | None = None,
+        fields: Sequence[str] | None = None,
+        stream: bool = False,
+        transfer: str = "pages",
+    ) -> Iterator[JsonDict]:
+        """Yield ``patentFileWrapperDataBag`` records page by page.
+
+        Pagination starts at the payload's ``pagination.offset`` and stops
+        when a page comes back short, ``count`` is reached, or
+        ``max_records`` records have been yielded. A ``validator`` checks
+        each record against the response schema as it streams past, and
+        ``fields`` (see ``endnote_export.required_fields``) asks the API to
+        return only those paths. With ``stream`` each page is decoded
+        incrementally (see ``stream_search_pfw``); ``count`` is then not
+        read, so paging ends on the first short page. With ``transfer="auto"``
+        chunks that fit are fetched from the search/download endpoint
+        instead of page by page (see ``retrieval.iter_search_adaptive``).
+        """
+        body = dict(payload)
+        if fields:
+            body["fields"] = list(fields)
+        if transfer == "auto":
+            if stream:
+                raise ValueError("stream=True needs transfer='pages'")
+            from .retrieval import iter_search_adaptive
+
+            return iter_search_adaptive(
+                self, body, page_size, max_records, validator
+            )
+        if transfer != "pages":
+            raise ValueError(f"unknown transfer mode: {transfer!r}")
+        return iter_pages(
+            body,
+            self.search_pfw,
+            self.stream_search_pfw,
+            "patentFileWrapperDataBag",
+            page_size,
+            max_records,
+            validator,
+            stream,
+        )
+
+    def download_search_pfw(self, payload: Mapping[str, Any]) -> JsonDict:
+        """Fetch a search result chunk from the search/download endpoint.
+
+        The endpoint answers with the same JSON envelope as ``search_pfw``
+        but in one response of up to about 6 MB.
+        """
+        return self._search_chunk(payload, download=True)[0]
+
+    def _search_chunk(
+        self, payload: Mapping[str, Any], download: bool = False
+    ) -> tuple[JsonDict, int]:
+        self._validate("pfw.search", payload)
+        if download:
+            response = self._retrying(
+                "pfw.search.download",
+                lambda: self.post(
+                    "/api/v1/patent/applications/search/download",
+                    json_body={**payload, "format": "json"},
+                    op="pfw.search.download",
+                ),
+            )
+        else:
+            response = self._retrying(
+                "pfw.search",
+                lambda: self.post(
+                    "/api/v1/patent/applications/search",
+                    json_body=payload,
+                    op="pfw.search",
+                ),
+            )
+        return self.decode(response), len(response.content)
+
+    def search_petitions(self, payload: Mapping[str, Any]) -> JsonDict:
+        self._validate("petition.search", payload)
+        response = self._retrying(
+            "petition.search",
+            lambda: self.post(
+                "/api/v1/petition-decisions/search",
+                json_body=payload,
+                op="petition.search",
+            ),
+        )
+        return self.decode(response)
+
+    def stream_search_petitions(
+        self, payload: Mapping[str, Any]
+    ) -> Iterator[JsonDict]:
+        """Yield one petition search page's decisions as they are decoded."""
+        self._validate("petition.search", payload)
+        response = self._retrying(
+            "petition.search",
+            lambda: self.post(
+                "/api/v1/petition-decisions/search",
+                json_body=payload,
+                stream=True,
+                op="petition.search",
+            ),
+        )
+        return self.iter_bag(response, "petitionDecisionDataBag")
+
+    def iter_search_petitions(
+        self,
+        payload: Mapping[str, Any],
+        page_size: int = 100,
+        max_records: int | None = None,
+        validator: StreamValidator | None = None,
+        stream: bool = False,
+    ) -> Iterator[JsonDict]:
+        """Yield ``petitionDecisionDataBag`` decisions page by page.
+
+        Paging follows the same rules as :meth:`iter_search_pfw`.
+        """
+        return iter_pages(
+            dict(payload),
+            self.search_petitions,
+            self.stream_search_petitions,
+            "petitionDecisionDataBag",
+            page_size,
+            max_records,
+            validator,
+            stream,
         )
-        return response.json()
 
     def search_pfw_get(self, params: Mapping[str, Any]) -> JsonDict:
-        response = self.get(
-            "/api/v1/patent/applications/search",
-            params=params,
+        response = self._retrying(
+            "pfw.search",
+            lambda: self.get(
+                "/api/v1/patent/applications/search",
+                params=params,
+                op="pfw.search",
+            ),
         )
-        return response.json()
+        return self.decode(response)
 
     def pfw_lookup(self, application_number: str) -> JsonDict:
         endpoint = f"/api/v1/patent/applications/{application_number}"
-        response = self.get(endpoint)
-        return response.json()
+        response = self._retrying(
+            "pfw.get_application",
+            lambda: self.get(endpoint, op="pfw.get_application"),
+        )
+        return self.decode(response)
 
     def pfw_documents(self, application_number: str) -> JsonDict:
         endpoint = f"/api/v1/patent/applications/{application_number}/documents"
-        response = self.get(endpoint)
-        return response.json()
+        response = self._retrying(
+            "pfw.list_documents",
+            lambda: self.get(endpoint, op="pfw.list_documents"),
+        )
+        return self.decode(response)
+
+    def pfw_lookup_if_changed(
+        self,
+        application_number: str,
+        validators: Mapping[str, str] | None = None,
+    ) -> requests.Response | None:
+        """Conditional :meth:`pfw_lookup`; see :meth:`get_if_changed`."""
+        endpoint = f"/api/v1/patent/applications/{application_number}"
+        return self._retrying(
+            "pfw.get_application",
+            lambda: self.get_if_changed(
+                endpoint, validators, op="pfw.get_application"
+            ),
+        )
+
+    def pfw_documents_if_changed(
+        self,
+        application_number: str,
+        validators: Mapping[str, str] | None = None,
+    ) -> requests.Response | None:
+        """Conditional :meth:`pfw_documents`; see :meth:`get_if_changed`."""
+        endpoint = f"/api/v1/patent/applications/{application_number}/documents"
+        return self._retrying(
+            "pfw.list_documents",
+            lambda: self.get_if_changed(
+                endpoint, validators, op="pfw.list_documents"
+            ),
+        )
 
     def pfw_download(
         self,
@@ -45,13 +290,21 @@ class USPTOODPClient(BaseClient):
         )
         url = self._url(endpoint)
         manager = DownloadManager(self.session)
-        return manager.download(url, dest_path)
+
+        def fetch() -> str:
+            self._throttle()
+            return manager.download(url, dest_path, op="pfw.download_document")
+
+        return self._retrying("pfw.download_document", fetch)
 
     def bulk_products(self, product_id: str, latest: bool = True) -> JsonDict:
         params: Dict[str, str] = {"latest": "true"} if latest else {}
         endpoint = f"/api/v1/datasets/products/{product_id}"
-        response = self.get(endpoint, params=params)
-        return response.json()
+        response = self._retrying(
+            "pfw.bulk.products",
+            lambda: self.get(endpoint, params=params, op="pfw.bulk.products"),
+        )
+        return self.decode(response)
 
     def bulk_download(
         self,
@@ -62,4 +315,9 @@ class USPTOODPClient(BaseClient):
         endpoint = f"/api/v1/datasets/products/files/{product_id}/{file_name}"
         url = self._url(endpoint)
         manager = DownloadManager(self.session)
-        return manager.download(url, dest_path)
+
+        def fetch() -> str:
+            self._throttle()
+            return manager.download(url, dest_path, op="pfw.bulk.download")
+
+        return self._retrying("pfw.bulk.download", fetch)
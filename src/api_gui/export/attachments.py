@@ -0,0 +1,204 @@
+"""Resolve EndNote file attachments while an export is written.
+
+``export_endnote_xml(attach_policy="file")`` links each reference to
+local files through an application -> paths mapping. An
+:class:`AttachmentResolver` builds that mapping on the fly: records pass
+through :meth:`AttachmentResolver.stream` on their way to the exporter,
+and for each one the application's documents are listed, filtered and
+downloaded ahead of the record being serialized::
+
+    resolver = AttachmentResolver(client, "attachments", codes=["NOA"])
+    export_endnote_xml(
+        resolver.stream(records),
+        mapping_file,
+        attach_policy="file",
+        attachment_urls=resolver.paths,
+    )
+
+Up to ``2 * workers`` applications are resolved ahead of the exporter,
+so listing and downloading overlap with mapping and serialization while
+records still come out in input order. Files land in
+``dest_dir/<application>/`` under :func:`document_filename` names; files
+already there are reused, and a :class:`DocumentStore` deduplicates
+documents across exports.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from ..clients.dispatch import bounded_map
+from ..util import metrics
+from ..util.batch_download import (
+    DocumentClient,
+    DocumentRef,
+    document_filename,
+    document_refs,
+    filter_documents,
+)
+
+if TYPE_CHECKING:
+    from ..util.document_store import DocumentStore
+
+__all__ = ["AttachmentResolver", "AttachmentStats"]
+
+
+@dataclass
+class AttachmentStats:
+    """Counts collected while attachments are resolved.
+
+    ``errors`` maps an application (or one of its files) to the failure.
+    """
+
+    applications: int = 0
+    documents: int = 0
+    downloaded: int = 0
+    linked: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+class AttachmentResolver:
+    """Download the documents attached to exported references.
+
+    Args:
+        client: Client providing ``pfw_documents`` and ``pfw_download``.
+        dest_dir: Root directory; files land in ``dest_dir/<application>/``.
+        codes: Optional ``documentCode`` allow-list, e.g. ``["NOA"]``.
+        date_from: Optional inclusive lower bound on ``officialDate``.
+        date_to: Optional inclusive upper bound on ``officialDate``.
+        workers: Applications listed concurrently.
+        download_workers: Concurrent ``pfw_download`` calls, shared by
+            all applications.
+        ext: Download format to select.
+        store: Document store to link files from.
+
+    :attr:`paths` maps each resolved application to the absolute paths of
+    its files; :attr:`stats` is updated as :meth:`stream` is consumed.
+    """
+
+    def __init__(
+        self,
+        client: DocumentClient,
+        dest_dir: str,
+        codes: Sequence[str] | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        workers: int = 4,
+        download_workers: int = 8,
+        ext: str = "pdf",
+        store: DocumentStore | None = None,
+    ) -> None:
+        self.client = client
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.codes = codes
+        self.date_from = date_from
+        self.date_to = date_to
+        self.workers = max(1, workers)
+        self.download_workers = max(1, download_workers)
+        self.ext = ext
+        self.store = store
+        self.paths: dict[str, list[str]] = {}
+        self.stats = AttachmentStats()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def _fetch(self, ref: DocumentRef) -> tuple[str, str]:
+        dest = os.path.join(
+            self.dest_dir, ref.application_number, document_filename(ref)
+        )
+        # DownloadManager renames the ``.part`` file only once complete.
+        if os.path.isfile(dest):
+            return dest, "skipped"
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if self.store is not None:
+            fetched = self.store.export(self.client, ref, dest)
+            return dest, "downloaded" if fetched else "linked"
+        self.client.pfw_download(ref.application_number, ref.document_id, ref.ext, dest)
+        return dest, "downloaded"
+
+    def _resolve(self, application: str) -> list[tuple[str, str, str]]:
+        """Return ``(path, status, error)`` for each selected document."""
+
+        listing = self.client.pfw_documents(application)
+        refs = filter_documents(
+            document_refs(listing, application, ext=self.ext),
+            codes=self.codes,
+            date_from=self.date_from,
+            date_to=self.date_to,
+        )
+        assert self._pool is not None
+        futures = [(ref, self._pool.submit(self._fetch, ref)) for ref in refs]
+        rows = []
+        for ref, future in futures:
+            try:
+                path, status = future.result()
+            except Exception as exc:  # keep the other files
+                name = document_filename(ref)
+                rows.append((name, "failed", str(exc)))
+            else:
+                rows.append((path, status, ""))
+        return rows
+
+    def resolve(self, applications: Iterable[str]) -> dict[str, list[str]]:
+        """Resolve ``applications`` up front and return :attr:`paths`."""
+
+        records = ({"applicationNumberText": app} for app in applications)
+        for _ in self.stream(records):
+            pass
+        return self.paths
+
+    def stream(self, records: Iterable[Any]) -> Iterator[Any]:
+        """Yield ``records`` in order once their attachments are resolved.
+
+        Each application is resolved once; records without an application
+        number pass through untouched. A failed listing or download is
+        counted in :attr:`stats` and leaves the record without that file.
+        """
+
+        def tagged(records: Iterable[Any]) -> Iterator[tuple[Any, str | None]]:
+            seen: set[str] = set()
+            for record in records:
+                app = record.get("applicationNumberText")
+                key = str(app) if app else None
+                if key in seen:
+                    key = None
+                elif key is not None:
+                    seen.add(key)
+                yield record, key
+
+        def resolve(
+            item: tuple[Any, str | None],
+        ) -> list[tuple[str, str, str]] | None:
+            return self._resolve(item[1]) if item[1] else None
+
+        stats = self.stats
+        pool = ThreadPoolExecutor(max_workers=self.download_workers)
+        with metrics.stage("export.attachments", dest=self.dest_dir) as info, pool:
+            self._pool = pool
+            try:
+                for (record, app), rows, exc in bounded_map(
+                    resolve, tagged(records), self.workers
+                ):
+                    if exc is not None:
+                        stats.applications += 1
+                        stats.failed += 1
+                        stats.errors[str(app)] = str(exc)
+                    elif app is not None and rows is not None:
+                        stats.applications += 1
+                        paths = self.paths.setdefault(app, [])
+                        for path, status, error in rows:
+                            stats.documents += 1
+                            setattr(stats, status, getattr(stats, status) + 1)
+                            if error:
+                                stats.errors[path] = error
+                            else:
+                                paths.append(path)
+                        info["items"] += len(rows)
+                    yield record
+            finally:
+                self._pool = None
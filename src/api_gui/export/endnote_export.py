@@ -1,8 +1,11 @@
 
-import os, json, xml.etree.ElementTree as ET
+import os, json, re, xml.etree.ElementTree as ET
+from collections.abc import Mapping
 from pathlib import Path
 from typing import Any, Iterable
 
+from ..util import metrics
+
 def _get_in(obj: dict, path: str):
     # Minimal JSONPath-ish getter supporting []. and simple '+' concat rule
     parts = [p.strip() for p in path.split('+')]
@@ -31,7 +34,8 @@ def _extract(obj, path: str):
             seg = seg[:-2]
             array = True
         for item in cur:
-            if isinstance(item, dict) and seg in item:
+            # Mapping rather than dict so lazy record views work unchanged
+            if isinstance(item, Mapping) and seg in item:
                 val = item[seg]
                 if array and isinstance(val, list):
                     next_items.extend(val)
@@ -44,6 +48,13 @@ def _extract(obj, path: str):
         return cur[0]
     return cur
 
+def _release(rec):
+    # Compact record views decode on demand; drop the decoded copy once
+    # mapped so exporting a large result set keeps only the raw bytes.
+    release = getattr(rec, "release", None)
+    if release is not None:
+        release()
+
 def map_to_endnote_fields(record: dict, mapping: dict) -> dict:
     out = {}
     for k, spec in mapping.items():
@@ -62,70 +73,156 @@ def map_to_endnote_fields(record: dict, mapping: dict) -> dict:
             out[k] = ""
     return out
 
-def export_endnote_xml(records: list[dict], mapping_file: str, ref_type: str="Patent",
-                       attach_policy: str="url", attachment_urls: dict|None=None) -> str:
+_LITERAL = re.compile(r"'[^']*'")
+_CONCAT = re.compile(r"^concat\((.*)\)$")
+
+def required_fields(mapping: dict, roots: Iterable[str] | None = None) -> list[str]:
+    """Return the minimal search ``fields`` list needed to apply ``mapping``.
+
+    Paths are cut at their first ``[]`` segment (the API returns whole bag
+    entries), quoted literals and ``concat(...)`` wrappers are stripped, and
+    paths already covered by a shorter one are dropped. When ``roots`` is
+    given, paths whose first segment is not a record field (for example the
+    ``pfw.documents[]`` attachment placeholders) are ignored.
+    """
+    specs = []
+    for spec in mapping.values():
+        if isinstance(spec, str):
+            specs.append(spec)
+        elif isinstance(spec, list):
+            specs.extend(x for x in spec if isinstance(x, str))
+    allowed = set(roots) if roots is not None else None
+    paths = set()
+    for spec in specs:
+        for part in spec.split("+"):
+            part = part.strip()
+            m = _CONCAT.match(part)
+            if m:
+                part = m.group(1)
+            for token in _LITERAL.sub(",", part).split(","):
+                token = token.strip()
+                if not token:
+                    continue
+                segs = []
+                for seg in token.split("."):
+                    if seg.endswith("[]"):
+                        segs.append(seg[:-2])
+                        break
+                    segs.append(seg)
+                if allowed is not None and segs[0] not in allowed:
+                    continue
+                paths.add(".".join(segs))
+    out = []
+    for path in sorted(paths):
+        if not any(path.startswith(p + ".") for p in out):
+            out.append(path)
+    return out
+
+def fields_for_mapping_file(mapping_file: str) -> list[str]:
+    """Search ``fields`` for a mapping file, limited to PFW record fields."""
+    from ..util.record_view import pfw_record_class
+    with open(mapping_file, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    return required_fields(cfg["transform"], roots=pfw_record_class()._fields)
+
+def _attachment_files(m: dict, attachment_urls: Mapping|None) -> list[str]:
+    # Map app number to one path or a list of paths
+    app = m.get("Application Number")
+    found = attachment_urls.get(app) if app and attachment_urls else None
+    files = [found] if isinstance(found, str) else list(found or ())
+    if files and "File Attachments" in m:
+        # The pfw.documents[] placeholders never resolve on a record; fill
+        # the field from the resolved files.
+        m["File Attachments"] = "; ".join(files)
+    return files
+
+def _endnote_record(m: dict, ref_type: str, attach_policy: str,
+                    files: list[str]) -> ET.Element:
+    rec_el = ET.Element("record")
+    ET.SubElement(rec_el, "ref-type", {"name": ref_type}).text = ref_type
+    for k,v in m.items():
+        if not v:
+            continue
+        f_el = ET.SubElement(rec_el, "titles" if k.lower()=="title" else "custom", {"name": k})
+        f_el.text = v
+    # Attachments
+    if attach_policy and attach_policy != "none":
+        att = ET.SubElement(rec_el, "attachments")
+        if attach_policy == "url":
+            url = m.get("URL")
+            if url:
+                a = ET.SubElement(att, "url")
+                a.text = url
+        elif attach_policy == "file":
+            for path in files:
+                a = ET.SubElement(att, "file")
+                a.text = path
+    return rec_el
+
+def export_endnote_xml(records: Iterable[dict], mapping_file: str,
+                       ref_type: str="Patent", attach_policy: str="url",
+                       attachment_urls: Mapping|None=None, out_path: str|None=None) -> str:
+    """Write ``records`` as EndNote XML and return the output path.
+
+    With ``attach_policy="file"``, ``attachment_urls`` maps application
+    numbers to a file path or a list of them. It is read as each record is
+    written, so it may be filled while ``records`` is consumed, as
+    :meth:`~api_gui.export.attachments.AttachmentResolver.stream` does.
+    """
     with open(mapping_file, "r", encoding="utf-8") as f:
         cfg = json.load(f)
     mapping = cfg["transform"]
     root = ET.Element("xml")
-    for rec in records:
-        m = map_to_endnote_fields(rec, mapping)
-        rec_el = ET.SubElement(root, "record")
-        ET.SubElement(rec_el, "ref-type", {"name": ref_type}).text = ref_type
-        for k,v in m.items():
-            if not v:
-                continue
-            f_el = ET.SubElement(rec_el, "titles" if k.lower()=="title" else "custom", {"name": k})
-            f_el.text = v
-        # Attachments
-        if attach_policy and attach_policy != "none":
-            att = ET.SubElement(rec_el, "attachments")
-            if attach_policy == "url":
-                url = m.get("URL")
-                if url:
-                    a = ET.SubElement(att, "url")
-                    a.text = url
-            elif attach_policy == "file" and attachment_urls:
-                # Map app number to path
-                app = m.get("Application Number")
-                path = attachment_urls.get(app) if app and attachment_urls else None
-                if path:
-                    a = ET.SubElement(att, "file")
-                    a.text = path
-    path = str(Path.cwd() / "endnote_export.xml")
+    with metrics.stage("export.endnote", mapping=os.path.basename(mapping_file)) as info:
+        for rec in records:
+            m = map_to_endnote_fields(rec, mapping)
+            _release(rec)
+            info["items"] += 1
+            files = []
+            if attach_policy == "file":
+                files = _attachment_files(m, attachment_urls)
+            root.append(_endnote_record(m, ref_type, attach_policy, files))
+    path = out_path or str(Path.cwd() / "endnote_export.xml")
     ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
     return path
 
-def export_ris(records: list[dict], mapping_file: str) -> str:
+def _ris_lines(m: dict) -> list[str]:
+    lines = ["TY  - PAT"]
+    if m.get("Title"):
+        lines.append(f"TI  - {m['Title']}")
+    if m.get("Patent Number"):
+        lines.append(f"AN  - {m['Patent Number']}")
+    if m.get("Application Number"):
+        lines.append(f"AU  - {m['Application Number']}")  # Note: AU is authors; here we include application # for tools
+    if m.get("Inventors"):
+        for inv in m["Inventors"].split('; '):
+            lines.append(f"AU  - {inv}")
+    if m.get("Assignee/Applicant"):
+        lines.append(f"PB  - {m['Assignee/Applicant']}")
+    if m.get("Filing Date"):
+        lines.append(f"DA  - {m['Filing Date']}")
+    if m.get("Issue Date"):
+        lines.append(f"PY  - {m['Issue Date']}")
+    if m.get("URL"):
+        lines.append(f"UR  - {m['URL']}")
+    # Attorneys/Correspondence - v2 draft fields in RIS NOTE fields
+    if m.get("Docket Number"):
+        lines.append(f"N1  - Docket: {m['Docket Number']}")
+    lines.append("ER  - ")
+    return lines
+
+def export_ris(records: Iterable[dict], mapping_file: str, out_path: str|None=None) -> str:
     with open(mapping_file, "r", encoding="utf-8") as f:
         cfg = json.load(f)
     mapping = cfg["transform"]
     lines = []
-    for rec in records:
-        m = map_to_endnote_fields(rec, mapping)
-        lines.append("TY  - PAT")
-        if m.get("Title"):
-            lines.append(f"TI  - {m['Title']}")
-        if m.get("Patent Number"):
-            lines.append(f"AN  - {m['Patent Number']}")
-        if m.get("Application Number"):
-            lines.append(f"AU  - {m['Application Number']}")  # Note: AU is authors; here we include application # for tools
-        if m.get("Inventors"):
-            for inv in m["Inventors"].split('; '):
-                lines.append(f"AU  - {inv}")
-        if m.get("Assignee/Applicant"):
-            lines.append(f"PB  - {m['Assignee/Applicant']}")
-        if m.get("Filing Date"):
-            lines.append(f"DA  - {m['Filing Date']}")
-        if m.get("Issue Date"):
-            lines.append(f"PY  - {m['Issue Date']}")
-        if m.get("URL"):
-            lines.append(f"UR  - {m['URL']}")
-        # Attorneys/Correspondence - v2 draft fields in RIS NOTE fields
-        if m.get("Docket Number"):
-            lines.append(f"N1  - Docket: {m['Docket Number']}")
-        lines.append("ER  - ")
-    path = str(Path.cwd() / "export.ris")
+    with metrics.stage("export.ris", mapping=os.path.basename(mapping_file)) as info:
+        for rec in records:
+            m = map_to_endnote_fields(rec, mapping)
+            _release(rec)
+            info["items"] += 1
+            lines.extend(_ris_lines(m))
+    path = out_path or str(Path.cwd() / "export.ris")
     with open(path, "w", encoding="utf-8") as f:
         f.write("\n".join(lines))
     return path
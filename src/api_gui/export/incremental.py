@@ -0,0 +1,337 @@
+"""Incremental EndNote and RIS exports.
+
+A weekly library refresh usually re-exports a result set in which most
+records did not change. :func:`export_incremental` keeps an SQLite state
+file next to the export holding, per record, a SHA-1 of its source JSON
+and its serialized output. On the next run only records whose source
+changed are mapped and serialized again; the others reuse their stored
+output::
+
+    result = export_incremental(
+        records, mapping_file, out_path="library.xml", delta_path="delta.xml"
+    )
+    result.changed, result.removed
+
+The patched full file is byte-for-byte what :func:`export_endnote_xml` or
+:func:`export_ris` would write for the same records. The delta file holds
+only records that are new or whose output changed, as a file of the same
+format that EndNote can import on its own. Records missing from the new
+input are dropped from the state and reported in ``removed``.
+
+A different mapping file, format, reference type or attachment policy
+invalidates the state, and the next run rebuilds every record.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any
+
+from ..util import metrics
+from ..util.sqlite_db import SQLiteDB
+from .endnote_export import (
+    _attachment_files,
+    _endnote_record,
+    _release,
+    _ris_lines,
+    map_to_endnote_fields,
+)
+
+__all__ = ["ExportState", "IncrementalResult", "export_incremental", "source_digest"]
+
+FORMATS = ("endnote", "ris")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS exported (
+    key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    fragment TEXT NOT NULL
+);
+"""
+
+_XML_HEAD = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+
+@dataclass
+class IncrementalResult:
+    """Outcome of one :func:`export_incremental` run.
+
+    ``remapped`` counts records whose source changed; of those, ``changed``
+    produced different output and went to the delta file, while the rest
+    are counted as ``unchanged``. ``rebuilt`` is set when the export
+    settings changed and the state was discarded.
+    """
+
+    path: str | None
+    delta_path: str | None
+    records: int = 0
+    added: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    remapped: int = 0
+    removed: list[str] = field(default_factory=list)
+    rebuilt: bool = False
+
+
+def source_digest(record: Mapping[str, Any], files: Iterable[str] = ()) -> str:
+    """Return a SHA-1 of ``record``'s JSON and its attachment ``files``.
+
+    Record views are hashed from their raw bytes without being decoded.
+    """
+
+    to_bytes = getattr(record, "to_bytes", None)
+    if to_bytes is not None:
+        raw = to_bytes()
+    else:
+        raw = json.dumps(
+            record, sort_keys=True, separators=(",", ":"), default=str
+        ).encode()
+    digest = hashlib.sha1(raw)
+    for path in files:
+        digest.update(b"\0" + path.encode())
+    return digest.hexdigest()
+
+
+class ExportState(SQLiteDB):
+    """SQLite file of per-record digests and serialized output.
+
+    :func:`export_incremental` holds one :meth:`transaction` for a whole
+    run, so an interrupted export leaves the previous state and output
+    files intact.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, _SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM exported").fetchone()[0]
+
+    def settings(self) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'settings'"
+            ).fetchone()
+        return row[0] if row else None
+
+    def reset(self, settings: str) -> None:
+        """Forget every record and remember ``settings``."""
+
+        with self._lock:
+            self._conn.execute("DELETE FROM exported")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('settings', ?)", (settings,)
+            )
+
+    def lookup(self, keys: list[str]) -> dict[str, tuple[str, str]]:
+        """Return ``{key: (digest, fragment)}`` for the known ``keys``."""
+
+        if not keys:
+            return {}
+        marks = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, digest, fragment FROM exported WHERE key IN ({marks})",
+                keys,
+            ).fetchall()
+        return {key: (digest, fragment) for key, digest, fragment in rows}
+
+    def put(self, rows: list[tuple[str, str, str]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO exported VALUES (?, ?, ?)", rows
+            )
+
+    def prune(self, keep: set[str]) -> list[str]:
+        """Delete records whose key is not in ``keep``; return their keys."""
+
+        with self._lock:
+            gone = [
+                key
+                for (key,) in self._conn.execute("SELECT key FROM exported")
+                if key not in keep
+            ]
+            self._conn.executemany(
+                "DELETE FROM exported WHERE key = ?", ((k,) for k in gone)
+            )
+        return sorted(gone)
+
+
+class _Output:
+    """Stream fragments into ``path`` via a temporary file."""
+
+    def __init__(self, path: str, fmt: str) -> None:
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        self._tmp = f"{path}.tmp"
+        self._handle: IO[str] = open(self._tmp, "w", encoding="utf-8", newline="")
+        if fmt == "endnote":
+            self._handle.write(_XML_HEAD)
+
+    def write(self, fragment: str) -> None:
+        if self.fmt == "endnote":
+            self._handle.write(fragment if self.count else "<xml>" + fragment)
+        else:
+            self._handle.write("\n" + fragment if self.count else fragment)
+        self.count += 1
+
+    def commit(self) -> None:
+        if self.fmt == "endnote":
+            self._handle.write("</xml>" if self.count else "<xml />")
+        self._handle.close()
+        os.replace(self._tmp, self.path)
+
+    def discard(self) -> None:
+        self._handle.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def export_incremental(
+    records: Iterable[Mapping[str, Any]],
+    mapping_file: str,
+    state_path: str | None = None,
+    fmt: str = "endnote",
+    out_path: str | None = None,
+    delta_path: str | None = None,
+    ref_type: str = "Patent",
+    attach_policy: str = "url",
+    attachment_urls: Mapping[str, Any] | None = None,
+    batch: int = 500,
+) -> IncrementalResult:
+    """Export ``records``, re-mapping only those whose source changed.
+
+    Args:
+        records: Full record set of this refresh, in output order.
+        mapping_file: EndNote field mapping, as for the full exporters.
+        state_path: State file; defaults to ``<out>.state.sqlite`` next to
+            the full file (or the delta file when only that is written).
+        fmt: ``"endnote"`` (XML) or ``"ris"``.
+        out_path: Patched full file. Defaults like the full exporters when
+            no ``delta_path`` is given either.
+        delta_path: Optional file receiving only new and changed records.
+        ref_type: EndNote reference type.
+        attach_policy: As for :func:`export_endnote_xml`; file attachments
+            are part of a record's digest.
+        attachment_urls: As for :func:`export_endnote_xml`.
+        batch: Records looked up in the state per query.
+
+    Returns:
+        An :class:`IncrementalResult`.
+
+    Raises:
+        ValueError: For an unknown ``fmt``.
+    """
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; use {FORMATS}")
+    if out_path is None and delta_path is None:
+        name = "endnote_export.xml" if fmt == "endnote" else "export.ris"
+        out_path = str(Path.cwd() / name)
+    state_path = state_path or f"{out_path or delta_path}.state.sqlite"
+    with open(mapping_file, "rb") as f:
+        raw_mapping = f.read()
+    mapping = json.loads(raw_mapping)["transform"]
+    settings = hashlib.sha1(
+        json.dumps([fmt, ref_type, attach_policy]).encode() + raw_mapping
+    ).hexdigest()
+    result = IncrementalResult(out_path, delta_path)
+    files_for = attach_policy == "file" and attachment_urls is not None
+
+    def serialize(record: Mapping[str, Any]) -> str:
+        m = map_to_endnote_fields(record, mapping)
+        _release(record)
+        if fmt == "ris":
+            return "\n".join(_ris_lines(m))
+        files = _attachment_files(m, attachment_urls) if files_for else []
+        element = _endnote_record(m, ref_type, attach_policy, files)
+        return ET.tostring(element, encoding="unicode")
+
+    outputs = [
+        _Output(path, fmt) for path in (out_path, delta_path) if path is not None
+    ]
+    full = outputs[0] if out_path is not None else None
+    delta = outputs[-1] if delta_path is not None else None
+    state = ExportState(state_path)
+    with metrics.stage(
+        "export.incremental", mapping=os.path.basename(mapping_file), format=fmt
+    ) as info:
+        try:
+            with state.transaction():
+                if state.settings() != settings:
+                    result.rebuilt = bool(len(state))
+                    state.reset(settings)
+                seen: set[str] = set()
+                for chunk in _chunks(records, max(1, batch)):
+                    keyed = []
+                    for record in chunk:
+                        app = record.get("applicationNumberText")
+                        files: Iterable[str] = ()
+                        if files_for and app:
+                            assert attachment_urls is not None
+                            found = attachment_urls.get(str(app))
+                            files = (found,) if isinstance(found, str) else found or ()
+                        digest = source_digest(record, files)
+                        key = str(app) if app else f"sha1:{digest}"
+                        while key in seen:  # repeated records keep their own slot
+                            key += "+"
+                        seen.add(key)
+                        keyed.append((key, digest, record))
+                    known = state.lookup([key for key, _, _ in keyed])
+                    updates = []
+                    for key, digest, record in keyed:
+                        result.records += 1
+                        old = known.get(key)
+                        if old is not None and old[0] == digest:
+                            _release(record)
+                            fragment = old[1]
+                            result.unchanged += 1
+                        else:
+                            fragment = serialize(record)
+                            updates.append((key, digest, fragment))
+                            if old is not None:
+                                result.remapped += 1
+                            if old is None:
+                                result.added += 1
+                            elif old[1] == fragment:
+                                result.unchanged += 1
+                            else:
+                                result.changed += 1
+                            if delta is not None and (
+                                old is None or old[1] != fragment
+                            ):
+                                delta.write(fragment)
+                        if full is not None:
+                            full.write(fragment)
+                    state.put(updates)
+                    info["items"] += len(updates)
+                result.removed = state.prune(seen)
+            # The state commits first: if replacing an output then fails,
+            # the next run still rebuilds the full file from the state.
+            for output in outputs:
+                output.commit()
+        except BaseException:
+            for output in outputs:
+                output.discard()
+            raise
+        finally:
+            state.close()
+    return result
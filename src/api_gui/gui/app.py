@@ -1,33 +1,69 @@
 
-import json, os, tkinter as tk
+import json, os, queue, threading, tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import webbrowser
-import requests
 import ttkbootstrap as tb
-from ttkbootstrap.style import Style
 
-from ..clients.uspto_odp import USPTOODPClient
-from ..util.provider_loader import load_providers
+# requests (via the client), webbrowser and the tooltip widget are imported
+# on first use so the window can paint before they load.
+from ..util.provider_loader import get_registry, load_providers
 from ..util.error_helper import suggest_url_encoding
 from .widgets import FacetsPanel, PillBar, TourOverlay, TooltipLib
 from ..util.presets import save_preset, load_preset, list_presets
+from ..util.batch_download import BatchDownloader, document_refs, filter_documents
 from ..util import settings
 
 APP_TITLE = "API GUI — USPTO PFW"
 THEME_DEFAULT = "lumenci_light"
+# Fields shown in the results pane; searches request only these.
+RESULT_FIELDS = [
+    "applicationNumberText",
+    "applicationMetaData.inventionTitle",
+    "applicationMetaData.filingDate",
+    "applicationMetaData.applicationStatusDescriptionText",
+]
 
 class App(tb.Window):
     def __init__(self):
         super().__init__(themename=THEME_DEFAULT)
         self.title(APP_TITLE)
         self.geometry("1200x800")
-        self.providers = load_providers(os.path.join(os.path.dirname(__file__), "..", "providers"))
+        self.providers = {}
         self.cfg = settings.load_settings()
         self.tooltiplib = TooltipLib(os.path.join(os.path.dirname(__file__), "odp_dsl_examples.json"))
         self._build_menu()
         self._build_layout()
+        # Worker threads hand UI updates to the Tk thread through this queue.
+        self._ui_calls = queue.Queue()
+        self.after(50, self._drain_ui_calls)
+        # Anything the first frame does not need runs once the window is up.
+        self.after_idle(self._deferred_init)
+
+    def _post(self, fn):
+        """Run ``fn`` on the Tk thread; the only UI call worker threads may make."""
+        self._ui_calls.put(fn)
+
+    def _drain_ui_calls(self):
+        try:
+            while True:
+                try:
+                    fn = self._ui_calls.get_nowait()
+                except queue.Empty:
+                    break
+                fn()
+        finally:
+            self.after(50, self._drain_ui_calls)
+
+    def _deferred_init(self):
+        self._load_providers()
+        self._refresh_presets()
         self._first_run_tour()
 
+    def _load_providers(self):
+        self.providers = load_providers(os.path.join(os.path.dirname(__file__), "..", "providers"))
+        self.provider_cb.configure(values=sorted(self.providers.keys()))
+        if self.provider_cb["values"]:
+            self.provider_cb.current(0)
+
     def _build_menu(self):
         menubar = tk.Menu(self)
         self.config(menu=menubar)
@@ -39,7 +75,7 @@ class App(tb.Window):
         menubar.add_cascade(label="File", menu=filem)
 
         helpm = tk.Menu(menubar, tearoff=0)
-        helpm.add_command(label="ODP Guide", command=lambda: webbrowser.open("https://data.uspto.gov/apis/patent-file-wrapper/search"))
+        helpm.add_command(label="ODP Guide", command=lambda: _open_url("https://data.uspto.gov/apis/patent-file-wrapper/search"))
         menubar.add_cascade(label="Help", menu=helpm)
 
         settingsm = tk.Menu(menubar, tearoff=0)
@@ -54,9 +90,7 @@ class App(tb.Window):
         left = ttk.Frame(paned, padding=8)
         paned.add(left, weight=1)
         ttk.Label(left, text="Provider/Operation").pack(anchor="w")
-        self.provider_cb = ttk.Combobox(left, values=sorted(self.providers.keys()))
-        if self.provider_cb["values"]:
-            self.provider_cb.current(0)
+        self.provider_cb = ttk.Combobox(left, values=())
         self.provider_cb.pack(fill="x")
         ttk.Label(left, text="API Key (X-API-KEY)").pack(anchor="w", pady=(8,0))
         self.api_key_var = tk.StringVar(value=self.cfg.get('api_keys',{}).get('uspto_odp',''))
@@ -66,7 +100,6 @@ class App(tb.Window):
         ttk.Label(left, text="Presets").pack(anchor="w")
         self.presets_lb = tk.Listbox(left, height=6)
         self.presets_lb.pack(fill="both", expand=True)
-        self._refresh_presets()
 
         # center: query tabs
         center = ttk.Notebook(paned)
@@ -77,20 +110,17 @@ class App(tb.Window):
         center.add(self.post_tab, text="Search (POST)")
         self._build_post_tab(self.post_tab)
 
-        # GET pane
-        self.get_tab = ttk.Frame(center, padding=8)
-        center.add(self.get_tab, text="GET Composer")
-        self._build_get_tab(self.get_tab)
-
-        # Documents
-        self.docs_tab = ttk.Frame(center, padding=8)
-        center.add(self.docs_tab, text="Documents")
-        self._build_docs_tab(self.docs_tab)
-
-        # Bulk
-        self.bulk_tab = ttk.Frame(center, padding=8)
-        center.add(self.bulk_tab, text="Bulk")
-        self._build_bulk_tab(self.bulk_tab)
+        # GET composer, Documents and Bulk are built on first activation
+        self._pending_tabs = {}
+        for attr, text, builder in (("get_tab", "GET Composer", self._build_get_tab),
+                                    ("docs_tab", "Documents", self._build_docs_tab),
+                                    ("bulk_tab", "Bulk", self._build_bulk_tab),
+                                    ("analytics_tab", "Analytics", self._build_analytics_tab)):
+            tab = ttk.Frame(center, padding=8)
+            setattr(self, attr, tab)
+            center.add(tab, text=text)
+            self._pending_tabs[str(tab)] = builder
+        center.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         # right: results
         right = ttk.Frame(paned, padding=8)
@@ -104,6 +134,12 @@ class App(tb.Window):
         self.pill_bar = PillBar(right, on_remove=self._remove_filter_pill)
         self.pill_bar.pack(fill="x")
 
+    def _on_tab_changed(self, event):
+        tab = event.widget.select()
+        builder = self._pending_tabs.pop(tab, None)
+        if builder:
+            builder(event.widget.nametowidget(tab))
+
     # ------------- POST Search tab -------------
     def _build_post_tab(self, frame):
         self.q_var = tk.StringVar()
@@ -138,6 +174,7 @@ class App(tb.Window):
         return payload
 
     def _client(self):
+        from ..clients.uspto_odp import USPTOODPClient
         key = self.api_key_var.get().strip()
         os.environ["USPTO_ODP_API_KEY"] = key
         return USPTOODPClient("https://api.uspto.gov", api_key_env="USPTO_ODP_API_KEY")
@@ -146,6 +183,8 @@ class App(tb.Window):
         try:
             cli = self._client()
             payload = self._payload_from_ui()
+            # Only the results pane is projected; saved presets keep every field.
+            payload["fields"] = list(RESULT_FIELDS)
             data = cli.search_pfw(payload)
             self._render_results(data)
             self._update_facets(data.get("facets"))
@@ -158,6 +197,18 @@ class App(tb.Window):
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def _render_results(self, data):
+        from ..util.record_view import load_views
+        records = load_views(data.get("patentFileWrapperDataBag") or [], compact=False)
+        self.results.delete("1.0", "end")
+        self.results.insert("end", f"{data.get('count', len(records))} results\n\n")
+        for rec in records:
+            meta = rec.applicationMetaData
+            title = meta.inventionTitle if meta else ""
+            status = meta.applicationStatusDescriptionText if meta else ""
+            filed = meta.filingDate if meta else ""
+            self.results.insert("end", f"{rec.applicationNumberText or ''}  {filed or ''}  {status or ''}\n    {title or ''}\n")
+
     def _update_facets(self, facets):
         if facets:
             self.facets_panel.set_facets(facets)
@@ -194,7 +245,8 @@ class App(tb.Window):
         base = "https://api.uspto.gov/api/v1/patent/applications/search"
         if q:
             from urllib.parse import quote
-            url = f"{base}?q={quote(q, safe=':()*[]\"')}".replace('"', '%22')
+            safe = ':()*[]"'
+            url = f"{base}?q={quote(q, safe=safe)}".replace('"', '%22')
         else:
             url = base
         self.get_url_lbl.configure(text=url)
@@ -211,7 +263,7 @@ class App(tb.Window):
 
     def _open_in_browser(self):
         url = self.get_url_lbl.cget("text")
-        webbrowser.open(url)
+        _open_url(url)
 
     # ------------- Documents tab -------------
     def _build_docs_tab(self, frame):
@@ -229,11 +281,36 @@ class App(tb.Window):
 
         ttk.Button(frame, text="Download PDF", command=self._download_selected_pdf).grid(row=2, column=2, sticky="e")
 
+        batch = ttk.Frame(frame)
+        batch.grid(row=3, column=0, columnspan=3, sticky="ew", pady=(6,0))
+        ttk.Label(batch, text="Codes").pack(side="left")
+        self.doc_codes_var = tk.StringVar()
+        ttk.Entry(batch, textvariable=self.doc_codes_var, width=16).pack(side="left", padx=4)
+        ttk.Label(batch, text="From").pack(side="left")
+        self.doc_from_var = tk.StringVar()
+        ttk.Entry(batch, textvariable=self.doc_from_var, width=11).pack(side="left", padx=4)
+        ttk.Label(batch, text="To").pack(side="left")
+        self.doc_to_var = tk.StringVar()
+        ttk.Entry(batch, textvariable=self.doc_to_var, width=11).pack(side="left", padx=4)
+        ttk.Label(batch, text="Store").pack(side="left")
+        self.doc_store_var = tk.StringVar(value=self.cfg.get("document_store", ""))
+        ttk.Entry(batch, textvariable=self.doc_store_var, width=18).pack(side="left", padx=4)
+        ttk.Label(batch, text="Workers").pack(side="left")
+        self.doc_workers_var = tk.IntVar(value=4)
+        ttk.Spinbox(batch, from_=1, to=16, textvariable=self.doc_workers_var, width=4).pack(side="left", padx=4)
+        ttk.Button(batch, text="Download All", command=lambda: self._batch_download(selected_only=False)).pack(side="right")
+        ttk.Button(batch, text="Download Selected", command=lambda: self._batch_download(selected_only=True)).pack(side="right", padx=4)
+        self.doc_status_lbl = ttk.Label(frame, text="")
+        self.doc_status_lbl.grid(row=4, column=0, columnspan=3, sticky="w")
+        self._doc_refs = {}
+
     def _list_docs(self):
         cli = self._client()
         app = self.doc_app_var.get().strip()
         data = cli.pfw_documents(app)
         self.docs_tree.delete(*self.docs_tree.get_children())
+        self._doc_refs = {}
+        refs = {r.document_id: r for r in document_refs(data, app)}
         for item in data.get("documentBag", []):
             date = item.get("officialDate","")
             code = item.get("documentCode","")
@@ -244,7 +321,10 @@ class App(tb.Window):
                 if opt.get("mimeTypeIdentifier") in ("PDF","pdf"):
                     url = opt.get("downloadUrl") or opt.get("documentURI") or ""
                     pages = opt.get("pageTotalQuantity","")
-            self.docs_tree.insert("", "end", values=(date, code, desc, str(pages), url))
+            iid = self.docs_tree.insert("", "end", values=(date, code, desc, str(pages), url))
+            ref = refs.get(item.get("documentIdentifier"))
+            if ref is not None:
+                self._doc_refs[iid] = ref
 
     def _download_selected_pdf(self):
         sel = self.docs_tree.focus()
@@ -259,9 +339,14 @@ class App(tb.Window):
         dest = filedialog.asksaveasfilename(defaultextension=".pdf", initialfile=f"{app}_{vals[1]}.pdf")
         if not dest:
             return
-        # Direct download via requests
         cli = self._client()
-        import requests
+        store, ref = self._doc_store(), self._doc_refs.get(sel)
+        if store is not None and ref is not None:
+            with store:
+                store.export(cli, ref, dest)
+            messagebox.showinfo("Saved", dest)
+            return
+        # Direct download via requests
         with cli.session.get(url, stream=True) as r:
             r.raise_for_status()
             with open(dest, "wb") as f:
@@ -270,6 +355,68 @@ class App(tb.Window):
                         f.write(chunk)
         messagebox.showinfo("Saved", dest)
 
+    def _batch_download(self, selected_only):
+        if selected_only:
+            refs = [self._doc_refs[i] for i in self.docs_tree.selection() if i in self._doc_refs]
+        else:
+            refs = list(self._doc_refs.values())
+        codes = [c.strip() for c in self.doc_codes_var.get().split(",") if c.strip()]
+        refs = filter_documents(refs, codes=codes or None,
+                                date_from=self.doc_from_var.get().strip() or None,
+                                date_to=self.doc_to_var.get().strip() or None)
+        if not refs:
+            messagebox.showwarning("No documents", "No documents match the current selection and filters.")
+            return
+        dest_dir = filedialog.askdirectory(title="Download into…")
+        if not dest_dir:
+            return
+        total = len(refs)
+        done = [0]
+
+        def progress(name, state):
+            done[0] += 1
+            self._post(lambda n=done[0]: self.doc_status_lbl.configure(text=f"{n}/{total} {state}: {name}"))
+
+        def finished(result):
+            self.doc_status_lbl.configure(
+                text=f"Downloaded {len(result.downloaded)}, linked {len(result.linked)}, "
+                     f"skipped {len(result.skipped)}, failed {len(result.failed)}")
+            if result.failed:
+                messagebox.showwarning("Batch download", "\n".join(f"{k}: {v}" for k, v in result.failed.items()))
+
+        def failed(exc):
+            self.doc_status_lbl.configure(text=f"Batch download failed: {exc}")
+            messagebox.showerror("Batch download", str(exc))
+
+        # Tk variables may only be read on the main thread.
+        client = self._client()
+        workers = self.doc_workers_var.get()
+        store = self._doc_store()
+
+        def run():
+            downloader = BatchDownloader(client, dest_dir, workers=workers,
+                                         progress=progress, store=store)
+            try:
+                result = downloader.download(refs)
+            except Exception as exc:
+                self._post(lambda e=exc: failed(e))
+                return
+            finally:
+                if store is not None:
+                    store.close()
+            self._post(lambda: finished(result))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _doc_store(self):
+        """The document store named in the Documents tab, or None."""
+        path = self.doc_store_var.get().strip()
+        if not path:
+            return None
+        from ..util.document_store import DocumentStore
+        self.cfg["document_store"] = path
+        return DocumentStore(path)
+
     # ------------- Bulk tab -------------
     def _build_bulk_tab(self, frame):
         ttk.Label(frame, text="Product").grid(row=0, column=0, sticky="w")
@@ -302,7 +449,6 @@ class App(tb.Window):
         dest = filedialog.asksaveasfilename(defaultextension=".zip", initialfile=fname)
         if not dest: return
         cli = self._client()
-        import requests
         with cli.session.get(url, stream=True) as r:
             r.raise_for_status()
             with open(dest, "wb") as f:
@@ -310,9 +456,93 @@ class App(tb.Window):
                     if chunk: f.write(chunk)
         messagebox.showinfo("Saved", dest)
 
+    # ------------- Analytics tab -------------
+    def _build_analytics_tab(self, frame):
+        ttk.Label(frame, text="Record store").grid(row=0, column=0, sticky="w")
+        self.an_store_var = tk.StringVar(value=self.cfg.get("record_store", ""))
+        ttk.Entry(frame, textvariable=self.an_store_var).grid(row=0, column=1, columnspan=4, sticky="ew")
+        ttk.Button(frame, text="Browse…", command=self._analytics_browse).grid(row=0, column=5, padx=4)
+        frame.grid_columnconfigure(1, weight=1)
+
+        ttk.Label(frame, text="Report").grid(row=1, column=0, sticky="w", pady=4)
+        self.an_report_var = tk.StringVar(value="allowance")
+        ttk.Combobox(frame, textvariable=self.an_report_var, state="readonly", width=12,
+                     values=("summary", "pendency", "allowance", "cpc")).grid(row=1, column=1, sticky="w")
+        ttk.Label(frame, text="Group by").grid(row=1, column=2, sticky="e")
+        self.an_by_var = tk.StringVar(value="art_unit")
+        ttk.Combobox(frame, textvariable=self.an_by_var, state="readonly", width=12,
+                     values=("", "art_unit", "examiner", "app_type", "status", "filing_year", "outcome")).grid(row=1, column=3, sticky="w", padx=4)
+        self.an_top_var = tk.IntVar(value=50)
+        ttk.Spinbox(frame, from_=1, to=10000, textvariable=self.an_top_var, width=6).grid(row=1, column=4, sticky="w")
+        ttk.Button(frame, text="Run", command=self._run_analytics).grid(row=1, column=5, padx=4)
+
+        self.an_tree = ttk.Treeview(frame, show="headings", height=14)
+        self.an_tree.grid(row=2, column=0, columnspan=6, sticky="nsew", pady=6)
+        frame.grid_rowconfigure(2, weight=1)
+        self.an_status_lbl = ttk.Label(frame, text="")
+        self.an_status_lbl.grid(row=3, column=0, columnspan=6, sticky="w")
+        self._portfolio = None  # (store path, Portfolio), reused between runs
+
+    def _analytics_browse(self):
+        path = filedialog.askopenfilename(filetypes=[("Record store", "*.sqlite *.db"), ("All files", "*")])
+        if path:
+            self.an_store_var.set(path)
+
+    def _run_analytics(self):
+        path = self.an_store_var.get().strip()
+        if not path or not os.path.exists(path):
+            messagebox.showwarning("Analytics", "Choose a record store built with 'pro-ref ingest'.")
+            return
+        self.cfg["record_store"] = path
+        report, by, top = self.an_report_var.get(), self.an_by_var.get() or None, self.an_top_var.get()
+        self.an_status_lbl.configure(text="Loading…")
+
+        def run():
+            # pandas is imported here, never at startup.
+            from ..util.analytics import load_portfolio
+            from ..util.record_store import RecordStore
+            try:
+                if self._portfolio is None or self._portfolio[0] != path:
+                    with RecordStore(path) as store:
+                        self._portfolio = (path, load_portfolio(store))
+                portfolio = self._portfolio[1]
+                if report == "summary":
+                    frame = portfolio.summary()
+                elif report == "pendency":
+                    frame = portfolio.pendency(by=by)
+                elif report == "allowance":
+                    frame = portfolio.allowance(by=by or "art_unit")
+                else:
+                    frame = portfolio.cpc_distribution(by=by, top=top)
+                frame = frame.head(top).reset_index(drop=report == "summary")
+            except Exception as exc:
+                msg = str(exc)
+                self._post(lambda: messagebox.showerror("Analytics", msg))
+                self._post(lambda: self.an_status_lbl.configure(text=""))
+                return
+            self._post(lambda: self._show_frame(frame, len(portfolio)))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _show_frame(self, frame, applications):
+        columns = [str(c) for c in frame.columns]
+        self.an_tree.delete(*self.an_tree.get_children())
+        self.an_tree.configure(columns=columns)
+        for c in columns:
+            self.an_tree.heading(c, text=c)
+            self.an_tree.column(c, width=110, anchor="w")
+        for row in frame.itertuples(index=False):
+            self.an_tree.insert("", "end", values=[f"{v:.3f}" if isinstance(v, float) else v for v in row])
+        self.an_status_lbl.configure(text=f"{len(frame)} rows over {applications} applications")
+
     # ------------- Presets -------------
     def _save_preset(self):
         payload = self._payload_from_ui()
+        try:
+            get_registry().validate("pfw.search", payload)
+        except Exception as e:
+            messagebox.showerror("Invalid preset", str(e))
+            return
         name = tk.simpledialog.askstring("Preset name", "Name:")
         if not name: return
         path = save_preset(name, payload)
@@ -364,6 +594,11 @@ class App(tb.Window):
         messagebox.showinfo("Settings", "Saved.")
 
 
+def _open_url(url):
+    import webbrowser
+    webbrowser.open(url)
+
+
 def main():
     app = App()
     app.mainloop()
@@ -148,13 +148,21 @@ class TooltipLib:
     """Load tooltip copy from disk and attach it to widgets."""
 
     def __init__(self, path: str) -> None:
-        try:
-            with open(path, "r", encoding="utf-8") as handle:
-                self._data: dict[str, str] = json.load(handle)
-        except Exception:  # pragma: no cover - defensive fallback
-            self._data = {}
+        self._path = path
+        self._data: dict[str, str] | None = None
+
+    def _load(self) -> dict[str, str]:
+        # Read on first use so constructing the library costs nothing at
+        # startup.
+        if self._data is None:
+            try:
+                with open(self._path, "r", encoding="utf-8") as handle:
+                    self._data = json.load(handle)
+            except Exception:  # pragma: no cover - defensive fallback
+                self._data = {}
+        return self._data
 
     def attach(self, widget: tk.Misc, key: str) -> None:
-        tip = self._data.get(key)
+        tip = self._load().get(key)
         if tip:
             ToolTip(widget, tip, delay=100)
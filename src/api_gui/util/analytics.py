@@ -0,0 +1,278 @@
+"""Columnar portfolio analytics over stored PFW records.
+
+:func:`load_portfolio` reads the flat ``record_fields`` and ``record_cpc``
+tables a :class:`~api_gui.util.record_store.RecordStore` maintains at
+ingest, so no record is decoded, and holds them as pandas columns: dates
+as ``datetime64``, art units, examiners and codes as categoricals. Every
+report is then a vectorized group-by::
+
+    portfolio = load_portfolio(RecordStore("corpus.sqlite"))
+    portfolio.pendency(by="art_unit")       # days from filing to grant
+    portfolio.allowance(by="examiner", min_count=20)
+    portfolio.cpc_distribution(level="subclass", top=25)
+
+Outcomes are derived once at load time: an application with a grant date
+or patent number is ``granted``, one whose status code is in the
+abandonment range or whose status text mentions abandonment is
+``abandoned``, and everything else is ``pending``. Allowance rates count
+only decided (granted or abandoned) applications.
+
+pandas and NumPy are optional; install them with ``pip install
+pro-ref[analytics]``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from . import metrics
+from .record_store import RecordStore
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = [
+    "GROUPS",
+    "OUTCOMES",
+    "Portfolio",
+    "load_portfolio",
+    "portfolio_from_records",
+]
+
+_COLUMNS = (
+    "filing_date",
+    "grant_date",
+    "art_unit",
+    "examiner",
+    "status_code",
+    "status",
+    "app_type",
+    "patent_number",
+)
+_CATEGORIES = ("art_unit", "examiner", "status", "app_type")
+
+OUTCOMES = ("granted", "abandoned", "pending")
+# Columns reports can group by.
+GROUPS = ("art_unit", "examiner", "app_type", "status", "filing_year", "outcome")
+
+# USPTO status codes 160-169 are the "Abandoned -- ..." family.
+_ABANDONED_CODES = range(160, 170)
+
+# CPC level -> characters of the compact symbol (e.g. "H04L9/32") kept.
+_CPC_LEVELS = {"section": 1, "class": 3, "subclass": 4}
+
+
+def _pandas() -> Any:
+    try:
+        import pandas
+    except ImportError as exc:
+        raise ImportError(
+            "Portfolio analytics need pandas; pip install 'pro-ref[analytics]'"
+        ) from exc
+    return pandas
+
+
+class Portfolio:
+    """Applications and their CPC symbols as pandas frames.
+
+    Attributes:
+        apps: One row per application, indexed by application number.
+        cpc: One row per (application, CPC symbol) pair; ``row`` is the
+            position of the application in :attr:`apps`.
+    """
+
+    def __init__(self, apps: pd.DataFrame, cpc: pd.DataFrame) -> None:
+        self.apps = apps
+        self.cpc = cpc
+
+    def __len__(self) -> int:
+        return len(self.apps)
+
+    def _check_group(self, by: str | None) -> None:
+        if by is not None and by not in GROUPS:
+            raise ValueError(f"Cannot group by {by!r}; choose from {GROUPS}")
+
+    def summary(self) -> pd.DataFrame:
+        """Return one row of portfolio-wide counts and pendency."""
+
+        pd = _pandas()
+        days = self.apps["pendency_days"]
+        outcomes = self.apps["outcome"].value_counts()
+        decided = outcomes["granted"] + outcomes["abandoned"]
+        return pd.DataFrame(
+            [
+                {
+                    "applications": len(self.apps),
+                    **{name: int(outcomes[name]) for name in OUTCOMES},
+                    "allowance_rate": (
+                        outcomes["granted"] / decided if decided else float("nan")
+                    ),
+                    "median_pendency_days": days.median(),
+                    "art_units": self.apps["art_unit"].nunique(),
+                    "examiners": self.apps["examiner"].nunique(),
+                }
+            ]
+        )
+
+    def pendency(self, by: str | None = None, min_count: int = 1) -> pd.DataFrame:
+        """Return filing-to-grant pendency statistics in days.
+
+        Only granted applications with both dates take part. Groups with
+        fewer than ``min_count`` of them are dropped.
+        """
+
+        self._check_group(by)
+        granted = self.apps[self.apps["pendency_days"].notna()]
+        days = granted["pendency_days"]
+        if by is None:
+            stats = days.agg(["count", "mean", "median"]).to_frame("all").T
+            quantiles = days.quantile([0.1, 0.9]).to_frame("all").T
+        else:
+            groups = days.groupby(granted[by], observed=True)
+            stats = groups.agg(["count", "mean", "median"])
+            # reindex keeps both columns when there are no groups at all
+            quantiles = (
+                groups.quantile([0.1, 0.9]).unstack().reindex(columns=[0.1, 0.9])
+            )
+        quantiles.columns = ["p10", "p90"]
+        stats = stats.join(quantiles)
+        stats.index.name = by or "group"
+        stats["count"] = stats["count"].astype("int64")
+        stats = stats[stats["count"] >= min_count]
+        return stats.sort_values("count", ascending=False)
+
+    def allowance(self, by: str = "art_unit", min_count: int = 1) -> pd.DataFrame:
+        """Return outcome counts and the allowance rate per group.
+
+        ``allowance_rate`` is granted / (granted + abandoned); groups with
+        fewer than ``min_count`` decided applications are dropped.
+        """
+
+        self._check_group(by)
+        counts = (
+            self.apps.groupby([by, "outcome"], observed=True)
+            .size()
+            .unstack(fill_value=0)
+            .reindex(columns=list(OUTCOMES), fill_value=0)
+        )
+        counts.columns = list(OUTCOMES)
+        decided = counts["granted"] + counts["abandoned"]
+        counts["decided"] = decided
+        counts["allowance_rate"] = counts["granted"] / decided.where(decided > 0)
+        counts = counts[decided >= min_count]
+        return counts.sort_values("decided", ascending=False)
+
+    def cpc_distribution(
+        self,
+        level: str = "subclass",
+        by: str | None = None,
+        top: int | None = None,
+    ) -> pd.DataFrame:
+        """Count applications per CPC symbol, truncated to ``level``.
+
+        Args:
+            level: ``"section"``, ``"class"``, ``"subclass"``, ``"group"``
+                (main group, e.g. ``H04L9``) or ``"symbol"``.
+            by: Optional column to break the counts down by.
+            top: Keep the ``top`` symbols (per group when ``by`` is set).
+
+        Returns:
+            Counts of distinct applications and their ``share`` of the
+            applications (in the group) that carry any CPC symbol.
+        """
+
+        pd = _pandas()
+        self._check_group(by)
+        symbols = self.cpc["symbol"]
+        # Truncate the (few) distinct categories, not the (many) rows.
+        cats = pd.Series(symbols.cat.categories)
+        if level in _CPC_LEVELS:
+            cats = cats.str[: _CPC_LEVELS[level]]
+        elif level == "group":
+            cats = cats.str.split("/").str[0]
+        elif level != "symbol":
+            raise ValueError(f"Unknown CPC level: {level!r}")
+        codes = symbols.cat.codes.to_numpy()
+        pairs = pd.DataFrame(
+            {
+                "row": self.cpc["row"].to_numpy(),
+                "symbol": pd.Categorical(cats.to_numpy()[codes]),
+            }
+        ).drop_duplicates()
+        keys = ["symbol"]
+        if by is not None:
+            pairs[by] = self.apps[by].to_numpy()[pairs["row"].to_numpy()]
+            keys = [by, "symbol"]
+        counts = pairs.groupby(keys, observed=True).size().rename("count")
+        if by is None:
+            total = pairs["row"].nunique()
+            share = counts / total if total else counts * float("nan")
+        else:
+            totals = pairs.groupby(by, observed=True)["row"].nunique()
+            share = counts / totals.reindex(counts.index.get_level_values(0)).values
+        out = pd.DataFrame({"count": counts, "share": share})
+        if by is None:
+            out = out.sort_values("count", ascending=False)
+            return out.head(top) if top else out
+        out = out.sort_values([by, "count"], ascending=[True, False])
+        return out.groupby(level=0, observed=True).head(top) if top else out
+
+
+def load_portfolio(store: RecordStore) -> Portfolio:
+    """Project the analytics columns of every record in ``store``."""
+
+    pd = _pandas()
+    import numpy as np
+
+    with metrics.stage("analytics.load", path=store.path) as info:
+        rows = store.select(
+            f"SELECT application, {', '.join(_COLUMNS)} FROM record_fields"
+            " ORDER BY application"
+        )
+        apps = pd.DataFrame.from_records(
+            rows, columns=["application", *_COLUMNS], index="application"
+        )
+        cpc_rows = store.select("SELECT application, value FROM record_cpc")
+        info["items"] = len(apps)
+
+    for column in ("filing_date", "grant_date"):
+        apps[column] = pd.to_datetime(
+            apps[column].str[:10], format="%Y-%m-%d", errors="coerce"
+        )
+    for column in _CATEGORIES:
+        apps[column] = apps[column].astype("category")
+    apps["status_code"] = pd.to_numeric(apps["status_code"], errors="coerce")
+    apps["filing_year"] = apps["filing_date"].dt.year.astype("Int16")
+    apps["pendency_days"] = (apps["grant_date"] - apps["filing_date"]).dt.days
+
+    granted = apps["grant_date"].notna() | apps["patent_number"].notna()
+    status = apps["status"].cat
+    abandoned_text = status.categories.str.contains("abandon", case=False)
+    # Code -1 (no status text) picks the appended False, which also covers
+    # a store where no record has status text and there are no categories.
+    abandoned_text = np.append(np.asarray(abandoned_text, dtype=bool), False)
+    abandoned = (
+        apps["status_code"].isin(_ABANDONED_CODES).to_numpy()
+        | abandoned_text[status.codes.to_numpy()]
+    )
+    outcome = np.where(granted, 0, np.where(abandoned, 1, 2))
+    apps["outcome"] = pd.Categorical.from_codes(outcome, categories=OUTCOMES)
+
+    cpc_apps = [app for app, _ in cpc_rows]
+    symbols = [str(value).replace(" ", "") for _, value in cpc_rows]
+    cpc = pd.DataFrame(
+        {
+            "row": apps.index.get_indexer(cpc_apps),
+            "symbol": pd.Categorical(symbols),
+        }
+    )
+    return Portfolio(apps, cpc)
+
+
+def portfolio_from_records(records: Iterable[dict[str, Any]]) -> Portfolio:
+    """Load records that are not in a store (e.g. a JSONL export)."""
+
+    with RecordStore(":memory:") as store:
+        store.ingest(records)
+        return load_portfolio(store)
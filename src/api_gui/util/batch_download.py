@@ -0,0 +1,344 @@
+"""Concurrent batch downloads for an application's file wrapper."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import IO, TYPE_CHECKING, Any, Protocol
+
+if TYPE_CHECKING:
+    from .document_store import DocumentStore
+
+__all__ = [
+    "DocumentRef",
+    "BatchResult",
+    "BatchDownloader",
+    "document_refs",
+    "filter_documents",
+    "document_filename",
+    "download_file_wrapper",
+]
+
+MANIFEST_NAME = ".batch_manifest.jsonl"
+# Whole-file JSON manifest of earlier versions; folded in on load.
+_LEGACY_MANIFEST = ".batch_manifest.json"
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class DocumentClient(Protocol):
+    """Subset of :class:`USPTOODPClient` used by the batch downloader."""
+
+    def pfw_documents(self, application_number: str) -> dict[str, Any]: ...
+
+    def pfw_download(
+        self,
+        application_number: str,
+        document_id: str,
+        ext: str,
+        dest_path: str,
+    ) -> str: ...
+
+
+@dataclass(frozen=True)
+class DocumentRef:
+    """A single downloadable document from a ``documentBag`` listing."""
+
+    application_number: str
+    document_id: str
+    code: str
+    date: str
+    description: str = ""
+    ext: str = "pdf"
+    url: str = ""
+    pages: int | None = None
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch run, keyed by destination file name.
+
+    ``linked`` files came from a :class:`DocumentStore` without a download.
+    """
+
+    downloaded: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    linked: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def document_refs(
+    listing: Mapping[str, Any],
+    application_number: str,
+    ext: str = "pdf",
+) -> list[DocumentRef]:
+    """Flatten a ``pfw_documents`` response into :class:`DocumentRef` items.
+
+    Args:
+        listing: Response body returned by ``pfw_documents``.
+        application_number: Application the listing belongs to.
+        ext: Download format to select from ``downloadOptionBag``.
+
+    Returns:
+        One reference per document offering the requested format, in
+        listing order.
+    """
+
+    refs: list[DocumentRef] = []
+    for item in listing.get("documentBag", []) or []:
+        doc_id = item.get("documentIdentifier")
+        if not doc_id:
+            continue
+        for opt in item.get("downloadOptionBag", []) or []:
+            if str(opt.get("mimeTypeIdentifier", "")).lower() != ext.lower():
+                continue
+            refs.append(
+                DocumentRef(
+                    application_number=str(
+                        item.get("applicationNumberText") or application_number
+                    ),
+                    document_id=str(doc_id),
+                    code=str(item.get("documentCode", "")),
+                    date=str(item.get("officialDate", "")),
+                    description=str(
+                        item.get("documentCodeDescriptionText", "")
+                    ),
+                    ext=ext.lower(),
+                    url=opt.get("downloadUrl") or opt.get("documentURI") or "",
+                    pages=opt.get("pageTotalQuantity"),
+                )
+            )
+            break
+    return refs
+
+
+def filter_documents(
+    refs: Iterable[DocumentRef],
+    codes: Sequence[str] | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+) -> list[DocumentRef]:
+    """Keep documents matching ``codes`` and an inclusive date window.
+
+    Dates are compared on their ``YYYY-MM-DD`` prefix, so both plain dates
+    and the ISO timestamps returned in ``officialDate`` are accepted.
+    """
+
+    wanted = {c.upper() for c in codes} if codes else None
+    lo = date_from[:10] if date_from else None
+    hi = date_to[:10] if date_to else None
+    out: list[DocumentRef] = []
+    for ref in refs:
+        if wanted is not None and ref.code.upper() not in wanted:
+            continue
+        day = ref.date[:10]
+        if lo and (not day or day < lo):
+            continue
+        if hi and (not day or day > hi):
+            continue
+        out.append(ref)
+    return out
+
+
+def document_filename(ref: DocumentRef) -> str:
+    """Return a deterministic, filesystem-safe file name for ``ref``."""
+
+    parts = [ref.application_number, ref.date[:10], ref.code, ref.document_id]
+    stem = "_".join(_UNSAFE.sub("-", p).strip("-") for p in parts if p)
+    return f"{stem}.{ref.ext}"
+
+
+class BatchDownloader:
+    """Download many documents concurrently into one directory.
+
+    Completed files are appended with their size to a JSON Lines manifest
+    inside ``dest_dir``, which each run compacts to one line per file when
+    it loads it. A later run skips every file that still exists with the
+    recorded size, and interrupted transfers continue from their ``.part``
+    file through :class:`DownloadManager`'s range requests. With a
+    ``store``, files are linked from the
+    :class:`~api_gui.util.document_store.DocumentStore` and only documents
+    it does not hold yet are downloaded (into the store).
+    """
+
+    def __init__(
+        self,
+        client: DocumentClient,
+        dest_dir: str,
+        workers: int = 4,
+        progress: Callable[[str, str], None] | None = None,
+        store: DocumentStore | None = None,
+    ) -> None:
+        self.client = client
+        self.dest_dir = dest_dir
+        self.workers = max(1, workers)
+        self.progress = progress
+        self.store = store
+        self._lock = threading.Lock()
+        self._manifest_path = os.path.join(dest_dir, MANIFEST_NAME)
+        self._manifest: dict[str, int] = {}
+        self._log: IO[str] | None = None
+
+    def _load_manifest(self) -> None:
+        manifest: dict[str, int] = {}
+        legacy = os.path.join(self.dest_dir, _LEGACY_MANIFEST)
+        try:
+            with open(legacy, "r", encoding="utf-8") as handle:
+                manifest.update((str(k), int(v)) for k, v in json.load(handle).items())
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        name, size = json.loads(line)
+                        manifest[str(name)] = int(size)
+                    except (TypeError, ValueError):  # torn last line
+                        continue
+        except OSError:
+            pass
+        self._manifest = manifest
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            for name in sorted(manifest):
+                handle.write(json.dumps([name, manifest[name]]) + "\n")
+        os.replace(tmp, self._manifest_path)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+
+    def _record(self, name: str, size: int) -> None:
+        with self._lock:
+            self._manifest[name] = size
+            if self._log is not None:
+                self._log.write(json.dumps([name, size]) + "\n")
+                self._log.flush()
+
+    def is_complete(self, name: str) -> bool:
+        """Return ``True`` when ``name`` exists and matches the manifest."""
+
+        path = os.path.join(self.dest_dir, name)
+        expected = self._manifest.get(name)
+        return (
+            expected is not None
+            and os.path.isfile(path)
+            and os.path.getsize(path) == expected
+        )
+
+    def _notify(self, name: str, state: str) -> None:
+        if self.progress:
+            self.progress(name, state)
+
+    def _fetch(self, ref: DocumentRef, name: str) -> bool:
+        dest = os.path.join(self.dest_dir, name)
+        fetched = True
+        if self.store is not None:
+            fetched = self.store.export(self.client, ref, dest)
+        else:
+            self.client.pfw_download(
+                ref.application_number, ref.document_id, ref.ext, dest
+            )
+        self._record(name, os.path.getsize(dest))
+        return fetched
+
+    def download(self, refs: Iterable[DocumentRef]) -> BatchResult:
+        """Download ``refs``, skipping files completed by earlier runs.
+
+        Args:
+            refs: Documents to fetch; duplicates are collapsed by file name.
+
+        Returns:
+            A :class:`BatchResult` listing downloaded, linked, skipped and
+            failed file names. Failures do not abort the remaining downloads.
+        """
+
+        os.makedirs(self.dest_dir, exist_ok=True)
+        self._load_manifest()
+        result = BatchResult()
+        pending: dict[str, DocumentRef] = {}
+        for ref in refs:
+            name = document_filename(ref)
+            if name in pending or name in result.skipped:
+                continue
+            if self.is_complete(name):
+                result.skipped.append(name)
+                self._notify(name, "skipped")
+            else:
+                pending[name] = ref
+
+        self._log = open(self._manifest_path, "a", encoding="utf-8")
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {
+                    pool.submit(self._fetch, ref, name): name
+                    for name, ref in pending.items()
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        fetched = future.result()
+                    except Exception as exc:  # keep going on per-file errors
+                        result.failed[name] = str(exc)
+                        self._notify(name, "failed")
+                    else:
+                        state = "downloaded" if fetched else "linked"
+                        getattr(result, state).append(name)
+                        self._notify(name, state)
+        finally:
+            with self._lock:
+                self._log.close()
+                self._log = None
+        result.downloaded.sort()
+        result.linked.sort()
+        return result
+
+
+def download_file_wrapper(
+    client: DocumentClient,
+    application_number: str,
+    dest_dir: str,
+    codes: Sequence[str] | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    workers: int = 4,
+    ext: str = "pdf",
+    progress: Callable[[str, str], None] | None = None,
+    store: DocumentStore | None = None,
+) -> BatchResult:
+    """List an application's documents and download the matching ones.
+
+    Args:
+        client: Client providing ``pfw_documents`` and ``pfw_download``.
+        application_number: Application whose file wrapper is fetched.
+        dest_dir: Directory receiving the files and the resume manifest.
+        codes: Optional ``documentCode`` allow-list, e.g. ``["CTNF"]``.
+        date_from: Optional inclusive lower bound on ``officialDate``.
+        date_to: Optional inclusive upper bound on ``officialDate``.
+        workers: Number of concurrent downloads.
+        ext: Download format (``pdf``, ``xml`` or ``docx``).
+        progress: Optional ``(file_name, state)`` callback.
+        store: Optional document store to link files from.
+
+    Returns:
+        The :class:`BatchResult` for the run.
+    """
+
+    listing = client.pfw_documents(application_number)
+    refs = filter_documents(
+        document_refs(listing, application_number, ext=ext),
+        codes=codes,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    downloader = BatchDownloader(
+        client, dest_dir, workers=workers, progress=progress, store=store
+    )
+    return downloader.download(refs)
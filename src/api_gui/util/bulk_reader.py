@@ -0,0 +1,59 @@
+"""Read records out of downloaded bulk dataset archives."""
+
+from __future__ import annotations
+
+import zipfile
+from collections.abc import Iterator
+from typing import IO, Any
+
+from ..clients.decoding import iter_json_array
+from . import metrics
+from .record_validation import StreamValidator
+
+__all__ = ["iter_bulk_records"]
+
+
+def iter_bulk_records(
+    path: str,
+    bag: str = "patentFileWrapperDataBag",
+    validator: StreamValidator | None = None,
+    chunk_size: int = 1 << 20,
+) -> Iterator[dict[str, Any]]:
+    """Yield the records of every JSON member in a bulk ZIP.
+
+    Members are decoded incrementally, one record at a time, so archives
+    whose JSON documents are larger than memory can still be read.
+
+    Args:
+        path: Bulk archive downloaded with ``bulk_download``; a bare
+            ``.json`` file is read the same way.
+        bag: Name of the record array inside each JSON document.
+        validator: Optional :class:`StreamValidator` applied to each record
+            as it is yielded.
+        chunk_size: Bytes read from a member per step.
+
+    Returns:
+        An iterator over the records, in archive order.
+    """
+
+    with metrics.stage("ingest.bulk", path=path) as info:
+        for handle in _iter_members(path):
+            chunks = iter(lambda: handle.read(chunk_size), b"")
+            for record in iter_json_array(chunks, bag):
+                if validator is not None:
+                    validator.validate(record)
+                info["items"] += 1
+                yield record
+
+
+def _iter_members(path: str) -> Iterator[IO[bytes]]:
+    if not zipfile.is_zipfile(path):
+        with open(path, "rb") as handle:
+            yield handle
+        return
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(".json"):
+                continue
+            with archive.open(info) as handle:
+                yield handle
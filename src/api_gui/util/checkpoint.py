@@ -0,0 +1,316 @@
+"""Resumable batch jobs backed by a local SQLite journal.
+
+A :class:`JobJournal` records, per job, the cursors it has advanced (such
+as a search offset), the work items it has finished (applications looked
+up, documents downloaded) and how many bytes of each output file are
+committed. Everything a step produced is committed in one transaction, so
+a job killed at any point restarts from its last commit::
+
+    with JobJournal("harvest.sqlite") as journal:
+        job = journal.job("search", payload)
+        out = job.output("hits.jsonl")      # drops any uncommitted tail
+        offset = job.cursor("offset", 0)
+        for page in pages_from(offset):
+            for record in page:
+                out.write(json.dumps(record) + "\\n")
+            offset += len(page)
+            job.commit(cursors={"offset": offset}, outputs=[out])
+        job.finish()
+
+Output files are truncated back to their committed length when reopened,
+and only grow past it in the same commit that advances the cursor, so a
+restarted job writes every record exactly once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator, Mapping
+from typing import IO, Any
+
+from .sqlite_db import SQLiteDB
+
+__all__ = ["Checkpoint", "CheckpointedOutput", "JobJournal", "job_id_for"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cursors (
+    job_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (job_id, name)
+);
+CREATE TABLE IF NOT EXISTS items (
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job_id, stage, key)
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    job_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    committed INTEGER NOT NULL,
+    PRIMARY KEY (job_id, path)
+);
+"""
+
+# Item statuses that count as finished work; anything else is retried.
+DONE_STATUSES = ("done", "downloaded", "linked", "skipped")
+
+
+def job_id_for(kind: str, params: Mapping[str, Any]) -> str:
+    """Return a stable id for a job of ``kind`` over ``params``."""
+
+    blob = json.dumps(params, sort_keys=True, default=str)
+    return f"{kind}-{hashlib.sha1(blob.encode()).hexdigest()[:16]}"
+
+
+class JobJournal(SQLiteDB):
+    """SQLite journal shared by the jobs of one workspace."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, _SCHEMA)
+
+    def job(
+        self,
+        kind: str,
+        params: Mapping[str, Any],
+        job_id: str | None = None,
+    ) -> Checkpoint:
+        """Open (or create) the job identified by ``job_id``.
+
+        ``job_id`` defaults to :func:`job_id_for` over ``kind`` and
+        ``params``, so rerunning the same command resumes the same job.
+
+        Raises:
+            ValueError: If ``job_id`` names a job created with different
+                ``kind`` or ``params``.
+        """
+
+        job_id = job_id or job_id_for(kind, params)
+        blob = json.dumps(params, sort_keys=True, default=str)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, params FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO jobs VALUES (?, ?, ?, 'running', ?, ?)",
+                    (job_id, kind, blob, now, now),
+                )
+            elif tuple(row) != (kind, blob):
+                raise ValueError(
+                    f"job {job_id!r} exists with different parameters"
+                )
+        return Checkpoint(self, job_id, kind, dict(params))
+
+    def jobs(self) -> list[dict[str, Any]]:
+        """Return every job with its status and item counts."""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT j.job_id, j.kind, j.status, j.updated,"
+                " (SELECT COUNT(*) FROM items i WHERE i.job_id = j.job_id)"
+                " FROM jobs j ORDER BY j.created"
+            ).fetchall()
+        keys = ("job_id", "kind", "status", "updated", "items")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+class CheckpointedOutput:
+    """Append-only output file whose length is tracked by the journal.
+
+    Opening truncates the file to the length recorded by the last commit,
+    discarding whatever an interrupted run wrote after it. Only files the
+    job created are truncated: a first open claims a missing or empty file
+    in the journal and refuses one that already holds data.
+
+    Raises:
+        FileExistsError: If ``path`` is a non-empty file this job did not
+            create.
+    """
+
+    def __init__(self, checkpoint: Checkpoint, path: str) -> None:
+        self.checkpoint = checkpoint
+        self.path = os.path.abspath(path)
+        committed = checkpoint._committed_length(self.path)
+        exists = os.path.exists(self.path)
+        if committed is None:
+            if exists and os.path.getsize(self.path):
+                raise FileExistsError(
+                    f"{self.path} already exists and was not written by job"
+                    f" {checkpoint.job_id}; move it or choose another path"
+                )
+            checkpoint._claim(self.path)
+            committed = 0
+        self.committed = committed
+        parent = os.path.dirname(self.path)
+        os.makedirs(parent, exist_ok=True)
+        self._handle: IO[bytes] = open(self.path, "r+b" if exists else "w+b")
+        self._handle.truncate(self.committed)
+        self._handle.seek(self.committed)
+        self._lock = threading.Lock()
+
+    @property
+    def is_new(self) -> bool:
+        """``True`` until the first commit has recorded any bytes."""
+
+        return self.committed == 0
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            self._handle.write(text.encode("utf-8"))
+
+    def _sync(self) -> int:
+        with self._lock:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            return self._handle.tell()
+
+    def close(self) -> None:
+        with self._lock:
+            self._handle.close()
+
+    def __enter__(self) -> CheckpointedOutput:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class Checkpoint:
+    """Progress of one job inside a :class:`JobJournal`."""
+
+    def __init__(
+        self, journal: JobJournal, job_id: str, kind: str, params: dict[str, Any]
+    ) -> None:
+        self.journal = journal
+        self.job_id = job_id
+        self.kind = kind
+        self.params = params
+
+    def _query(self, sql: str, *args: Any) -> list[tuple[Any, ...]]:
+        with self.journal._lock:
+            return self.journal._conn.execute(sql, (self.job_id, *args)).fetchall()
+
+    @property
+    def status(self) -> str:
+        return self._query("SELECT status FROM jobs WHERE job_id = ?")[0][0]
+
+    def cursor(self, name: str, default: Any = None) -> Any:
+        """Return the committed value of cursor ``name``."""
+
+        rows = self._query(
+            "SELECT value FROM cursors WHERE job_id = ? AND name = ?", name
+        )
+        return json.loads(rows[0][0]) if rows else default
+
+    def done(self, stage: str, key: str) -> bool:
+        """Return ``True`` when ``key`` finished ``stage`` in a committed step."""
+
+        rows = self._query(
+            "SELECT status FROM items WHERE job_id = ? AND stage = ? AND key = ?",
+            stage,
+            key,
+        )
+        return bool(rows) and rows[0][0] in DONE_STATUSES
+
+    def completed(self, stage: str) -> set[str]:
+        """Return every key that finished ``stage``."""
+
+        marks = ",".join("?" * len(DONE_STATUSES))
+        rows = self._query(
+            "SELECT key FROM items WHERE job_id = ? AND stage = ?"
+            f" AND status IN ({marks})",
+            stage,
+            *DONE_STATUSES,
+        )
+        return {r[0] for r in rows}
+
+    def pending(self, stage: str, keys: Iterable[str]) -> Iterator[str]:
+        """Yield the ``keys`` that have not finished ``stage``."""
+
+        finished = self.completed(stage)
+        return (key for key in keys if key not in finished)
+
+    def output(self, path: str) -> CheckpointedOutput:
+        """Open ``path`` for exactly-once appends under this job."""
+
+        return CheckpointedOutput(self, path)
+
+    def _committed_length(self, path: str) -> int | None:
+        rows = self._query(
+            "SELECT committed FROM outputs WHERE job_id = ? AND path = ?", path
+        )
+        return int(rows[0][0]) if rows else None
+
+    def _claim(self, path: str) -> None:
+        """Record ``path`` as created by this job, with nothing committed."""
+
+        self._query("INSERT OR IGNORE INTO outputs VALUES (?, ?, 0)", path)
+
+    def commit(
+        self,
+        cursors: Mapping[str, Any] | None = None,
+        items: Iterable[tuple[str, str, str]] = (),
+        outputs: Iterable[CheckpointedOutput] = (),
+    ) -> None:
+        """Record a step atomically.
+
+        ``outputs`` are flushed to disk first, then their new lengths, the
+        ``cursors`` and the ``(stage, key, status)`` ``items`` are written
+        in a single transaction.
+        """
+
+        lengths = [(out, out._sync()) for out in outputs]
+        now = time.time()
+        conn = self.journal._conn
+        with self.journal._lock:
+            conn.execute("BEGIN")
+            try:
+                for name, value in (cursors or {}).items():
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cursors VALUES (?, ?, ?)",
+                        (self.job_id, name, json.dumps(value)),
+                    )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)",
+                    [(self.job_id, s, k, st, now) for s, k, st in items],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?)",
+                    [(self.job_id, out.path, n) for out, n in lengths],
+                )
+                conn.execute(
+                    "UPDATE jobs SET updated = ? WHERE job_id = ?",
+                    (now, self.job_id),
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        for out, n in lengths:
+            out.committed = n
+
+    def finish(self, status: str = "done") -> None:
+        """Mark the job finished so callers can tell a rerun has no work."""
+
+        with self.journal._lock:
+            self.journal._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE job_id = ?",
+                (status, time.time(), self.job_id),
+            )
@@ -0,0 +1,276 @@
+"""Content-addressed store for downloaded documents.
+
+A :class:`DocumentStore` keeps every downloaded file once, named by the
+SHA-256 of its bytes, and indexes it by ``documentIdentifier`` and
+format. Exports then link the stored object into per-application
+folders instead of writing another copy::
+
+    store = DocumentStore("~/.api-gui/documents")
+    fetched = store.export(client, ref, "out/14412875/CTNF.pdf")
+
+Before any network request the store checks whether the document is
+already indexed and whether its object is still on disk with the
+recorded size; only then is it linked instead of downloaded. The same
+bytes under different identifiers (an IDS reference filed in every
+continuation, say) share one object.
+
+Links are hard links where the filesystem allows them, reflinks
+(copy-on-write clones, Linux ``FICLONE``) otherwise, and plain copies as
+the last resort. Objects are made read-only, because a hard-linked export
+shares its bytes with the store.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+import stat
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Protocol
+
+from . import metrics
+from .batch_download import DocumentRef
+from .sqlite_db import SQLiteDB
+
+__all__ = ["LINK_MODES", "DocumentStore", "StoredDocument", "link_file"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    pages INTEGER,
+    stored REAL NOT NULL,
+    PRIMARY KEY (document_id, ext)
+);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256);
+"""
+
+# Link strategies tried, in order, by each mode.
+LINK_MODES = {
+    "auto": ("hardlink", "reflink", "copy"),
+    "hardlink": ("hardlink",),
+    "reflink": ("reflink",),
+    "copy": ("copy",),
+}
+
+_FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class DownloadClient(Protocol):
+    """Subset of :class:`USPTOODPClient` used by the store."""
+
+    def pfw_download(
+        self,
+        application_number: str,
+        document_id: str,
+        ext: str,
+        dest_path: str,
+    ) -> str: ...
+
+
+@dataclass(frozen=True)
+class StoredDocument:
+    """A document held by a :class:`DocumentStore`."""
+
+    document_id: str
+    ext: str
+    sha256: str
+    size: int
+    path: str
+    pages: int | None = None
+
+
+def _reflink(src: str, dest: str) -> None:
+    try:
+        import fcntl
+    except ImportError as exc:  # Windows
+        raise OSError("reflinks are not supported on this platform") from exc
+    with open(src, "rb") as source, open(dest, "wb") as target:
+        fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+
+
+def link_file(src: str, dest: str, mode: str = "auto") -> str:
+    """Place the contents of ``src`` at ``dest`` and return how.
+
+    ``mode`` is a key of :data:`LINK_MODES`; its strategies are tried in
+    order until one works. An existing ``dest`` is replaced atomically.
+
+    Raises:
+        OSError: When no strategy of ``mode`` works here.
+    """
+
+    tmp = f"{dest}.{threading.get_ident()}.link"
+    error: OSError | None = None
+    for method in LINK_MODES[mode]:
+        try:
+            if method == "hardlink":
+                os.link(src, tmp)
+            elif method == "reflink":
+                _reflink(src, tmp)
+            else:
+                shutil.copyfile(src, tmp)
+        except OSError as exc:
+            error = exc
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            continue
+        os.replace(tmp, dest)
+        return method
+    assert error is not None
+    raise error
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentStore(SQLiteDB):
+    """Deduplicating document store rooted at ``root``.
+
+    Args:
+        root: Directory holding ``objects/``, ``tmp/`` and the
+            ``index.sqlite`` index; created if missing.
+        link: How :meth:`export` places files; see :data:`LINK_MODES`.
+
+    Concurrent requests for the same document wait for a single download.
+    """
+
+    def __init__(self, root: str, link: str = "auto") -> None:
+        if link not in LINK_MODES:
+            raise ValueError(f"Unknown link mode {link!r}; use {tuple(LINK_MODES)}")
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.link = link
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        super().__init__(os.path.join(self.root, "index.sqlite"), _SCHEMA)
+        # Per-document lock and the number of fetches holding or awaiting it.
+        self._inflight: dict[tuple[str, str], tuple[threading.Lock, list[int]]] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def object_path(self, sha256: str) -> str:
+        """Return where the object with digest ``sha256`` is kept."""
+
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def get(self, document_id: str, ext: str = "pdf") -> StoredDocument | None:
+        """Return the stored document, or ``None`` if it is not intact.
+
+        A document counts as stored when it is indexed and its object
+        exists with the indexed size.
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, size, pages FROM documents"
+                " WHERE document_id = ? AND ext = ?",
+                (document_id, ext.lower()),
+            ).fetchone()
+        if row is None:
+            return None
+        sha256, size, pages = row
+        path = self.object_path(sha256)
+        try:
+            if os.stat(path).st_size != size:
+                return None
+        except OSError:
+            return None
+        return StoredDocument(document_id, ext.lower(), sha256, size, path, pages)
+
+    def add(
+        self,
+        document_id: str,
+        src_path: str,
+        ext: str = "pdf",
+        pages: int | None = None,
+    ) -> StoredDocument:
+        """Move the file at ``src_path`` into the store under ``document_id``.
+
+        If an object with the same bytes is already stored, ``src_path``
+        is deleted instead.
+        """
+
+        sha256 = _sha256(src_path)
+        size = os.path.getsize(src_path)
+        path = self.object_path(sha256)
+        if os.path.isfile(path) and os.path.getsize(path) == size:
+            os.remove(src_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.chmod(src_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(src_path, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)",
+                (document_id, ext.lower(), sha256, size, pages, time.time()),
+            )
+        return StoredDocument(document_id, ext.lower(), sha256, size, path, pages)
+
+    @contextmanager
+    def _key_lock(self, key: tuple[str, str]) -> Iterator[None]:
+        """Serialise fetches of ``key``; the lock is dropped once unused."""
+
+        with self._lock:
+            lock, users = self._inflight.setdefault(key, (threading.Lock(), [0]))
+            users[0] += 1
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                users[0] -= 1
+                if not users[0]:
+                    del self._inflight[key]
+
+    def fetch(
+        self, client: DownloadClient, ref: DocumentRef
+    ) -> tuple[StoredDocument, bool]:
+        """Return ``ref``'s stored document, downloading it if needed.
+
+        The second item is ``True`` when the document was downloaded.
+        A stored document whose page count disagrees with ``ref.pages``
+        is downloaded again.
+        """
+
+        key = (ref.document_id, ref.ext.lower())
+        with self._key_lock(key):
+            doc = self.get(*key)
+            if doc is not None and (
+                ref.pages is None or doc.pages is None or doc.pages == ref.pages
+            ):
+                return doc, False
+            name = _UNSAFE.sub("-", f"{ref.document_id}.{ref.ext}")
+            tmp = os.path.join(self.tmp_dir, name)
+            with metrics.stage("docstore.fetch", document=ref.document_id):
+                # DownloadManager resumes from ``tmp.part`` after a crash.
+                client.pfw_download(
+                    ref.application_number, ref.document_id, ref.ext, tmp
+                )
+                return self.add(ref.document_id, tmp, ref.ext, ref.pages), True
+
+    def export(self, client: DownloadClient, ref: DocumentRef, dest: str) -> bool:
+        """Place ``ref`` at ``dest`` from the store; return ``True`` if the
+        document had to be downloaded first."""
+
+        doc, fetched = self.fetch(client, ref)
+        parent = os.path.dirname(os.path.abspath(dest))
+        os.makedirs(parent, exist_ok=True)
+        link_file(doc.path, dest, self.link)
+        return fetched
@@ -1,7 +1,9 @@
 
-import os, requests, math, sys
+import os, requests, math, sys, time
 from typing import Optional, Callable
 
+from . import metrics
+
 class DownloadManager:
     """
     Simple resumable downloader using HTTP Range headers.
@@ -10,14 +12,32 @@ class DownloadManager:
         self.session = session or requests.Session()
         self.chunk_size = chunk_size
 
-    def download(self, url: str, dest_path: str, progress: Optional[Callable[[int,int], None]]=None) -> str:
+    def download(self, url: str, dest_path: str, progress: Optional[Callable[[int,int], None]]=None,
+                 op: Optional[str]=None) -> str:
         tmp_path = dest_path + ".part"
         headers = {}
         first_byte = 0
         if os.path.exists(tmp_path):
             first_byte = os.path.getsize(tmp_path)
             headers['Range'] = f"bytes={first_byte}-"
+        if not metrics.enabled():
+            return self._fetch(url, dest_path, tmp_path, headers, first_byte, progress)
+        # ``op`` names the operation in metrics; defaults to "download".
+        attrs = {"url": url, "resumed_from": first_byte, "status": 0, "bytes": 0}
+        start = time.perf_counter()
+        try:
+            return self._fetch(url, dest_path, tmp_path, headers, first_byte, progress, attrs)
+        except Exception as exc:
+            attrs["error"] = type(exc).__name__
+            raise
+        finally:
+            metrics.emit(metrics.Event("download", op or "download", time.perf_counter() - start, attrs))
+
+    def _fetch(self, url, dest_path, tmp_path, headers, first_byte, progress, attrs=None) -> str:
         with self.session.get(url, stream=True, headers=headers) as r:
+            if attrs is not None:
+                attrs["status"] = r.status_code
+                attrs["ttfb"] = r.elapsed.total_seconds()
             r.raise_for_status()
             total = int(r.headers.get('Content-Length', '0'))
             mode = 'ab' if first_byte else 'wb'
@@ -28,6 +48,8 @@ class DownloadManager:
                         continue
                     f.write(chunk)
                     downloaded += len(chunk)
+                    if attrs is not None:
+                        attrs["bytes"] += len(chunk)
                     if progress:
                         progress(downloaded, first_byte + total if total else downloaded)
         os.replace(tmp_path, dest_path)
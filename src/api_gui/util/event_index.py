@@ -0,0 +1,255 @@
+"""Timeline queries over the prosecution history of stored records.
+
+A :class:`~api_gui.util.record_store.RecordStore` keeps every record's
+``eventDataBag`` in its ``record_events`` table, refreshed in the same
+transaction as the record itself, so the index is always current and
+re-ingesting an unchanged record costs nothing. The table is indexed by
+``(code, date)`` for time-window scans and by ``(application, code,
+seq)`` for per-application probes, which turns the usual questions into
+index lookups instead of a scan of every record::
+
+    events = EventIndex(store)
+    events.timeline("14412875")                     # sorted Event list
+    events.window(["CTFR"], since=days_ago(30))     # final rejections
+    # final rejections in the last 30 days not yet followed by a response
+    events.awaiting(["CTFR"], ["A...", "RCEX", "N/AP"], since=days_ago(30))
+    # applications that went non-final -> final -> RCE, in that order
+    events.sequence(["CTNF", "CTFR", "RCEX"])
+
+Dates are ISO ``YYYY-MM-DD`` strings, which SQLite compares in order.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Union
+
+from .record_store import EVENTS, RecordStore
+
+__all__ = ["Event", "EventIndex", "Match", "days_ago"]
+
+DateLike = Union[dt.date, str]
+
+_TABLE = EVENTS.table
+
+
+@dataclass(frozen=True)
+class Event:
+    """One prosecution-history event of an application."""
+
+    application: str
+    seq: int
+    date: str | None
+    code: str | None
+    description: str | None
+
+
+@dataclass(frozen=True)
+class Match:
+    """An application matched by a query, with the event that matched."""
+
+    application: str
+    date: str | None
+    code: str | None
+
+
+def days_ago(days: int, today: dt.date | None = None) -> dt.date:
+    """Return the date ``days`` before ``today`` (default: the current date)."""
+
+    return (today or dt.date.today()) - dt.timedelta(days=days)
+
+
+def _day(value: DateLike | None) -> str | None:
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, dt.date) else str(value)[:10]
+
+
+def _marks(values: Sequence[str]) -> str:
+    if not values:
+        raise ValueError("At least one event code is required")
+    return ",".join("?" * len(values))
+
+
+class EventIndex:
+    """Query the ``record_events`` table of a :class:`RecordStore`."""
+
+    def __init__(self, store: RecordStore) -> None:
+        self.store = store
+
+    def codes(self) -> list[tuple[str, int]]:
+        """Return every event code with its number of events."""
+
+        return self.store.select(
+            f"SELECT code, COUNT(*) FROM {_TABLE}"
+            " WHERE code IS NOT NULL GROUP BY code ORDER BY COUNT(*) DESC"
+        )
+
+    def timeline(self, application: str) -> list[Event]:
+        """Return ``application``'s events, oldest first."""
+
+        rows = self.store.select(
+            f"SELECT * FROM {_TABLE} WHERE application = ? ORDER BY seq",
+            (application,),
+        )
+        return [Event(*row) for row in rows]
+
+    def window(
+        self,
+        codes: Iterable[str],
+        since: DateLike | None = None,
+        until: DateLike | None = None,
+        limit: int | None = None,
+    ) -> list[Event]:
+        """Return events with one of ``codes`` dated ``since..until``.
+
+        Both ends are inclusive and optional; results are newest first.
+        """
+
+        codes = list(codes)
+        sql = f"SELECT * FROM {_TABLE} WHERE code IN ({_marks(codes)})"
+        params: list[object] = list(codes)
+        if since is not None:
+            sql += " AND date >= ?"
+            params.append(_day(since))
+        if until is not None:
+            sql += " AND date <= ?"
+            params.append(_day(until))
+        sql += " ORDER BY date DESC, application"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [Event(*row) for row in self.store.select(sql, params)]
+
+    def awaiting(
+        self,
+        codes: Iterable[str],
+        responses: Iterable[str],
+        since: DateLike | None = None,
+        until: DateLike | None = None,
+        within_days: int | None = None,
+    ) -> list[Match]:
+        """Return applications whose latest ``codes`` event has no response.
+
+        An application matches when its most recent event with one of
+        ``codes`` falls in ``since..until`` and no event with one of
+        ``responses`` follows it (within ``within_days`` of it, if given).
+        Matches are newest first.
+        """
+
+        codes, responses = list(codes), list(responses)
+        sql = (
+            f"SELECT e.application, e.date, e.code FROM {_TABLE} AS e"
+            f" WHERE e.code IN ({_marks(codes)})"
+        )
+        params: list[object] = list(codes)
+        if since is not None:
+            sql += " AND e.date >= ?"
+            params.append(_day(since))
+        if until is not None:
+            sql += " AND e.date <= ?"
+            params.append(_day(until))
+        # ... and it is the application's latest such event ...
+        sql += (
+            f" AND NOT EXISTS (SELECT 1 FROM {_TABLE} AS x"
+            " WHERE x.application = e.application AND x.seq > e.seq"
+            f" AND x.code IN ({_marks(codes)}))"
+        )
+        params.extend(codes)
+        # ... with no response after it.
+        reply = (
+            f"SELECT 1 FROM {_TABLE} AS r WHERE r.application = e.application"
+            f" AND r.seq > e.seq AND r.code IN ({_marks(responses)})"
+        )
+        params.extend(responses)
+        if within_days is not None:
+            reply += " AND r.date <= date(e.date, ?)"
+            params.append(f"+{int(within_days)} days")
+        sql += f" AND NOT EXISTS ({reply}) ORDER BY e.date DESC, e.application"
+        return [Match(*row) for row in self.store.select(sql, params)]
+
+    def sequence(
+        self,
+        codes: Sequence[str],
+        since: DateLike | None = None,
+        until: DateLike | None = None,
+        within_days: int | None = None,
+    ) -> list[Match]:
+        """Return applications with events ``codes[0]``, ``codes[1]``, ... in
+        timeline order (other events may come between).
+
+        ``since``/``until`` bound the first event and ``within_days`` the
+        time from the first event to the last. Each match reports the
+        earliest completion of the sequence.
+        """
+
+        if not codes:
+            raise ValueError("At least one event code is required")
+        if within_days is None:
+            return self._earliest_sequence(codes, since, until)
+        aliases = [f"e{i}" for i in range(len(codes))]
+        first, last = aliases[0], aliases[-1]
+        joins = [f"{_TABLE} AS {first}"]
+        params: list[object] = []
+        for prev, alias, code in zip(aliases, aliases[1:], codes[1:]):
+            joins.append(
+                f"JOIN {_TABLE} AS {alias} ON {alias}.application"
+                f" = {prev}.application AND {alias}.seq > {prev}.seq"
+                f" AND {alias}.code = ?"
+            )
+            params.append(code)
+        where = [f"{first}.code = ?"]
+        params.append(codes[0])
+        if since is not None:
+            where.append(f"{first}.date >= ?")
+            params.append(_day(since))
+        if until is not None:
+            where.append(f"{first}.date <= ?")
+            params.append(_day(until))
+        where.append(f"{last}.date <= date({first}.date, ?)")
+        params.append(f"+{int(within_days)} days")
+        sql = (
+            f"SELECT {first}.application, MIN({last}.date) FROM "
+            + " ".join(joins)
+            + " WHERE "
+            + " AND ".join(where)
+            + f" GROUP BY {first}.application ORDER BY {first}.application"
+        )
+        rows = self.store.select(sql, params)
+        return [Match(app, date, codes[-1]) for app, date in rows]
+
+    def _earliest_sequence(
+        self,
+        codes: Sequence[str],
+        since: DateLike | None,
+        until: DateLike | None,
+    ) -> list[Match]:
+        # Without a time limit, matching each code at its earliest position
+        # after the previous one finds every sequence: one index probe per
+        # step and application instead of joining every combination.
+        last = "f.s0"
+        for _ in codes[1:]:
+            last = (
+                f"(SELECT MIN(seq) FROM {_TABLE} WHERE application"
+                f" = f.application AND code = ? AND seq > {last})"
+            )
+        # The outermost probe's placeholder comes first in the SQL text.
+        params: list[object] = list(reversed(codes[1:]))
+        starts = f"SELECT application, MIN(seq) AS s0 FROM {_TABLE} WHERE code = ?"
+        params.append(codes[0])
+        if since is not None:
+            starts += " AND date >= ?"
+            params.append(_day(since))
+        if until is not None:
+            starts += " AND date <= ?"
+            params.append(_day(until))
+        sql = (
+            f"SELECT m.application, e.date FROM (SELECT f.application,"
+            f" {last} AS last FROM ({starts} GROUP BY application) AS f) AS m"
+            f" JOIN {_TABLE} AS e ON e.application = m.application"
+            " AND e.seq = m.last ORDER BY m.application"
+        )
+        rows = self.store.select(sql, params)
+        return [Match(app, date, codes[-1]) for app, date in rows]
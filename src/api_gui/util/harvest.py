@@ -0,0 +1,579 @@
+"""Cross-application document harvesting pipeline.
+
+A harvest chains four stages connected by bounded queues::
+
+    search hits -> document listing -> document download -> manifest
+
+Each stage runs on its own threads, so listing the next applications
+overlaps with downloading documents for earlier ones, and the bounded
+queues keep a fast stage from racing ahead of a slow one.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import queue
+import threading
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Iterator, Protocol
+
+from . import metrics
+from .batch_download import (
+    DocumentRef,
+    document_filename,
+    document_refs,
+    filter_documents,
+)
+
+if TYPE_CHECKING:
+    from .checkpoint import Checkpoint
+    from .document_store import DocumentStore
+
+__all__ = [
+    "ManifestRow",
+    "HarvestSummary",
+    "Harvester",
+    "checkpointed_lookups",
+    "checkpointed_search",
+    "harvest_documents",
+    "search_application_numbers",
+]
+
+MANIFEST_FIELDS = (
+    "application_number",
+    "document_id",
+    "code",
+    "date",
+    "status",
+    "path",
+    "bytes",
+    "error",
+)
+
+_DONE = object()
+
+
+class HarvestClient(Protocol):
+    """Subset of :class:`USPTOODPClient` used by the harvester."""
+
+    def iter_search_pfw(
+        self,
+        payload: Mapping[str, Any],
+        page_size: int = 100,
+        max_records: int | None = None,
+    ) -> Iterator[dict[str, Any]]: ...
+
+    def pfw_documents(self, application_number: str) -> dict[str, Any]: ...
+
+    def pfw_download(
+        self,
+        application_number: str,
+        document_id: str,
+        ext: str,
+        dest_path: str,
+    ) -> str: ...
+
+
+@dataclass
+class ManifestRow:
+    """One line of the harvest manifest."""
+
+    application_number: str
+    document_id: str = ""
+    code: str = ""
+    date: str = ""
+    status: str = ""
+    path: str = ""
+    bytes: int = 0
+    error: str = ""
+
+
+@dataclass
+class HarvestSummary:
+    """Counts collected while a harvest runs."""
+
+    applications: int = 0
+    documents: int = 0
+    downloaded: int = 0
+    linked: int = 0
+    skipped: int = 0
+    failed: int = 0
+    resumed: int = 0
+    manifest_path: str = ""
+    rows: list[ManifestRow] = field(default_factory=list, repr=False)
+
+
+class _ManifestWriter:
+    """Append manifest rows as CSV or JSONL depending on the extension.
+
+    Under a checkpoint the file is a :class:`CheckpointedOutput`; rows are
+    made durable by the harvest's commits rather than flushed one by one.
+    """
+
+    def __init__(self, path: str, checkpoint: Checkpoint | None = None) -> None:
+        self.path = path
+        self._jsonl = path.lower().endswith((".jsonl", ".ndjson"))
+        self.output = checkpoint.output(path) if checkpoint is not None else None
+        if self.output is not None:
+            is_new = self.output.is_new
+            self._handle: Any = self.output
+        else:
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._handle = open(path, "a", encoding="utf-8", newline="")
+        self._csv = None
+        if not self._jsonl:
+            self._csv = csv.DictWriter(self._handle, fieldnames=MANIFEST_FIELDS)
+            if is_new:
+                self._csv.writeheader()
+
+    def write(self, row: ManifestRow) -> None:
+        if self._csv is not None:
+            self._csv.writerow(asdict(row))
+        else:
+            self._handle.write(json.dumps(asdict(row)) + "\n")
+        if self.output is None:
+            self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class Harvester:
+    """Run a bounded, multi-stage document harvest.
+
+    Args:
+        client: Client providing search, listing and download calls.
+        dest_dir: Root directory; files land in ``dest_dir/<application>/``.
+        codes: Optional ``documentCode`` allow-list, e.g. ``["CTNF"]``.
+        date_from: Optional inclusive lower bound on ``officialDate``.
+        date_to: Optional inclusive upper bound on ``officialDate``.
+        manifest_path: CSV or JSONL manifest; defaults to
+            ``dest_dir/manifest.jsonl``.
+        list_workers: Concurrent ``pfw_documents`` calls.
+        download_workers: Concurrent ``pfw_download`` calls.
+        queue_size: Capacity of each inter-stage queue.
+        ext: Download format to select.
+        progress: Optional callback receiving every manifest row.
+        checkpoint: Journal job to resume from; see below.
+        store: Document store to link files from; documents it does not
+            hold yet are downloaded into it first (status ``linked``
+            otherwise).
+
+    With a ``checkpoint`` every manifest row is committed to the journal
+    together with the document it describes. A restarted harvest skips
+    applications whose documents all finished, re-lists the others, skips
+    their finished documents, and drops manifest rows written after the
+    last commit, so each finished document appears in the manifest once.
+    A failed document is retried on resume and keeps the rows of its
+    failed attempts ahead of its final one.
+    """
+
+    def __init__(
+        self,
+        client: HarvestClient,
+        dest_dir: str,
+        codes: Sequence[str] | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        manifest_path: str | None = None,
+        list_workers: int = 4,
+        download_workers: int = 8,
+        queue_size: int = 64,
+        ext: str = "pdf",
+        progress: Callable[[ManifestRow], None] | None = None,
+        checkpoint: Checkpoint | None = None,
+        store: DocumentStore | None = None,
+    ) -> None:
+        self.client = client
+        self.dest_dir = dest_dir
+        self.codes = codes
+        self.date_from = date_from
+        self.date_to = date_to
+        self.manifest_path = manifest_path or os.path.join(
+            dest_dir, "manifest.jsonl"
+        )
+        self.list_workers = max(1, list_workers)
+        self.download_workers = max(1, download_workers)
+        self.queue_size = max(1, queue_size)
+        self.ext = ext
+        self.progress = progress
+        self.checkpoint = checkpoint
+        self.store = store
+        self._stop = threading.Event()
+
+    def cancel(self) -> None:
+        """Ask every stage to stop after its current item."""
+
+        self._stop.set()
+
+    # -- stages ---------------------------------------------------------
+    def _produce(
+        self,
+        applications: Iterable[str],
+        apps_q: queue.Queue[Any],
+        errors: list[BaseException],
+    ) -> None:
+        try:
+            for app in applications:
+                if self._stop.is_set():
+                    break
+                apps_q.put(app)
+        except BaseException as exc:  # surfaced from run()
+            errors.append(exc)
+        finally:
+            for _ in range(self.list_workers):
+                apps_q.put(_DONE)
+
+    def _list(
+        self,
+        apps_q: queue.Queue[Any],
+        docs_q: queue.Queue[Any],
+        rows_q: queue.Queue[Any],
+    ) -> None:
+        while True:
+            app = apps_q.get()
+            if app is _DONE:
+                return
+            if self._stop.is_set():
+                continue
+            try:
+                listing = self.client.pfw_documents(app)
+            except Exception as exc:
+                rows_q.put(
+                    ManifestRow(app, status="list_failed", error=str(exc))
+                )
+                continue
+            refs = filter_documents(
+                document_refs(listing, app, ext=self.ext),
+                codes=self.codes,
+                date_from=self.date_from,
+                date_to=self.date_to,
+            )
+            listed = len(refs)
+            if self.checkpoint is not None:
+                refs = [
+                    ref
+                    for ref in refs
+                    if not self.checkpoint.done("document", _doc_key(ref))
+                ]
+            rows_q.put(("listed", app, len(refs), listed - len(refs)))
+            for ref in refs:
+                docs_q.put(ref)
+
+    def _download(
+        self,
+        docs_q: queue.Queue[Any],
+        rows_q: queue.Queue[Any],
+    ) -> None:
+        while True:
+            ref = docs_q.get()
+            if ref is _DONE:
+                return
+            if self._stop.is_set():
+                continue
+            rows_q.put(self._fetch(ref))
+
+    def _fetch(self, ref: DocumentRef) -> ManifestRow:
+        app_dir = os.path.join(self.dest_dir, ref.application_number)
+        dest = os.path.join(app_dir, document_filename(ref))
+        row = ManifestRow(
+            ref.application_number,
+            document_id=ref.document_id,
+            code=ref.code,
+            date=ref.date,
+            path=dest,
+        )
+        # DownloadManager only renames the ``.part`` file once the body is
+        # complete, so an existing destination file is a finished download.
+        if os.path.isfile(dest):
+            row.status = "skipped"
+            row.bytes = os.path.getsize(dest)
+            return row
+        try:
+            os.makedirs(app_dir, exist_ok=True)
+            fetched = True
+            if self.store is not None:
+                fetched = self.store.export(self.client, ref, dest)
+            else:
+                self.client.pfw_download(
+                    ref.application_number, ref.document_id, ref.ext, dest
+                )
+        except Exception as exc:
+            row.status = "failed"
+            row.error = str(exc)
+        else:
+            row.status = "downloaded" if fetched else "linked"
+            row.bytes = os.path.getsize(dest)
+        return row
+
+    # -- driver ---------------------------------------------------------
+    def run(self, applications: Iterable[str]) -> HarvestSummary:
+        """Harvest documents for ``applications``.
+
+        Args:
+            applications: Application numbers; may be a lazy iterator such
+                as the output of :func:`search_application_numbers`.
+
+        Returns:
+            A :class:`HarvestSummary` with per-status counts and rows.
+
+        Raises:
+            Exception: Re-raises an error from the application source after
+                in-flight work has been drained and recorded, or an error
+                from ``progress`` once every stage has stopped.
+        """
+
+        os.makedirs(self.dest_dir, exist_ok=True)
+        checkpoint = self.checkpoint
+        if checkpoint is not None:
+            applications = checkpoint.pending("application", applications)
+        apps_q: queue.Queue[Any] = queue.Queue(self.queue_size)
+        docs_q: queue.Queue[Any] = queue.Queue(self.queue_size)
+        rows_q: queue.Queue[Any] = queue.Queue(self.queue_size)
+        errors: list[BaseException] = []
+        summary = HarvestSummary(manifest_path=self.manifest_path)
+
+        producer = threading.Thread(
+            target=self._produce, args=(applications, apps_q, errors)
+        )
+        listers = [
+            threading.Thread(target=self._list, args=(apps_q, docs_q, rows_q))
+            for _ in range(self.list_workers)
+        ]
+        downloaders = [
+            threading.Thread(target=self._download, args=(docs_q, rows_q))
+            for _ in range(self.download_workers)
+        ]
+
+        def close_stages() -> None:
+            producer.join()
+            for t in listers:
+                t.join()
+            for _ in downloaders:
+                docs_q.put(_DONE)
+            for t in downloaders:
+                t.join()
+            rows_q.put(_DONE)
+
+        for t in (producer, *listers, *downloaders):
+            t.daemon = True
+            t.start()
+        closer = threading.Thread(target=close_stages, daemon=True)
+        closer.start()
+
+        # Documents still outstanding per application; None once one failed.
+        remaining: dict[str, int | None] = {}
+        with metrics.stage("harvest", dest=self.dest_dir) as info:
+            writer = _ManifestWriter(self.manifest_path, checkpoint)
+            try:
+                while True:
+                    item = rows_q.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, tuple):
+                        _, app, count, resumed = item
+                        summary.applications += 1
+                        summary.documents += count
+                        summary.resumed += resumed
+                        if checkpoint is not None:
+                            remaining[app] = count
+                            if not count:
+                                checkpoint.commit(
+                                    items=[("application", app, "done")]
+                                )
+                        continue
+                    if checkpoint is not None:
+                        writer.write(item)
+                        checkpoint.commit(
+                            items=self._finished(item, remaining),
+                            outputs=[writer.output] if writer.output else [],
+                        )
+                    if item.status == "list_failed":
+                        summary.applications += 1
+                        summary.failed += 1
+                    elif item.status == "downloaded":
+                        summary.downloaded += 1
+                    elif item.status == "linked":
+                        summary.linked += 1
+                    elif item.status == "skipped":
+                        summary.skipped += 1
+                    else:
+                        summary.failed += 1
+                    if checkpoint is None:
+                        writer.write(item)
+                    summary.rows.append(item)
+                    info["items"] += 1
+                    if self.progress:
+                        self.progress(item)
+            except BaseException:
+                # Stop the stages and drain their rows, or threads blocked
+                # on the full bounded queues would never exit.
+                self._stop.set()
+                while rows_q.get() is not _DONE:
+                    pass
+                closer.join()
+                raise
+            finally:
+                writer.close()
+        closer.join()
+        if errors:
+            raise errors[0]
+        if checkpoint is not None and not (self._stop.is_set() or summary.failed):
+            checkpoint.finish()
+        return summary
+
+    @staticmethod
+    def _finished(
+        row: ManifestRow, remaining: dict[str, int | None]
+    ) -> list[tuple[str, str, str]]:
+        """Journal items completed by ``row``."""
+
+        app = row.application_number
+        if row.status == "list_failed":
+            return []
+        items = [("document", f"{app}/{row.document_id}", row.status)]
+        left = remaining.get(app)
+        if row.status not in ("downloaded", "linked", "skipped"):
+            remaining[app] = None
+        elif left is not None:
+            remaining[app] = left - 1
+            if left == 1:
+                items.append(("application", app, "done"))
+        return items
+
+
+def _doc_key(ref: DocumentRef) -> str:
+    return f"{ref.application_number}/{ref.document_id}"
+
+
+def search_application_numbers(
+    client: HarvestClient,
+    payload: Mapping[str, Any],
+    page_size: int = 100,
+    max_records: int | None = None,
+) -> Iterator[str]:
+    """Yield ``applicationNumberText`` for every search hit."""
+
+    for record in client.iter_search_pfw(
+        payload, page_size=page_size, max_records=max_records
+    ):
+        app = record.get("applicationNumberText")
+        if app:
+            yield str(app)
+
+
+def harvest_documents(
+    client: HarvestClient,
+    payload: Mapping[str, Any],
+    dest_dir: str,
+    codes: Sequence[str] | None = None,
+    max_records: int | None = None,
+    **options: Any,
+) -> HarvestSummary:
+    """Search, list and download matching documents in one pipeline.
+
+    Args:
+        client: Client providing search, listing and download calls.
+        payload: ``search_pfw`` payload selecting the applications.
+        dest_dir: Root directory for downloads and the manifest.
+        codes: Optional ``documentCode`` allow-list, e.g. ``["CTNF"]``.
+        max_records: Optional cap on the number of search hits.
+        **options: Extra :class:`Harvester` keyword arguments.
+
+    Returns:
+        The :class:`HarvestSummary` for the run.
+    """
+
+    harvester = Harvester(client, dest_dir, codes=codes, **options)
+    return harvester.run(
+        search_application_numbers(client, payload, max_records=max_records)
+    )
+
+
+def checkpointed_search(
+    client: Any,
+    payload: Mapping[str, Any],
+    out_path: str,
+    checkpoint: Checkpoint,
+    page_size: int = 100,
+    max_records: int | None = None,
+    **search_options: Any,
+) -> int:
+    """Write search hits to ``out_path`` as JSONL, resuming ``checkpoint``.
+
+    The output and the number of records written are committed after every
+    page, so a restarted search continues at the next uncommitted page and
+    never writes a hit twice. ``search_options`` are passed on to
+    ``iter_search_pfw`` (``validator``, ``fields``, ``stream``).
+
+    Returns:
+        The number of records written by this call.
+    """
+
+    done = int(checkpoint.cursor("records", 0))
+    body = dict(payload)
+    start = int((body.get("pagination") or {}).get("offset", 0))
+    body["pagination"] = {"offset": start + done, "limit": page_size}
+    limit = None if max_records is None else max_records - done
+    written = 0
+    with checkpoint.output(out_path) as output, metrics.stage(
+        "search.checkpointed", resumed_from=done
+    ) as info:
+        if limit is None or limit > 0:
+            for record in client.iter_search_pfw(
+                body, page_size=page_size, max_records=limit, **search_options
+            ):
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                written += 1
+                if written % page_size == 0:
+                    checkpoint.commit({"records": done + written}, outputs=[output])
+        checkpoint.commit({"records": done + written}, outputs=[output])
+        info["items"] = written
+    checkpoint.finish()
+    return written
+
+
+def checkpointed_lookups(
+    client: Any,
+    applications: Iterable[str],
+    out_path: str,
+    checkpoint: Checkpoint,
+    workers: int = 4,
+    batch: int = 100,
+) -> dict[str, str]:
+    """Look up ``applications`` into ``out_path``, resuming ``checkpoint``.
+
+    Applications already committed are skipped; results are committed in
+    batches of ``batch``. Failed lookups are left pending for the next run.
+
+    Returns:
+        Error messages keyed by application number.
+    """
+
+    from ..clients.dispatch import bounded_map
+
+    failures: dict[str, str] = {}
+    items: list[tuple[str, str, str]] = []
+    pending = checkpoint.pending("lookup", applications)
+    with checkpoint.output(out_path) as output, metrics.stage(
+        "lookup.checkpointed"
+    ) as info:
+        for app, data, exc in bounded_map(client.pfw_lookup, pending, workers):
+            if exc is not None:
+                failures[app] = str(exc)
+                continue
+            assert data is not None
+            for record in data.get("patentFileWrapperDataBag") or [data]:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            items.append(("lookup", app, "done"))
+            info["items"] += 1
+            if len(items) >= batch:
+                checkpoint.commit(items=items, outputs=[output])
+                items = []
+        checkpoint.commit(items=items, outputs=[output])
+    if not failures:
+        checkpoint.finish()
+    return failures
@@ -0,0 +1,334 @@
+"""In-process instrumentation: event hooks, metrics and exporters.
+
+Hot paths report what they did by calling :func:`emit` with an
+:class:`Event`. With nothing subscribed this is a single truthiness check,
+so instrumentation costs nothing unless it is switched on::
+
+    metrics = MetricsRegistry()
+    trace = JsonlTraceWriter("trace.jsonl")
+    subscribe(metrics)
+    subscribe(trace)
+    ...
+    metrics.write_prometheus("metrics.prom")
+
+Event kinds:
+
+* ``request`` -- one API call; ``name`` is the operation's ``op_id`` (or the
+  URL path). Attributes: ``method``, ``path``, ``status``, ``ttfb`` (seconds
+  until the response headers were parsed), ``bytes_out``, ``bytes_in`` and,
+  for failures without a response, ``error``.
+* ``download`` -- one file download. Attributes: ``url``, ``status``,
+  ``bytes`` (received this time), ``resumed_from`` and ``ttfb``.
+* ``retry`` -- a failed API call about to be retried; ``seconds`` is the
+  delay before the next try. Attributes: ``attempt`` (failures so far),
+  ``status`` (0 without a response) and ``error``.
+* ``stage`` -- an export or ingest stage timed with :func:`stage`; ``items``
+  counts the records it handled.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+__all__ = [
+    "Event",
+    "Histogram",
+    "MetricsRegistry",
+    "JsonlTraceWriter",
+    "emit",
+    "enabled",
+    "stage",
+    "subscribe",
+]
+
+_LOGGER = logging.getLogger(__name__)
+
+Hook = Callable[["Event"], None]
+
+# Seconds; spans cached lookups through slow bulk downloads.
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Bytes; 1 KiB to 1 GiB in powers of four.
+SIZE_BUCKETS = tuple(float(1024 * 4**i) for i in range(11))
+
+
+@dataclass
+class Event:
+    """One instrumented operation."""
+
+    kind: str
+    name: str
+    seconds: float
+    attrs: dict[str, Any] = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+
+
+# Replaced wholesale on (un)subscribe so ``emit`` can read it without a lock.
+_hooks: tuple[Hook, ...] = ()
+_hooks_lock = threading.Lock()
+
+
+def subscribe(hook: Hook) -> Callable[[], None]:
+    """Call ``hook`` for every event; return a function that unsubscribes."""
+
+    global _hooks
+    with _hooks_lock:
+        _hooks = (*_hooks, hook)
+
+    def unsubscribe() -> None:
+        global _hooks
+        with _hooks_lock:
+            _hooks = tuple(h for h in _hooks if h is not hook)
+
+    return unsubscribe
+
+
+def enabled() -> bool:
+    """Return ``True`` when at least one hook is subscribed."""
+
+    return bool(_hooks)
+
+
+def emit(event: Event) -> None:
+    """Deliver ``event`` to every subscriber on the calling thread.
+
+    A failing hook is logged and skipped; instrumentation never breaks the
+    operation it observes.
+    """
+
+    for hook in _hooks:
+        try:
+            hook(event)
+        except Exception:  # pragma: no cover - defensive
+            _LOGGER.exception("Metrics hook %r failed", hook)
+
+
+@contextmanager
+def stage(name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+    """Time a block as a ``stage`` event.
+
+    The yielded dict becomes the event's attributes, so the block can add
+    counts as it goes (``info["items"] += 1``). A block that raises is
+    still reported, with an ``error`` attribute.
+    """
+
+    attrs.setdefault("items", 0)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as exc:
+        attrs["error"] = type(exc).__name__
+        raise
+    finally:
+        if _hooks:
+            emit(Event("stage", name, time.perf_counter() - start, attrs))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float] = TIME_BUCKETS) -> None:
+        self.bounds = tuple(sorted(bounds))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Return ``(upper bound, observations <= bound)`` pairs."""
+
+        out = []
+        running = 0
+        for bound, n in zip((*self.bounds, math.inf), self.counts):
+            running += n
+            out.append((bound, running))
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Estimate quantile ``q`` as the upper bound of its bucket."""
+
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        for bound, running in self.cumulative():
+            if running >= rank:
+                return bound
+        return math.inf  # pragma: no cover - last bucket is +Inf
+
+
+_Labels = tuple[tuple[str, str], ...]
+
+_HELP = {
+    "api_requests_total": "API requests by operation and HTTP status.",
+    "api_request_seconds": "Total API request time.",
+    "api_request_ttfb_seconds": "Time until response headers arrived.",
+    "api_request_bytes_out_total": "Request body bytes sent.",
+    "api_request_bytes_in_total": "Response body bytes received.",
+    "api_response_bytes": "Response body size.",
+    "downloads_total": "File downloads by HTTP status.",
+    "download_seconds": "File download time.",
+    "download_bytes_total": "File bytes received.",
+    "api_retries_total": "Retried API calls by operation and HTTP status.",
+    "api_retry_delay_seconds": "Delay before retrying an API call.",
+    "stage_seconds": "Export and ingest stage time.",
+    "stage_items_total": "Records handled by export and ingest stages.",
+}
+
+
+class MetricsRegistry:
+    """Counters and histograms fed by events.
+
+    An instance is itself a hook: ``subscribe(registry)`` folds every event
+    into the metrics listed in the module docstring. Metrics can also be
+    recorded directly with :meth:`inc` and :meth:`observe`.
+    """
+
+    def __init__(self) -> None:
+        self.counters: dict[str, dict[_Labels, float]] = {}
+        self.histograms: dict[str, dict[_Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: dict[str, Any]) -> _Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Sequence[float] = TIME_BUCKETS,
+        **labels: Any,
+    ) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def histogram(self, name: str, **labels: Any) -> Histogram | None:
+        return self.histograms.get(name, {}).get(self._labels(labels))
+
+    def counter(self, name: str, **labels: Any) -> float:
+        return self.counters.get(name, {}).get(self._labels(labels), 0)
+
+    def __call__(self, event: Event) -> None:
+        a = event.attrs
+        if event.kind == "request":
+            op = event.name
+            self.inc("api_requests_total", op=op, status=a.get("status", 0))
+            self.observe("api_request_seconds", event.seconds, op=op)
+            if a.get("ttfb") is not None:
+                self.observe("api_request_ttfb_seconds", a["ttfb"], op=op)
+            self.inc("api_request_bytes_out_total", a.get("bytes_out", 0), op=op)
+            if a.get("bytes_in") is not None:
+                self.inc("api_request_bytes_in_total", a["bytes_in"], op=op)
+                self.observe("api_response_bytes", a["bytes_in"], SIZE_BUCKETS, op=op)
+        elif event.kind == "download":
+            op = event.name
+            self.inc("downloads_total", op=op, status=a.get("status", 0))
+            self.observe("download_seconds", event.seconds, op=op)
+            self.inc("download_bytes_total", a.get("bytes", 0), op=op)
+        elif event.kind == "retry":
+            op = event.name
+            self.inc("api_retries_total", op=op, status=a.get("status", 0))
+            self.observe("api_retry_delay_seconds", event.seconds, op=op)
+        elif event.kind == "stage":
+            self.observe("stage_seconds", event.seconds, stage=event.name)
+            self.inc("stage_items_total", a.get("items", 0), stage=event.name)
+
+    # -- exporters ------------------------------------------------------
+    @staticmethod
+    def _fmt_labels(labels: _Labels, extra: tuple[str, str] | None = None) -> str:
+        pairs = [*labels, extra] if extra else list(labels)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+
+        lines: list[str] = []
+        with self._lock:
+            for name in sorted(self.counters):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(self.counters[name].items()):
+                    lines.append(f"{name}{self._fmt_labels(labels)} {_num(value)}")
+            for name in sorted(self.histograms):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, hist in sorted(self.histograms[name].items()):
+                    for bound, running in hist.cumulative():
+                        le = ("le", "+Inf" if bound == math.inf else _num(bound))
+                        lines.append(
+                            f"{name}_bucket{self._fmt_labels(labels, le)} {running}"
+                        )
+                    lab = self._fmt_labels(labels)
+                    lines.append(f"{name}_sum{lab} {_num(hist.sum)}")
+                    lines.append(f"{name}_count{lab} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> str:
+        """Write :meth:`render_prometheus` to ``path``.
+
+        The file suits node_exporter's textfile collector or a CI artifact.
+        """
+
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(self.render_prometheus())
+        return path
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class JsonlTraceWriter:
+    """Hook appending every event to a JSONL trace file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._handle = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event) -> None:
+        line = json.dumps(asdict(event), default=str)
+        with self._lock:
+            if not self._handle.closed:
+                self._handle.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._handle.close()
+
+    def __enter__(self) -> JsonlTraceWriter:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,140 @@
+"""Join petition decisions to their patent file wrapper records.
+
+Petition searches return one decision per row, and a busy application can
+carry dozens of them. :func:`enrich_petitions` resolves each decision's
+``applicationNumberText`` through a :class:`LookupCache`, so enriching a
+result set costs one ``pfw_lookup`` per unique application no matter how
+many decisions share it, and lookups for different applications run
+concurrently.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Protocol
+
+__all__ = ["LookupCache", "enrich_petitions", "pfw_record"]
+
+
+class LookupClient(Protocol):
+    """Subset of :class:`USPTOODPClient` used by the join."""
+
+    def pfw_lookup(self, application_number: str) -> dict[str, Any]: ...
+
+
+def pfw_record(response: Mapping[str, Any]) -> dict[str, Any] | None:
+    """Return the record of a ``pfw_lookup`` response, or ``None``."""
+
+    bag = response.get("patentFileWrapperDataBag") or []
+    return bag[0] if bag else None
+
+
+class LookupCache:
+    """Thread-safe, single-flight cache of application lookups.
+
+    Concurrent requests for the same key share one call to ``fetch``;
+    later requests get the stored result without calling it again. A
+    failed ``fetch`` is re-raised to the requests already waiting on it
+    but not stored, so the next request retries. With ``maxsize`` the least recently used
+    entries are evicted once the cache is full.
+
+    Args:
+        fetch: Called with an application number on a cache miss.
+        maxsize: Entries to keep; ``None`` keeps everything.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], dict[str, Any] | None],
+        maxsize: int | None = None,
+    ) -> None:
+        self.fetch = fetch
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Future[dict[str, Any] | None]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached result for ``key``, fetching it on a miss."""
+
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                owner = False
+            else:
+                future = Future()
+                self._entries[key] = future
+                self.misses += 1
+                owner = True
+                if self.maxsize is not None:
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        if owner:
+            try:
+                future.set_result(self.fetch(key))
+            except BaseException as exc:
+                with self._lock:
+                    if self._entries.get(key) is future:
+                        del self._entries[key]
+                future.set_exception(exc)
+        return future.result()
+
+
+def enrich_petitions(
+    client: LookupClient,
+    decisions: Iterable[Mapping[str, Any]],
+    workers: int = 8,
+    cache: LookupCache | None = None,
+    strict: bool = False,
+) -> Iterator[tuple[Mapping[str, Any], dict[str, Any] | None]]:
+    """Yield ``(decision, pfw_record)`` pairs in input order.
+
+    Decisions are read lazily, with at most ``workers * 4`` lookups in
+    flight, so an iterator over many search pages streams straight through.
+
+    Args:
+        client: Client providing ``pfw_lookup``.
+        decisions: ``petitionDecisionDataBag`` entries.
+        workers: Concurrent lookups.
+        cache: Cache to share between calls; a fresh one is used otherwise.
+        strict: Re-raise lookup errors instead of pairing the decision with
+            ``None``.
+    """
+
+    if cache is None:
+        cache = LookupCache(lambda app: pfw_record(client.pfw_lookup(app)))
+    window = max(1, workers) * 4
+
+    def resolve(app: str) -> dict[str, Any] | None:
+        try:
+            return cache.get(app)
+        except Exception:
+            if strict:
+                raise
+            return None
+
+    pending: deque[tuple[Mapping[str, Any], Future[Any] | None]] = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for decision in decisions:
+            app = str(decision.get("applicationNumberText") or "").strip()
+            pending.append((decision, pool.submit(resolve, app) if app else None))
+            if len(pending) >= window:
+                done, future = pending.popleft()
+                yield done, future.result() if future else None
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result() if future else None
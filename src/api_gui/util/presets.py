@@ -4,9 +4,9 @@ from pathlib import Path
 from typing import Any
 
 DEFAULT_DIR = Path.home() / ".api-gui" / "presets"
-DEFAULT_DIR.mkdir(parents=True, exist_ok=True)
 
 def save_preset(name: str, payload: dict) -> str:
+    DEFAULT_DIR.mkdir(parents=True, exist_ok=True)
     path = DEFAULT_DIR / f"{name}.json"
     with open(path, "w", encoding="utf-8") as f:
         json.dump(payload, f, indent=2, ensure_ascii=False)
@@ -1,18 +1,151 @@
-
-import json, os, glob
+import copy, json, os, glob, threading, time
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Mapping
+
+PROVIDERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "providers")
 
 @dataclass
 class Provider:
     key: str
     meta: dict
 
+
+@dataclass
+class _Entry:
+    stamp: tuple[int, int]
+    provider: Provider
+    validator: Any = None
+    compiled: bool = False
+
+
+class ProviderRegistry:
+    """Parsed ``provider.*.json`` files, cached until a file's mtime changes.
+
+    The directory is re-listed and the files stat'ed at most once every
+    ``check_interval`` seconds; only new or modified files are parsed again.
+    Request-schema validators are compiled once per file version, on first
+    use, so validating a payload is a dict lookup plus the schema check.
+    """
+
+    def __init__(self, dir_path: str, check_interval: float = 1.0) -> None:
+        self.dir_path = os.path.abspath(dir_path)
+        self.check_interval = check_interval
+        self._entries: dict[str, _Entry] = {}
+        self._by_op: dict[str, _Entry] = {}
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> dict[str, _Entry]:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked < self.check_interval:
+                return self._entries
+            self._checked = now
+            seen = {}
+            for fp in glob.glob(os.path.join(self.dir_path, "provider.*.json")):
+                st = os.stat(fp)
+                stamp = (st.st_mtime_ns, st.st_size)
+                entry = self._entries.get(fp)
+                if entry is None or entry.stamp != stamp:
+                    with open(fp, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    key = f"{meta.get('provider')}::{meta['operation']['op_id']}"
+                    entry = _Entry(stamp, Provider(key=key, meta=meta))
+                seen[fp] = entry
+            self._entries = seen
+            self._by_op = {}
+            for entry in seen.values():
+                self._by_op[entry.provider.key] = entry
+                self._by_op[entry.provider.meta["operation"]["op_id"]] = entry
+            return seen
+
+    def providers(self) -> dict[str, Provider]:
+        """Return providers keyed by ``"<provider>::<op_id>"``."""
+
+        return {e.provider.key: e.provider for e in self._refresh().values()}
+
+    def _entry(self, op: str) -> _Entry:
+        self._refresh()
+        return self._by_op[op]
+
+    def __contains__(self, op: object) -> bool:
+        self._refresh()
+        return op in self._by_op
+
+    def get(self, op: str) -> Provider:
+        """Return the provider for an ``op_id`` or full provider key."""
+
+        return self._entry(op).provider
+
+    def validator(self, op: str) -> Any:
+        """Return the compiled request validator for ``op`` (or ``None``)."""
+
+        entry = self._entry(op)
+        if not entry.compiled:
+            schema = (entry.provider.meta["operation"].get("request") or {}).get("schema")
+            if schema:
+                from jsonschema import Draft7Validator
+                from jsonschema.validators import validator_for
+
+                cls = validator_for(schema, default=Draft7Validator)
+                cls.check_schema(schema)
+                entry.validator = cls(schema)
+            entry.compiled = True
+        return entry.validator
+
+    def precompile(self) -> None:
+        """Compile every operation's request validator up front."""
+
+        for key in self.providers():
+            self.validator(key)
+
+    def validate(self, op: str, payload: Mapping[str, Any]) -> None:
+        """Check ``payload`` against ``op``'s request schema.
+
+        Raises:
+            RequestValidationError: If the payload does not match; the
+                exception lists every violation, not just the first.
+        """
+
+        validator = self.validator(op)
+        if validator is None:
+            return
+        errors = sorted(validator.iter_errors(dict(payload)), key=lambda e: [str(p) for p in e.path])
+        if errors:
+            # Imported here: clients.base pulls in requests, which the GUI
+            # keeps off its startup path.
+            from ..clients.base import RequestValidationError
+
+            messages = [
+                f"{'/'.join(str(p) for p in e.path) or '<root>'}: {e.message}"
+                for e in errors
+            ]
+            raise RequestValidationError(op, messages)
+
+
+_REGISTRIES: dict[str, ProviderRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_registry(dir_path: str = PROVIDERS_DIR) -> ProviderRegistry:
+    """Return the shared registry for ``dir_path``."""
+
+    path = os.path.abspath(dir_path)
+    with _REGISTRIES_LOCK:
+        registry = _REGISTRIES.get(path)
+        if registry is None:
+            registry = _REGISTRIES[path] = ProviderRegistry(path)
+        return registry
+
+
 def load_providers(dir_path: str) -> dict[str, Provider]:
-    out = {}
-    for fp in glob.glob(os.path.join(dir_path, "provider.*.json")):
-        with open(fp, "r", encoding="utf-8") as f:
-            meta = json.load(f)
-        key = f"{meta.get('provider')}::{meta['operation']['op_id']}"
-        out[key] = Provider(key=key, meta=meta)
-    return out
+    """Return private copies of the providers in ``dir_path``.
+
+    The registry's own :class:`Provider` objects are shared process-wide,
+    so callers get deep copies they are free to modify.
+    """
+
+    return {
+        key: Provider(key=p.key, meta=copy.deepcopy(p.meta))
+        for key, p in get_registry(dir_path).providers().items()
+    }
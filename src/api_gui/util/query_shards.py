@@ -0,0 +1,322 @@
+"""Split a search into date-range shards and run them in parallel.
+
+Deep ``pagination.offset`` values get slower on the search endpoint and
+eventually fail, so large result sets are better fetched as many shallow
+searches. :func:`plan_shards` adds a ``rangeFilters`` entry on a date
+field (``applicationMetaData.filingDate`` by default), probes each range's
+``count`` with a one-record search, and splits ranges until every shard
+holds at most ``max_shard`` hits. Ranges are split in proportion to their
+count, so dense recent years end up in narrow shards and sparse early
+years in wide ones; adjacent small shards are merged again afterwards.
+
+:func:`iter_sharded` runs the shards concurrently and merges their hits
+into one stream, dropping duplicates by ``applicationNumberText``. Shards
+are disjoint whole-day ranges, so duplicates only appear when a record
+changes while the search runs.
+
+Records without a value in the shard field match no range; compare
+:attr:`ShardPlan.total` with :attr:`ShardPlan.covered` to see how many.
+"""
+
+from __future__ import annotations
+
+import copy
+import math
+import queue
+import threading
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Protocol
+
+from . import metrics
+
+__all__ = [
+    "DEFAULT_FIELD",
+    "Shard",
+    "ShardPlan",
+    "iter_sharded",
+    "plan_shards",
+    "shard_payload",
+]
+
+DEFAULT_FIELD = "applicationMetaData.filingDate"
+DEFAULT_START = date(1900, 1, 1)
+
+# Ranges split into at most this many pieces per probe round.
+_MAX_FANOUT = 16
+
+_DONE = object()
+
+
+class SearchClient(Protocol):
+    """Subset of :class:`USPTOODPClient` used by the planner."""
+
+    def search_pfw(self, payload: Mapping[str, Any]) -> dict[str, Any]: ...
+
+    def iter_search_pfw(
+        self, payload: Mapping[str, Any], page_size: int = 100, **options: Any
+    ) -> Iterator[dict[str, Any]]: ...
+
+
+@dataclass(frozen=True)
+class Shard:
+    """An inclusive whole-day range and the hits it matched when probed."""
+
+    start: date
+    end: date
+    count: int
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+
+@dataclass
+class ShardPlan:
+    """Shards covering a search, in date order."""
+
+    payload: dict[str, Any]
+    field: str
+    shards: list[Shard] = field(default_factory=list)
+    total: int = 0
+    probes: int = 0
+
+    @property
+    def covered(self) -> int:
+        return sum(s.count for s in self.shards)
+
+    def payloads(self) -> list[dict[str, Any]]:
+        return [
+            shard_payload(self.payload, self.field, s.start, s.end)
+            for s in self.shards
+        ]
+
+
+def _day(value: Any) -> date:
+    return date.fromisoformat(str(value)[:10])
+
+
+def _existing_range(
+    payload: Mapping[str, Any], field_name: str
+) -> tuple[date, date] | None:
+    for entry in payload.get("rangeFilters") or []:
+        if entry.get("field") == field_name:
+            return _day(entry["valueFrom"]), _day(entry["valueTo"])
+    return None
+
+
+def shard_payload(
+    payload: Mapping[str, Any], field_name: str, start: date, end: date
+) -> dict[str, Any]:
+    """Return ``payload`` restricted to ``start..end`` on ``field_name``.
+
+    An existing ``rangeFilters`` entry on the same field is replaced; the
+    planner never widens it, since shards are cut from inside it.
+    """
+
+    body = copy.deepcopy(dict(payload))
+    ranges = [
+        entry
+        for entry in body.get("rangeFilters") or []
+        if entry.get("field") != field_name
+    ]
+    ranges.append(
+        {
+            "field": field_name,
+            "valueFrom": start.isoformat(),
+            "valueTo": end.isoformat(),
+        }
+    )
+    body["rangeFilters"] = ranges
+    body.pop("pagination", None)
+    return body
+
+
+def _split(start: date, end: date, pieces: int) -> list[tuple[date, date]]:
+    days = (end - start).days + 1
+    pieces = max(1, min(pieces, days))
+    bounds = [start + timedelta(days=days * i // pieces) for i in range(pieces + 1)]
+    return [
+        (bounds[i], bounds[i + 1] - timedelta(days=1)) for i in range(pieces)
+    ]
+
+
+def plan_shards(
+    client: SearchClient,
+    payload: Mapping[str, Any],
+    field_name: str = DEFAULT_FIELD,
+    start: date | str | None = None,
+    end: date | str | None = None,
+    max_shard: int = 5000,
+    workers: int = 4,
+) -> ShardPlan:
+    """Probe ``payload``'s hits by date and cut them into shards.
+
+    Args:
+        client: Client providing ``search_pfw``.
+        payload: ``search_pfw`` payload to shard.
+        field_name: Date field to shard on.
+        start: First day; defaults to an existing range filter on
+            ``field_name`` or 1900-01-01.
+        end: Last day; defaults to the existing range filter or today.
+        max_shard: Most hits a shard may hold. A single day with more hits
+            stays one (oversized) shard.
+        workers: Concurrent count probes.
+
+    Returns:
+        A :class:`ShardPlan`; shards that matched nothing are left out.
+    """
+
+    from ..clients.dispatch import bounded_map
+
+    existing = _existing_range(payload, field_name)
+    first = _day(start) if start else existing[0] if existing else DEFAULT_START
+    last = _day(end) if end else existing[1] if existing else date.today()
+    if existing:
+        first, last = max(first, existing[0]), min(last, existing[1])
+    plan = ShardPlan(dict(payload), field_name)
+
+    def count(body: dict[str, Any]) -> int:
+        body["pagination"] = {"offset": 0, "limit": 1}
+        body["fields"] = ["applicationNumberText"]
+        return int(client.search_pfw(body).get("count") or 0)
+
+    def probe(span: tuple[date, date]) -> int:
+        return count(shard_payload(payload, field_name, *span))
+
+    with metrics.stage("search.plan", field=field_name) as info:
+        plan.total = count(copy.deepcopy(dict(payload)))
+        plan.probes = 1
+        todo: list[tuple[date, date]] = [(first, last)] if first <= last else []
+        found: list[Shard] = []
+        while todo:
+            results = list(bounded_map(probe, todo, workers))
+            plan.probes += len(results)
+            todo = []
+            for (lo, hi), hits, exc in results:
+                if exc is not None:
+                    raise exc
+                assert hits is not None
+                if not hits:
+                    continue
+                if hits <= max_shard or lo == hi:
+                    found.append(Shard(lo, hi, hits))
+                    continue
+                pieces = min(_MAX_FANOUT, math.ceil(hits / max_shard) + 1)
+                todo.extend(_split(lo, hi, pieces))
+        found.sort(key=lambda s: s.start)
+        plan.shards = _merge(found, max_shard)
+        info["items"] = len(plan.shards)
+    return plan
+
+
+def _merge(shards: list[Shard], max_shard: int) -> list[Shard]:
+    """Join neighbouring shards while their combined count fits."""
+
+    merged: list[Shard] = []
+    for shard in shards:
+        if merged and merged[-1].count + shard.count <= max_shard:
+            prev = merged.pop()
+            shard = Shard(prev.start, shard.end, prev.count + shard.count)
+        merged.append(shard)
+    return merged
+
+
+def iter_sharded(
+    client: SearchClient,
+    payload: Mapping[str, Any],
+    field_name: str = DEFAULT_FIELD,
+    max_shard: int = 5000,
+    workers: int = 4,
+    page_size: int = 100,
+    max_records: int | None = None,
+    plan: ShardPlan | None = None,
+    key: str = "applicationNumberText",
+    **search_options: Any,
+) -> Iterator[dict[str, Any]]:
+    """Yield every hit of ``payload``, fetched as parallel date shards.
+
+    Hits arrive in completion order, not in the API's sort order. Each
+    shard is paged with ``iter_search_pfw`` (``search_options`` such as
+    ``fields``, ``validator`` or ``stream`` are passed on), and a bounded
+    queue keeps fast shards from running ahead of the consumer.
+
+    Args:
+        plan: A plan from :func:`plan_shards`; computed when omitted.
+        key: Record field used to drop duplicates.
+    """
+
+    if plan is None:
+        plan = plan_shards(
+            client, payload, field_name, max_shard=max_shard, workers=workers
+        )
+    shards: queue.Queue[dict[str, Any]] = queue.Queue()
+    for body in plan.payloads():
+        shards.put(body)
+    hits: queue.Queue[Any] = queue.Queue(maxsize=page_size * max(1, workers))
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                hits.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run() -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    body = shards.get_nowait()
+                except queue.Empty:
+                    return
+                for record in client.iter_search_pfw(
+                    body, page_size=page_size, **search_options
+                ):
+                    if not put(record):
+                        return
+        except BaseException as exc:  # surfaced to the consumer
+            errors.append(exc)
+            stop.set()
+        finally:
+            put(_DONE)
+
+    threads = [
+        threading.Thread(target=run, daemon=True)
+        for _ in range(max(1, min(workers, len(plan.shards))))
+    ]
+    for thread in threads:
+        thread.start()
+    seen: set[Any] = set()
+    yielded = 0
+    running = len(threads)
+    try:
+        while running:
+            try:
+                item = hits.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    break
+                continue
+            if item is _DONE:
+                running -= 1
+                continue
+            ident = item.get(key)
+            if ident is not None:
+                if ident in seen:
+                    continue
+                seen.add(ident)
+            yield item
+            yielded += 1
+            if max_records is not None and yielded >= max_records:
+                return
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,402 @@
+"""Local SQLite store of PFW records, keyed by application number.
+
+Search results, lookups and bulk archives can all be ingested into one
+:class:`RecordStore`, which keeps the newest version of every record as
+JSON text together with a content digest. Re-ingesting a record whose
+digest is unchanged costs a hash and a primary-key read, no write::
+
+    with RecordStore("corpus.sqlite") as store:
+        stats = store.ingest(iter_bulk_records("PTFWPRD.zip"))
+        stats.added, stats.changed, stats.unchanged
+        store.get("14412875")["applicationMetaData"]["inventionTitle"]
+
+Every write also refreshes the store's derived tables, so reports and
+queries read flat, indexed rows instead of parsing the JSON bodies:
+
+* ``record_fields`` holds one row of common ``applicationMetaData`` fields
+  per application and ``record_cpc`` one row per CPC symbol
+  (:class:`Projection`);
+* ``record_events`` holds the ``eventDataBag`` transaction history, one
+  row per event, indexed by event code and date and by application
+  (:class:`EventProjection`; queried through
+  :class:`api_gui.util.event_index.EventIndex`).
+
+A store created before a derived table existed is backfilled the first
+time it is opened.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from . import metrics
+from .sqlite_db import SQLiteDB
+
+__all__ = [
+    "EventProjection",
+    "IngestStats",
+    "Projection",
+    "RecordStore",
+    "StoreIndex",
+    "record_digest",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    application TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    updated REAL NOT NULL,
+    body TEXT NOT NULL
+);
+"""
+
+
+def _lookup(record: Mapping[str, Any], path: str) -> Any:
+    value: Any = record
+    for key in path.split("."):
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(key)
+    return value
+
+
+class StoreIndex(Protocol):
+    """Derived tables a :class:`RecordStore` keeps in step with records."""
+
+    @property
+    def tables(self) -> tuple[str, ...]: ...
+
+    def create(self, conn: sqlite3.Connection) -> None: ...
+
+    def write(
+        self, conn: sqlite3.Connection, app: str, record: Mapping[str, Any]
+    ) -> None:
+        """Replace ``app``'s rows, inside the store's write transaction."""
+
+
+class Projection:
+    """A derived table of record fields, refreshed on every write.
+
+    Args:
+        table: Table name; its key column is ``application``.
+        columns: Column name -> dotted path of a scalar field.
+        list_path: Dotted path of a string array whose items go, one row
+            each, into ``list_table`` as ``(application, value)``.
+        list_table: Table for ``list_path`` items.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        columns: Mapping[str, str],
+        list_path: str | None = None,
+        list_table: str | None = None,
+    ) -> None:
+        self.table = table
+        self.columns = dict(columns)
+        self.list_path = list_path
+        self.list_table = list_table
+        names = ", ".join(self.columns)
+        marks = ", ".join("?" * (len(self.columns) + 1))
+        self._insert = f"INSERT OR REPLACE INTO {table} (application, {names})"
+        self._insert += f" VALUES ({marks})"
+
+    @property
+    def tables(self) -> tuple[str, ...]:
+        return (self.table,) + ((self.list_table,) if self.list_table else ())
+
+    def create(self, conn: sqlite3.Connection) -> None:
+        cols = "".join(f", {name}" for name in self.columns)
+        conn.execute(f"CREATE TABLE {self.table} (application TEXT PRIMARY KEY{cols})")
+        if self.list_table:
+            conn.execute(
+                f"CREATE TABLE {self.list_table} (application TEXT, value TEXT)"
+            )
+            conn.execute(
+                f"CREATE INDEX {self.list_table}_application"
+                f" ON {self.list_table} (application)"
+            )
+
+    def write(
+        self, conn: sqlite3.Connection, app: str, record: Mapping[str, Any]
+    ) -> None:
+        values = []
+        for path in self.columns.values():
+            value = _lookup(record, path)
+            values.append(value if isinstance(value, (str, int, float)) else None)
+        conn.execute(self._insert, (app, *values))
+        if self.list_table and self.list_path:
+            conn.execute(f"DELETE FROM {self.list_table} WHERE application = ?", (app,))
+            items = _lookup(record, self.list_path) or []
+            conn.executemany(
+                f"INSERT INTO {self.list_table} VALUES (?, ?)",
+                [(app, str(item)) for item in items if item is not None],
+            )
+
+
+FIELDS = Projection(
+    "record_fields",
+    {
+        "filing_date": "applicationMetaData.filingDate",
+        "grant_date": "applicationMetaData.grantDate",
+        "art_unit": "applicationMetaData.groupArtUnitNumber",
+        "examiner": "applicationMetaData.examinerNameText",
+        "status_code": "applicationMetaData.applicationStatusCode",
+        "status": "applicationMetaData.applicationStatusDescriptionText",
+        "app_type": "applicationMetaData.applicationTypeCode",
+        "patent_number": "applicationMetaData.patentNumber",
+        "title": "applicationMetaData.inventionTitle",
+    },
+    list_path="applicationMetaData.cpcClassificationBag",
+    list_table="record_cpc",
+)
+
+
+class EventProjection:
+    """One row per ``eventDataBag`` entry, in timeline order.
+
+    ``seq`` numbers an application's events by date (ties keep bag
+    order), so sequence queries can compare positions instead of dates.
+    """
+
+    table = "record_events"
+    tables = (table,)
+
+    def create(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            f"CREATE TABLE {self.table} (application TEXT NOT NULL,"
+            " seq INTEGER NOT NULL, date TEXT, code TEXT, description TEXT,"
+            " PRIMARY KEY (application, seq))"
+        )
+        # Time-window scans by code, and "later event with code X" probes.
+        conn.execute(f"CREATE INDEX {self.table}_code ON {self.table} (code, date)")
+        conn.execute(
+            f"CREATE INDEX {self.table}_app_code"
+            f" ON {self.table} (application, code, seq)"
+        )
+
+    def write(
+        self, conn: sqlite3.Connection, app: str, record: Mapping[str, Any]
+    ) -> None:
+        conn.execute(f"DELETE FROM {self.table} WHERE application = ?", (app,))
+        events = [e for e in record.get("eventDataBag") or [] if isinstance(e, dict)]
+        events.sort(key=lambda e: str(e.get("eventDate") or ""))
+        conn.executemany(
+            f"INSERT INTO {self.table} VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    app,
+                    seq,
+                    str(e.get("eventDate") or "")[:10] or None,
+                    e.get("eventCode"),
+                    e.get("eventDescriptionText"),
+                )
+                for seq, e in enumerate(events)
+            ],
+        )
+
+
+EVENTS = EventProjection()
+
+
+def _canonical(record: Any) -> str:
+    return json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def record_digest(record: Any) -> str:
+    """Return the content digest of ``record``, independent of key order."""
+
+    return hashlib.sha1(_canonical(record).encode()).hexdigest()
+
+
+@dataclass
+class IngestStats:
+    """Outcome of one :meth:`RecordStore.ingest` call."""
+
+    added: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+
+    @property
+    def written(self) -> int:
+        return self.added + self.changed
+
+
+class RecordStore(SQLiteDB):
+    """SQLite store of the latest record per application.
+
+    ``":memory:"`` gives a throwaway store.
+    """
+
+    projections: tuple[StoreIndex, ...] = (FIELDS, EVENTS)
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, _SCHEMA)
+        self._init_projections()
+
+    def _init_projections(self) -> None:
+        existing = {
+            name
+            for (name,) in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        missing = [p for p in self.projections if not set(p.tables) <= existing]
+        if not missing:
+            return
+        with metrics.stage("store.backfill", path=self.path) as info:
+            self._conn.execute("BEGIN")
+            try:
+                for projection in missing:
+                    for table in projection.tables:
+                        self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+                    projection.create(self._conn)
+                rows = self._conn.execute("SELECT application, body FROM records")
+                for app, body in rows:
+                    record = json.loads(body)
+                    for projection in missing:
+                        projection.write(self._conn, app, record)
+                    info["items"] += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def __contains__(self, application: object) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM records WHERE application = ?", (application,)
+            ).fetchone()
+        return row is not None
+
+    def ingest(
+        self, records: Iterable[dict[str, Any]], batch: int = 1000
+    ) -> IngestStats:
+        """Insert or replace ``records``, one transaction per ``batch``.
+
+        Records without ``applicationNumberText`` are counted as skipped.
+        """
+
+        stats = IngestStats()
+        with metrics.stage("store.ingest", path=self.path) as info:
+            chunk: list[dict[str, Any]] = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= batch:
+                    self._put(chunk, stats)
+                    chunk = []
+            if chunk:
+                self._put(chunk, stats)
+            info["items"] = stats.written
+        return stats
+
+    def _put(self, records: list[dict[str, Any]], stats: IngestStats) -> None:
+        rows = []
+        for record in records:
+            app = str(record.get("applicationNumberText") or "")
+            if not app:
+                stats.skipped += 1
+                continue
+            body = _canonical(record)
+            digest = hashlib.sha1(body.encode()).hexdigest()
+            rows.append((app, digest, body, record))
+        now = time.time()
+        with self._lock:
+            known = self._digests([row[0] for row in rows])
+            self._conn.execute("BEGIN")
+            try:
+                for app, digest, body, record in rows:
+                    old = known.get(app)
+                    if old == digest:
+                        stats.unchanged += 1
+                        continue
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                        (app, digest, now, body),
+                    )
+                    for projection in self.projections:
+                        projection.write(self._conn, app, record)
+                    known[app] = digest
+                    if old is None:
+                        stats.added += 1
+                    else:
+                        stats.changed += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _digests(self, apps: Sequence[str]) -> dict[str, str]:
+        found: dict[str, str] = {}
+        # Stay well under SQLite's bound-parameter limit.
+        for i in range(0, len(apps), 500):
+            part = apps[i : i + 500]
+            marks = ",".join("?" * len(part))
+            found.update(
+                self._conn.execute(
+                    "SELECT application, digest FROM records"
+                    f" WHERE application IN ({marks})",
+                    part,
+                )
+            )
+        return found
+
+    def digest(self, application: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM records WHERE application = ?", (application,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, application: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM records WHERE application = ?", (application,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def applications(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT application FROM records ORDER BY application"
+            ).fetchall()
+        return [app for (app,) in rows]
+
+    def iter_records(self, batch: int = 1000) -> Iterator[dict[str, Any]]:
+        """Yield every stored record in application order."""
+
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT application, body FROM records WHERE application > ?"
+                    " ORDER BY application LIMIT ?",
+                    (last, batch),
+                ).fetchall()
+            if not rows:
+                return
+            for _, body in rows:
+                yield json.loads(body)
+            last = rows[-1][0]
+
+    def select(self, sql: str, params: Sequence[Any] = ()) -> list[tuple[Any, ...]]:
+        """Run a read-only query against the store and return its rows.
+
+        The ``records`` table has the columns ``application``, ``digest``,
+        ``updated`` and ``body`` (JSON text); see :class:`Projection` for
+        the derived tables.
+        """
+
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
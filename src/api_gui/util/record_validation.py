@@ -0,0 +1,220 @@
+"""Streaming validation of API records against the bundled JSON Schemas."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from .schema_dialect import SchemaDialect, configured_schema_dialect
+
+__all__ = [
+    "RecordValidationError",
+    "ValidationReport",
+    "StreamValidator",
+    "compile_schema",
+    "record_schema",
+]
+
+SCHEMAS_DIR = Path(__file__).resolve().parents[1] / "schemas"
+
+# Bag holding the records of each bundled response schema.
+DEFAULT_BAGS = {
+    "patent-data-schema.json": "patentFileWrapperDataBag",
+    "petition-decision-schema.json": "petitionDecisionDataBag",
+    "bulkdata-response-schema.json": "bulkDataProductBag",
+}
+
+
+class RecordValidationError(ValueError):
+    """Raised in strict mode when a streamed record fails validation."""
+
+
+def _validator_class(dialect: SchemaDialect) -> Any:
+    import jsonschema
+
+    return {
+        "draft-7": jsonschema.Draft7Validator,
+        "draft-2020-12": jsonschema.Draft202012Validator,
+        "draft-4": jsonschema.Draft4Validator,
+        # OpenAPI 3.0 schema objects are an extended draft-4 subset.
+        "openapi-3.0": jsonschema.Draft4Validator,
+    }[dialect]
+
+
+def _load(schema: str) -> dict[str, Any]:
+    path = Path(schema)
+    if not path.is_absolute() and not path.exists():
+        path = SCHEMAS_DIR / schema
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def record_schema(schema: dict[str, Any], bag: str) -> dict[str, Any]:
+    """Return the per-record subschema of ``bag`` within ``schema``.
+
+    The bundled schemas describe bag items in draft-4 tuple form
+    (``"items": [{...}]``); the first entry is the record schema.
+    """
+
+    items = schema["properties"][bag].get("items", {})
+    if isinstance(items, list):
+        items = items[0] if items else {}
+    sub = dict(items)
+    if "$schema" in schema:
+        sub.setdefault("$schema", schema["$schema"])
+    return sub
+
+
+@lru_cache(maxsize=None)
+def _compiled(schema: str, bag: str | None, dialect: SchemaDialect | None) -> Any:
+    from jsonschema import Draft7Validator
+    from jsonschema.validators import validator_for
+
+    doc = _load(schema)
+    if bag:
+        doc = record_schema(doc, bag)
+    # A configured dialect wins over the file's ``$schema``; without one the
+    # file's declaration (or draft-7) decides.
+    if dialect is not None:
+        cls = _validator_class(dialect)
+    else:
+        cls = validator_for(doc, default=Draft7Validator)
+    cls.check_schema(doc)
+    return cls(doc)
+
+
+def compile_schema(schema: str, bag: str | None = None) -> Any:
+    """Return a cached validator for a bundled schema file.
+
+    Args:
+        schema: File name under ``schemas/`` or a path to a schema file.
+        bag: Optional bag name; when given, the validator checks a single
+            record of that bag rather than a whole response.
+
+    Returns:
+        A compiled ``jsonschema`` validator, built once per schema, bag and
+        configured dialect. With ``FIRECRAWL_JSON_SCHEMA_DIALECT`` set, that
+        dialect is used even where the schema declares its own ``$schema``.
+
+    Raises:
+        jsonschema.SchemaError: If the schema is not valid in the dialect.
+    """
+
+    return _compiled(schema, bag, configured_schema_dialect())
+
+
+def _error_key(error: Any) -> tuple[str, str]:
+    path = "/".join("[]" if isinstance(p, int) else str(p) for p in error.path)
+    return path or "<root>", error.validator
+
+
+@dataclass
+class ValidationReport:
+    """Aggregated outcome of a validation run."""
+
+    seen: int = 0
+    checked: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+    errors: Counter[tuple[str, str]] = field(default_factory=Counter)
+    examples: dict[tuple[str, str], list[str]] = field(default_factory=dict)
+
+    def summary(self, top: int = 10) -> str:
+        """Return a short human-readable summary of the worst errors."""
+
+        lines = [
+            f"seen={self.seen} checked={self.checked} invalid={self.invalid} "
+            f"time={self.seconds:.3f}s"
+        ]
+        for (path, keyword), count in self.errors.most_common(top):
+            sample = ", ".join(self.examples.get((path, keyword), []))
+            lines.append(f"  {count:>6}  {path} ({keyword})  e.g. {sample}")
+        return "\n".join(lines)
+
+
+class StreamValidator:
+    """Validate records as they stream past, with sampling.
+
+    Args:
+        schema: Bundled schema file name or path.
+        bag: Record bag inside the schema; defaults to the bag known for the
+            bundled schema.
+        sample_rate: Fraction of records to check, from 0 to 1. Sampling is
+            a deterministic stride, so reruns check the same records.
+        strict: Raise :class:`RecordValidationError` on the first invalid
+            record instead of only aggregating it.
+        max_examples: Record identifiers kept per distinct error.
+        id_field: Record field used to label examples.
+    """
+
+    def __init__(
+        self,
+        schema: str = "patent-data-schema.json",
+        bag: str | None = None,
+        sample_rate: float = 1.0,
+        strict: bool = False,
+        max_examples: int = 5,
+        id_field: str = "applicationNumberText",
+    ) -> None:
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        bag = bag or DEFAULT_BAGS.get(Path(schema).name)
+        if not bag:
+            raise ValueError(f"No record bag known for {schema}")
+        self.validator = compile_schema(schema, bag)
+        self.sample_rate = sample_rate
+        self.strict = strict
+        self.max_examples = max_examples
+        self.id_field = id_field
+        self.report = ValidationReport()
+        self._lock = threading.Lock()
+
+    def _sampled(self, index: int) -> bool:
+        rate = self.sample_rate
+        return int(index * rate) != int((index - 1) * rate)
+
+    def validate(self, record: Any) -> bool:
+        """Check one record; return ``False`` only if it was found invalid."""
+
+        with self._lock:
+            self.report.seen += 1
+            if not self._sampled(self.report.seen):
+                return True
+        start = time.perf_counter()
+        errors = list(self.validator.iter_errors(record))
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            report = self.report
+            report.checked += 1
+            report.seconds += elapsed
+            if not errors:
+                return True
+            report.invalid += 1
+            ident = str(report.seen)
+            if isinstance(record, dict):
+                ident = str(record.get(self.id_field, ident))
+            for error in errors:
+                key = _error_key(error)
+                report.errors[key] += 1
+                examples = report.examples.setdefault(key, [])
+                if len(examples) < self.max_examples:
+                    examples.append(ident)
+        if self.strict:
+            raise RecordValidationError(
+                f"Record {ident} is invalid: {errors[0].message}"
+            )
+        return False
+
+    def wrap(self, records: Iterable[Any]) -> Iterator[Any]:
+        """Yield ``records`` unchanged, validating each one on the way."""
+
+        for record in records:
+            self.validate(record)
+            yield record
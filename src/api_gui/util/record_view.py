@@ -0,0 +1,254 @@
+"""Lazy, slotted views over PFW records generated from the bundled schema.
+
+A view wraps either the raw JSON bytes of one record or an already decoded
+mapping. Raw bytes are only parsed when a field is first read, and
+:meth:`RecordView.release` drops the decoded form again, so large result
+sets can be held as compact bytes and expanded one record at a time.
+
+Views are read-only :class:`~collections.abc.Mapping` objects, so code that
+walks plain dicts (such as the EndNote exporter) accepts them unchanged;
+schema fields are also exposed as attributes::
+
+    Record = pfw_record_class()
+    rec = Record(raw_bytes)
+    rec.applicationMetaData.inventionTitle
+"""
+
+from __future__ import annotations
+
+import json
+import tracemalloc
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, ClassVar
+
+__all__ = [
+    "RecordView",
+    "view_class",
+    "pfw_record_class",
+    "project",
+    "load_views",
+    "measure_memory",
+]
+
+SCHEMAS_DIR = Path(__file__).resolve().parents[1] / "schemas"
+
+_MISSING = object()
+
+
+class RecordView(Mapping[str, Any]):
+    """Read-only mapping over one JSON object, decoded on first access."""
+
+    __slots__ = ("_raw", "_data")
+
+    # field name -> view class for object / array-of-object fields
+    _children: ClassVar[dict[str, type[RecordView]]] = {}
+    _fields: ClassVar[tuple[str, ...]] = ()
+
+    def __init__(self, source: bytes | str | Mapping[str, Any]) -> None:
+        if isinstance(source, (bytes, bytearray, str)):
+            if isinstance(source, str):
+                source = source.encode("utf-8")
+            self._raw: bytes | None = bytes(source)
+            self._data: Mapping[str, Any] | None = None
+        else:
+            self._raw = None
+            self._data = source
+
+    def _decoded(self) -> Mapping[str, Any]:
+        data = self._data
+        if data is None:
+            assert self._raw is not None
+            data = self._data = json.loads(self._raw)
+        return data
+
+    def _wrap(self, key: str, value: Any) -> Any:
+        child = self._children.get(key)
+        if child is None:
+            return value
+        if isinstance(value, Mapping):
+            return child(value)
+        if isinstance(value, list):
+            return [child(v) if isinstance(v, Mapping) else v for v in value]
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        return self._wrap(key, self._decoded()[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._decoded())
+
+    def __len__(self) -> int:
+        return len(self._decoded())
+
+    def __repr__(self) -> str:
+        state = "raw" if self._data is None else "decoded"
+        return f"<{type(self).__name__} {state}>"
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._data is not None
+
+    def release(self) -> None:
+        """Drop the decoded form when the raw bytes are still available."""
+
+        if self._raw is not None:
+            self._data = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a plain, fully decoded copy of the record."""
+
+        return json.loads(json.dumps(self._decoded()))
+
+    def to_bytes(self) -> bytes:
+        """Return compact JSON bytes for the record."""
+
+        if self._raw is not None:
+            return self._raw
+        return json.dumps(self._decoded(), separators=(",", ":")).encode()
+
+
+def _field_property(name: str) -> property:
+    def getter(self: RecordView) -> Any:
+        value = self._decoded().get(name, _MISSING)
+        return None if value is _MISSING else self._wrap(name, value)
+
+    getter.__name__ = name
+    return property(getter)
+
+
+def _items_schema(node: Mapping[str, Any]) -> Mapping[str, Any]:
+    items = node.get("items") or {}
+    if isinstance(items, list):
+        items = items[0] if items else {}
+    return items
+
+
+def _class_name(name: str) -> str:
+    return name[:1].upper() + name[1:]
+
+
+def view_class(schema: Mapping[str, Any], name: str) -> type[RecordView]:
+    """Generate a slotted :class:`RecordView` subclass for an object schema.
+
+    Nested objects and arrays of objects get their own generated classes,
+    so attribute access stays typed all the way down.
+    """
+
+    props: Mapping[str, Any] = schema.get("properties") or {}
+    namespace: dict[str, Any] = {
+        "__slots__": (),
+        "__module__": __name__,
+        "_fields": tuple(props),
+    }
+    children: dict[str, type[RecordView]] = {}
+    for field, sub in props.items():
+        kind = sub.get("type")
+        if kind == "object" and sub.get("properties"):
+            children[field] = view_class(sub, _class_name(field))
+        elif kind == "array":
+            items = _items_schema(sub)
+            if items.get("type") == "object" and items.get("properties"):
+                children[field] = view_class(items, _class_name(field) + "Item")
+        if field.isidentifier() and not hasattr(RecordView, field):
+            namespace[field] = _field_property(field)
+    namespace["_children"] = children
+    return type(name, (RecordView,), namespace)
+
+
+@lru_cache(maxsize=None)
+def pfw_record_class(
+    schema_file: str = "patent-data-schema.json",
+    bag: str = "patentFileWrapperDataBag",
+    name: str = "PFWRecord",
+) -> type[RecordView]:
+    """Return the view class for one record of ``bag`` in ``schema_file``."""
+
+    with (SCHEMAS_DIR / schema_file).open("r", encoding="utf-8") as handle:
+        schema = json.load(handle)
+    return view_class(_items_schema(schema["properties"][bag]), name)
+
+
+def _project_into(src: Any, path: list[str], out: dict[str, Any]) -> None:
+    head, rest = path[0], path[1:]
+    if not isinstance(src, Mapping) or head not in src:
+        return
+    value = src[head]
+    if not rest:
+        out[head] = value
+    elif isinstance(value, list):
+        existing = out.get(head)
+        if isinstance(existing, list):
+            target = existing
+        else:
+            target = [{} for _ in value]
+        for item, slot in zip(value, target):
+            _project_into(item, rest, slot)
+        out[head] = target
+    elif isinstance(value, Mapping):
+        _project_into(value, rest, out.setdefault(head, {}))
+
+
+def project(record: Mapping[str, Any], fields: Sequence[str]) -> dict[str, Any]:
+    """Keep only the dotted ``fields`` of ``record``.
+
+    Paths descend through arrays, so ``applicationMetaData.inventorBag.
+    inventorNameText`` keeps just the names of every inventor. A trailing
+    ``[]`` on a segment is accepted and ignored.
+    """
+
+    out: dict[str, Any] = {}
+    for field in fields:
+        parts = [p[:-2] if p.endswith("[]") else p for p in field.split(".")]
+        _project_into(record, parts, out)
+    return out
+
+
+def load_views(
+    records: Iterable[bytes | str | Mapping[str, Any]],
+    fields: Sequence[str] | None = None,
+    compact: bool = True,
+    cls: type[RecordView] | None = None,
+) -> list[RecordView]:
+    """Wrap ``records`` in views, optionally projecting and compacting them.
+
+    Args:
+        records: Raw JSON bytes/str or decoded records.
+        fields: Optional dotted paths to keep (see :func:`project`).
+        compact: Store each record as compact JSON bytes rather than a
+            decoded dict; fields decode again on first access.
+        cls: View class to use; defaults to :func:`pfw_record_class`.
+
+    Returns:
+        One view per input record.
+    """
+
+    cls = cls or pfw_record_class()
+    out: list[RecordView] = []
+    for rec in records:
+        if fields is not None:
+            if not isinstance(rec, Mapping):
+                rec = json.loads(rec)
+            rec = project(rec, fields)
+        if compact and isinstance(rec, Mapping):
+            rec = json.dumps(rec, separators=(",", ":")).encode()
+        out.append(cls(rec))
+    return out
+
+
+def measure_memory(build: Callable[[], Sequence[Any]]) -> float:
+    """Return the traced heap bytes per item of the sequence ``build`` makes.
+
+    Inputs that ``build`` closes over are allocated beforehand and are not
+    counted, only what the returned sequence keeps alive.
+    """
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        items = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / max(1, len(items))
@@ -44,6 +44,18 @@ def get_schema_dialect() -> SchemaDialect:
     return dialect
 
 
+def configured_schema_dialect() -> SchemaDialect | None:
+    """Return the dialect set in the environment, or ``None`` when unset.
+
+    Unlike :func:`get_schema_dialect`, this tells an explicit setting apart
+    from the ``draft-7`` default.
+    """
+
+    if os.getenv("FIRECRAWL_JSON_SCHEMA_DIALECT") is None:
+        return None
+    return get_schema_dialect()
+
+
 def add_schema_dialect(schema: dict[str, Any]) -> dict[str, Any]:
     """Attach dialect metadata to ``schema`` when required.
 
@@ -3,7 +3,6 @@ import json, os
 from pathlib import Path
 
 CONFIG_DIR = Path.home() / ".api-gui"
-CONFIG_DIR.mkdir(parents=True, exist_ok=True)
 SETTINGS_PATH = CONFIG_DIR / "settings.json"
 
 DEFAULTS = {
@@ -25,6 +24,7 @@ def load_settings():
     return merged
 
 def save_settings(data):
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
     return str(SETTINGS_PATH)
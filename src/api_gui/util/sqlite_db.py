@@ -0,0 +1,73 @@
+"""Shared connection handling for the package's SQLite files.
+
+Record stores, job journals, watchlists, the document and text indexes
+and export state all keep one SQLite database that several threads use.
+:class:`SQLiteDB` opens it the same way for each of them: in WAL mode, so
+commits are sequential appends and readers do not block the writer, with
+``synchronous=NORMAL``, and as a single autocommit connection serialised
+by a re-entrant lock; :meth:`SQLiteDB.transaction` groups writes into one
+transaction under that lock.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+__all__ = ["SQLiteDB"]
+
+_DB = TypeVar("_DB", bound="SQLiteDB")
+
+
+class SQLiteDB:
+    """One locked SQLite connection with ``schema`` applied.
+
+    Args:
+        path: Database file; its directory is created if missing.
+            ``":memory:"`` gives a throwaway database.
+        schema: SQL script run on open; use ``IF NOT EXISTS`` clauses.
+    """
+
+    def __init__(self, path: str, schema: str) -> None:
+        self.path = path
+        if path != ":memory:":
+            parent = os.path.dirname(os.path.abspath(path))
+            os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(schema)
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Hold the lock and run the block as one transaction.
+
+        The transaction commits when the block exits normally and rolls
+        back when it raises.
+        """
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self: _DB) -> _DB:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
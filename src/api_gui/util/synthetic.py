@@ -0,0 +1,512 @@
+"""Deterministic, schema-driven synthetic API records.
+
+Records are generated from the bundled response schemas, so they have
+exactly the shape the clients, exporters and validators expect. Field
+names drive the values (dates look like dates, ``*ApplicationNumberText``
+fields hold application numbers), and a few cross-field rules keep the
+records plausible: events follow the filing date, and continuity bags
+point at other applications in the same synthetic population so family
+traversals find real neighbours.
+
+Every record is a pure function of ``(seed, index)``; any slice of a
+dataset can be regenerated or produced in parallel::
+
+    gen = SyntheticGenerator(seed=7, cardinalities={"inventorBag": 3})
+    gen.record(41)                       # same dict on every run
+    write_bulk_zip("bulk.zip", gen, records=1_000_000, processes=8)
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import random
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Union
+
+from .record_validation import DEFAULT_BAGS, SCHEMAS_DIR
+
+__all__ = [
+    "DEFAULT_CARDINALITIES",
+    "SyntheticGenerator",
+    "write_bulk_zip",
+    "write_json",
+]
+
+Cardinality = Union[int, tuple[int, int]]
+
+# Items per array field; a pair is an inclusive random range.
+DEFAULT_CARDINALITIES: dict[str, Cardinality] = {
+    "inventorBag": (1, 4),
+    "applicantBag": (1, 2),
+    "assignmentBag": (0, 2),
+    "eventDataBag": (5, 40),
+    "documentBag": (1, 8),
+    "parentContinuityBag": (0, 2),
+    "childContinuityBag": (0, 2),
+    "foreignPriorityBag": (0, 1),
+    "patentTermAdjustmentHistoryDataBag": (0, 3),
+    "productFileBag": 1,
+    "fileDataBag": (1, 5),
+}
+_DEFAULT_RANGE = (0, 2)
+
+# Present in every record regardless of ``density``.
+_ALWAYS = frozenset({
+    "applicationNumberText",
+    "parentApplicationNumberText",
+    "childApplicationNumberText",
+    "applicationMetaData",
+    "filingDate",
+    "inventionTitle",
+    "eventCode",
+    "eventDate",
+    "documentIdentifier",
+    "documentCode",
+    "officialDate",
+    "petitionDecisionRecordIdentifier",
+    "productIdentifier",
+    "fileName",
+})
+
+FIRST_APPLICATION = 10_000_000
+
+_FIRST = ("JOHN", "MARIA", "WEI", "AISHA", "LUCAS", "YUKI", "OMAR", "ELENA")
+_LAST = ("SMITH", "GARCIA", "CHEN", "KHAN", "MULLER", "TANAKA", "ROSSI", "NOVAK")
+_ORGS = ("ACME CORP", "GLOBEX INC", "INITECH LLC", "UMBRELLA GMBH", "STARK KK")
+_WORDS = (
+    "adaptive", "sensor", "assembly", "method", "wireless", "battery",
+    "module", "optical", "fastener", "valve", "controller", "composite",
+    "signal", "network", "catalyst", "housing", "display", "coupling",
+)
+_EVENTS = ("CTNF", "CTFR", "NOA", "ELC.", "IDS", "RCEX", "A...", "ABN2", "ISSUE")
+_DOCS = ("CTNF", "CTFR", "NOA", "CLM", "SPEC", "REM", "IDS", "892", "ABST")
+_COUNTRIES = ("US", "JP", "DE", "CN", "KR", "FR", "GB")
+_TYPES = ("UTL", "DES", "PP", "REI")
+_CITIES = ("ALEXANDRIA", "AUSTIN", "TOKYO", "MUNICH", "SEOUL", "LYON")
+
+
+class _Ctx:
+    """Per-record state shared by the field generators."""
+
+    __slots__ = ("rng", "index", "population", "filing")
+
+    def __init__(
+        self,
+        rng: random.Random,
+        index: int,
+        population: int | None,
+        epoch: dt.date,
+        span_days: int,
+    ) -> None:
+        self.rng = rng
+        self.index = index
+        self.population = population
+        # Filing dates grow with the index, so date-range slices of a
+        # dataset are contiguous index ranges.
+        self.filing = epoch + dt.timedelta(
+            days=(index * 7 + rng.randrange(7)) % span_days
+        )
+
+    def app(self, index: int | None = None) -> str:
+        return str(FIRST_APPLICATION + (self.index if index is None else index))
+
+    def related(self, direction: int) -> str:
+        step = self.rng.randint(1, 50)
+        other = self.index + direction * step
+        if other < 0:
+            other = self.index + step
+        if self.population is not None and other >= self.population:
+            other = max(0, self.index - step)
+        return self.app(other)
+
+    def date_after(self, days: int = 1500) -> dt.date:
+        return self.filing + dt.timedelta(days=self.rng.randrange(days))
+
+    def person(self) -> tuple[str, str]:
+        return self.rng.choice(_FIRST), self.rng.choice(_LAST)
+
+    def words(self, lo: int, hi: int) -> str:
+        rng = self.rng
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+FieldGen = Callable[[_Ctx], Any]
+
+
+def _name_text(c: _Ctx) -> str:
+    first, last = c.person()
+    return f"{last}, {first}"
+
+
+_STRINGS: dict[str, FieldGen] = {
+    "applicationNumberText": lambda c: c.app(),
+    "parentApplicationNumberText": lambda c: c.related(-1),
+    "childApplicationNumberText": lambda c: c.related(+1),
+    "filingDate": lambda c: c.filing.isoformat(),
+    "effectiveFilingDate": lambda c: c.filing.isoformat(),
+    "inventionTitle": lambda c: c.words(3, 9).upper(),
+    "patentNumber": lambda c: str(7_000_000 + c.index * 3),
+    "parentPatentNumber": lambda c: str(7_000_000 + c.rng.randrange(5_000_000)),
+    "childPatentNumber": lambda c: str(7_000_000 + c.rng.randrange(5_000_000)),
+    "eventCode": lambda c: c.rng.choice(_EVENTS),
+    "documentCode": lambda c: c.rng.choice(_DOCS),
+    "applicationTypeCode": lambda c: c.rng.choice(_TYPES),
+    "countryCode": lambda c: c.rng.choice(_COUNTRIES),
+    "cityName": lambda c: c.rng.choice(_CITIES),
+    "postalCode": lambda c: f"{c.rng.randrange(100000):05d}",
+    "groupArtUnitNumber": lambda c: str(1600 + c.rng.randrange(1200)),
+    "firstName": lambda c: c.rng.choice(_FIRST),
+    "lastName": lambda c: c.rng.choice(_LAST),
+    "firstApplicantName": lambda c: c.rng.choice(_ORGS),
+    "mimeTypeIdentifier": lambda c: c.rng.choice(("PDF", "XML", "MS_WORD")),
+    "documentDirectionCategory": lambda c: c.rng.choice(("INCOMING", "OUTGOING")),
+    "documentIdentifier": lambda c: f"{c.app()}{c.rng.randrange(16**8):08X}",
+    "petitionDecisionRecordIdentifier": lambda c: (
+        f"{c.rng.randrange(16**8):08x}-{c.rng.randrange(16**4):04x}-"
+        f"{c.rng.randrange(16**12):012x}"
+    ),
+    "productIdentifier": lambda c: "PTFW" + "".join(
+        c.rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ") for _ in range(3)
+    ),
+}
+
+
+def _string_by_suffix(name: str) -> FieldGen:
+    if name.endswith("DateTime"):
+        return lambda c: f"{c.date_after().isoformat()}T{c.rng.randrange(24):02d}:00:00"
+    if name.endswith("Date") or name == "fileDate":
+        return lambda c: c.date_after().isoformat()
+    if name.endswith("ApplicationNumberText"):
+        return lambda c: c.related(-1)
+    if name.endswith(("URI", "Url", "URL")):
+        return lambda c: (
+            f"https://api.uspto.gov/api/v1/download/{c.app()}/"
+            f"{c.rng.randrange(10**6)}.pdf"
+        )
+    if name.endswith("FileName") or name == "fileName":
+        return lambda c: f"{name[:-8] or 'file'}_{c.index}_{c.rng.randrange(10**4)}.zip"
+    if name.endswith("Indicator"):
+        return lambda c: c.rng.choice(("Y", "N"))
+    if name.endswith("NameText") or name.endswith("Name"):
+        return _name_text
+    if name.endswith(("Text", "Description")):
+        return lambda c: c.words(2, 6).capitalize()
+    return lambda c: f"{name}-{c.rng.randrange(10**6)}"
+
+
+def _integer(name: str) -> FieldGen:
+    if name.endswith("Size") or name.endswith("TotalFileSize"):
+        return lambda c: c.rng.randrange(10**5, 10**10)
+    if name == "applicationStatusCode":
+        return lambda c: c.rng.choice((30, 41, 150, 161, 250))
+    if name == "customerNumber":
+        return lambda c: c.rng.randrange(10_000, 200_000)
+    return lambda c: c.rng.randrange(1000)
+
+
+def _leaf(kind: Any, name: str) -> FieldGen:
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if kind == "integer":
+        return _integer(name)
+    if kind == "number":
+        return lambda c: round(c.rng.uniform(0, 1000), 2)
+    if kind == "boolean":
+        return lambda c: c.rng.random() < 0.5
+    if kind == "null":
+        return lambda c: None
+    return _STRINGS.get(name) or _string_by_suffix(name)
+
+
+def _items(node: Mapping[str, Any]) -> Mapping[str, Any]:
+    items = node.get("items") or {}
+    if isinstance(items, list):
+        items = items[0] if items else {}
+    return items
+
+
+class SyntheticGenerator:
+    """Generate schema-valid records for one bundled response schema.
+
+    Args:
+        schema: Bundled schema file name or path.
+        seed: Dataset seed; with ``index`` it fully determines a record.
+        cardinalities: Items per array field name, as a count or an
+            inclusive ``(min, max)`` range; merged over
+            :data:`DEFAULT_CARDINALITIES`.
+        density: Probability that an optional (not ``required``) field is
+            present. Identifier fields are always present.
+        population: Total records in the dataset; continuity links then
+            stay inside it. ``None`` leaves the far end open.
+        start_date: Filing date of record 0.
+        span_days: Filing dates wrap around after this many days.
+        bag: Record bag; defaults to the bag known for the schema.
+    """
+
+    def __init__(
+        self,
+        schema: str = "patent-data-schema.json",
+        seed: int = 0,
+        cardinalities: Mapping[str, Cardinality] | None = None,
+        density: float = 0.85,
+        population: int | None = None,
+        start_date: dt.date = dt.date(2000, 1, 3),
+        span_days: int = 365 * 25,
+        bag: str | None = None,
+    ) -> None:
+        self._args = {
+            "schema": schema,
+            "seed": seed,
+            "cardinalities": cardinalities,
+            "density": density,
+            "population": population,
+            "start_date": start_date,
+            "span_days": span_days,
+            "bag": bag,
+        }
+        self.schema = schema
+        self.seed = seed
+        self.cardinalities = {**DEFAULT_CARDINALITIES, **(cardinalities or {})}
+        self.density = density
+        self.population = population
+        self.start_date = start_date
+        self.span_days = span_days
+        self.bag = bag or DEFAULT_BAGS.get(Path(schema).name)
+        if not self.bag:
+            raise ValueError(f"No record bag known for {schema}")
+        doc = _load(schema)
+        bag_node = doc["properties"][self.bag]
+        self._record = self._compile(_items(bag_node), self.bag)
+        # Whole responses follow the bag's tuple positions, which may each
+        # require different fields.
+        raw = bag_node.get("items") or {}
+        self._positional = [
+            self._compile(spec, self.bag)
+            for spec in (raw if isinstance(raw, list) and raw else [raw])
+        ]
+        self._wrapper = {
+            name: self._compile(node, name)
+            for name, node in doc.get("properties", {}).items()
+            if name not in (self.bag, "count")
+        }
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Compiled closures do not pickle; rebuild from the arguments.
+        return (_rebuild, (self._args,))
+
+    # -- compilation ----------------------------------------------------
+    def _count(self, name: str) -> Callable[[random.Random], int]:
+        spec = self.cardinalities.get(name, _DEFAULT_RANGE)
+        if isinstance(spec, int):
+            return lambda rng: spec
+        lo, hi = spec
+        return lambda rng: rng.randint(lo, hi)
+
+    def _always(
+        self, name: str, node: Mapping[str, Any], required: set[str]
+    ) -> bool:
+        if name in required or name in _ALWAYS:
+            return True
+        # A bag given a non-zero minimum cardinality is always emitted.
+        spec = self.cardinalities.get(name)
+        low = spec if isinstance(spec, int) else (spec or (0, 0))[0]
+        return node.get("type") == "array" and low > 0
+
+    def _compile(self, node: Mapping[str, Any], name: str) -> FieldGen:
+        kind = node.get("type")
+        if kind == "object" or (kind is None and "properties" in node):
+            required = set(node.get("required") or ())
+            fields = [
+                (prop, self._compile(sub, prop), self._always(prop, sub, required))
+                for prop, sub in (node.get("properties") or {}).items()
+            ]
+            density = self.density
+
+            def gen_object(c: _Ctx) -> dict[str, Any]:
+                rnd = c.rng.random
+                return {
+                    prop: gen(c)
+                    for prop, gen, always in fields
+                    if always or rnd() < density
+                }
+
+            return gen_object
+        if kind == "array":
+            # Draft-4 tuple form gives one schema per position; items past
+            # the end reuse the last one.
+            raw = node.get("items") or {}
+            specs = raw if isinstance(raw, list) and raw else [raw]
+            gens = [self._compile(spec, name) for spec in specs]
+            last = len(gens) - 1
+            count = self._count(name)
+
+            def gen_array(c: _Ctx) -> list[Any]:
+                return [gens[min(k, last)](c) for k in range(count(c.rng))]
+
+            return gen_array
+        return _leaf(kind, name)
+
+    # -- generation -----------------------------------------------------
+    def _ctx(self, index: int) -> _Ctx:
+        rng = random.Random(f"{self.seed}:{index}")
+        return _Ctx(rng, index, self.population, self.start_date, self.span_days)
+
+    def record(self, index: int) -> dict[str, Any]:
+        """Return record ``index`` of the dataset."""
+
+        return self._record(self._ctx(index))
+
+    def records(self, count: int, start: int = 0) -> Iterator[dict[str, Any]]:
+        """Yield records ``start`` to ``start + count - 1``."""
+
+        for index in range(start, start + count):
+            yield self.record(index)
+
+    def response(self, count: int, start: int = 0) -> dict[str, Any]:
+        """Return a whole response body wrapping ``count`` records."""
+
+        ctx = self._ctx(-1 - start)
+        body: dict[str, Any] = {"count": count}
+        for name, gen in self._wrapper.items():
+            body[name] = gen(ctx)
+        last = len(self._positional) - 1
+        body[self.bag] = [
+            self._positional[min(k, last)](self._ctx(start + k))
+            for k in range(count)
+        ]
+        return body
+
+    def encoded(self, count: int, start: int = 0) -> bytes:
+        """Return records as comma-joined compact JSON (an array body)."""
+
+        return b",".join(
+            json.dumps(rec, separators=(",", ":")).encode()
+            for rec in self.records(count, start)
+        )
+
+
+def _rebuild(kwargs: dict[str, Any]) -> SyntheticGenerator:
+    return SyntheticGenerator(**kwargs)
+
+
+def _load(schema: str) -> dict[str, Any]:
+    path = Path(schema)
+    if not path.is_absolute() and not path.exists():
+        path = SCHEMAS_DIR / schema
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def write_json(path: str, generator: SyntheticGenerator, records: int) -> str:
+    """Write one response body holding ``records`` records to ``path``."""
+
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(generator.response(records), handle)
+    return path
+
+
+def _encode_batch(generator: SyntheticGenerator, count: int, start: int) -> bytes:
+    return generator.encoded(count, start)
+
+
+def write_bulk_zip(
+    path: str,
+    generator: SyntheticGenerator,
+    records: int | None = None,
+    target_bytes: int | None = None,
+    records_per_member: int = 10_000,
+    processes: int = 1,
+    batch: int = 500,
+) -> dict[str, int]:
+    """Write a bulk-dataset style ZIP of JSON members.
+
+    Each member is ``{"<bag>": [...], "count": n}`` as served by the bulk
+    API, so :func:`~api_gui.util.bulk_reader.iter_bulk_records` reads it
+    back. Members are streamed into the archive (ZIP64), so multi-GB
+    archives are written in constant memory.
+
+    Args:
+        path: Destination ``.zip`` file.
+        generator: Source of records.
+        records: Number of records to write.
+        target_bytes: Alternatively, stop after the batch that takes the
+            uncompressed JSON past this size.
+        records_per_member: Records per JSON member (the last one may hold
+            fewer).
+        processes: Generate batches in this many worker processes; the
+            archive is identical to a single-process run.
+        batch: Records per generation task.
+
+    Returns:
+        ``{"records": ..., "members": ..., "bytes": ...}`` (uncompressed).
+    """
+
+    if records is None and target_bytes is None:
+        raise ValueError("Pass records or target_bytes")
+    batch = max(1, min(batch, records_per_member))
+    bag = generator.bag.encode()
+    stats = {"records": 0, "members": 0, "bytes": 0}
+
+    def tasks() -> Iterator[tuple[int, int]]:
+        start = 0
+        while records is None or start < records:
+            count = batch if records is None else min(batch, records - start)
+            # Never let a batch straddle two members.
+            count = min(count, records_per_member - start % records_per_member)
+            yield count, start
+            start += count
+
+    def encoded() -> Iterator[tuple[int, bytes]]:
+        if processes <= 1:
+            for count, start in tasks():
+                yield count, _encode_batch(generator, count, start)
+            return
+        with ProcessPoolExecutor(processes) as pool:
+            window: deque[tuple[int, Future[bytes]]] = deque()
+            try:
+                for count, start in tasks():
+                    window.append(
+                        (count, pool.submit(_encode_batch, generator, count, start))
+                    )
+                    if len(window) >= processes * 2:
+                        done_count, future = window.popleft()
+                        yield done_count, future.result()
+                while window:
+                    done_count, future = window.popleft()
+                    yield done_count, future.result()
+            finally:
+                for _, future in window:
+                    future.cancel()
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        member = None
+        in_member = 0
+        for count, chunk in encoded():
+            if member is None:
+                name = f"{Path(path).stem}-{stats['members']:05d}.json"
+                member = archive.open(name, "w", force_zip64=True)
+                member.write(b'{"' + bag + b'":[')
+                stats["members"] += 1
+                in_member = 0
+            elif in_member:
+                member.write(b",")
+            member.write(chunk)
+            in_member += count
+            stats["records"] += count
+            stats["bytes"] += len(chunk)
+            done = target_bytes is not None and stats["bytes"] >= target_bytes
+            if in_member >= records_per_member or done:
+                member.write(b'],"count":%d}' % in_member)
+                member.close()
+                member = None
+            if done:
+                break
+        if member is not None:
+            member.write(b'],"count":%d}' % in_member)
+            member.close()
+    return stats
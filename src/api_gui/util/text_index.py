@@ -0,0 +1,400 @@
+"""Full-text index of downloaded file-wrapper documents.
+
+:meth:`TextIndex.add` extracts the text of downloaded PDFs in a process
+pool and stores it once per content hash, in a SQLite FTS5 table joined
+to the application number and ``documentCode`` of every document with
+that content::
+
+    with TextIndex("text.sqlite") as index:
+        index.add(sources_from_manifest("harvest/manifest.jsonl"), workers=8)
+        for hit in index.search('"obvious over" NEAR(motivation)', codes=["CTFR"]):
+            hit.application, hit.code, hit.snippet
+
+Nothing is parsed twice. A document whose file has the same path, size
+and modification time as when it was indexed is skipped without being
+read, and a file whose SHA-256 (taken from a
+:class:`~api_gui.util.document_store.DocumentStore` when one is given)
+already has text reuses it. Documents that fail to extract are
+remembered too, so a broken PDF is not retried on every run unless
+``retry_failed`` asks for it.
+
+The default extractor needs pypdf; install it with ``pip install
+pro-ref[text]``. Any picklable ``path -> str`` function can replace it.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from ..clients.dispatch import bounded_map
+from . import metrics
+from .sqlite_db import SQLiteDB
+
+if TYPE_CHECKING:
+    from .document_store import DocumentStore
+
+__all__ = [
+    "Hit",
+    "IndexStats",
+    "TextIndex",
+    "TextSource",
+    "extract_pdf_text",
+    "sources_from_manifest",
+]
+
+Extractor = Callable[[str], str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS texts (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    chars INTEGER NOT NULL,
+    error TEXT,
+    extracted REAL NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS text_fts USING fts5(
+    body, content='texts', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS documents (
+    application TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    code TEXT,
+    date TEXT,
+    sha256 TEXT NOT NULL,
+    path TEXT,
+    size INTEGER,
+    mtime INTEGER,
+    PRIMARY KEY (application, document_id)
+);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256);
+CREATE INDEX IF NOT EXISTS documents_code ON documents (code, application);
+"""
+
+# Harvest manifest statuses whose ``path`` holds the document.
+_ON_DISK = ("downloaded", "linked", "skipped")
+
+
+def extract_pdf_text(path: str) -> str:
+    """Return the text of every page of the PDF at ``path``."""
+
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:
+        raise ImportError(
+            "PDF text extraction needs pypdf; pip install 'pro-ref[text]'"
+        ) from exc
+    reader = PdfReader(path)
+    return "\n\f".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _extract(job: tuple[Extractor, str]) -> tuple[str, str | None]:
+    # Runs in a worker process; an error is a result to cache, not a crash.
+    extractor, path = job
+    try:
+        return extractor(path), None
+    except ImportError:
+        raise
+    except Exception as exc:
+        return "", f"{type(exc).__name__}: {exc}"
+
+
+@dataclass(frozen=True)
+class TextSource:
+    """A downloaded document to index."""
+
+    application: str
+    document_id: str
+    path: str
+    code: str = ""
+    date: str = ""
+    sha256: str | None = None
+
+
+@dataclass(frozen=True)
+class Hit:
+    """A document matching a :meth:`TextIndex.search` query."""
+
+    application: str
+    document_id: str
+    code: str
+    date: str
+    snippet: str
+    score: float
+
+
+@dataclass
+class IndexStats:
+    """Counts for one :meth:`TextIndex.add` call.
+
+    ``unchanged`` documents were skipped unread, ``cached`` ones reused
+    the text of content indexed before, ``extracted`` were parsed now.
+    """
+
+    documents: int = 0
+    unchanged: int = 0
+    cached: int = 0
+    extracted: int = 0
+    failed: int = 0
+    missing: int = 0
+
+
+def sources_from_manifest(path: str) -> Iterator[TextSource]:
+    """Yield the on-disk documents of a harvest manifest (CSV or JSONL)."""
+
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            rows: Iterable[dict[str, Any]] = (
+                json.loads(line) for line in handle if line.strip()
+            )
+        else:
+            rows = csv.DictReader(handle)
+        for row in rows:
+            if row.get("status") in _ON_DISK and row.get("path"):
+                yield TextSource(
+                    str(row["application_number"]),
+                    str(row["document_id"]),
+                    str(row["path"]),
+                    code=str(row.get("code") or ""),
+                    date=str(row.get("date") or "")[:10],
+                )
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TextIndex(SQLiteDB):
+    """SQLite FTS5 index of document text, cached by content hash."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, _SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def text(self, application: str, document_id: str) -> str | None:
+        """Return the indexed text of one document."""
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT t.body FROM documents AS d JOIN texts AS t"
+                " ON t.sha256 = d.sha256"
+                " WHERE d.application = ? AND d.document_id = ?",
+                (application, document_id),
+            ).fetchone()
+        return row[0] if row else None
+
+    def failures(self) -> list[tuple[str, str, str]]:
+        """Return ``(application, document_id, error)`` for failed texts."""
+
+        with self._lock:
+            return self._conn.execute(
+                "SELECT d.application, d.document_id, t.error FROM documents AS d"
+                " JOIN texts AS t ON t.sha256 = d.sha256"
+                " WHERE t.error IS NOT NULL ORDER BY 1, 2"
+            ).fetchall()
+
+    def _known(self) -> dict[tuple[str, str], tuple[str, str | None, int, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.application, d.document_id, d.sha256, d.path, d.size,"
+                " d.mtime FROM documents AS d JOIN texts AS t ON t.sha256 = d.sha256"
+            ).fetchall()
+        return {(r[0], r[1]): (r[2], r[3], r[4], r[5]) for r in rows}
+
+    def _cached(self, sha256: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM texts WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return row is not None
+
+    def add(
+        self,
+        sources: Iterable[TextSource],
+        workers: int = 4,
+        extractor: Extractor = extract_pdf_text,
+        store: DocumentStore | None = None,
+        batch: int = 200,
+        retry_failed: bool = False,
+    ) -> IndexStats:
+        """Index ``sources``, extracting only text not cached yet.
+
+        Args:
+            sources: Documents on disk, e.g. :func:`sources_from_manifest`.
+            workers: Extraction processes; ``0`` extracts in this process.
+            extractor: Picklable ``path -> text`` function.
+            store: Document store to take content hashes from instead of
+                hashing files.
+            batch: Extracted texts written per transaction.
+            retry_failed: Extract documents that failed before again.
+
+        Raises:
+            ImportError: When the extractor's PDF library is missing.
+        """
+
+        stats = IndexStats()
+        if retry_failed:
+            with self._lock:
+                self._conn.execute("DELETE FROM texts WHERE error IS NOT NULL")
+        known = self._known()
+
+        def changed() -> Iterator[tuple[TextSource, int, int]]:
+            for source in sources:
+                stats.documents += 1
+                try:
+                    st = os.stat(source.path)
+                except OSError:
+                    stats.missing += 1
+                    continue
+                key = (source.application, source.document_id)
+                current = (source.path, st.st_size, st.st_mtime_ns)
+                if known.get(key, ())[1:] == current:
+                    stats.unchanged += 1
+                    continue
+                yield source, st.st_size, st.st_mtime_ns
+
+        def hashed(item: tuple[TextSource, int, int]) -> str:
+            source, size, _ = item
+            if source.sha256:
+                return source.sha256
+            if store is not None:
+                doc = store.get(source.document_id, _ext(source.path))
+                if doc is not None and doc.size == size:
+                    return doc.sha256
+            return _sha256(source.path)
+
+        with metrics.stage("text.index", path=self.path) as info:
+            rows: list[tuple[Any, ...]] = []
+            needed: dict[str, str] = {}
+            # Hashing reads every changed file; threads overlap the reads.
+            for (source, size, mtime), sha, exc in bounded_map(
+                hashed, changed(), max(1, workers)
+            ):
+                if exc is not None:
+                    stats.missing += 1
+                    continue
+                assert sha is not None
+                rows.append(
+                    (source.application, source.document_id, source.code)
+                    + (source.date, sha, source.path, size, mtime)
+                )
+                if sha not in needed and not self._cached(sha):
+                    needed[sha] = source.path
+            stats.cached = len(rows) - len(needed)
+
+            texts: list[tuple[str, str, str | None]] = []
+            jobs = [(extractor, path) for path in needed.values()]
+            for sha, (text, error) in zip(needed, self._run(jobs, workers)):
+                texts.append((sha, text, error))
+                if error is None:
+                    stats.extracted += 1
+                else:
+                    stats.failed += 1
+                info["items"] += 1
+                if len(texts) >= batch:
+                    self._write(texts, [])
+                    texts = []
+            # Documents are written after the texts they point at.
+            self._write(texts, rows)
+        return stats
+
+    def _run(
+        self, jobs: list[tuple[Extractor, str]], workers: int
+    ) -> Iterator[tuple[str, str | None]]:
+        if workers <= 0 or len(jobs) <= 1:
+            yield from map(_extract, jobs)
+            return
+        # "spawn" rather than fork: the caller may be running other threads
+        # (the GUI, a harvest), which a forked child would inherit mid-lock.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            for _, result, exc in bounded_map(_extract, jobs, workers, pool):
+                if exc is not None:  # missing library or a broken pool
+                    raise exc
+                assert result is not None
+                yield result
+
+    def _write(
+        self, texts: list[tuple[str, str, str | None]], rows: list[tuple[Any, ...]]
+    ) -> None:
+        if not texts and not rows:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sha, body, error in texts:
+                    cur = self._conn.execute(
+                        "INSERT OR IGNORE INTO texts (sha256, chars, error,"
+                        " extracted, body) VALUES (?, ?, ?, ?, ?)",
+                        (sha, len(body), error, now, body),
+                    )
+                    if cur.rowcount and body:
+                        self._conn.execute(
+                            "INSERT INTO text_fts (rowid, body) VALUES (?, ?)",
+                            (cur.lastrowid, body),
+                        )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def search(
+        self,
+        query: str,
+        codes: Sequence[str] | None = None,
+        applications: Sequence[str] | None = None,
+        limit: int | None = 50,
+    ) -> list[Hit]:
+        """Return documents matching the FTS5 ``query``, best first.
+
+        ``query`` uses FTS5 syntax: words, ``"exact phrases"``,
+        ``NEAR(a b, 10)``, ``AND``/``OR``/``NOT`` and ``prefix*``; words are
+        stemmed, so ``rejected`` also finds ``rejection``. Every document
+        with matching content is returned, restricted to ``codes`` and
+        ``applications`` when given.
+        """
+
+        sql = (
+            "SELECT d.application, d.document_id, d.code, d.date,"
+            " snippet(text_fts, 0, '[', ']', '...', 16), bm25(text_fts)"
+            " FROM text_fts JOIN texts AS t ON t.id = text_fts.rowid"
+            " JOIN documents AS d ON d.sha256 = t.sha256"
+            " WHERE text_fts MATCH ?"
+        )
+        params: list[object] = [query]
+        for column, values in (("code", codes), ("application", applications)):
+            if values:
+                sql += f" AND d.{column} IN ({','.join('?' * len(values))})"
+                params.extend(values)
+        sql += " ORDER BY bm25(text_fts), d.application, d.document_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [Hit(*row) for row in rows]
+
+
+def _ext(path: str) -> str:
+    return os.path.splitext(path)[1].lstrip(".").lower() or "pdf"
@@ -0,0 +1,381 @@
+"""Watchlists of applications polled for status changes.
+
+A :class:`Watchlist` keeps, per application, a :class:`Snapshot` of what
+a docketing team watches: the status code, the latest ``eventDataBag``
+entry and the number of documents. :meth:`Watchlist.poll` re-checks every
+application with bounded concurrency and yields a :class:`Change` only
+where the snapshot's fingerprint moved::
+
+    with Watchlist("watch.sqlite") as watch:
+        watch.add(["14412875", "16123456"])
+        for change in watch.poll(client, workers=8):
+            change.application, change.fields()  # {"status_code": (30, 150)}
+        watch.last.not_modified, watch.last.changed
+
+Unchanged applications are cheap at every step. Each request carries the
+``ETag``/``Last-Modified`` validators of the previous response, so a
+server that honours them answers ``304`` without a body; otherwise the
+raw body is hashed and compared with the previous one before anything is
+decoded. Only responses that changed are decoded, and only applications
+whose fingerprint or validators changed are written back.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import asdict, astuple, dataclass, field
+from typing import TYPE_CHECKING, Any, Protocol
+
+from ..clients.base import response_validators
+from ..clients.dispatch import bounded_map
+from . import metrics
+from .petition_join import pfw_record
+from .sqlite_db import SQLiteDB
+
+if TYPE_CHECKING:
+    import requests
+
+    from .record_store import RecordStore
+
+__all__ = ["Change", "PollStats", "Snapshot", "Watchlist", "record_snapshot"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watch (
+    application TEXT PRIMARY KEY,
+    added REAL NOT NULL,
+    changed REAL,
+    snapshot TEXT,
+    record_tag TEXT,
+    record_hash TEXT,
+    docs_tag TEXT,
+    docs_hash TEXT
+);
+"""
+
+Fetch = Callable[[str, "Mapping[str, str] | None"], "requests.Response | None"]
+
+
+class WatchClient(Protocol):
+    """Subset of :class:`USPTOODPClient` used by :meth:`Watchlist.poll`."""
+
+    def pfw_lookup_if_changed(
+        self, application_number: str, validators: Mapping[str, str] | None = None
+    ) -> requests.Response | None: ...
+
+    def pfw_documents_if_changed(
+        self, application_number: str, validators: Mapping[str, str] | None = None
+    ) -> requests.Response | None: ...
+
+    def decode(self, response: requests.Response) -> Any: ...
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """The watched state of one application."""
+
+    status_code: int | None = None
+    event_date: str | None = None
+    event_code: str | None = None
+    documents: int | None = None
+    status: str | None = field(default=None, compare=False)
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the compared fields (the status text is informative)."""
+
+        return hashlib.sha1(json.dumps(astuple(self)[:4]).encode()).hexdigest()
+
+
+_FIELDS = ("status_code", "event_date", "event_code", "documents")
+
+
+def record_snapshot(
+    record: Mapping[str, Any], documents: int | None = None
+) -> Snapshot:
+    """Return the :class:`Snapshot` of a PFW record."""
+
+    meta = record.get("applicationMetaData") or {}
+    events = [e for e in record.get("eventDataBag") or [] if isinstance(e, dict)]
+    latest = max(events, key=lambda e: str(e.get("eventDate") or ""), default={})
+    date = str(latest.get("eventDate") or "")[:10] or None
+    return Snapshot(
+        status_code=meta.get("applicationStatusCode"),
+        event_date=date,
+        event_code=latest.get("eventCode"),
+        documents=documents,
+        status=meta.get("applicationStatusDescriptionText"),
+    )
+
+
+@dataclass(frozen=True)
+class Change:
+    """An application whose snapshot changed since the previous poll.
+
+    ``before`` is ``None`` the first time an application is polled, and
+    ``record`` is the new PFW record when the lookup itself changed.
+    """
+
+    application: str
+    before: Snapshot | None
+    after: Snapshot
+    record: dict[str, Any] | None = field(default=None, repr=False, compare=False)
+
+    def fields(self) -> dict[str, tuple[Any, Any]]:
+        """Return ``{field: (old, new)}`` for every field that changed."""
+
+        before = self.before or Snapshot()
+        return {
+            name: (getattr(before, name), getattr(self.after, name))
+            for name in _FIELDS
+            if getattr(before, name) != getattr(self.after, name)
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "application": self.application,
+            "first": self.before is None,
+            "status": self.after.status,
+            "changes": {name: list(pair) for name, pair in self.fields().items()},
+        }
+
+
+@dataclass
+class PollStats:
+    """Counts for one :meth:`Watchlist.poll` call.
+
+    ``not_modified`` applications were answered ``304``; ``unchanged``
+    ones returned a body that hashed (or fingerprinted) as before.
+    """
+
+    checked: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+    changed: int = 0
+    failed: int = 0
+    written: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _Entry:
+    application: str
+    snapshot: Snapshot | None = None
+    record_tag: dict[str, str] | None = None
+    record_hash: str | None = None
+    docs_tag: dict[str, str] | None = None
+    docs_hash: str | None = None
+
+
+@dataclass
+class _Probe:
+    data: Any
+    tag: dict[str, str] | None
+    digest: str | None
+    status: str  # "not_modified", "same" or "new"
+
+
+def _probe(
+    client: WatchClient, fetch: Fetch, app: str, tag: Any, digest: str | None
+) -> _Probe:
+    response = fetch(app, tag)
+    if response is None:
+        return _Probe(None, tag, digest, "not_modified")
+    new_tag = response_validators(response) or None
+    new_digest = hashlib.sha1(response.content).hexdigest()
+    if new_digest == digest:
+        return _Probe(None, new_tag, digest, "same")
+    return _Probe(client.decode(response), new_tag, new_digest, "new")
+
+
+class Watchlist(SQLiteDB):
+    """SQLite list of watched applications and their last snapshots."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, _SCHEMA)
+        self.last = PollStats()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM watch").fetchone()[0]
+
+    def __contains__(self, application: object) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM watch WHERE application = ?", (application,)
+            ).fetchone()
+        return row is not None
+
+    def add(self, applications: Iterable[str]) -> int:
+        """Watch ``applications``; return how many were not watched yet."""
+
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO watch (application, added) VALUES (?, ?)",
+                [(str(app), now) for app in applications],
+            )
+            return self._conn.total_changes - before
+
+    def remove(self, applications: Iterable[str]) -> int:
+        """Stop watching ``applications``; return how many were removed."""
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "DELETE FROM watch WHERE application = ?",
+                [(str(app),) for app in applications],
+            )
+            return self._conn.total_changes - before
+
+    def items(self) -> list[tuple[str, Snapshot | None]]:
+        """Return every watched application with its last snapshot."""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT application, snapshot FROM watch ORDER BY application"
+            ).fetchall()
+        return [(app, _snapshot(text)) for app, text in rows]
+
+    def _entries(self, applications: Iterable[str] | None) -> list[_Entry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT application, snapshot, record_tag, record_hash,"
+                " docs_tag, docs_hash FROM watch ORDER BY application"
+            ).fetchall()
+        entries = [
+            _Entry(app, _snapshot(snap), _tag(rtag), rhash, _tag(dtag), dhash)
+            for app, snap, rtag, rhash, dtag, dhash in rows
+        ]
+        if applications is None:
+            return entries
+        wanted = set(applications)
+        return [entry for entry in entries if entry.application in wanted]
+
+    def poll(
+        self,
+        client: WatchClient,
+        workers: int = 4,
+        documents: bool = True,
+        applications: Iterable[str] | None = None,
+        store: RecordStore | None = None,
+    ) -> Iterator[Change]:
+        """Re-check watched applications and yield those that changed.
+
+        Args:
+            client: Client providing the conditional lookups.
+            workers: Concurrent applications in flight.
+            documents: Also check the document list (a second request per
+                application); otherwise document counts are left as they
+                were.
+            applications: Poll only these watched applications.
+            store: Record store that every newly fetched record is ingested
+                into, whether or not its snapshot fingerprint moved.
+
+        Failed applications keep their previous state and are listed in
+        :attr:`last`, which holds this poll's :class:`PollStats`.
+        """
+
+        stats = self.last = PollStats()
+
+        def check(entry: _Entry) -> tuple[_Probe, _Probe | None]:
+            record = _probe(
+                client,
+                client.pfw_lookup_if_changed,
+                entry.application,
+                entry.record_tag,
+                entry.record_hash,
+            )
+            docs = None
+            if documents:
+                docs = _probe(
+                    client,
+                    client.pfw_documents_if_changed,
+                    entry.application,
+                    entry.docs_tag,
+                    entry.docs_hash,
+                )
+            return record, docs
+
+        with metrics.stage("watch.poll", path=self.path) as info:
+            results = bounded_map(check, self._entries(applications), workers)
+            for entry, probes, exc in results:
+                stats.checked += 1
+                info["items"] = stats.checked
+                if exc is not None:
+                    stats.failed += 1
+                    stats.errors[entry.application] = str(exc)
+                    continue
+                assert probes is not None
+                record = probes[0]
+                if store is not None and record.status == "new":
+                    # Any new body goes to the store, not only fingerprint moves.
+                    store.ingest([pfw_record(record.data) or record.data])
+                change = self._apply(entry, *probes, stats)
+                if change is None:
+                    continue
+                stats.changed += 1
+                yield change
+
+    def _apply(
+        self, entry: _Entry, record: _Probe, docs: _Probe | None, stats: PollStats
+    ) -> Change | None:
+        probes = [record] + ([docs] if docs is not None else [])
+        if all(p.status == "not_modified" for p in probes):
+            stats.not_modified += 1
+            return None
+        before = entry.snapshot
+        after = before or Snapshot()
+        data = None
+        if record.status == "new":
+            data = pfw_record(record.data) or record.data
+            after = record_snapshot(data, after.documents)
+        if docs is not None and docs.status == "new":
+            count = len(docs.data.get("documentBag") or [])
+            after = Snapshot(**{**asdict(after), "documents": count})
+        moved = before is None or after.fingerprint != before.fingerprint
+        if docs is None:
+            docs = _Probe(None, entry.docs_tag, entry.docs_hash, "not_modified")
+        dirty = moved or (
+            (record.tag, record.digest, docs.tag, docs.digest)
+            != (entry.record_tag, entry.record_hash, entry.docs_tag, entry.docs_hash)
+        )
+        if not moved:
+            stats.unchanged += 1
+        if dirty:
+            self._write(entry.application, after, record, docs, moved)
+            stats.written += 1
+        if not moved:
+            return None
+        return Change(entry.application, before, after, data)
+
+    def _write(
+        self, app: str, snapshot: Snapshot, record: _Probe, docs: _Probe, moved: bool
+    ) -> None:
+        values = [
+            json.dumps(asdict(snapshot)),
+            json.dumps(record.tag) if record.tag else None,
+            record.digest,
+            json.dumps(docs.tag) if docs.tag else None,
+            docs.digest,
+        ]
+        sql = (
+            "UPDATE watch SET snapshot = ?, record_tag = ?, record_hash = ?,"
+            " docs_tag = ?, docs_hash = ?"
+        )
+        if moved:
+            sql += ", changed = ?"
+            values.append(time.time())
+        with self._lock:
+            self._conn.execute(sql + " WHERE application = ?", (*values, app))
+
+
+def _snapshot(text: str | None) -> Snapshot | None:
+    return Snapshot(**json.loads(text)) if text else None
+
+
+def _tag(text: str | None) -> dict[str, str] | None:
+    return json.loads(text) if text else None
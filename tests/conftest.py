@@ -1,4 +1,8 @@
+from __future__ import annotations
+
 import os
+import threading
+from collections.abc import Collection, Iterator, Mapping, Sequence
 from pathlib import Path
 from typing import Any, cast
 
@@ -31,3 +35,80 @@ def recorder(name: str) -> Any:
 
     decorator: Any = vcr_instance.use_cassette(str(cassette_path))
     return decorator
+
+
+class FakeDocumentClient:
+    """File-wrapper search, listing and download fakes for offline tests.
+
+    Each application lists one PDF per entry of ``codes``, identified as
+    ``"<application>-<code>"``, unless ``listing`` fixes the response for
+    every application. Downloads write ``content[document_id]``, or
+    ``b"%PDF-" + document_id`` when ``content`` has no entry. ``listed``
+    and ``downloads`` record every attempt, including failed ones.
+
+    Args:
+        codes: Document codes, or ``(code, officialDate)`` pairs.
+        listing: ``pfw_documents`` response served for every application.
+        content: Bytes written per document id.
+        records: Search hits yielded by ``iter_search_pfw``.
+        fail_listing: Applications whose listing raises.
+        fail: Document ids whose download raises; tests may reassign it.
+    """
+
+    def __init__(
+        self,
+        codes: Sequence[str | tuple[str, str]] = ("CTNF", "NOA"),
+        *,
+        listing: Mapping[str, Any] | None = None,
+        content: Mapping[str, bytes] | None = None,
+        records: Sequence[dict[str, Any]] = (),
+        fail_listing: Collection[str] = (),
+        fail: Collection[str] = (),
+    ) -> None:
+        self.codes = [(c, "2020-01-01") if isinstance(c, str) else c for c in codes]
+        self.listing = listing
+        self.content = dict(content or {})
+        self.records = list(records)
+        self.fail_listing = set(fail_listing)
+        self.fail = set(fail)
+        self.listed: list[str] = []
+        self.downloads: list[str] = []
+        self._lock = threading.Lock()
+
+    def iter_search_pfw(
+        self,
+        payload: Mapping[str, Any],
+        page_size: int = 100,
+        max_records: int | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        yield from self.records[:max_records]
+
+    def pfw_documents(self, application_number: str) -> Mapping[str, Any]:
+        with self._lock:
+            self.listed.append(application_number)
+        if application_number in self.fail_listing:
+            raise RuntimeError("listing failed")
+        if self.listing is not None:
+            return self.listing
+        return {
+            "documentBag": [
+                {
+                    "documentIdentifier": f"{application_number}-{code}",
+                    "officialDate": date,
+                    "documentCode": code,
+                    "downloadOptionBag": [{"mimeTypeIdentifier": "PDF"}],
+                }
+                for code, date in self.codes
+            ]
+        }
+
+    def pfw_download(
+        self, application_number: str, document_id: str, ext: str, dest_path: str
+    ) -> str:
+        with self._lock:
+            self.downloads.append(document_id)
+        if document_id in self.fail:
+            raise RuntimeError("download failed")
+        body = self.content.get(document_id, b"%PDF-" + document_id.encode())
+        Path(dest_path).write_bytes(body)
+        return dest_path
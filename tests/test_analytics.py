@@ -0,0 +1,209 @@
+"""Tests for the local record store and portfolio analytics."""
+
+from __future__ import annotations
+
+import io
+import json
+import math
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from api_gui import cli
+from api_gui.util.record_store import RecordStore
+
+# (app, art unit, examiner, filing, grant, status code, status, cpc)
+ROWS = [
+    (
+        "1",
+        "2100",
+        "SMITH, A",
+        "2015-01-01",
+        "2017-01-01",
+        150,
+        "Patented Case",
+        ["H04L 9/32", "G06F 21/60"],
+    ),
+    (
+        "2",
+        "2100",
+        "SMITH, A",
+        "2016-01-01",
+        "2017-01-01",
+        150,
+        "Patented Case",
+        ["H04L 63/08"],
+    ),
+    (
+        "3",
+        "2100",
+        "JONES, B",
+        "2016-06-01",
+        None,
+        161,
+        "Abandoned -- Failure to Respond to an Office Action",
+        ["G06F 21/31"],
+    ),
+    ("4", "3600", "JONES, B", "2018-01-01", None, 30, "Docketed New Case", []),
+    (
+        "5",
+        "3600",
+        "JONES, B",
+        "2014-01-01",
+        "2020-01-01",
+        150,
+        "Patented Case",
+        ["G06Q 40/04"],
+    ),
+]
+
+
+def _record(row: tuple[Any, ...]) -> dict[str, Any]:
+    app, unit, examiner, filed, granted, code, status, cpc = row
+    meta = {
+        "groupArtUnitNumber": unit,
+        "examinerNameText": examiner,
+        "filingDate": filed,
+        "applicationStatusCode": code,
+        "applicationStatusDescriptionText": status,
+        "cpcClassificationBag": cpc,
+    }
+    if granted:
+        meta["grantDate"] = granted
+    return {"applicationNumberText": app, "applicationMetaData": meta}
+
+
+def test_ingest_skips_unchanged_records(tmp_path: Path) -> None:
+    records = [_record(row) for row in ROWS]
+    path = str(tmp_path / "store.sqlite")
+    with RecordStore(path) as store:
+        first = store.ingest(records + [{"no": "number"}])
+        stamp = store.select("SELECT updated FROM records WHERE application='1'")
+
+        changed = _record(ROWS[3])
+        changed["applicationMetaData"]["applicationStatusCode"] = 161
+        # Key order does not count as a change.
+        reordered = dict(reversed(list(records[0].items())))
+        second = store.ingest([reordered, changed])
+
+        assert (first.added, first.skipped) == (5, 1)
+        assert (second.added, second.changed, second.unchanged) == (0, 1, 1)
+        assert (
+            store.select("SELECT updated FROM records WHERE application='1'") == stamp
+        )
+        assert store.select(
+            "SELECT status_code FROM record_fields WHERE application='4'"
+        ) == [(161,)]
+        assert store.get("4") == changed
+        assert len(store) == 5 and "5" in store
+
+
+def test_projections_are_backfilled(tmp_path: Path) -> None:
+    path = str(tmp_path / "store.sqlite")
+    with RecordStore(path) as store:
+        store.ingest(_record(row) for row in ROWS)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE record_cpc")
+    conn.commit()
+    conn.close()
+
+    with RecordStore(path) as store:
+        rows = store.select(
+            "SELECT value FROM record_cpc WHERE application='1' ORDER BY value"
+        )
+    assert rows == [("G06F 21/60",), ("H04L 9/32",)]
+
+
+@pytest.fixture
+def portfolio() -> Any:
+    pytest.importorskip("pandas")
+    from api_gui.util.analytics import portfolio_from_records
+
+    return portfolio_from_records(_record(row) for row in ROWS)
+
+
+def test_portfolio_columns_and_outcomes(portfolio: Any) -> None:
+    apps = portfolio.apps
+
+    assert str(apps["filing_date"].dtype).startswith("datetime64")
+    assert apps["art_unit"].dtype == "category"
+    assert list(apps["outcome"]) == [
+        "granted",
+        "granted",
+        "abandoned",
+        "pending",
+        "granted",
+    ]
+    summary = portfolio.summary().iloc[0]
+    assert summary["allowance_rate"] == pytest.approx(0.75)
+
+
+def test_pendency_and_allowance_by_group(portfolio: Any) -> None:
+    pendency = portfolio.pendency(by="art_unit")
+    allowance = portfolio.allowance(by="examiner")
+
+    assert pendency.loc["2100", "count"] == 2
+    assert pendency.loc["2100", "median"] == pytest.approx((731 + 366) / 2)
+    assert pendency.loc["3600", "mean"] == 2191
+    assert portfolio.pendency().loc["all", "count"] == 3
+    assert allowance.loc["SMITH, A", "allowance_rate"] == 1.0
+    assert allowance.loc["JONES, B", "allowance_rate"] == 0.5
+    assert allowance.loc["JONES, B", "pending"] == 1
+    assert list(portfolio.allowance(min_count=3).index) == ["2100"]
+    with pytest.raises(ValueError):
+        portfolio.pendency(by="inventionTitle")
+
+
+def test_records_without_status_text() -> None:
+    pytest.importorskip("pandas")
+    from api_gui.util.analytics import portfolio_from_records
+
+    portfolio = portfolio_from_records([{"applicationNumberText": "1"}])
+
+    assert list(portfolio.apps["outcome"]) == ["pending"]
+    assert portfolio.pendency(by="art_unit").empty
+
+
+def test_empty_portfolio_reports() -> None:
+    pytest.importorskip("pandas")
+    from api_gui.util.analytics import portfolio_from_records
+
+    portfolio = portfolio_from_records([])
+
+    for report in (portfolio.pendency(), portfolio.pendency(by="examiner")):
+        assert list(report.columns) == ["count", "mean", "median", "p10", "p90"]
+    assert portfolio.allowance().empty
+
+
+def test_cpc_distribution_levels(portfolio: Any) -> None:
+    subclass = portfolio.cpc_distribution()
+    section = portfolio.cpc_distribution(level="section", by="art_unit")
+
+    # App 1 has two G06F/H04L symbols but counts once per subclass.
+    assert subclass["count"].to_dict() == {"G06F": 2, "H04L": 2, "G06Q": 1}
+    assert subclass.loc["H04L", "share"] == pytest.approx(0.5)
+    assert section.loc[("2100", "G"), "count"] == 2
+    assert section.loc[("2100", "H"), "share"] == pytest.approx(2 / 3)
+    assert section.loc[("3600", "G"), "share"] == 1.0
+    group = portfolio.cpc_distribution(level="group", top=1)
+    assert list(group.index) == ["G06F21"]
+
+
+def test_cli_ingest_and_analytics(tmp_path: Path) -> None:
+    pytest.importorskip("pandas")
+    source = tmp_path / "hits.jsonl"
+    source.write_text("".join(json.dumps(_record(r)) + "\n" for r in ROWS))
+    store = str(tmp_path / "store.sqlite")
+
+    out = io.StringIO()
+    assert cli.main(["ingest", store, str(source)], out=out) == 0
+    assert json.loads(out.getvalue())["added"] == 5
+
+    out = io.StringIO()
+    argv = ["analytics", store, "--report", "allowance", "--by", "art_unit"]
+    assert cli.main(argv, out=out) == 0
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert rows[0]["art_unit"] == "2100"
+    assert math.isclose(rows[0]["allowance_rate"], 2 / 3)
@@ -0,0 +1,103 @@
+"""Tests for resolving EndNote file attachments during export."""
+
+from __future__ import annotations
+
+import io
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from api_gui import cli
+from api_gui.export.attachments import AttachmentResolver
+from api_gui.export.endnote_export import export_endnote_xml
+from api_gui.util.document_store import DocumentStore
+from tests.conftest import FakeDocumentClient
+
+V2_MAPPING = "src/api_gui/export/endnote_field_map.uspto_pfw.v2.json"
+CODES = [("CTNF", "2023-01-01"), ("NOA", "2024-01-01")]
+
+
+def _client() -> FakeDocumentClient:
+    """Application ``"3"`` has no listing and ``"2-NOA"`` fails to download."""
+
+    return FakeDocumentClient(CODES, fail_listing={"3"}, fail={"2-NOA"})
+
+
+def _records(*apps: str) -> list[dict[str, Any]]:
+    return [
+        {
+            "applicationNumberText": app,
+            "applicationMetaData": {"inventionTitle": f"Invention {app}"},
+        }
+        for app in apps
+    ]
+
+
+def test_stream_resolves_each_application_once(tmp_path: Path) -> None:
+    client = _client()
+    resolver = AttachmentResolver(client, str(tmp_path), workers=2)
+    records = _records("1", "2", "1", "3") + [{"applicationMetaData": {}}]
+
+    streamed = list(resolver.stream(records))
+
+    assert streamed == records
+    assert sorted(client.listed) == ["1", "2", "3"]
+    assert [Path(p).name for p in resolver.paths["1"]] == [
+        "1_2023-01-01_CTNF_1-CTNF.pdf",
+        "1_2024-01-01_NOA_1-NOA.pdf",
+    ]
+    assert len(resolver.paths["2"]) == 1 and "3" not in resolver.paths
+    stats = resolver.stats
+    assert (stats.applications, stats.documents) == (3, 4)
+    assert (stats.downloaded, stats.failed) == (3, 2)
+    assert set(stats.errors) == {"3", "2_2024-01-01_NOA_2-NOA.pdf"}
+
+    # Files already in place are reused by the next export.
+    again = AttachmentResolver(client, str(tmp_path), codes=["NOA"])
+    assert again.resolve(["1"]) == {"1": resolver.paths["1"][1:]}
+    assert (again.stats.skipped, len(client.downloads)) == (1, 4)
+
+
+def test_export_writes_resolved_files(tmp_path: Path) -> None:
+    client = _client()
+    with DocumentStore(str(tmp_path / "store")) as store:
+        resolver = AttachmentResolver(
+            client, str(tmp_path / "files"), codes=["CTNF"], store=store
+        )
+        path = export_endnote_xml(
+            resolver.stream(_records("1", "2")),
+            V2_MAPPING,
+            attach_policy="file",
+            attachment_urls=resolver.paths,
+            out_path=str(tmp_path / "refs.xml"),
+        )
+
+    records = ET.parse(path).getroot().findall("record")
+    files = [[f.text for f in r.iter("file")] for r in records]
+    assert files == [resolver.paths["1"], resolver.paths["2"]]
+    assert all(Path(f).read_bytes().startswith(b"%PDF") for f in sum(files, []))
+    custom = records[0].find("custom[@name='File Attachments']")
+    assert custom is not None and custom.text == resolver.paths["1"][0]
+
+
+def test_cli_export_with_attachments(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client = _client()
+    monkeypatch.setattr(cli, "_client", lambda args: client)
+    hits = tmp_path / "hits.jsonl"
+    hits.write_text("".join(json.dumps(r) + "\n" for r in _records("1", "2")))
+    argv = ["export", str(hits), "--mapping", V2_MAPPING, "--attach-policy", "file"]
+    argv += ["--attach-dir", str(tmp_path / "files"), "--attach-codes", "CTNF"]
+    argv += ["--out", str(tmp_path / "refs.xml")]
+
+    out = io.StringIO()
+    assert cli.main(argv, out=out) == 0
+
+    summary = json.loads(out.getvalue())
+    assert summary["records"] == 2
+    assert summary["attachments"]["downloaded"] == 2
+    assert len(list(ET.parse(summary["path"]).getroot().iter("file"))) == 2
@@ -0,0 +1,138 @@
+"""Tests for concurrent file-wrapper batch downloads."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from api_gui.util.batch_download import (
+    MANIFEST_NAME,
+    BatchDownloader,
+    document_filename,
+    document_refs,
+    download_file_wrapper,
+    filter_documents,
+)
+from tests.conftest import FakeDocumentClient
+
+LISTING: dict[str, Any] = {
+    "documentBag": [
+        {
+            "documentIdentifier": "DOC1",
+            "officialDate": "2015-01-02T00:00:00.000-0500",
+            "documentCode": "CTNF",
+            "documentCodeDescriptionText": "Non-Final Rejection",
+            "downloadOptionBag": [
+                {"mimeTypeIdentifier": "PDF", "pageTotalQuantity": 9},
+            ],
+        },
+        {
+            "documentIdentifier": "DOC2",
+            "officialDate": "2016-03-04T00:00:00.000-0500",
+            "documentCode": "CTFR",
+            "downloadOptionBag": [{"mimeTypeIdentifier": "PDF"}],
+        },
+        {
+            "documentIdentifier": "DOC3",
+            "officialDate": "2017-05-06T00:00:00.000-0500",
+            "documentCode": "CTNF",
+            "downloadOptionBag": [{"mimeTypeIdentifier": "XML"}],
+        },
+    ]
+}
+
+
+def _client() -> FakeDocumentClient:
+    return FakeDocumentClient(listing=LISTING, fail={"BAD"})
+
+
+def test_document_refs_selects_requested_format() -> None:
+    refs = document_refs(LISTING, "14412875")
+
+    assert [r.document_id for r in refs] == ["DOC1", "DOC2"]
+    assert refs[0].pages == 9
+    assert refs[0].description == "Non-Final Rejection"
+
+
+def test_filter_documents_by_code_and_date() -> None:
+    refs = document_refs(LISTING, "14412875")
+
+    assert [r.document_id for r in filter_documents(refs, ["ctnf"])] == [
+        "DOC1"
+    ]
+    assert [
+        r.document_id for r in filter_documents(refs, date_from="2016-01-01")
+    ] == ["DOC2"]
+    assert filter_documents(refs, date_to="2014-12-31") == []
+
+
+def test_document_filename_is_deterministic() -> None:
+    ref = document_refs(LISTING, "14/412,875")[0]
+
+    assert document_filename(ref) == "14-412-875_2015-01-02_CTNF_DOC1.pdf"
+
+
+def test_batch_download_skips_completed_files(tmp_path: Path) -> None:
+    client = _client()
+
+    first = download_file_wrapper(client, "14412875", str(tmp_path), workers=2)
+    assert len(first.downloaded) == 2
+    assert first.ok
+
+    second = download_file_wrapper(client, "14412875", str(tmp_path))
+    assert second.downloaded == []
+    assert len(second.skipped) == 2
+    assert sorted(client.downloads) == ["DOC1", "DOC2"]
+
+
+def test_batch_download_refetches_mismatched_file(tmp_path: Path) -> None:
+    client = _client()
+    download_file_wrapper(client, "14412875", str(tmp_path))
+    name = document_filename(document_refs(LISTING, "14412875")[0])
+    (tmp_path / name).write_bytes(b"%PDF")
+
+    result = download_file_wrapper(client, "14412875", str(tmp_path))
+
+    assert result.downloaded == [name]
+
+
+def test_batch_download_reports_failures(tmp_path: Path) -> None:
+    client = _client()
+    refs = document_refs(LISTING, "14412875")
+    bad = refs[0].__class__(
+        application_number="14412875",
+        document_id="BAD",
+        code="CTNF",
+        date="2015-01-02",
+    )
+
+    result = BatchDownloader(client, str(tmp_path)).download([*refs, bad])
+
+    assert len(result.downloaded) == 2
+    assert list(result.failed) == [document_filename(bad)]
+    assert not result.ok
+
+
+def test_manifest_is_appended_and_compacted(tmp_path: Path) -> None:
+    client = _client()
+    refs = document_refs(LISTING, "14412875")
+    first, second = (document_filename(ref) for ref in refs)
+    (tmp_path / first).write_bytes(b"%PDF-DOC1")
+    (tmp_path / ".batch_manifest.json").write_text(json.dumps({first: 9}))
+
+    result = BatchDownloader(client, str(tmp_path)).download(refs)
+
+    assert (result.skipped, result.downloaded) == ([first], [second])
+    manifest = tmp_path / MANIFEST_NAME
+    assert manifest.read_text().splitlines() == [
+        json.dumps([first, 9]),
+        json.dumps([second, 9]),
+    ]
+    assert not (tmp_path / ".batch_manifest.json").exists()
+
+    with manifest.open("a") as handle:
+        handle.write(json.dumps([second, 9]) + "\n" + '["torn", 4')
+    again = BatchDownloader(client, str(tmp_path)).download(refs)
+    assert sorted(again.skipped) == sorted([first, second])
+    assert len(manifest.read_text().splitlines()) == 2
@@ -0,0 +1,197 @@
+"""Tests for the job journal and resumable harvests."""
+
+from __future__ import annotations
+
+import csv
+import json
+import threading
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+import pytest
+
+from api_gui.util.checkpoint import JobJournal
+from api_gui.util.harvest import (
+    Harvester,
+    checkpointed_lookups,
+    checkpointed_search,
+)
+
+
+class Crash(Exception):
+    pass
+
+
+class FlakyClient:
+    """Search, lookup and download fakes that can fail part-way through."""
+
+    def __init__(self, records: int = 25) -> None:
+        self.records = [
+            {"applicationNumberText": str(16000000 + i)} for i in range(records)
+        ]
+        self.fail_after: int | None = None
+        self.fail_docs: set[str] = set()
+        self.offsets: list[int] = []
+        self.downloads: list[str] = []
+        self.lookups: list[str] = []
+        self._lock = threading.Lock()
+
+    def iter_search_pfw(
+        self,
+        payload: Mapping[str, Any],
+        page_size: int = 100,
+        max_records: int | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        offset = payload["pagination"]["offset"]
+        self.offsets.append(offset)
+        end = len(self.records) if max_records is None else offset + max_records
+        for n, record in enumerate(self.records[offset:end]):
+            if self.fail_after is not None and offset + n == self.fail_after:
+                raise Crash("connection lost")
+            yield record
+
+    def pfw_lookup(self, application_number: str) -> dict[str, Any]:
+        with self._lock:
+            self.lookups.append(application_number)
+        if application_number in self.fail_docs:
+            raise Crash("lookup failed")
+        record = {"applicationNumberText": application_number}
+        return {"patentFileWrapperDataBag": [record]}
+
+    def pfw_documents(self, application_number: str) -> dict[str, Any]:
+        return {
+            "documentBag": [
+                {
+                    "documentIdentifier": f"{application_number}-{code}",
+                    "officialDate": "2020-01-01",
+                    "documentCode": code,
+                    "downloadOptionBag": [{"mimeTypeIdentifier": "PDF"}],
+                }
+                for code in ("CTNF", "NOA")
+            ]
+        }
+
+    def pfw_download(
+        self, application_number: str, document_id: str, ext: str, dest_path: str
+    ) -> str:
+        with self._lock:
+            self.downloads.append(document_id)
+        if document_id in self.fail_docs:
+            raise Crash("download failed")
+        Path(dest_path).write_bytes(b"%PDF")
+        return dest_path
+
+
+def test_search_resumes_from_last_committed_page(tmp_path: Path) -> None:
+    client = FlakyClient(records=25)
+    out = tmp_path / "hits.jsonl"
+    journal = JobJournal(str(tmp_path / "jobs.sqlite"))
+    job = journal.job("search", {"q": "x"})
+
+    client.fail_after = 17
+    with pytest.raises(Crash):
+        checkpointed_search(client, {"q": "x"}, str(out), job, page_size=5)
+    # Two records of the interrupted page reached the file but not the journal.
+    assert len(out.read_text().splitlines()) == 17
+
+    client.fail_after = None
+    resumed = journal.job("search", {"q": "x"})
+    written = checkpointed_search(
+        client, {"q": "x"}, str(out), resumed, page_size=5
+    )
+
+    lines = out.read_text().splitlines()
+    apps = [json.loads(line)["applicationNumberText"] for line in lines]
+    assert apps == [r["applicationNumberText"] for r in client.records]
+    assert written == 10
+    assert client.offsets == [0, 15]
+    assert resumed.status == "done"
+    with pytest.raises(ValueError):
+        journal.job("search", {"q": "y"}, job_id=job.job_id)
+    journal.close()
+
+
+def test_output_refuses_files_the_job_did_not_write(tmp_path: Path) -> None:
+    client = FlakyClient(records=5)
+    earlier = tmp_path / "hits.jsonl"
+    earlier.write_text('{"applicationNumberText": "kept"}\n')
+
+    with JobJournal(str(tmp_path / "jobs.sqlite")) as journal:
+        job = journal.job("search", {"q": "x"})
+        with pytest.raises(FileExistsError):
+            checkpointed_search(client, {"q": "x"}, str(earlier), job)
+        assert "kept" in earlier.read_text()
+
+        # A file the job created is reclaimed even before its first commit.
+        out = tmp_path / "new.jsonl"
+        job.output(str(out)).close()
+        out.write_text("partial\n")
+        with job.output(str(out)) as output:
+            assert output.is_new and out.read_text() == ""
+
+
+def test_lookups_skip_committed_applications(tmp_path: Path) -> None:
+    client = FlakyClient(records=6)
+    apps = [r["applicationNumberText"] for r in client.records]
+    client.fail_docs = {apps[2]}
+    out = tmp_path / "records.jsonl"
+
+    with JobJournal(str(tmp_path / "jobs.sqlite")) as journal:
+        job = journal.job("lookup", {"apps": apps})
+        failures = checkpointed_lookups(client, apps, str(out), job, batch=2)
+        assert list(failures) == [apps[2]]
+        assert job.status == "running"
+
+        client.fail_docs = set()
+        client.lookups.clear()
+        assert checkpointed_lookups(client, apps, str(out), job) == {}
+
+    assert client.lookups == [apps[2]]
+    lines = out.read_text().splitlines()
+    written = sorted(json.loads(line)["applicationNumberText"] for line in lines)
+    assert written == sorted(apps)
+
+
+def test_harvest_resume_downloads_and_records_each_document_once(
+    tmp_path: Path,
+) -> None:
+    client = FlakyClient(records=4)
+    apps = [r["applicationNumberText"] for r in client.records]
+    client.fail_docs = {f"{apps[1]}-NOA"}
+    manifest = tmp_path / "manifest.csv"
+
+    with JobJournal(str(tmp_path / "jobs.sqlite")) as journal:
+        job = journal.job("harvest", {"dest": str(tmp_path)})
+        first = Harvester(
+            client, str(tmp_path), manifest_path=str(manifest), checkpoint=job
+        ).run(apps)
+        assert (first.downloaded, first.failed) == (7, 1)
+
+        client.fail_docs = set()
+        client.downloads.clear()
+        second = Harvester(
+            client, str(tmp_path), manifest_path=str(manifest), checkpoint=job
+        ).run(apps)
+
+        assert client.downloads == [f"{apps[1]}-NOA"]
+        assert (second.applications, second.resumed) == (1, 1)
+        assert job.status == "done"
+
+    with manifest.open(newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    ok = [r["document_id"] for r in rows if r["status"] == "downloaded"]
+    assert sorted(ok) == sorted(f"{a}-{c}" for a in apps for c in ("CTNF", "NOA"))
+    # The failed attempt keeps its row ahead of the finished one.
+    retried = [r["status"] for r in rows if r["document_id"] == f"{apps[1]}-NOA"]
+    assert retried == ["failed", "downloaded"]
+
+
+def test_docs_checkpoint_needs_download(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    from api_gui import cli
+
+    argv = ["docs", "1", "--checkpoint", str(tmp_path / "jobs.sqlite")]
+
+    assert cli.main(argv) == 2
+    assert "--checkpoint needs --download" in capsys.readouterr().err
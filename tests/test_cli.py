@@ -0,0 +1,171 @@
+"""Tests for the headless command-line interface."""
+
+from __future__ import annotations
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+import pytest
+
+from api_gui import cli
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util.rate_limit import RateLimiter
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def test_cli_import_does_not_load_tk() -> None:
+    code = (
+        "import sys, api_gui.cli; "
+        "print(any(m in sys.modules for m in ('tkinter', 'ttkbootstrap')))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": str(SRC)},
+    )
+
+    assert proc.stdout.strip() == "False"
+
+
+def test_parser_accepts_provider_op_ids() -> None:
+    providers = cli.load_providers(str(cli.PROVIDERS_DIR))
+    parser = cli.build_parser(providers)
+
+    args = parser.parse_args(["pfw.get_application", "14412875"])
+
+    assert args.func is cli.cmd_lookup
+    assert args.op_id == "pfw.get_application"
+
+
+def test_search_streams_jsonl(monkeypatch: pytest.MonkeyPatch) -> None:
+    captured: dict[str, Any] = {}
+
+    def fake_iter(
+        self: USPTOODPClient,
+        payload: Mapping[str, Any],
+        page_size: int = 100,
+        max_records: int | None = None,
+        validator: Any = None,
+        fields: Any = None,
+        stream: bool = False,
+        transfer: str = "pages",
+    ) -> Iterator[dict[str, Any]]:
+        captured.update(
+            payload=payload, limiter=self.limiter, fields=fields, stream=stream
+        )
+        yield {"applicationNumberText": "1"}
+        yield {"applicationNumberText": "2"}
+
+    monkeypatch.setattr(USPTOODPClient, "iter_search_pfw", fake_iter)
+    out = io.StringIO()
+
+    status = cli.main(
+        [
+            "search",
+            "--q",
+            "Design",
+            "--filter",
+            "applicationMetaData.applicationTypeCode=DES,UTL",
+            "--rate-limit",
+            "5",
+            "--fields-from-mapping",
+            str(cli.DEFAULT_MAPPING),
+            "--stream",
+        ],
+        out=out,
+    )
+
+    assert status == 0
+    lines = [json.loads(x) for x in out.getvalue().splitlines()]
+    assert [x["applicationNumberText"] for x in lines] == ["1", "2"]
+    assert captured["payload"]["filters"][0]["value"] == ["DES", "UTL"]
+    assert isinstance(captured["limiter"], RateLimiter)
+    assert "applicationMetaData.inventionTitle" in captured["fields"]
+    assert captured["stream"] is True
+
+
+def test_lookup_reports_errors_and_continues(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def fake_lookup(self: USPTOODPClient, app: str) -> dict[str, Any]:
+        if app == "bad":
+            raise RuntimeError("nope")
+        return {"patentFileWrapperDataBag": [{"applicationNumberText": app}]}
+
+    monkeypatch.setattr(USPTOODPClient, "pfw_lookup", fake_lookup)
+    out = io.StringIO()
+
+    status = cli.main(["lookup", "1", "bad", "3", "--workers", "2"], out=out)
+
+    assert status == 1
+    lines = out.getvalue().splitlines()
+    apps = [json.loads(x)["applicationNumberText"] for x in lines]
+    assert apps == ["1", "3"]
+
+
+def test_export_ris_from_jsonl(tmp_path: Path) -> None:
+    source = tmp_path / "records.jsonl"
+    record = {
+        "applicationNumberText": "14412875",
+        "applicationMetaData": {"inventionTitle": "Widget"},
+    }
+    source.write_text(json.dumps(record) + "\n", encoding="utf-8")
+    target = tmp_path / "out.ris"
+    out = io.StringIO()
+
+    cli.main(
+        ["export", str(source), "--format", "ris", "--out", str(target)],
+        out=out,
+    )
+
+    assert json.loads(out.getvalue()) == {"path": str(target), "records": 1}
+    assert "TI  - Widget" in target.read_text(encoding="utf-8")
+
+
+def test_export_streams_its_input(monkeypatch, tmp_path: Path) -> None:
+    from api_gui.export import endnote_export
+
+    trace: list[str] = []
+
+    def records(path: str) -> Iterator[dict[str, Any]]:
+        for n in range(3):
+            trace.append(f"read {n}")
+            yield {"applicationNumberText": str(n)}
+
+    original = endnote_export.map_to_endnote_fields
+
+    def spy(record: Any, mapping: Any) -> Any:
+        trace.append(f"map {record['applicationNumberText']}")
+        return original(record, mapping)
+
+    monkeypatch.setattr(cli, "_iter_records", records)
+    monkeypatch.setattr(endnote_export, "map_to_endnote_fields", spy)
+    out = io.StringIO()
+    argv = ["export", "-", "--format", "ris", "--out", str(tmp_path / "out.ris")]
+
+    assert cli.main(argv, out=out) == 0
+
+    assert trace[:3] == ["read 0", "map 0", "read 1"]
+    assert json.loads(out.getvalue())["records"] == 3
+
+
+def test_rate_limiter_spaces_requests() -> None:
+    now = [0.0]
+    waits: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        waits.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(2, burst=1, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        limiter.acquire()
+
+    assert waits == [0.5, 0.5]
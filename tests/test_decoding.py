@@ -0,0 +1,143 @@
+"""Tests for the pluggable JSON decoder and incremental bag decoding."""
+
+from __future__ import annotations
+
+import json
+import zipfile
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from api_gui.clients.decoding import get_decoder, iter_json_array
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util.bulk_reader import iter_bulk_records
+
+
+def _document(n: int) -> dict[str, Any]:
+    return {
+        "count": n,
+        "requestIdentifier": "abc",
+        "otherBag": [{"patentFileWrapperDataBag": ["decoy"]}],
+        "patentFileWrapperDataBag": [
+            {
+                "applicationNumberText": f"16{i:06d}",
+                "title": 'quote " brace } bracket ] slash \\',
+                "events": [{"code": "CTNF", "n": i}, [1, 2.5, None, True]],
+            }
+            for i in range(n)
+        ],
+        "trailer": {"patentFileWrapperDataBag": "not this one"},
+    }
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 1 << 20])
+def test_iter_json_array_matches_full_decode(size: int) -> None:
+    doc = _document(25)
+    data = json.dumps(doc, indent=1).encode()
+
+    records = list(
+        iter_json_array(_chunks(data, size), "patentFileWrapperDataBag")
+    )
+
+    assert records == doc["patentFileWrapperDataBag"]
+
+
+def test_iter_json_array_scalars_and_missing_key() -> None:
+    data = b'{"a": [1, "x,]", -2.5e3, null, true], "b": []}'
+
+    assert list(iter_json_array(_chunks(data, 3), "a")) == [
+        1,
+        "x,]",
+        -2500.0,
+        None,
+        True,
+    ]
+    assert list(iter_json_array([data], "b")) == []
+
+
+@pytest.mark.parametrize("size", [1, 2, 5])
+def test_iter_json_array_numbers_split_across_chunks(size: int) -> None:
+    data = b'{"bag":[1e5, 2.5, -30, 4E-2]}'
+
+    assert list(iter_json_array(_chunks(data, size), "bag")) == [
+        1e5,
+        2.5,
+        -30,
+        0.04,
+    ]
+    assert list(iter_json_array([data], "missing")) == []
+
+
+def test_iter_json_array_truncated_stream() -> None:
+    data = json.dumps(_document(3)).encode()
+    cut = data.index(b'"16000002"')
+
+    with pytest.raises(ValueError):
+        list(iter_json_array([data[:cut]], "patentFileWrapperDataBag"))
+
+
+def test_get_decoder_fallback() -> None:
+    assert get_decoder("json")(b'{"a": [1]}') == {"a": [1]}
+    assert get_decoder()(b'{"a": [1]}') == {"a": [1]}
+    with pytest.raises(ValueError):
+        get_decoder("simplejson")
+
+
+class _StreamResponse:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.content = data
+        self.closed = False
+
+    def iter_content(self, chunk_size: int) -> list[bytes]:
+        return _chunks(self.data, 5)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_client_decoder_and_streamed_search(monkeypatch) -> None:
+    calls: list[tuple[dict[str, Any], bool]] = []
+    pages = [_document(2), _document(1)]
+
+    client = USPTOODPClient(
+        "https://example.test", validate_requests=False, decoder=json.loads
+    )
+
+    def fake_post(path, json_body=None, stream=False, op=None):
+        calls.append((dict(json_body or {}), stream))
+        return _StreamResponse(json.dumps(pages[len(calls) - 1]).encode())
+
+    monkeypatch.setattr(client, "post", fake_post)
+
+    assert client.search_pfw({"q": "x"})["count"] == 2
+    calls.clear()
+    records = list(client.iter_search_pfw({"q": "x"}, page_size=2, stream=True))
+
+    assert [r["applicationNumberText"] for r in records] == [
+        "16000000",
+        "16000001",
+        "16000000",
+    ]
+    assert [(c[0]["pagination"], c[1]) for c in calls] == [
+        ({"offset": 0, "limit": 2}, True),
+        ({"offset": 2, "limit": 2}, True),
+    ]
+
+
+def test_bulk_reader_streams_zip_members(tmp_path: Path) -> None:
+    archive = tmp_path / "bulk.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a.json", json.dumps(_document(3)))
+        zf.writestr("b.json", json.dumps(_document(2)))
+        zf.writestr("readme.txt", "ignored")
+
+    records = list(iter_bulk_records(str(archive), chunk_size=11))
+
+    assert len(records) == 5
+    assert records[3]["applicationNumberText"] == "16000000"
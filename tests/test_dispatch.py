@@ -0,0 +1,176 @@
+"""Tests for provider-driven operation dispatch."""
+
+from __future__ import annotations
+
+import io
+import json
+from typing import Any
+
+import pytest
+import requests
+
+from api_gui import cli
+from api_gui.clients.base import ApiError, RequestValidationError
+from api_gui.clients.dispatch import PathTemplate
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util import metrics
+
+
+def _response(body: Any, status: int = 200, **headers: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode()
+    response.headers.update(headers)
+    return response
+
+
+class Recorder:
+    """Stands in for ``Session.request``, answering from a queue or a function."""
+
+    def __init__(self, *responses: requests.Response, answer: Any = None) -> None:
+        self.responses = list(responses)
+        self.answer = answer
+        self.calls: list[tuple[str, str, dict[str, Any]]] = []
+
+    def __call__(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        self.calls.append((method, url, kwargs))
+        if self.answer is not None:
+            return self.answer(method, url, kwargs)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def delays() -> list[float]:
+    return []
+
+
+@pytest.fixture
+def client(delays: list[float]) -> USPTOODPClient:
+    client = USPTOODPClient("https://api.example.test", api_key_env=None)
+    client.dispatcher.sleep = delays.append
+    return client
+
+
+def test_path_template_renders_and_quotes() -> None:
+    template = PathTemplate("/apps/{applicationNumberText}/{documentIdentifier}.{ext}")
+
+    assert template.params == (
+        "applicationNumberText",
+        "documentIdentifier",
+        "ext",
+    )
+    path = template.render(
+        {"applicationNumberText": "14/412", "documentIdentifier": "D1", "ext": "pdf"}
+    )
+    assert path == "/apps/14%2F412/D1.pdf"
+
+
+def test_every_provider_operation_is_dispatchable(client: USPTOODPClient) -> None:
+    ops = client.dispatcher.ops()
+
+    assert {"pfw.search", "pfw.get_application", "petition.search"} <= set(ops)
+    assert {"pfw.download_document", "pfw.bulk.download"} <= set(ops)
+    lookup = client.dispatcher["pfw.get_application"]
+    assert lookup is client.dispatcher["pfw.get_application"]
+    assert lookup.policy.cache is not None
+
+
+def test_get_is_cached_and_validated(monkeypatch, client: USPTOODPClient) -> None:
+    record = {"patentFileWrapperDataBag": [{"applicationNumberText": "14412875"}]}
+    recorder = Recorder(_response(record))
+    monkeypatch.setattr(client.session, "request", recorder)
+    lookup = client.dispatcher["pfw.get_application"]
+
+    first = lookup(applicationNumberText="14412875")
+    first["patentFileWrapperDataBag"].clear()
+    assert lookup(applicationNumberText="14412875") == record
+    assert len(recorder.calls) == 1
+    assert recorder.calls[0][1].endswith("/api/v1/patent/applications/14412875")
+    with pytest.raises(RequestValidationError):
+        lookup()
+    with pytest.raises(RequestValidationError):
+        client.dispatcher["pfw.bulk.products"](productIdentifier="NOPE")
+
+
+def test_retry_follows_policy(
+    monkeypatch, client: USPTOODPClient, delays: list[float]
+) -> None:
+    recorder = Recorder(
+        _response({}, 503),
+        _response({}, 429, **{"Retry-After": "3"}),
+        _response({"count": 0}),
+    )
+    monkeypatch.setattr(client.session, "request", recorder)
+
+    data = client.dispatcher["pfw.bulk.products"](productIdentifier="PTFWPRD")
+
+    assert data == {"count": 0}
+    assert delays == [0.5, 3.0]
+    assert recorder.calls[0][2]["params"] == {"latest": "true"}
+
+    monkeypatch.setattr(client.session, "request", Recorder(_response({}, 404)))
+    with pytest.raises(ApiError) as info:
+        client.dispatcher["pfw.list_documents"](applicationNumberText="1")
+    assert info.value.status == 404
+
+
+def test_client_methods_retry_like_operations(
+    monkeypatch, client: USPTOODPClient, delays: list[float]
+) -> None:
+    responses = [_response({}, 503), _response({"documentBag": []})]
+    for response in responses:
+        response.request = requests.Request("GET", "https://x.test").prepare()
+    recorder = Recorder(*responses)
+    monkeypatch.setattr(client.session, "request", recorder)
+    events: list[metrics.Event] = []
+    unsubscribe = metrics.subscribe(events.append)
+    try:
+        assert client.pfw_documents("1") == {"documentBag": []}
+    finally:
+        unsubscribe()
+
+    assert (len(recorder.calls), delays) == (2, [0.5])
+    (retry,) = [e for e in events if e.kind == "retry"]
+    assert (retry.name, retry.seconds) == ("pfw.list_documents", 0.5)
+    assert retry.attrs == {"attempt": 1, "status": 503, "error": "ApiError"}
+
+
+def test_pages_and_map(monkeypatch, client: USPTOODPClient) -> None:
+    records = [{"applicationNumberText": str(n)} for n in range(7)]
+
+    def answer(method: str, url: str, kwargs: dict[str, Any]) -> requests.Response:
+        if method == "POST":
+            page = kwargs["json"]["pagination"]
+            bag = records[page["offset"] : page["offset"] + page["limit"]]
+            return _response({"count": 7, "patentFileWrapperDataBag": bag})
+        app = url.rsplit("/", 2)[-2]
+        return _response({"documentBag": [{"documentIdentifier": app}]})
+
+    recorder = Recorder(answer=answer)
+    monkeypatch.setattr(client.session, "request", recorder)
+
+    search = client.dispatcher["pfw.search"]
+    assert list(search.pages({"q": "x"}, page_size=3)) == records
+    assert len(recorder.calls) == 3
+
+    docs = client.dispatcher["pfw.list_documents"]
+    apps = [{"applicationNumberText": str(n)} for n in range(20)]
+    results = list(docs.map(apps, workers=4))
+    assert [p for p, _, _ in results] == apps
+    for params, data, exc in results:
+        assert exc is None
+        ident = data["documentBag"][0]["documentIdentifier"]
+        assert ident == params["applicationNumberText"]
+
+
+def test_cli_call(monkeypatch) -> None:
+    recorder = Recorder(_response({"count": 1}))
+    monkeypatch.setattr(requests.Session, "request", recorder)
+    out = io.StringIO()
+
+    status = cli.main(
+        ["call", "pfw.get_application", "applicationNumberText=14412875"], out=out
+    )
+
+    assert status == 0
+    assert json.loads(out.getvalue()) == {"count": 1}
@@ -0,0 +1,148 @@
+"""Tests for the content-addressed document store."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from api_gui.util.batch_download import BatchDownloader, DocumentRef
+from api_gui.util.checkpoint import JobJournal
+from api_gui.util.document_store import DocumentStore, link_file
+from api_gui.util.harvest import Harvester
+from tests.conftest import FakeDocumentClient
+
+CONTENT = {"A": b"%PDF-priority", "B": b"%PDF-ids-ref", "C": b"%PDF-ids-ref"}
+LISTING = {
+    "documentBag": [
+        {
+            "documentIdentifier": doc_id,
+            "officialDate": "2020-01-01",
+            "documentCode": "IDS",
+            "downloadOptionBag": [{"mimeTypeIdentifier": "PDF"}],
+        }
+        for doc_id in sorted(CONTENT)
+    ]
+}
+
+
+def _client() -> FakeDocumentClient:
+    return FakeDocumentClient(listing=LISTING, content=CONTENT)
+
+
+def _ref(doc_id: str, app: str = "1", pages: int | None = None) -> DocumentRef:
+    return DocumentRef(app, doc_id, "IDS", "2020-01-01", pages=pages)
+
+
+def test_store_deduplicates_and_links(tmp_path: Path) -> None:
+    client = _client()
+    with DocumentStore(str(tmp_path / "store"), link="hardlink") as store:
+        fetched = [
+            store.export(client, _ref(doc_id, app), str(tmp_path / app / doc_id))
+            for app in ("1", "2")
+            for doc_id in ("A", "B", "C")
+        ]
+        objects = list((tmp_path / "store" / "objects").rglob("*"))
+
+        assert fetched == [True, True, True, False, False, False]
+        assert client.downloads == ["A", "B", "C"]
+        # B and C have the same bytes: one object, three index entries.
+        assert len([p for p in objects if p.is_file()]) == 2
+        assert len(store) == 3
+        b1, c2 = tmp_path / "1" / "B", tmp_path / "2" / "C"
+        assert b1.read_bytes() == CONTENT["B"]
+        assert os.stat(b1).st_ino == os.stat(c2).st_ino
+
+
+def test_store_refetches_missing_or_changed_objects(tmp_path: Path) -> None:
+    client = _client()
+    with DocumentStore(str(tmp_path / "store")) as store:
+        doc, _ = store.fetch(client, _ref("A", pages=3))
+        assert store.fetch(client, _ref("A", pages=3)) == (doc, False)
+
+        os.chmod(doc.path, 0o644)
+        Path(doc.path).write_bytes(b"truncated")
+        assert store.get("A") is None
+        assert store.fetch(client, _ref("A", pages=3))[1] is True
+        # A different page count in the listing means a new version.
+        assert store.fetch(client, _ref("A", pages=4))[1] is True
+        assert client.downloads == ["A", "A", "A"]
+
+
+def test_concurrent_fetches_share_one_download(tmp_path: Path) -> None:
+    client = _client()
+    with DocumentStore(str(tmp_path / "store")) as store:
+        threads = [
+            threading.Thread(target=store.fetch, args=(client, _ref(doc_id)))
+            for doc_id in ("A", "B") * 4
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(client.downloads) == ["A", "B"]
+        # Per-document locks do not outlive their fetches.
+        assert store._inflight == {}
+
+
+def test_link_file_copy_and_errors(tmp_path: Path) -> None:
+    src = tmp_path / "src.pdf"
+    src.write_bytes(b"%PDF")
+    dest = tmp_path / "dest.pdf"
+    dest.write_bytes(b"old")
+
+    assert link_file(str(src), str(dest), mode="copy") == "copy"
+    assert dest.read_bytes() == b"%PDF"
+    assert os.stat(src).st_ino != os.stat(dest).st_ino
+    with pytest.raises(OSError):
+        link_file(str(tmp_path / "missing.pdf"), str(dest))
+    with pytest.raises(ValueError):
+        DocumentStore(str(tmp_path / "store"), link="symlink")
+
+
+def test_harvest_and_batch_use_store(tmp_path: Path) -> None:
+    client = _client()
+    store = DocumentStore(str(tmp_path / "store"))
+    first = Harvester(client, str(tmp_path / "run1"), store=store).run(["1"])
+    second = Harvester(client, str(tmp_path / "run2"), store=store).run(["2"])
+    batch = BatchDownloader(client, str(tmp_path / "batch"), store=store)
+    result = batch.download([_ref("A"), _ref("B")])
+    store.close()
+
+    assert (first.downloaded, first.linked) == (3, 0)
+    assert (second.downloaded, second.linked) == (0, 3)
+    assert {row.status for row in second.rows} == {"linked"}
+    assert (result.downloaded, len(result.linked)) == ([], 2)
+    assert sorted(client.downloads) == ["A", "B", "C"]
+
+
+def test_checkpointed_harvest_resumes_linked_documents_once(tmp_path: Path) -> None:
+    client = _client()
+    store = DocumentStore(str(tmp_path / "store"))
+    store.fetch(client, _ref("A"))
+    store.fetch(client, _ref("B"))
+    client.fail = {"C"}
+    manifest = tmp_path / "out" / "manifest.jsonl"
+
+    with JobJournal(str(tmp_path / "jobs.sqlite")) as journal:
+        job = journal.job("harvest", {"dest": "out"})
+        first = Harvester(client, str(tmp_path / "out"), store=store, checkpoint=job)
+        assert (first.run(["1"]).linked, job.status) == (2, "running")
+
+        client.fail = set()
+        second = Harvester(client, str(tmp_path / "out"), store=store, checkpoint=job)
+        summary = second.run(["1"])
+    store.close()
+
+    assert (summary.resumed, summary.downloaded, summary.linked) == (2, 1, 0)
+    rows = [json.loads(line) for line in manifest.read_text().splitlines()]
+    assert sorted((r["document_id"], r["status"]) for r in rows) == [
+        ("A", "linked"),
+        ("B", "linked"),
+        ("C", "downloaded"),
+        ("C", "failed"),
+    ]
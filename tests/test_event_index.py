@@ -0,0 +1,126 @@
+"""Tests for the prosecution-history event index."""
+
+from __future__ import annotations
+
+import datetime as dt
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from api_gui import cli
+from api_gui.util.event_index import EventIndex, days_ago
+from api_gui.util.record_store import RecordStore
+
+TIMELINES = {
+    # Final rejection answered by an RCE.
+    "1": [("2024-01-10", "CTNF"), ("2024-05-02", "CTFR"), ("2024-06-20", "RCEX")],
+    # Final rejection with no response yet.
+    "2": [("2024-02-01", "CTNF"), ("2024-05-20", "CTFR")],
+    # Response came, but 200 days after the final rejection.
+    "3": [("2023-03-01", "CTNF"), ("2023-04-01", "CTFR"), ("2023-10-18", "A...")],
+    # Events out of order in the bag; sorted by date in the index.
+    "4": [("2024-05-25", "CTFR"), ("2023-01-05", "CTNF"), ("2023-06-01", "CTFR")],
+}
+
+
+def _record(app: str, events: list[tuple[str, str]]) -> dict[str, Any]:
+    return {
+        "applicationNumberText": app,
+        "eventDataBag": [
+            {"eventDate": date, "eventCode": code, "eventDescriptionText": code}
+            for date, code in events
+        ],
+    }
+
+
+@pytest.fixture
+def store() -> Any:
+    with RecordStore(":memory:") as store:
+        store.ingest(_record(app, ev) for app, ev in TIMELINES.items())
+        yield store
+
+
+def test_timeline_and_window(store: RecordStore) -> None:
+    index = EventIndex(store)
+
+    timeline = index.timeline("4")
+    window = index.window(["CTFR"], since="2024-05-01", until="2024-05-31")
+
+    assert [(e.seq, e.date) for e in timeline] == [
+        (0, "2023-01-05"),
+        (1, "2023-06-01"),
+        (2, "2024-05-25"),
+    ]
+    assert [(e.application, e.date) for e in window] == [
+        ("4", "2024-05-25"),
+        ("2", "2024-05-20"),
+        ("1", "2024-05-02"),
+    ]
+    assert dict(index.codes())["CTFR"] == 5
+    assert days_ago(30, dt.date(2024, 6, 30)) == dt.date(2024, 5, 31)
+
+
+def test_awaiting_response(store: RecordStore) -> None:
+    index = EventIndex(store)
+
+    open_finals = index.awaiting(["CTFR"], ["A...", "RCEX"])
+    late = index.awaiting(["CTFR"], ["A...", "RCEX"], within_days=90)
+    recent = index.awaiting(["CTFR"], ["RCEX"], since="2024-05-21")
+
+    assert [m.application for m in open_finals] == ["4", "2"]
+    assert [m.application for m in late] == ["4", "2", "3"]
+    # App 4's latest final rejection is the one that counts.
+    assert [(m.application, m.date) for m in recent] == [("4", "2024-05-25")]
+
+
+def test_sequence_queries(store: RecordStore) -> None:
+    index = EventIndex(store)
+
+    assert [m.application for m in index.sequence(["CTNF", "CTFR"])] == [
+        "1",
+        "2",
+        "3",
+        "4",
+    ]
+    rce = index.sequence(["CTNF", "CTFR", "RCEX"])
+    assert [(m.application, m.date) for m in rce] == [("1", "2024-06-20")]
+    late_start = index.sequence(["CTNF", "CTFR"], since="2023-02-01")
+    assert [m.application for m in late_start] == ["1", "2", "3"]
+    quick = index.sequence(["CTNF", "CTFR"], within_days=60)
+    assert [m.application for m in quick] == ["3"]
+    assert index.sequence(["CTFR", "CTNF"]) == []
+
+
+def test_index_follows_record_changes(tmp_path: Path) -> None:
+    path = str(tmp_path / "store.sqlite")
+    with RecordStore(path) as store:
+        store.ingest(_record(app, ev) for app, ev in TIMELINES.items())
+        answered = TIMELINES["2"] + [("2024-06-01", "A...")]
+        stats = store.ingest([_record("2", answered), _record("1", TIMELINES["1"])])
+        index = EventIndex(store)
+
+        assert (stats.changed, stats.unchanged) == (1, 1)
+        assert len(index.timeline("2")) == 3
+        assert [m.application for m in index.awaiting(["CTFR"], ["A..."])] == [
+            "4",
+            "1",
+        ]
+
+
+def test_cli_events(tmp_path: Path) -> None:
+    path = str(tmp_path / "store.sqlite")
+    with RecordStore(path) as store:
+        store.ingest(_record(app, ev) for app, ev in TIMELINES.items())
+
+    out = io.StringIO()
+    argv = ["events", path, "--code", "CTFR", "--without", "A...,RCEX"]
+    assert cli.main(argv, out=out) == 0
+
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert rows == [
+        {"application": "4", "date": "2024-05-25", "code": "CTFR"},
+        {"application": "2", "date": "2024-05-20", "code": "CTFR"},
+    ]
@@ -47,3 +47,63 @@ def test_endnote_field_mapping_basic_fields() -> None:
     assert result["Patent Number"] == "US1234567B2"
     assert result["Application Number"] == "14412875"
     assert result["Inventors"] == "DOE, JOHN"
+
+
+def test_required_fields_from_mapping() -> None:
+    """Mapping specs collapse to the minimal search ``fields`` list."""
+
+    mapping: dict[str, Any] = {
+        "Title": "applicationMetaData.inventionTitle",
+        "Inventors": [
+            "applicationMetaData.inventorBag[].inventorNameText",
+            "applicationMetaData.inventorBag[].firstName + ' ' + "
+            "applicationMetaData.inventorBag[].lastName",
+        ],
+        "URL": "concat('https://example/', applicationNumberText)",
+        "File Attachments": ["pfw.documents[].downloadUrl"],
+        "Abstract": None,
+    }
+
+    fields = endnote_export.required_fields(
+        mapping, roots=["applicationNumberText", "applicationMetaData"]
+    )
+
+    assert fields == [
+        "applicationMetaData.inventionTitle",
+        "applicationMetaData.inventorBag",
+        "applicationNumberText",
+    ]
+
+
+def test_fields_for_v2_mapping_cover_exported_values() -> None:
+    """Projecting a record to the derived fields keeps every mapped value."""
+
+    from api_gui.util.record_view import project
+
+    v2 = MAPPING_PATH.with_name("endnote_field_map.uspto_pfw.v2.json")
+    fields = endnote_export.fields_for_mapping_file(str(v2))
+    with v2.open("r", encoding="utf-8") as handle:
+        mapping: dict[str, Any] = json.load(handle)["transform"]
+    work: dict[str, Any] = {
+        "applicationNumberText": "14412875",
+        "applicationMetaData": {
+            "inventionTitle": "Sample Invention",
+            "examinerNameText": "SMITH, JANE",
+            "applicationStatusCode": 150,
+            "inventorBag": [{"firstName": "JOHN", "lastName": "DOE"}],
+        },
+        "parentContinuityBag": [
+            {
+                "claimParentageTypeCode": "CON",
+                "parentApplicationNumberText": "13000000",
+            }
+        ],
+        "eventDataBag": [{"eventCode": "CTNF"}],
+    }
+
+    projected = project(work, fields)
+
+    assert "eventDataBag" not in projected
+    assert map_to_endnote_fields(projected, mapping) == map_to_endnote_fields(
+        work, mapping
+    )
@@ -0,0 +1,144 @@
+"""Tests for continuity family graph expansion."""
+
+from __future__ import annotations
+
+import io
+import json
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from api_gui import cli
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util.family_graph import FamilyGraphBuilder, continuity_edges
+
+# Two families: a chain 10 -> 11 -> 12 -> 13 with 11 -> 14 branching off,
+# and a separate pair 20 -> 21. "99" fails to look up.
+EDGES = [("10", "11"), ("11", "12"), ("12", "13"), ("11", "14"), ("20", "21")]
+
+
+def _record(app: str) -> dict[str, Any]:
+    return {
+        "applicationNumberText": app,
+        "applicationMetaData": {"filingDate": f"20{app}-01-01"},
+        "parentContinuityBag": [
+            {
+                "parentApplicationNumberText": parent,
+                "childApplicationNumberText": app,
+                "claimParentageTypeCode": "CON",
+                "parentPatentNumber": f"9{parent}",
+            }
+            for parent, child in EDGES
+            if child == app
+        ],
+        "childContinuityBag": [
+            {"parentApplicationNumberText": app, "childApplicationNumberText": child}
+            for parent, child in EDGES
+            if parent == app
+        ],
+    }
+
+
+class FamilyClient:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self._lock = threading.Lock()
+
+    def pfw_lookup(self, application_number: str) -> dict[str, Any]:
+        with self._lock:
+            self.calls.append(application_number)
+        time.sleep(0.005)  # keep a frontier's lookups overlapping
+        if application_number == "99":
+            raise RuntimeError("lookup failed")
+        return {"patentFileWrapperDataBag": [_record(application_number)]}
+
+
+def test_continuity_edges_fill_in_own_number() -> None:
+    record = {
+        "applicationNumberText": "11",
+        "parentContinuityBag": [{"parentApplicationNumberText": "10"}],
+        "childContinuityBag": [{"childApplicationNumberText": "12"}],
+    }
+
+    edges = [(e.parent, e.child) for e in continuity_edges(record)]
+
+    assert edges == [("10", "11"), ("11", "12")]
+
+
+def test_expand_many_fetches_each_application_once() -> None:
+    client = FamilyClient()
+    builder = FamilyGraphBuilder(client, workers=4)
+
+    families = builder.expand_many(["13", "10", "21", "14", "99"])
+
+    assert sorted(client.calls) == ["10", "11", "12", "13", "14", "20", "21", "99"]
+    assert families[0] == families[1] == {"10", "11", "12", "13", "14"}
+    assert families[2] == {"20", "21"}
+    assert builder.last.failed == 1
+    assert builder.graph.nodes["99"].error == "lookup failed"
+
+    client.calls.clear()
+    assert builder.expand("12") == families[0]
+    assert client.calls == []
+    assert builder.last.reused == 5
+
+
+def test_depth_and_node_limits() -> None:
+    client = FamilyClient()
+    builder = FamilyGraphBuilder(client)
+
+    assert builder.expand("10", max_depth=0) == {"10", "11"}
+    assert client.calls == ["10"]
+    family = builder.expand("10", max_depth=1)
+
+    assert client.calls == ["10", "11"]
+    assert family == {"10", "11", "12", "14"}
+    assert builder.graph.nodes["11"].expanded
+    assert not builder.graph.nodes["12"].expanded
+
+    builder = FamilyGraphBuilder(FamilyClient())
+    builder.expand("10", max_nodes=3)
+    assert builder.last.fetched == 3
+    assert builder.last.truncated
+
+
+def test_adjacency_and_dot() -> None:
+    builder = FamilyGraphBuilder(FamilyClient())
+    family = builder.expand("12")
+    graph = builder.graph
+
+    assert graph.adjacency(family)["11"] == {
+        "parents": ["10"],
+        "children": ["12", "14"],
+    }
+    data = graph.to_dict(family)
+    assert [n["application_number"] for n in data["nodes"]] == [
+        "10",
+        "11",
+        "12",
+        "13",
+        "14",
+    ]
+    assert {"parent": "10", "child": "11"}.items() <= data["edges"][0].items()
+    dot = graph.to_dot(family)
+    assert dot.startswith("digraph family {")
+    assert '"10" -> "11" [label="CON"];' in dot
+
+
+def test_cli_family_emits_each_family_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = FamilyClient()
+    monkeypatch.setattr(
+        USPTOODPClient, "pfw_lookup", lambda self, app: client.pfw_lookup(app)
+    )
+
+    out = io.StringIO()
+    status = cli.main(["family", "10", "13", "20"], out=out)
+
+    assert status == 0
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [row["seed"] for row in rows] == ["10", "20"]
+    assert len(rows[0]["nodes"]) == 5 and len(rows[1]["edges"]) == 1
@@ -0,0 +1,129 @@
+"""Tests for the search iterator and the harvest pipeline."""
+
+from __future__ import annotations
+
+import csv
+import json
+import threading
+from pathlib import Path
+from typing import Any, Mapping
+
+import pytest
+
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util.harvest import Harvester, harvest_documents
+from tests.conftest import FakeDocumentClient
+
+
+def _records(n: int) -> list[dict[str, Any]]:
+    return [{"applicationNumberText": f"1600000{i}"} for i in range(n)]
+
+
+def test_iter_search_pfw_pages_until_count(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = USPTOODPClient("https://api.uspto.gov", api_key_env=None)
+    records = _records(7)
+    seen: list[dict[str, int]] = []
+
+    def fake_search(payload: Mapping[str, Any]) -> dict[str, Any]:
+        page = dict(payload["pagination"])
+        seen.append(page)
+        start = page["offset"]
+        bag = records[start : start + page["limit"]]
+        return {"count": len(records), "patentFileWrapperDataBag": bag}
+
+    monkeypatch.setattr(client, "search_pfw", fake_search)
+
+    out = list(client.iter_search_pfw({"q": "x"}, page_size=3))
+
+    assert out == records
+    assert [p["offset"] for p in seen] == [0, 3, 6]
+    assert len(list(client.iter_search_pfw({}, 3, max_records=4))) == 4
+
+
+def _client(apps: int) -> FakeDocumentClient:
+    """Applications ending in ``9`` fail their listing."""
+
+    records = _records(apps)
+    failing = {
+        r["applicationNumberText"]
+        for r in records
+        if r["applicationNumberText"].endswith("9")
+    }
+    return FakeDocumentClient(
+        ("CTNF", "CTFR", "NOA"), records=records, fail_listing=failing
+    )
+
+
+def test_harvest_filters_downloads_and_writes_manifest(tmp_path: Path) -> None:
+    client = _client(3)
+
+    summary = harvest_documents(
+        client,
+        {"q": "x"},
+        str(tmp_path),
+        codes=["CTNF"],
+        list_workers=2,
+        download_workers=3,
+        queue_size=1,
+    )
+
+    assert summary.applications == 3
+    assert summary.downloaded == 3
+    assert sorted(client.downloads) == [
+        "16000000-CTNF",
+        "16000001-CTNF",
+        "16000002-CTNF",
+    ]
+    lines = Path(summary.manifest_path).read_text().splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert {r["status"] for r in rows} == {"downloaded"}
+    assert all(Path(r["path"]).exists() for r in rows)
+
+
+def test_harvest_rerun_skips_and_records_failures(tmp_path: Path) -> None:
+    client = _client(10)
+    manifest = tmp_path / "manifest.csv"
+    harvester = Harvester(
+        client, str(tmp_path), codes=["NOA"], manifest_path=str(manifest)
+    )
+    apps = [r["applicationNumberText"] for r in client.records]
+
+    first = harvester.run(apps)
+    second = harvester.run(apps)
+
+    assert first.downloaded == 9 and first.failed == 1
+    assert second.downloaded == 0 and second.skipped == 9
+    with manifest.open(newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    assert len(rows) == 20
+    assert [r["status"] for r in rows].count("list_failed") == 2
+
+
+def test_raising_progress_callback_stops_every_stage(tmp_path: Path) -> None:
+    client = _client(20)
+    apps = [r["applicationNumberText"] for r in client.records]
+
+    def progress(row: Any) -> None:
+        raise ValueError("callback failed")
+
+    harvester = Harvester(
+        client, str(tmp_path), progress=progress, download_workers=2, queue_size=1
+    )
+    errors: list[BaseException] = []
+
+    def run() -> None:
+        try:
+            harvester.run(apps)
+        except BaseException as exc:
+            errors.append(exc)
+
+    before = threading.active_count()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert [str(e) for e in errors] == ["callback failed"]
+    assert threading.active_count() == before
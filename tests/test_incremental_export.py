@@ -0,0 +1,143 @@
+"""Tests for incremental EndNote/RIS exports."""
+
+from __future__ import annotations
+
+import io
+import json
+import sqlite3
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from api_gui import cli
+from api_gui.export import endnote_export
+from api_gui.export.incremental import ExportState, export_incremental
+from api_gui.util.record_view import pfw_record_class
+
+MAPPING = "src/api_gui/export/endnote_field_map.uspto_pfw.v2.json"
+
+
+def _record(app: str, title: str, events: int = 1) -> dict[str, Any]:
+    return {
+        "applicationNumberText": app,
+        "applicationMetaData": {"inventionTitle": title, "filingDate": "2020-01-01"},
+        "eventDataBag": [{"eventCode": "CTNF"}] * events,
+    }
+
+
+@pytest.fixture
+def mapped(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Record the application number of every record that gets mapped."""
+
+    seen: list[str] = []
+    original = endnote_export.map_to_endnote_fields
+
+    def spy(record: Any, mapping: dict[str, Any]) -> dict[str, Any]:
+        seen.append(record["applicationNumberText"])
+        return original(record, mapping)
+
+    monkeypatch.setattr(endnote_export, "map_to_endnote_fields", spy)
+    monkeypatch.setattr("api_gui.export.incremental.map_to_endnote_fields", spy)
+    return seen
+
+
+def test_refresh_remaps_only_changed_records(tmp_path: Path, mapped: list[str]) -> None:
+    out, delta = str(tmp_path / "lib.xml"), str(tmp_path / "delta.xml")
+    week1 = [_record(str(n), f"Invention {n}") for n in range(5)]
+    first = export_incremental(week1, MAPPING, out_path=out, delta_path=delta)
+    assert (first.added, first.records, len(mapped)) == (5, 5, 5)
+
+    week2 = [dict(r) for r in week1[:4]] + [_record("9", "Café filter")]
+    week2[1] = _record("1", "Renamed invention")
+    # Events are not exported: re-mapped, but not a change in the output.
+    week2[2] = _record("2", "Invention 2", events=2)
+    mapped.clear()
+    second = export_incremental(week2, MAPPING, out_path=out, delta_path=delta)
+
+    assert sorted(mapped) == ["1", "2", "9"]
+    assert (second.added, second.changed, second.remapped) == (1, 1, 2)
+    assert (second.unchanged, second.removed, second.rebuilt) == (3, ["4"], False)
+    delta_titles = [t.text for t in ET.parse(delta).getroot().iter("titles")]
+    assert delta_titles == ["Renamed invention", "Café filter"]
+
+    # The patched file matches a full export of the same records.
+    full = endnote_export.export_endnote_xml(
+        week2, MAPPING, out_path=str(tmp_path / "full.xml")
+    )
+    assert Path(out).read_bytes() == Path(full).read_bytes()
+
+
+def test_record_views_and_ris(tmp_path: Path, mapped: list[str]) -> None:
+    Record = pfw_record_class()
+    records = [Record(json.dumps(_record(str(n), f"T{n}")).encode()) for n in (1, 2)]
+    out = str(tmp_path / "lib.ris")
+    export_incremental(records, MAPPING, fmt="ris", out_path=out)
+    mapped.clear()
+    again = export_incremental(records, MAPPING, fmt="ris", out_path=out)
+
+    assert (mapped, again.unchanged) == ([], 2)
+    assert not any(r.is_decoded for r in records)
+    full = endnote_export.export_ris(
+        records, MAPPING, out_path=str(tmp_path / "full.ris")
+    )
+    assert Path(out).read_text() == Path(full).read_text()
+
+    # Another mapping or format invalidates the stored output.
+    mapped.clear()
+    redo = export_incremental(
+        records, MAPPING, fmt="endnote", out_path=out, state_path=f"{out}.state.sqlite"
+    )
+    assert (redo.rebuilt, redo.added, len(mapped)) == (True, 2, 2)
+    with pytest.raises(ValueError):
+        export_incremental(records, MAPPING, fmt="bibtex", out_path=out)
+
+
+def test_cli_incremental_delta(tmp_path: Path) -> None:
+    hits = tmp_path / "hits.jsonl"
+    out, delta = str(tmp_path / "lib.xml"), str(tmp_path / "delta.xml")
+    argv = ["export", str(hits), "--mapping", MAPPING, "--out", out, "--delta", delta]
+
+    hits.write_text(json.dumps(_record("1", "A")) + "\n")
+    assert cli.main(argv, out=io.StringIO()) == 0
+    hits.write_text(json.dumps(_record("1", "B")) + "\n")
+    stdout = io.StringIO()
+    assert cli.main(argv, out=stdout) == 0
+
+    summary = json.loads(stdout.getvalue())
+    assert (summary["path"], summary["records"], summary["changed"]) == (out, 1, 1)
+    assert Path(f"{out}.state.sqlite").exists()
+    assert [t.text for t in ET.parse(delta).getroot().iter("titles")] == ["B"]
+
+
+def test_failed_state_commit_keeps_previous_outputs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    out, delta = tmp_path / "lib.xml", tmp_path / "delta.xml"
+    records = [_record("1", "A")]
+    export_incremental(records, MAPPING, out_path=str(out), delta_path=str(delta))
+    before = out.read_bytes(), delta.read_bytes()
+    original = ExportState.transaction
+
+    @contextmanager
+    def failing_commit(self: ExportState) -> Iterator[None]:
+        with original(self):
+            yield
+            raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(ExportState, "transaction", failing_commit)
+    with pytest.raises(sqlite3.OperationalError):
+        export_incremental(
+            [_record("1", "B")], MAPPING, out_path=str(out), delta_path=str(delta)
+        )
+    monkeypatch.undo()
+
+    assert (out.read_bytes(), delta.read_bytes()) == before
+    assert sorted(p.name for p in tmp_path.iterdir() if p.suffix == ".tmp") == []
+    again = export_incremental(
+        [_record("1", "B")], MAPPING, out_path=str(out), delta_path=str(delta)
+    )
+    assert again.changed == 1
@@ -0,0 +1,122 @@
+"""Tests for request/stage instrumentation and the metrics exporters."""
+
+from __future__ import annotations
+
+import io
+import json
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+
+from api_gui import cli
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util import metrics
+
+
+def _response(body: bytes, status: int = 200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.elapsed = timedelta(milliseconds=40)
+    response.request = requests.Request(
+        "POST", "https://example.test/x", json={"q": "widget"}
+    ).prepare()
+    return response
+
+
+@pytest.fixture
+def events() -> Any:
+    seen: list[metrics.Event] = []
+    unsubscribe = metrics.subscribe(seen.append)
+    yield seen
+    unsubscribe()
+
+
+def test_client_emits_request_events(monkeypatch, events) -> None:
+    client = USPTOODPClient("https://example.test", validate_requests=False)
+    registry = metrics.MetricsRegistry()
+    unsubscribe = metrics.subscribe(registry)
+    body = json.dumps({"count": 0, "patentFileWrapperDataBag": []}).encode()
+    monkeypatch.setattr(
+        client.session, "request", lambda *a, **k: _response(body)
+    )
+
+    try:
+        client.search_pfw({"q": "widget"})
+        client.search_pfw({"q": "widget"})
+    finally:
+        unsubscribe()
+
+    event = events[0]
+    assert (event.kind, event.name) == ("request", "pfw.search")
+    assert event.attrs["status"] == 200
+    assert event.attrs["ttfb"] == pytest.approx(0.04)
+    assert event.attrs["bytes_in"] == len(body)
+    assert event.attrs["bytes_out"] > 0
+    assert registry.counter("api_requests_total", op="pfw.search", status=200) == 2
+    assert registry.histogram("api_request_seconds", op="pfw.search").count == 2
+
+    text = registry.render_prometheus()
+    assert "# TYPE api_request_seconds histogram" in text
+    assert 'api_requests_total{op="pfw.search",status="200"} 2' in text
+    assert 'api_request_seconds_bucket{op="pfw.search",le="+Inf"} 2' in text
+
+
+def test_failed_request_is_still_reported(monkeypatch, events) -> None:
+    client = USPTOODPClient("https://example.test", validate_requests=False)
+
+    def refuse(*args: Any, **kwargs: Any) -> requests.Response:
+        raise requests.ConnectionError("refused")
+
+    monkeypatch.setattr(client.session, "request", refuse)
+
+    with pytest.raises(requests.ConnectionError):
+        client.pfw_lookup("14412875")
+
+    assert events[0].name == "pfw.get_application"
+    assert events[0].attrs["error"] == "ConnectionError"
+
+
+def test_histogram_buckets_and_quantile() -> None:
+    hist = metrics.Histogram([0.1, 1, 10])
+    for value in (0.05, 0.5, 0.5, 5):
+        hist.observe(value)
+
+    assert hist.cumulative()[-1] == (float("inf"), 4)
+    assert [n for _, n in hist.cumulative()] == [1, 3, 4, 4]
+    assert hist.quantile(0.5) == 1
+
+
+def test_cli_writes_metrics_and_trace(tmp_path: Path) -> None:
+    source = tmp_path / "records.jsonl"
+    source.write_text(
+        json.dumps({"applicationNumberText": "14412875"}) + "\n",
+        encoding="utf-8",
+    )
+    prom = tmp_path / "metrics.prom"
+    trace = tmp_path / "trace.jsonl"
+
+    cli.main(
+        [
+            "export",
+            str(source),
+            "--format",
+            "ris",
+            "--out",
+            str(tmp_path / "out.ris"),
+            "--metrics",
+            str(prom),
+            "--trace",
+            str(trace),
+        ],
+        out=io.StringIO(),
+    )
+
+    assert 'stage_items_total{stage="export.ris"} 1' in prom.read_text()
+    (line,) = trace.read_text().splitlines()
+    event = json.loads(line)
+    assert (event["kind"], event["name"]) == ("stage", "export.ris")
+    assert not metrics.enabled()
@@ -0,0 +1,135 @@
+"""Tests for petition search paging and the petition/file wrapper join."""
+
+from __future__ import annotations
+
+import io
+import json
+import threading
+import time
+from typing import Any, Mapping
+
+import pytest
+
+from api_gui import cli
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util.petition_join import LookupCache, enrich_petitions
+
+
+def _decisions(n: int, apps: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "applicationNumberText": f"1600000{i % apps}",
+            "decisionTypeCode": "GRANTED",
+            "decisionDate": f"2024-01-{1 + i % 28:02d}",
+        }
+        for i in range(n)
+    ]
+
+
+class LookupCounter:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self._lock = threading.Lock()
+
+    def pfw_lookup(self, application_number: str) -> dict[str, Any]:
+        with self._lock:
+            self.calls.append(application_number)
+        time.sleep(0.01)  # keep lookups overlapping
+        if application_number.endswith("3"):
+            raise RuntimeError("lookup failed")
+        return {
+            "count": 1,
+            "patentFileWrapperDataBag": [
+                {"applicationNumberText": application_number}
+            ],
+        }
+
+
+def test_iter_search_petitions_pages(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = USPTOODPClient("https://api.uspto.gov", api_key_env=None)
+    decisions = _decisions(7, 7)
+    seen: list[dict[str, int]] = []
+
+    def fake_search(payload: Mapping[str, Any]) -> dict[str, Any]:
+        page = dict(payload["pagination"])
+        seen.append(page)
+        bag = decisions[page["offset"] : page["offset"] + page["limit"]]
+        return {"count": len(decisions), "petitionDecisionDataBag": bag}
+
+    monkeypatch.setattr(client, "search_petitions", fake_search)
+
+    assert list(client.iter_search_petitions({"q": "x"}, page_size=3)) == decisions
+    assert [p["offset"] for p in seen] == [0, 3, 6]
+    assert len(list(client.iter_search_petitions({}, 3, max_records=4))) == 4
+
+
+def test_enrich_looks_up_each_application_once() -> None:
+    client = LookupCounter()
+    decisions = _decisions(200, 5)
+
+    pairs = list(enrich_petitions(client, iter(decisions), workers=8))
+
+    assert [d for d, _ in pairs] == decisions
+    unique = {d["applicationNumberText"] for d in decisions}
+    # Successful lookups are cached; the failing one is retried later.
+    ok = [app for app in client.calls if not app.endswith("3")]
+    assert sorted(ok) == sorted(a for a in unique if not a.endswith("3"))
+    assert 1 < client.calls.count("16000003") <= 40
+    for decision, record in pairs:
+        if decision["applicationNumberText"].endswith("3"):
+            assert record is None
+        else:
+            app = decision["applicationNumberText"]
+            assert record == {"applicationNumberText": app}
+
+
+def test_lookup_cache_evicts_and_retries_errors() -> None:
+    calls: list[str] = []
+
+    def fetch(key: str) -> dict[str, Any]:
+        calls.append(key)
+        if key == "bad" and calls.count(key) < 3:
+            raise KeyError(key)
+        return {"key": key}
+
+    cache = LookupCache(fetch, maxsize=2)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")  # evicts "b", the least recently used
+
+    assert "b" not in cache and "a" in cache
+    with pytest.raises(KeyError):
+        cache.get("bad")
+    # Errors are not cached: each later request tries again.
+    with pytest.raises(KeyError):
+        cache.get("bad")
+    assert "bad" not in cache
+    assert cache.get("bad") == {"key": "bad"}
+    assert calls == ["a", "b", "c", "bad", "bad", "bad"]
+    assert (cache.hits, cache.misses) == (1, 6)
+
+
+def test_cli_petitions_enrich(monkeypatch: pytest.MonkeyPatch) -> None:
+    decisions = _decisions(6, 2)
+    counter = LookupCounter()
+
+    def fake_iter(self: Any, payload: Mapping[str, Any], **kwargs: Any) -> Any:
+        assert payload["q"] == "decisionTypeCode:GRANTED"
+        return iter(decisions)
+
+    monkeypatch.setattr(USPTOODPClient, "iter_search_petitions", fake_iter)
+    monkeypatch.setattr(
+        USPTOODPClient, "pfw_lookup", lambda self, app: counter.pfw_lookup(app)
+    )
+
+    out = io.StringIO()
+    status = cli.main(
+        ["petitions", "--q", "decisionTypeCode:GRANTED", "--enrich"], out=out
+    )
+
+    assert status == 0
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(rows) == 6
+    assert rows[0]["patentFileWrapper"] == {"applicationNumberText": "16000000"}
+    assert len(counter.calls) == 2
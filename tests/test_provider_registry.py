@@ -0,0 +1,97 @@
+"""Tests for the cached provider registry and request validation."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from api_gui.clients.base import RequestValidationError
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util.provider_loader import (
+    ProviderRegistry,
+    get_registry,
+    load_providers,
+)
+
+PROVIDERS_DIR = Path("src/api_gui/providers")
+
+
+@pytest.fixture()
+def registry_dir(tmp_path: Path) -> Path:
+    for path in PROVIDERS_DIR.glob("provider.*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+def test_registry_reparses_only_modified_files(registry_dir: Path) -> None:
+    registry = ProviderRegistry(str(registry_dir), check_interval=0)
+    first = registry.providers()
+
+    target = registry_dir / "provider.uspto.pfw.lookup.json"
+    meta = json.loads(target.read_text(encoding="utf-8"))
+    meta["operation"]["summary"] = "changed"
+    target.write_text(json.dumps(meta), encoding="utf-8")
+    stat = target.stat()
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second = registry.providers()
+
+    key = "uspto_odp_pfw::pfw.get_application"
+    assert second[key].meta["operation"]["summary"] == "changed"
+    assert second[key] is not first[key]
+    search = "uspto_odp_pfw::pfw.search"
+    assert second[search] is first[search]
+
+
+def test_validator_is_compiled_once(registry_dir: Path) -> None:
+    registry = ProviderRegistry(str(registry_dir))
+
+    assert registry.validator("pfw.search") is registry.validator(
+        "uspto_odp_pfw::pfw.search"
+    )
+    assert registry.validator("pfw.get_application") is None
+
+
+def test_validate_reports_every_violation(registry_dir: Path) -> None:
+    registry = ProviderRegistry(str(registry_dir))
+    payload = {
+        "q": 5,
+        "pagination": {"offset": -1, "limit": 25},
+        "sort": [{"field": "applicationMetaData.filingDate"}],
+    }
+
+    with pytest.raises(RequestValidationError) as info:
+        registry.validate("pfw.search", payload)
+
+    assert info.value.op_id == "pfw.search"
+    assert len(info.value.errors) == 3
+    registry.validate("pfw.search", {"q": "Design"})
+
+
+def test_client_rejects_invalid_payload_before_sending(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = USPTOODPClient("https://api.uspto.gov", api_key_env=None)
+
+    def no_network(*args: object, **kwargs: object) -> None:
+        raise AssertionError("request should not be sent")
+
+    monkeypatch.setattr(client.session, "post", no_network)
+
+    with pytest.raises(RequestValidationError):
+        client.search_pfw({"pagination": {"offset": 0, "limit": 0}})
+
+
+def test_load_providers_returns_private_copies(registry_dir: Path) -> None:
+    key = "uspto_odp_pfw::pfw.get_application"
+    first = load_providers(str(registry_dir))
+    first[key].meta["operation"]["op_id"] = "mutated"
+    first[key].meta.clear()
+
+    again = load_providers(str(registry_dir))
+
+    assert again[key].meta["operation"]["op_id"] == "pfw.get_application"
+    assert get_registry(str(registry_dir)).get("pfw.get_application").meta
@@ -0,0 +1,124 @@
+"""Tests for date-range query sharding."""
+
+from __future__ import annotations
+
+import threading
+from datetime import date, timedelta
+from typing import Any, Iterator, Mapping
+
+import pytest
+
+from api_gui.clients.dispatch import iter_pages
+from api_gui.util.query_shards import iter_sharded, plan_shards, shard_payload
+
+FIELD = "applicationMetaData.filingDate"
+
+
+def _filing_date(record: Mapping[str, Any]) -> str:
+    return (record.get("applicationMetaData") or {}).get("filingDate", "")
+
+
+class ShardedIndex:
+    """Search fake with filing dates skewed toward recent years.
+
+    Like the real endpoint it refuses to page past ``max_offset``.
+    """
+
+    def __init__(self, records: int = 3000, max_offset: int = 500) -> None:
+        start = date(2000, 1, 1)
+        self.records = [
+            {
+                "applicationNumberText": str(16000000 + i),
+                "applicationMetaData": {
+                    # Quadratic spacing: later years are much denser.
+                    "filingDate": (
+                        start + timedelta(days=int(9000 * (i / records) ** 0.5))
+                    ).isoformat()
+                },
+            }
+            for i in range(records)
+        ]
+        self.records.append({"applicationNumberText": "99999999"})  # no date
+        self.max_offset = max_offset
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _matches(self, payload: Mapping[str, Any]) -> list[dict[str, Any]]:
+        hits = self.records
+        for entry in payload.get("rangeFilters") or []:
+            lo, hi = entry["valueFrom"], entry["valueTo"]
+            hits = [r for r in hits if lo <= _filing_date(r) <= hi]
+        return hits
+
+    def search_pfw(self, payload: Mapping[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+        page = payload.get("pagination") or {"offset": 0, "limit": 25}
+        if page["offset"] + page["limit"] > self.max_offset:
+            raise RuntimeError("offset too deep")
+        hits = self._matches(payload)
+        bag = hits[page["offset"] : page["offset"] + page["limit"]]
+        return {"count": len(hits), "patentFileWrapperDataBag": bag}
+
+    def iter_search_pfw(
+        self, payload: Mapping[str, Any], page_size: int = 100, **options: Any
+    ) -> Iterator[dict[str, Any]]:
+        return iter_pages(
+            dict(payload),
+            self.search_pfw,
+            None,
+            "patentFileWrapperDataBag",
+            page_size,
+            options.get("max_records"),
+        )
+
+
+def test_shard_payload_replaces_range_on_field() -> None:
+    payload = {
+        "q": "x",
+        "rangeFilters": [
+            {"field": FIELD, "valueFrom": "2000-01-01", "valueTo": "2020-12-31"},
+            {"field": "other", "valueFrom": "a", "valueTo": "b"},
+        ],
+        "pagination": {"offset": 40, "limit": 10},
+    }
+
+    body = shard_payload(payload, FIELD, date(2005, 1, 1), date(2005, 6, 30))
+
+    assert body["rangeFilters"] == [
+        {"field": "other", "valueFrom": "a", "valueTo": "b"},
+        {"field": FIELD, "valueFrom": "2005-01-01", "valueTo": "2005-06-30"},
+    ]
+    assert "pagination" not in body
+    assert payload["rangeFilters"][0]["valueFrom"] == "2000-01-01"
+
+
+def test_plan_adapts_shards_to_density() -> None:
+    index = ShardedIndex()
+
+    plan = plan_shards(index, {"q": "x"}, FIELD, start="2000-01-01", max_shard=400)
+
+    assert plan.total == 3001
+    assert plan.covered == 3000
+    assert all(s.count <= 400 for s in plan.shards)
+    for a, b in zip(plan.shards, plan.shards[1:]):
+        assert a.end < b.start
+    # Sparse early years get wider shards than dense recent ones.
+    assert plan.shards[0].days > plan.shards[-1].days
+
+
+def test_iter_sharded_merges_every_hit_once() -> None:
+    index = ShardedIndex(max_offset=500)
+    with pytest.raises(RuntimeError):
+        list(index.iter_search_pfw({"q": "x"}))
+
+    hits = list(
+        iter_sharded(
+            index, {"q": "x"}, FIELD, max_shard=400, workers=4, page_size=100
+        )
+    )
+
+    apps = [h["applicationNumberText"] for h in hits]
+    assert len(apps) == len(set(apps)) == 3000
+    capped = iter_sharded(index, {}, FIELD, max_shard=400, max_records=7)
+    assert len(list(capped)) == 7
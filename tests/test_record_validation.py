@@ -0,0 +1,106 @@
+"""Tests for streaming record validation."""
+
+from __future__ import annotations
+
+import json
+import zipfile
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from api_gui.util.bulk_reader import iter_bulk_records
+from api_gui.util.record_validation import (
+    RecordValidationError,
+    StreamValidator,
+    compile_schema,
+)
+
+GOOD: dict[str, Any] = {
+    "applicationNumberText": "14412875",
+    "applicationMetaData": {
+        "filingDate": "2013-01-01",
+        "applicationStatusCode": 150,
+        "inventorBag": [{"inventorNameText": "DOE, JOHN"}],
+    },
+}
+BAD: dict[str, Any] = {
+    "applicationNumberText": "16000001",
+    "applicationMetaData": {"applicationStatusCode": "patented"},
+}
+
+
+def test_compile_schema_is_cached() -> None:
+    bag = "patentFileWrapperDataBag"
+    first = compile_schema("patent-data-schema.json", bag)
+    second = compile_schema("patent-data-schema.json", bag)
+
+    assert first is second
+
+
+def test_configured_dialect_overrides_schema_declaration(monkeypatch) -> None:
+    import jsonschema
+
+    bag = "patentFileWrapperDataBag"
+    monkeypatch.delenv("FIRECRAWL_JSON_SCHEMA_DIALECT", raising=False)
+    # The bundled schema declares draft-04 and keeps it by default.
+    assert isinstance(
+        compile_schema("patent-data-schema.json", bag), jsonschema.Draft4Validator
+    )
+
+    monkeypatch.setenv("FIRECRAWL_JSON_SCHEMA_DIALECT", "draft-7")
+    validator = compile_schema("patent-data-schema.json", bag)
+    assert isinstance(validator, jsonschema.Draft7Validator)
+    assert validator.is_valid(GOOD) and not validator.is_valid(BAD)
+
+
+def test_stream_validator_aggregates_errors() -> None:
+    validator = StreamValidator()
+
+    out = list(validator.wrap([GOOD, BAD, BAD]))
+
+    report = validator.report
+    assert out == [GOOD, BAD, BAD]
+    assert (report.seen, report.checked, report.invalid) == (3, 3, 2)
+    key = ("applicationMetaData/applicationStatusCode", "type")
+    assert report.errors[key] == 2
+    assert report.examples[key] == ["16000001", "16000001"]
+    assert "applicationStatusCode" in report.summary()
+
+
+def test_stream_validator_sampling_is_deterministic() -> None:
+    validator = StreamValidator(sample_rate=0.25)
+
+    for _ in range(100):
+        validator.validate(BAD)
+
+    assert validator.report.checked == 25
+    assert validator.report.invalid == 25
+
+
+def test_strict_mode_raises() -> None:
+    validator = StreamValidator(strict=True)
+
+    with pytest.raises(RecordValidationError, match="16000001"):
+        validator.validate(BAD)
+
+
+def test_bulk_records_are_validated_while_streaming(tmp_path: Path) -> None:
+    archive = tmp_path / "bulk.zip"
+    with zipfile.ZipFile(archive, "w") as handle:
+        handle.writestr(
+            "part1.json", json.dumps({"patentFileWrapperDataBag": [GOOD]})
+        )
+        handle.writestr(
+            "part2.json", json.dumps({"patentFileWrapperDataBag": [BAD]})
+        )
+        handle.writestr("README.txt", "ignored")
+    validator = StreamValidator()
+
+    records = list(iter_bulk_records(str(archive), validator=validator))
+
+    assert [r["applicationNumberText"] for r in records] == [
+        "14412875",
+        "16000001",
+    ]
+    assert validator.report.invalid == 1
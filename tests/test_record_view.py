@@ -0,0 +1,102 @@
+"""Tests for the lazy PFW record views."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from api_gui.export import endnote_export
+from api_gui.util.record_view import (
+    RecordView,
+    load_views,
+    measure_memory,
+    pfw_record_class,
+    project,
+)
+
+MAPPING_PATH = Path("src/api_gui/export/endnote_field_map.uspto_pfw.json")
+
+
+def _record(i: int) -> dict[str, Any]:
+    return {
+        "applicationNumberText": f"16{i:06d}",
+        "applicationMetaData": {
+            "inventionTitle": f"Widget {i}",
+            "filingDate": "2019-01-01",
+            "examinerNameText": "SMITH, JANE",
+            "inventorBag": [
+                {"inventorNameText": f"DOE, JOHN {n}", "countryCode": "US"}
+                for n in range(3)
+            ],
+        },
+        "eventDataBag": [
+            {
+                "eventCode": "CTNF",
+                "eventDescriptionText": "Non-Final Rejection " * 4,
+                "eventDate": "2020-01-01",
+            }
+            for _ in range(20)
+        ],
+    }
+
+
+def test_view_decodes_lazily_and_exposes_schema_fields() -> None:
+    Record = pfw_record_class()
+    rec = Record(json.dumps(_record(1)).encode())
+
+    assert not rec.is_decoded
+    meta = rec.applicationMetaData
+    assert rec.is_decoded
+    assert meta.inventionTitle == "Widget 1"
+    assert meta.inventorBag[2].inventorNameText == "DOE, JOHN 2"
+    assert isinstance(meta.inventorBag[0], RecordView)
+    assert rec.parentContinuityBag is None
+    assert not hasattr(rec, "__dict__")
+
+    rec.release()
+    assert not rec.is_decoded
+
+
+def test_project_keeps_only_selected_paths() -> None:
+    out = project(
+        _record(1),
+        [
+            "applicationNumberText",
+            "applicationMetaData.inventorBag[].inventorNameText",
+        ],
+    )
+
+    assert out == {
+        "applicationNumberText": "16000001",
+        "applicationMetaData": {
+            "inventorBag": [
+                {"inventorNameText": "DOE, JOHN 0"},
+                {"inventorNameText": "DOE, JOHN 1"},
+                {"inventorNameText": "DOE, JOHN 2"},
+            ]
+        },
+    }
+
+
+def test_exporter_maps_views_directly() -> None:
+    with MAPPING_PATH.open("r", encoding="utf-8") as handle:
+        mapping = json.load(handle)["transform"]
+    record = _record(7)
+    view = load_views([record])[0]
+
+    expected = endnote_export.map_to_endnote_fields(record, mapping)
+
+    assert endnote_export.map_to_endnote_fields(view, mapping) == expected
+
+
+def test_compact_projected_views_use_less_memory() -> None:
+    raw = [json.dumps(_record(i)) for i in range(300)]
+    fields = ["applicationNumberText", "applicationMetaData.inventionTitle"]
+
+    as_dicts = measure_memory(lambda: [json.loads(r) for r in raw])
+    as_views = measure_memory(lambda: load_views(raw))
+    projected = measure_memory(lambda: load_views(raw, fields=fields))
+
+    assert as_views < as_dicts
+    assert projected < as_views
@@ -0,0 +1,114 @@
+"""Tests for choosing between paged search and search/download."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Mapping
+
+import pytest
+
+from api_gui.clients.base import ApiError
+from api_gui.clients.retrieval import TransferPlanner, iter_search_adaptive
+from api_gui.clients.uspto_odp import USPTOODPClient
+
+
+def test_planner_sizes_downloads_under_the_cap() -> None:
+    planner = TransferPlanner(page_size=100, cap=1_000_000, headroom=0.5)
+    assert planner.plan(5000) == ("page", 100)
+
+    planner.observe_page(100, 200_000, 0.2)  # 2 kB per record
+    assert planner.plan(5000) == ("download", 250)
+    assert planner.plan(150) == ("page", 100)
+
+    # Measured downloads slower per record than pages: stay on pages.
+    planner.observe_download(250, 500_000, 2.0)
+    assert planner.plan(5000) == ("page", 100)
+
+
+def test_planner_backs_off_after_failures() -> None:
+    planner = TransferPlanner(page_size=10, cap=100_000, headroom=1.0)
+    planner.observe_page(10, 1_000, 0.1)
+    assert planner.plan(1000) == ("download", 1000)
+
+    planner.download_failed(1000)
+    assert planner.plan(1000) == ("download", 500)
+    planner.download_failed(30)
+    assert planner.plan(1000) == ("page", 10)
+
+
+class ChunkServer:
+    def __init__(self, records: int, cap: int) -> None:
+        self.records = [
+            {"applicationNumberText": str(16000000 + i), "pad": "x" * 90}
+            for i in range(records)
+        ]
+        self.cap = cap
+        self.calls: list[tuple[str, int, int]] = []
+
+    def __call__(
+        self, payload: Mapping[str, Any], download: bool = False
+    ) -> tuple[dict[str, Any], int]:
+        page = payload["pagination"]
+        self.calls.append(
+            ("download" if download else "page", page["offset"], page["limit"])
+        )
+        bag = self.records[page["offset"] : page["offset"] + page["limit"]]
+        body = {"count": len(self.records), "patentFileWrapperDataBag": bag}
+        size = len(json.dumps(body))
+        if download and size > self.cap:
+            raise ApiError("too large", status=413)
+        return body, size
+
+
+def test_auto_transfer_mixes_pages_and_downloads(monkeypatch) -> None:
+    client = USPTOODPClient("https://api.example.test", api_key_env=None)
+    server = ChunkServer(records=1000, cap=40_000)
+    monkeypatch.setattr(client, "_search_chunk", server)
+
+    out = list(client.iter_search_pfw({"q": "x"}, page_size=50, transfer="auto"))
+
+    assert out == server.records
+    modes = [mode for mode, _, _ in server.calls]
+    assert modes[0] == "page" and "download" in modes
+    assert len(server.calls) < 1000 // 50
+    offsets = [offset for _, offset, _ in server.calls]
+    assert offsets == sorted(offsets)
+
+    with pytest.raises(ValueError):
+        client.iter_search_pfw({}, transfer="auto", stream=True)
+
+
+def test_auto_transfer_falls_back_when_cap_is_hit(monkeypatch) -> None:
+    client = USPTOODPClient("https://api.example.test", api_key_env=None)
+    server = ChunkServer(records=600, cap=5_000)  # below any useful chunk
+    monkeypatch.setattr(client, "_search_chunk", server)
+
+    out = list(client.iter_search_pfw({"q": "x"}, page_size=20, transfer="auto"))
+
+    assert len(out) == 600
+    failed = [c for c in server.calls if c[0] == "download"]
+    assert 0 < len(failed) <= 4  # halved until below two pages
+    assert server.calls[-1][0] == "page"
+
+
+def test_throttled_download_is_retried_not_shrunk(monkeypatch) -> None:
+    client = USPTOODPClient("https://api.example.test", api_key_env=None)
+    delays: list[float] = []
+    client.dispatcher.sleep = delays.append
+    server = ChunkServer(records=1000, cap=40_000)
+    throttled = [ApiError("slow down", status=429, retry_after=2)]
+
+    def chunk(payload: Mapping[str, Any], download: bool = False) -> Any:
+        if download and throttled:
+            raise throttled.pop()
+        return server(payload, download)
+
+    monkeypatch.setattr(client, "_search_chunk", chunk)
+    planner = TransferPlanner(page_size=50, cap=40_000)
+
+    out = list(iter_search_adaptive(client, {"q": "x"}, 50, planner=planner))
+
+    assert out == server.records
+    assert delays == [2.0]
+    assert planner.downloads_enabled and planner.max_download is None
+    assert "download" in [mode for mode, _, _ in server.calls]
@@ -0,0 +1,105 @@
+"""Startup benchmarks for the GUI entry point.
+
+Measurements are stored in the pytest cache under ``api_gui/startup`` (the
+CI job uploads ``.pytest_cache``) so they can be compared between commits.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+IMPORT_BUDGET_S = float(os.getenv("API_GUI_IMPORT_BUDGET_S", "0.5"))
+FIRST_FRAME_BUDGET_S = float(os.getenv("API_GUI_FIRST_FRAME_BUDGET_S", "1.0"))
+
+_IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)")
+
+
+def _run(
+    code: str, home: Path, *flags: str
+) -> subprocess.CompletedProcess[str]:
+    env = {**os.environ, "PYTHONPATH": str(SRC), "HOME": str(home)}
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+
+
+def _record(request: pytest.FixtureRequest, **values: float) -> None:
+    cache = request.config.cache
+    if cache is None:  # pragma: no cover - cacheprovider disabled
+        return
+    data = cache.get("api_gui/startup", {})
+    data.update(values)
+    cache.set("api_gui/startup", data)
+
+
+def test_app_import_is_side_effect_free(tmp_path: Path) -> None:
+    code = (
+        "import sys, api_gui.gui.app; "
+        "print('requests' in sys.modules)"
+    )
+
+    proc = _run(code, tmp_path)
+
+    assert proc.stdout.strip() == "False"
+    assert not (tmp_path / ".api-gui").exists()
+
+
+def test_app_import_time(
+    tmp_path: Path, request: pytest.FixtureRequest
+) -> None:
+    proc = _run("import api_gui.gui.app", tmp_path, "-X", "importtime")
+    cumulative = {
+        name: int(us) for us, name in _IMPORTTIME.findall(proc.stderr)
+    }
+
+    seconds = cumulative["api_gui.gui.app"] / 1e6
+    _record(request, import_s=seconds)
+
+    assert seconds < IMPORT_BUDGET_S
+
+
+@pytest.mark.skipif(
+    sys.platform.startswith("linux") and not os.getenv("DISPLAY"),
+    reason="no display available",
+)
+def test_time_to_first_frame(
+    tmp_path: Path, request: pytest.FixtureRequest
+) -> None:
+    (tmp_path / ".api-gui").mkdir()
+    (tmp_path / ".api-gui" / ".tour_done").touch()
+    code = (
+        "from api_gui.gui.app import App\n"
+        "app = App()\n"
+        "app.update()\n"
+        "print('frame', flush=True)\n"
+        "app.destroy()\n"
+    )
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(SRC), "HOME": str(tmp_path)},
+    )
+    assert proc.stdout is not None
+    line = proc.stdout.readline()
+    seconds = time.perf_counter() - start
+    proc.wait(timeout=30)
+    _record(request, first_frame_s=seconds)
+
+    assert line.strip() == "frame"
+    assert seconds < FIRST_FRAME_BUDGET_S
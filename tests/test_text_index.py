@@ -0,0 +1,142 @@
+"""Tests for document text extraction and the full-text index."""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from api_gui import cli
+from api_gui.util.text_index import (
+    TextIndex,
+    TextSource,
+    extract_pdf_text,
+    sources_from_manifest,
+)
+
+TEXTS = {
+    "CTNF": "Claims 1-5 are rejected under 35 U.S.C. 103 as being obvious over Smith.",
+    "CTFR": "Claims 1-5 remain rejected; the rejection is made FINAL.",
+    "NOA": "The following is an examiner's statement of reasons for allowance.",
+}
+
+
+def read_text(path: str) -> str:
+    """Stands in for PDF extraction; module level so it pickles."""
+
+    text = Path(path).read_text()
+    if text == "broken":
+        raise ValueError("not a PDF")
+    return text
+
+
+def _write_manifest(tmp_path: Path, apps: list[str]) -> Path:
+    rows = []
+    for app in apps:
+        for code, text in TEXTS.items():
+            path = tmp_path / app / f"{code}.pdf"
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(text)
+            row = {"application_number": app, "document_id": f"{app}-{code}"}
+            row.update(code=code, date="2024-01-01", status="downloaded")
+            rows.append({**row, "path": str(path)})
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    return manifest
+
+
+def test_index_extracts_each_content_once(tmp_path: Path) -> None:
+    manifest = _write_manifest(tmp_path, ["1", "2"])
+    with TextIndex(str(tmp_path / "text.sqlite")) as index:
+        first = index.add(sources_from_manifest(str(manifest)), extractor=read_text)
+        again = index.add(sources_from_manifest(str(manifest)), extractor=read_text)
+
+        # Both applications hold the same three texts.
+        assert (first.documents, first.extracted, first.cached) == (6, 3, 3)
+        assert (again.unchanged, again.extracted) == (6, 0)
+        assert len(index) == 6
+        assert index.text("2", "2-NOA") == TEXTS["NOA"]
+
+        hits = index.search("rejected", codes=["CTNF", "CTFR"])
+        assert sorted((h.application, h.code) for h in hits) == [
+            ("1", "CTFR"),
+            ("1", "CTNF"),
+            ("2", "CTFR"),
+            ("2", "CTNF"),
+        ]
+        obvious = index.search('"obvious over"', applications=["2"])
+        assert [(h.document_id, "[obvious over]" in h.snippet) for h in obvious] == [
+            ("2-CTNF", True)
+        ]
+
+
+def test_changed_and_failed_documents(tmp_path: Path) -> None:
+    manifest = _write_manifest(tmp_path, ["1"])
+    (tmp_path / "1" / "NOA.pdf").write_text("broken")
+    with TextIndex(":memory:") as index:
+        first = index.add(
+            sources_from_manifest(str(manifest)), workers=2, extractor=read_text
+        )
+        assert (first.extracted, first.failed) == (2, 1)
+        assert index.failures()[0][:2] == ("1", "1-NOA")
+
+        path = tmp_path / "1" / "CTFR.pdf"
+        path.write_text("Claims 1-5 are allowable.")
+        os.utime(path, ns=(1, 1))
+        second = index.add(sources_from_manifest(str(manifest)), extractor=read_text)
+        assert (second.unchanged, second.extracted, second.failed) == (2, 1, 0)
+        assert [h.code for h in index.search("allowable")] == ["CTFR"]
+        assert index.search("FINAL") == []
+
+        (tmp_path / "1" / "NOA.pdf").write_text(TEXTS["NOA"])
+        os.utime(tmp_path / "1" / "NOA.pdf", ns=(2, 2))
+        third = index.add(
+            [TextSource("1", "1-NOA", str(tmp_path / "1" / "NOA.pdf"), "NOA")],
+            extractor=read_text,
+        )
+        assert third.extracted == 1 and index.failures() == []
+
+
+def _pdf(text: str) -> bytes:
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792]"
+        b" /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1)
+    return out + b"startxref\n%d\n%%%%EOF\n" % xref
+
+
+def test_extract_pdf_text_and_cli(tmp_path: Path) -> None:
+    pytest.importorskip("pypdf")
+    pdf = tmp_path / "1" / "CTNF.pdf"
+    pdf.parent.mkdir()
+    pdf.write_bytes(_pdf("Claim 1 is rejected as obvious"))
+    manifest = tmp_path / "manifest.jsonl"
+    row = {"application_number": "1", "document_id": "D1", "code": "CTNF"}
+    row.update(status="downloaded", path=str(pdf))
+    manifest.write_text(json.dumps(row) + "\n")
+    db = str(tmp_path / "text.sqlite")
+
+    assert "rejected as obvious" in extract_pdf_text(str(pdf))
+    out = io.StringIO()
+    assert cli.main(["fulltext", db, "add", str(manifest)], out=out) == 0
+    assert json.loads(out.getvalue())["extracted"] == 1
+    out = io.StringIO()
+    argv = ["fulltext", db, "search", "reject*", "--codes", "CTNF"]
+    assert cli.main(argv, out=out) == 0
+    assert json.loads(out.getvalue())["document_id"] == "D1"
@@ -0,0 +1,182 @@
+"""Tests for application watchlists."""
+
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+
+from api_gui import cli
+from api_gui.clients.uspto_odp import USPTOODPClient
+from api_gui.util.record_store import RecordStore
+from api_gui.util.watchlist import Watchlist, record_snapshot
+
+
+def _record(app: str, status: int, events: list[tuple[str, str]]) -> dict[str, Any]:
+    return {
+        "applicationNumberText": app,
+        "applicationMetaData": {
+            "applicationStatusCode": status,
+            "applicationStatusDescriptionText": f"status {status}",
+        },
+        "eventDataBag": [
+            {"eventDate": date, "eventCode": code} for date, code in events
+        ],
+    }
+
+
+class Server:
+    """Answers ``Session.request`` for lookups (with ETags) and documents
+    (without), counting requests by kind and status."""
+
+    def __init__(self) -> None:
+        self.records = {
+            "1": _record("1", 30, [("2024-01-02", "CTNF")]),
+            "2": _record("2", 41, [("2024-02-01", "CTFR")]),
+        }
+        self.docs = {"1": 2, "2": 5}
+        self.calls: list[tuple[str, int]] = []
+
+    def __call__(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        app = url.split("/applications/")[1].split("/")[0]
+        response = requests.Response()
+        response.status_code = 200
+        if app not in self.records:
+            response.status_code = 404
+            response._content = b"{}"
+            kind = "missing"
+        elif url.endswith("/documents"):
+            kind = "docs"
+            bag = [{"documentIdentifier": str(i)} for i in range(self.docs[app])]
+            response._content = json.dumps({"documentBag": bag}).encode()
+        else:
+            kind = "lookup"
+            record = self.records[app]
+            etag = f'"{hash(json.dumps(record, sort_keys=True))}"'
+            headers = kwargs.get("headers") or {}
+            if headers.get("If-None-Match") == etag:
+                response.status_code = 304
+                response._content = b""
+            else:
+                body = {"patentFileWrapperDataBag": [record]}
+                response._content = json.dumps(body).encode()
+            response.headers["ETag"] = etag
+        self.calls.append((kind, response.status_code))
+        return response
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> Server:
+    server = Server()
+    monkeypatch.setattr(requests.Session, "request", server)
+    return server
+
+
+@pytest.fixture
+def client() -> USPTOODPClient:
+    return USPTOODPClient("https://api.example.test", api_key_env=None)
+
+
+def test_record_snapshot_takes_latest_event() -> None:
+    record = _record("1", 30, [("2024-01-02", "CTNF"), ("2024-03-04", "CTFR")])
+    record["eventDataBag"].reverse()
+
+    snapshot = record_snapshot(record, documents=3)
+
+    assert (snapshot.event_date, snapshot.event_code) == ("2024-03-04", "CTFR")
+    assert snapshot.status_code == 30 and snapshot.documents == 3
+
+
+def test_poll_reports_only_changes(server: Server, client: USPTOODPClient) -> None:
+    with Watchlist(":memory:") as watch:
+        assert watch.add(["1", "2", "1"]) == 2
+        first = list(watch.poll(client, workers=2))
+        assert [c.application for c in first] == ["1", "2"]
+        assert first[0].fields()["documents"] == (None, 2)
+
+        server.calls.clear()
+        writes = watch._conn.total_changes
+        assert list(watch.poll(client, workers=2)) == []
+        # Lookups answer 304; document lists hash as before. Nothing is written.
+        assert sorted(server.calls) == [
+            ("docs", 200),
+            ("docs", 200),
+            ("lookup", 304),
+            ("lookup", 304),
+        ]
+        assert watch._conn.total_changes == writes
+        assert (watch.last.not_modified, watch.last.unchanged) == (0, 2)
+
+        server.records["2"]["eventDataBag"].append(
+            {"eventDate": "2024-05-01", "eventCode": "RCEX"}
+        )
+        server.docs["1"] = 3
+        changes = {c.application: c for c in watch.poll(client, workers=2)}
+
+        assert changes["2"].fields() == {
+            "event_date": ("2024-02-01", "2024-05-01"),
+            "event_code": ("CTFR", "RCEX"),
+        }
+        assert changes["2"].record is not None
+        assert changes["1"].fields() == {"documents": (2, 3)}
+        assert changes["1"].record is None
+        assert dict(watch.items())["1"].documents == 3
+
+
+def test_poll_without_documents_and_failures(
+    server: Server, client: USPTOODPClient
+) -> None:
+    with Watchlist(":memory:") as watch:
+        watch.add(["1", "404"])
+        changes = list(watch.poll(client, documents=False))
+        failed = watch.last
+        server.calls.clear()
+        again = list(watch.poll(client, documents=False, applications=["1"]))
+
+    assert [c.application for c in changes] == ["1"]
+    assert changes[0].after.documents is None
+    assert (failed.failed, list(failed.errors)) == (1, ["404"])
+    assert (watch.last.checked, watch.last.not_modified) == (1, 1)
+    assert again == []
+    assert server.calls == [("lookup", 304)]
+
+
+def test_poll_ingests_new_bodies_without_snapshot_changes(
+    server: Server, client: USPTOODPClient
+) -> None:
+    with Watchlist(":memory:") as watch, RecordStore(":memory:") as store:
+        watch.add(["1"])
+        list(watch.poll(client, store=store))
+        server.records["1"]["applicationMetaData"]["inventionTitle"] = "Widget"
+
+        assert list(watch.poll(client, store=store)) == []
+        assert watch.last.unchanged == 1
+        assert store.get("1")["applicationMetaData"]["inventionTitle"] == "Widget"
+
+
+def test_cli_watch(server: Server, tmp_path: Path) -> None:
+    db, store = str(tmp_path / "watch.sqlite"), str(tmp_path / "store.sqlite")
+    assert cli.main(["watch", db, "add", "1", "2"], out=io.StringIO()) == 0
+
+    out = io.StringIO()
+    argv = ["watch", db, "poll", "--store", store, "--base-url", "https://x.test"]
+    assert cli.main(argv, out=out) == 0
+    server.records["1"]["applicationMetaData"]["applicationStatusCode"] = 150
+    out = io.StringIO()
+    assert cli.main(argv, out=out) == 0
+
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert rows == [
+        {
+            "application": "1",
+            "first": False,
+            "status": "status 30",
+            "changes": {"status_code": [30, 150]},
+        }
+    ]
+    with RecordStore(store) as records:
+        assert records.get("1")["applicationMetaData"]["applicationStatusCode"] == 150